@@ -35,7 +35,55 @@ describe('BatchUploader', () => {
     jest.resetAllMocks();
   });
 
-  it('submits multiple selected files with project_id', async () => {
+  const directUploadsUnavailable = () =>
+    global.fetch.mockResolvedValueOnce({
+      ok: false,
+      status: 404,
+      json: () => Promise.resolve({}),
+    });
+
+  it('uploads directly to storage and finalizes', async () => {
+    global.fetch
+      .mockResolvedValueOnce({
+        ok: true,
+        status: 200,
+        json: () =>
+          Promise.resolve({
+            uploads: [
+              {
+                photo_id: '1',
+                key: 'projects/proj-123/photos/1.jpg',
+                upload_url: 'https://r2.example/put-1',
+                method: 'PUT',
+                headers: { 'Content-Type': 'image/jpeg' },
+              },
+            ],
+          }),
+      })
+      .mockResolvedValueOnce({ ok: true, status: 200, json: () => ({}) });
+    const { getByTestId, getByText } = renderWithAuth(<BatchUploader />);
+    const input = getByTestId('dropzone').querySelector('input[type="file"]');
+    const file = new File(['a'], 'one.jpg', { type: 'image/jpeg' });
+    fireEvent.change(input, { target: { files: [file] } });
+    fireEvent.click(getByText('Upload'));
+
+    await waitFor(() => expect(global.fetch).toHaveBeenCalledTimes(3));
+    const [initUrl, initOptions] = global.fetch.mock.calls[0];
+    expect(initUrl).toMatch(/\/api\/photos\/uploads$/);
+    expect(JSON.parse(initOptions.body)).toEqual({
+      project_id: 'proj-123',
+      files: [{ file_name: 'one.jpg', content_type: 'image/jpeg', size: 1 }],
+    });
+    const [putUrl, putOptions] = global.fetch.mock.calls[1];
+    expect(putUrl).toBe('https://r2.example/put-1');
+    expect(putOptions.body).toBe(file);
+    const [finalizeUrl, finalizeOptions] = global.fetch.mock.calls[2];
+    expect(finalizeUrl).toMatch(/\/api\/photos\/uploads\/finalize$/);
+    expect(JSON.parse(finalizeOptions.body).uploads[0].photo_id).toBe('1');
+  });
+
+  it('falls back to multipart with every file and project_id', async () => {
+    directUploadsUnavailable();
     const { getByText, getByTestId } = renderWithAuth(<BatchUploader />);
     const input = getByTestId('dropzone').querySelector('input[type="file"]');
 
@@ -45,9 +93,9 @@ describe('BatchUploader', () => {
     fireEvent.change(input, { target: { files: [file1, file2] } });
     fireEvent.click(getByText('Upload'));
 
-    await waitFor(() => expect(global.fetch).toHaveBeenCalled());
+    await waitFor(() => expect(global.fetch).toHaveBeenCalledTimes(2));
 
-    const body = global.fetch.mock.calls[0][1].body;
+    const body = global.fetch.mock.calls[1][1].body;
     expect(body instanceof FormData).toBe(true);
     expect(body.getAll('files').length).toBe(2);
     expect(body.get('project_id')).toBe('proj-123');
@@ -69,14 +117,15 @@ describe('BatchUploader', () => {
   });
 
   it('calls API with multipart shape for a single file', async () => {
+    directUploadsUnavailable();
     const { getByTestId, getByText } = renderWithAuth(<BatchUploader />);
     const input = getByTestId('dropzone').querySelector('input[type="file"]');
     const file = new File(['a'], 'only.jpg', { type: 'image/jpeg' });
     fireEvent.change(input, { target: { files: [file] } });
     fireEvent.click(getByText('Upload'));
 
-    await waitFor(() => expect(global.fetch).toHaveBeenCalled());
-    const body = global.fetch.mock.calls[0][1].body;
+    await waitFor(() => expect(global.fetch).toHaveBeenCalledTimes(2));
+    const body = global.fetch.mock.calls[1][1].body;
     expect(body.getAll('files')[0].name).toBe('only.jpg');
   });
 
@@ -328,6 +328,10 @@ const UploadPlanModal = ({
     formData.append('min_lng', String(georeferenceResult.bbox.min_lng));
     formData.append('max_lat', String(georeferenceResult.bbox.max_lat));
     formData.append('max_lng', String(georeferenceResult.bbox.max_lng));
+    // The rotated corners let the server pre-warp the plan into map alignment.
+    Object.entries(georeferenceResult.corners || {}).forEach(([key, value]) =>
+      formData.append(key, String(value))
+    );
     try {
       await apiClient.request(`/v1/projects/${projectId}/plan`, {
         method: isReplaceMode ? 'PATCH' : 'POST',
@@ -1,6 +1,11 @@
 import React, { useCallback, useRef, useState } from 'react';
 import { useAuth } from '../../context';
-import { appendProjectId, requireProjectId } from '../../services/uploadHelper';
+import {
+  appendProjectId,
+  DirectUploadUnavailable,
+  requireProjectId,
+  uploadDirect,
+} from '../../services/uploadHelper';
 import { getApiOrigin } from '../../utils/apiEnv';
 
 const apiBase = getApiOrigin();
@@ -27,12 +32,11 @@ const BatchUploader = ({ onForbidden, onUploaded, variant = 'full' }) => {
         return;
       }
       setIsSubmitting(true);
-      const formData = new FormData();
-      uploadFiles.forEach(f => formData.append('files', f));
-      appendProjectId(formData, activeProjectId);
-
       const accessToken = localStorage.getItem('access_token') || '';
-      try {
+      const uploadMultipart = async () => {
+        const formData = new FormData();
+        uploadFiles.forEach(f => formData.append('files', f));
+        appendProjectId(formData, activeProjectId);
         const res = await fetch(buildApiUrl(), {
           method: 'POST',
           body: formData,
@@ -41,6 +45,23 @@ const BatchUploader = ({ onForbidden, onUploaded, variant = 'full' }) => {
           },
         });
         const payload = await res.json().catch(() => ({}));
+        return { res, payload };
+      };
+
+      try {
+        let result;
+        try {
+          result = await uploadDirect({
+            apiBase,
+            accessToken,
+            projectId: activeProjectId,
+            files: uploadFiles,
+          });
+        } catch (err) {
+          if (!(err instanceof DirectUploadUnavailable)) throw err;
+          result = await uploadMultipart();
+        }
+        const { res, payload } = result;
         if (res.status === 403 && typeof onForbidden === 'function') {
           onForbidden();
         }
@@ -171,9 +171,11 @@ const PlanPage = () => {
 
   const planMetadata = useMemo(() => {
     if (!plan) return null;
-    const corners = derivePlanCorners(plan);
+    // A rotated calibration comes with a north-up, pre-warped raster.
+    const source = plan.warped?.image_url ? plan.warped : plan;
+    const corners = derivePlanCorners(source);
     return {
-      imageUrl: plan.image_url || null,
+      imageUrl: source.image_url || null,
       corner_nw: corners?.corner_nw,
       corner_ne: corners?.corner_ne,
       corner_se: corners?.corner_se,
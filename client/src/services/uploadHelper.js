@@ -12,3 +12,72 @@ export const requireProjectId = projectId => {
   }
   return projectId;
 };
+
+// Thrown when the browser cannot upload straight to storage (an older API
+// without /api/photos/uploads, or a bucket without CORS for PUT); callers
+// then send the files through the multipart endpoint instead.
+export class DirectUploadUnavailable extends Error {}
+
+const postJson = async (url, body, accessToken) => {
+  const res = await fetch(url, {
+    method: 'POST',
+    body: JSON.stringify(body),
+    headers: {
+      'Content-Type': 'application/json',
+      ...(accessToken ? { Authorization: `Bearer ${accessToken}` } : {}),
+    },
+  });
+  const payload = await res.json().catch(() => ({}));
+  return { res, payload };
+};
+
+/**
+ * Upload files directly to R2: reserve presigned PUT URLs, PUT each file,
+ * then finalize so the server records the photos. Resolves to the
+ * { res, payload } of the finalize request (or of a failed init).
+ */
+export const uploadDirect = async ({ apiBase, accessToken, projectId, files }) => {
+  const base = (apiBase || '').replace(/\/$/, '');
+  const init = await postJson(
+    `${base}/api/photos/uploads`,
+    {
+      project_id: projectId,
+      files: files.map(f => ({
+        file_name: f.name,
+        content_type: f.type || 'application/octet-stream',
+        size: f.size,
+      })),
+    },
+    accessToken
+  );
+  if (init.res.status === 404 || init.res.status === 405) {
+    throw new DirectUploadUnavailable('Direct uploads are not supported');
+  }
+  if (!init.res.ok) {
+    return init;
+  }
+
+  const uploads = init.payload?.uploads || [];
+  try {
+    await Promise.all(
+      uploads.map(async (upload, index) => {
+        const put = await fetch(upload.upload_url, {
+          method: upload.method || 'PUT',
+          headers: upload.headers || {},
+          body: files[index],
+        });
+        if (!put.ok) {
+          throw new Error(`Storage upload failed (${put.status})`);
+        }
+      })
+    );
+  } catch (err) {
+    throw new DirectUploadUnavailable(err.message);
+  }
+
+  return postJson(
+    `${base}/api/photos/uploads/finalize`,
+    { project_id: projectId, uploads },
+    accessToken
+  );
+};
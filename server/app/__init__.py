@@ -190,6 +190,35 @@ def create_app(config_name=None):
     app.register_blueprint(files_bp)
     app.register_blueprint(public_links_bp)
 
+    from app.services.offline import offline_backends_enabled
+
+    if offline_backends_enabled():
+        from app.api_routes.offline import bp as offline_bp
+
+        app.register_blueprint(offline_bp)
+
+    from app.services.storage.supabase_client import reset_identity_map
+
+    # Request-scoped Supabase identity map: start every request empty and drop
+    # it on teardown so rows never leak between requests sharing an app context.
+    @app.before_request
+    def _reset_supabase_identity_map():
+        reset_identity_map()
+
+    @app.teardown_request
+    def _drop_supabase_identity_map(_exc=None):
+        reset_identity_map()
+
+    from app.services import instrumentation
+
+    instrumentation.init_app(app)
+
+    # Load (or refresh in the background) the schema capability snapshot so no
+    # request ever pays for column discovery.
+    from app.services.storage.schema_capabilities import schema_probe
+
+    schema_probe.warm()
+
     @app.route("/api/test/connection", methods=["GET"])
     def test_connection():
         return {
@@ -0,0 +1,38 @@
+"""
+Object URLs for the offline S3 fake.
+
+Registered only when OFFLINE_BACKENDS is enabled. R2Client hands out
+``<OFFLINE_R2_URL_BASE>/<bucket>/<key>`` URLs in that mode; these routes serve
+(and accept presigned-style PUTs to) those objects so export and direct-upload
+paths work end to end without R2.
+"""
+
+from flask import Blueprint, Response, jsonify, request
+
+from app.services.offline import get_offline_object_store
+
+bp = Blueprint("offline", __name__, url_prefix="/offline/r2")
+
+
+@bp.route("/<bucket>/<path:key>", methods=["GET"])
+def get_object(bucket: str, key: str):
+    store = get_offline_object_store()
+    try:
+        body, meta = store.read(bucket, key)
+    except Exception:
+        return jsonify({"error": "not_found"}), 404
+    return Response(
+        body, mimetype=meta.get("ContentType"), headers={"ETag": meta["ETag"]}
+    )
+
+
+@bp.route("/<bucket>/<path:key>", methods=["PUT"])
+def put_object(bucket: str, key: str):
+    store = get_offline_object_store()
+    result = store.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=request.get_data(),
+        ContentType=request.content_type,
+    )
+    return Response(status=200, headers={"ETag": result["ETag"]})
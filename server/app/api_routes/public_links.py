@@ -1,3 +1,4 @@
+import os
 import secrets
 from datetime import datetime, timezone
 from typing import Dict, Optional, Tuple
@@ -8,6 +9,7 @@ from app.middleware.auth_middleware import jwt_required
 from app.services.auth.permissions import require_role
 from app.services.storage.supabase_client import supabase_client
 from app.services.storage.r2_client import r2_client
+from app.utils.ttl_cache import TTLCache
 
 bp = Blueprint("public_links", __name__)
 
@@ -15,6 +17,16 @@ OWNER_ROLES = {"Owner"}
 PUBLIC_TOKEN_TABLE = "project_public_links"
 DEFAULT_DENIED_MESSAGE = "You do not have permission for this action."
 
+# Validated link records keyed by token. Each worker holds its own copy, so the
+# TTL bounds how long a link deleted through another worker stays usable.
+PUBLIC_LINK_CACHE_TTL = float(os.environ.get("PUBLIC_LINK_CACHE_TTL", "60"))
+# Sanitized project/photo payloads keyed by project id. Must stay well below the
+# 600 s lifetime of the signed URLs embedded in the photo payload.
+PUBLIC_RESPONSE_CACHE_TTL = float(os.environ.get("PUBLIC_RESPONSE_CACHE_TTL", "30"))
+
+_link_cache = TTLCache(PUBLIC_LINK_CACHE_TTL, max_entries=2048)
+_response_cache = TTLCache(PUBLIC_RESPONSE_CACHE_TTL, max_entries=512)
+
 
 def _forbidden(message: str = DEFAULT_DENIED_MESSAGE):
     return {"error": "forbidden", "message": message}, 403
@@ -32,7 +44,40 @@ def _now_utc():
     return datetime.now(timezone.utc)
 
 
+def clear_public_link_caches() -> None:
+    """Drop every cached link record and public payload (used by tests)."""
+    _link_cache.clear()
+    _response_cache.clear()
+
+
+def _seconds_until_expiry(record: Dict) -> Optional[float]:
+    expires_at = _parse_expires_at(record)
+    if expires_at is None:
+        return None
+    return (expires_at - _now_utc()).total_seconds()
+
+
+def _remember_link(record: Optional[Dict]) -> None:
+    if not record or not record.get("token"):
+        return
+    _link_cache.set(record["token"], record, ttl_seconds=_seconds_until_expiry(record))
+
+
+def _forget_link(record: Optional[Dict]) -> None:
+    if not record:
+        return
+    if record.get("token"):
+        _link_cache.pop(record["token"])
+    project_id = record.get("project_id")
+    if project_id:
+        _response_cache.pop(("project", project_id))
+        _response_cache.pop(("photos", project_id))
+
+
 def _load_link_by_token(token: str) -> Optional[Dict]:
+    cached = _link_cache.get(token)
+    if cached is not None:
+        return cached
     if not supabase_client.client:
         return None
     response = (
@@ -44,7 +89,8 @@ def _load_link_by_token(token: str) -> Optional[Dict]:
     )
     data = response.data if hasattr(response, "data") else None
     if isinstance(data, list):
-        return data[0] if data else None
+        data = data[0] if data else None
+    _remember_link(data)
     return data
 
 
@@ -64,17 +110,24 @@ def _load_link_by_id(link_id: str) -> Optional[Dict]:
     return data
 
 
-def _is_expired(record: Dict) -> bool:
+def _parse_expires_at(record: Dict) -> Optional[datetime]:
     expires_at = record.get("expires_at")
     if not expires_at:
-        return False
+        return None
     if isinstance(expires_at, str):
         try:
             expires_at = datetime.fromisoformat(
                 expires_at.replace("Z", "+00:00")
             )
         except Exception:
-            return False
+            return None
+    return expires_at
+
+
+def _is_expired(record: Dict) -> bool:
+    expires_at = _parse_expires_at(record)
+    if expires_at is None:
+        return False
     return expires_at < _now_utc()
 
 
@@ -134,6 +187,9 @@ def create_public_link(project_id: str):
     if not record:
         return jsonify({"error": "failed", "message": "Could not create link"}), 500
 
+    _forget_link(record)
+    _remember_link(record)
+
     base_url = request.url_root.rstrip("/")
     return (
         jsonify(
@@ -184,6 +240,7 @@ def delete_public_link(link_id: str):
         return jsonify(payload), status_code
 
     supabase_client.client.table(PUBLIC_TOKEN_TABLE).delete().eq("id", link_id).execute()
+    _forget_link(record)
     return jsonify({"status": "deleted"})
 
 
@@ -203,12 +260,20 @@ def get_public_project(token: str):
         payload, status = error
         return jsonify(payload), status
 
-    project = supabase_client.get_project(record.get("project_id"))
+    project_id = record.get("project_id")
+    cache_key = ("project", project_id)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    project = supabase_client.get_project(project_id)
     if not project:
         payload, status = _not_found("Project not found")
         return jsonify(payload), status
 
-    return jsonify({"project": _sanitize_project(project)})
+    body = {"project": _sanitize_project(project)}
+    _response_cache.set(cache_key, body)
+    return jsonify(body)
 
 
 @bp.route("/api/v1/public/<token>/photos", methods=["GET"])
@@ -219,6 +284,11 @@ def get_public_photos(token: str):
         return jsonify(payload), status
 
     project_id = record.get("project_id")
+    cache_key = ("photos", project_id)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
     try:
         result = supabase_client.fetch_project_photos(
             project_ids=[project_id],
@@ -227,10 +297,13 @@ def get_public_photos(token: str):
             page_size=200,
         )
     except Exception:
-        result = {"data": [], "count": 0}
+        # Do not cache failures; the next request retries the backend.
+        return jsonify({"photos": []})
 
     photos = [_sanitize_photo(row) for row in result.get("data", []) or []]
-    return jsonify({"photos": photos})
+    body = {"photos": photos}
+    _response_cache.set(cache_key, body)
+    return jsonify(body)
 
 
 @bp.route("/api/v1/public/<token>/photos/<photo_id>/download", methods=["GET"])
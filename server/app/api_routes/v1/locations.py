@@ -1,9 +1,8 @@
 from flask import Blueprint, request, jsonify, g
-from app.services.storage.supabase_client import SupabaseClient
+from app.services.storage.supabase_client import supabase_client
 from app.middleware.auth_middleware import jwt_required
 
 bp = Blueprint("v1_locations", __name__)
-supabase_client = SupabaseClient()
 
 
 @bp.route("/", methods=["GET"])
@@ -80,6 +80,11 @@ def _prefetch_project_scope(
     """
     Resolve the list of authorized project ids plus a memoized metadata cache.
 
+    Membership comes from an uncached project_members read; the cached
+    project listing only supplies names and the show_on_projects filter, so a
+    revoked membership stops authorizing at once, while a new one may wait
+    for the listing to expire.
+
     Returns:
         (authorized_ids, project_cache, error_payload)
     """
@@ -92,14 +97,15 @@ def _prefetch_project_scope(
         project_cache[requested_project_id] = {"role": permission.get("role")}
         return [requested_project_id], project_cache, None
 
+    roles = supabase_client.get_project_roles_for_user(user_id)
     memberships = supabase_client.list_projects_for_user(user_id) or []
     allowed_ids = []
     for project in memberships:
         pid = project.get("id")
-        if not pid:
+        if not pid or pid not in roles:
             continue
         allowed_ids.append(pid)
-        project_cache[pid] = {"role": project.get("role"), "name": project.get("name")}
+        project_cache[pid] = {"role": roles[pid], "name": project.get("name")}
 
     return allowed_ids, project_cache, None
 
@@ -632,14 +638,56 @@ def download_zip():
 @bp.route("/stats", methods=["GET"])
 @jwt_required
 def get_photo_stats():
-    """Get photo statistics - API v1"""
-    return (
-        jsonify(
-            {
-                "error": "gone",
-                "version": "v1",
-                "message": "Stats are Supabase-backed; use GET /api/v1/photos/?project_id=<uuid> and count client-side for now.",
-            }
-        ),
-        410,
-    )
+    """
+    Photo statistics - API v1
+
+    Served from the trigger-maintained project_stats counters. Optional
+    ?project_id=<uuid> narrows the result to one project; otherwise every
+    project the caller belongs to is included.
+    """
+    if not supabase_client.client:
+        return jsonify({"error": "Supabase client not configured", "version": "v1"}), 500
+
+    current_user = getattr(g, "current_user", None) or {}
+    current_user_id = current_user.get("id")
+    if not current_user_id:
+        return jsonify({"error": "Authenticated Supabase user context missing"}), 401
+
+    try:
+        project_id = _normalize_uuid(request.args.get("project_id"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc), "version": "v1"}), 400
+
+    try:
+        project_ids, _, error = _prefetch_project_scope(current_user_id, project_id)
+        if error:
+            payload, status_code = error
+            return jsonify(payload), status_code
+
+        per_project = supabase_client.get_project_stats_many(project_ids)
+    except Exception as e:
+        return jsonify({"error": str(e), "version": "v1"}), 500
+
+    totals: Dict[str, Any] = {
+        "photo_count": 0,
+        "location_count": 0,
+        "storage_bytes": 0,
+        "first_captured_at": None,
+        "last_captured_at": None,
+    }
+    for stats in per_project.values():
+        totals["photo_count"] += stats.get("photo_count") or 0
+        totals["location_count"] += stats.get("location_count") or 0
+        if totals["storage_bytes"] is not None:
+            bytes_used = stats.get("storage_bytes")
+            totals["storage_bytes"] = (
+                None if bytes_used is None else totals["storage_bytes"] + bytes_used
+            )
+        first = stats.get("first_captured_at")
+        last = stats.get("last_captured_at")
+        if first and (totals["first_captured_at"] is None or first < totals["first_captured_at"]):
+            totals["first_captured_at"] = first
+        if last and (totals["last_captured_at"] is None or last > totals["last_captured_at"]):
+            totals["last_captured_at"] = last
+
+    return jsonify({"version": "v1", "totals": totals, "projects": per_project})
@@ -110,6 +110,8 @@ def register_profile():
             supabase_client.client.table("project_members").update(  # type: ignore[union-attr]
                 {"user_id": user_id}
             ).eq("user_id", old_user_id).execute()
+            supabase_client.invalidate_project_lists(user_id=old_user_id)
+            supabase_client.invalidate_project_lists(user_id=user_id)
 
             # Remove the now-orphaned placeholder row.
             supabase_client.client.table("users").delete().eq(  # type: ignore[union-attr]
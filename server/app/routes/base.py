@@ -2,8 +2,9 @@
 API routes for Swallow Skyer backend.
 """
 
-from flask import Blueprint, jsonify, request, send_from_directory
+from flask import Blueprint, Response, jsonify, request, send_from_directory
 from sqlalchemy import text
+import hmac
 import os
 from datetime import datetime
 from app import db
@@ -12,6 +13,11 @@ from app.services.storage.r2_client import r2_client
 from .upload import registerUploadRoutes
 from app.middleware.auth_middleware import jwt_required
 from app.api_routes.v1.photos import handle_photo_listing_request
+from app.services.instrumentation import registry as metrics_registry
+from app.services.resilience import dependency_health
+from app.services.geocoding.cache import get_geocode_cache
+from app.services.geocoding.client import get_geocoding_client
+from app.services.plan_raster_cache import get_plan_raster_cache
 
 # Create blueprint
 main_bp = Blueprint("main", __name__)
@@ -44,7 +50,51 @@ def health():
     except Exception:
         db_status = "unhealthy"
 
-    return jsonify({"status": "ok", "database": db_status, "version": "1.0.0"})
+    # Circuit-breaker state of outbound dependencies (only those used so far).
+    dependencies = dependency_health()
+    status = "ok"
+    if any(dep["state"] != "closed" for dep in dependencies.values()):
+        status = "degraded"
+
+    payload = {
+        "status": status,
+        "database": db_status,
+        "version": "1.0.0",
+        "dependencies": dependencies,
+    }
+    geocode_cache = get_geocode_cache()
+    if geocode_cache is not None:
+        # Per-worker lookup counts; /metrics has the same series for scraping.
+        payload["geocode_cache"] = geocode_cache.stats()
+    payload["geocoding"] = get_geocoding_client().stats()
+    plan_raster_cache = get_plan_raster_cache()
+    if plan_raster_cache is not None:
+        payload["plan_raster_cache"] = plan_raster_cache.stats()
+    return jsonify(payload)
+
+
+_LOOPBACK_ADDRS = ("127.0.0.1", "::1")
+
+
+@main_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus scrape endpoint for backend round-trip metrics.
+
+    Requires ``Authorization: Bearer $METRICS_TOKEN`` when METRICS_TOKEN is set;
+    without a token only loopback clients (a local scraper) are served.
+    """
+    token = (os.environ.get("METRICS_TOKEN") or "").strip()
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {token}"):
+            return jsonify({"error": "Unauthorized"}), 401
+    elif request.remote_addr not in _LOOPBACK_ADDRS:
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(
+        metrics_registry.render(),
+        mimetype="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 @main_bp.route("/uploads/<path:filename>", methods=["GET"])
@@ -2,10 +2,11 @@
 Project CRUD routes with Supabase-backed permissions.
 """
 
+import logging
 import os
 from uuid import UUID
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, current_app, jsonify, redirect, request, g
 from werkzeug.utils import secure_filename
 
 from app.middleware.auth_middleware import jwt_required
@@ -14,7 +15,21 @@ from app.services.storage.supabase_client import supabase_client
 from app.services.storage.r2_client import r2_client
 import app.services.project_service as project_service
 import app.services.plan_service as plan_service
-from app.services.plan_rasterizer import rasterize_to_png, RasterizeError
+from app.services.plan_rasterizer import (
+    pdf_page_index,
+    raster_extension,
+    raster_format,
+    rasterize_to_png,
+    RasterizeError,
+)
+import app.services.plan_jobs as plan_jobs
+import app.services.plan_pages as plan_pages
+import app.services.plan_raster_cache as plan_raster_cache
+import app.services.plan_raster_pool as plan_raster_pool
+import app.services.plan_tiler as plan_tiler
+import app.services.plan_warp as plan_warp
+
+logger = logging.getLogger(__name__)
 
 projects_bp = Blueprint("projects", __name__, url_prefix="/api/v1/projects")
 VIEW_ROLES = set(ROLE_ORDER)
@@ -23,7 +38,6 @@ OWNER_ONLY_ROLES = {"Owner"}
 PLAN_ADMIN_ROLES = {"Owner", "Administrator"}
 ALLOWED_PLAN_EXTENSIONS = {"pdf", "png", "jpeg", "jpg"}
 MAX_PLAN_BYTES = 50 * 1024 * 1024
-PNG_MIME = "image/png"
 
 
 def _parse_coords(address, raw_lat, raw_lng):
@@ -57,6 +71,18 @@ def _parse_coords(address, raw_lat, raw_lng):
     return lat, lng, None
 
 
+def _geocode_error_response(err):
+    """422 for geocoding failures, 503 when the geocoder was too busy, else 500."""
+    geocode_err = err.get("geocode_error")
+    if geocode_err == "deadline_exceeded":
+        return jsonify(err), 503, {"Retry-After": "5"}
+    return jsonify(err), 422 if geocode_err else 500
+
+
+def _location_pending(result) -> bool:
+    return (result or {}).get("location_status") == project_service.LOCATION_PENDING
+
+
 def _require_auth():
     user = getattr(g, "current_user", None)
     user_id = None
@@ -98,9 +124,7 @@ def create_project():
         lng=lng,
     )
     if err:
-        geocode_err = err.get("geocode_error")
-        status = 422 if geocode_err else 500
-        return jsonify(err), status
+        return _geocode_error_response(err)
 
     try:
         supabase_client.add_project_member(
@@ -108,7 +132,7 @@ def create_project():
             user_id=user_id,
             role="Owner",
         )
-        return jsonify(project), 201
+        return jsonify(project), 202 if _location_pending(project) else 201
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -193,12 +217,10 @@ def update_project(project_id):
         show_on_projects=show_on_projects,
     )
     if err:
-        geocode_err = err.get("geocode_error")
-        status = 422 if geocode_err else 500
-        return jsonify(err), status
+        return _geocode_error_response(err)
     if not updated:
         return jsonify({"error": "Project not found"}), 404
-    return jsonify(updated)
+    return jsonify(updated), 202 if _location_pending(updated) else 200
 
 
 @projects_bp.route("/<project_id>", methods=["DELETE"])
@@ -360,17 +382,18 @@ def project_summary(project_id):
     except Exception:
         pass
 
-    photo_count, location_count = 0, 0
+    stats = supabase_client._empty_project_stats()
     try:
-        photo_count, location_count = supabase_client.get_project_stats(project_id)
+        stats = supabase_client.get_project_stats_summary(project_id)
     except Exception:
         pass
 
     return jsonify(
         {
             "project": project,
-            "photo_count": photo_count,
-            "location_count": location_count,
+            "photo_count": stats["photo_count"],
+            "location_count": stats["location_count"],
+            "stats": stats,
             "members": members,
         }
     )
@@ -425,14 +448,13 @@ def update_project_location(project_id):
         lng=lng,
     )
     if err:
-        geocode_err = err.get("geocode_error")
-        status = 422 if geocode_err else 500
-        return jsonify(err), status
+        return _geocode_error_response(err)
     if not updated:
         return jsonify({"error": "Project not found"}), 404
 
     location = supabase_client.get_project_location(project_id)
-    return jsonify({"project": updated, "location": location})
+    status = 202 if _location_pending(updated) else 200
+    return jsonify({"project": updated, "location": location}), status
 
 
 @projects_bp.route("/<project_id>/access", methods=["POST"])
@@ -478,9 +500,34 @@ def _parse_plan_bounds(form):
     return min_lat, min_lng, max_lat, max_lng, None
 
 
+def _parse_plan_corners(form):
+    """
+    Parse the optional calibrated corners (corner_nw_lat ... corner_sw_lng) from form.
+    Returns (corners, bounds, error): corners is None when no corner field is sent;
+    bounds is their (min_lat, min_lng, max_lat, max_lng).
+    """
+    if not any(form.get(field) for field in plan_warp.CORNER_FIELDS):
+        return None, None, None
+    try:
+        corners = {field: float(form.get(field, "")) for field in plan_warp.CORNER_FIELDS}
+    except (TypeError, ValueError):
+        return None, None, "All eight corner coordinates (corner_nw_lat ... corner_sw_lng) must be numeric."
+    lats = [value for field, value in corners.items() if field.endswith("_lat")]
+    lngs = [value for field, value in corners.items() if field.endswith("_lng")]
+    if not all(-90 <= lat <= 90 for lat in lats):
+        return None, None, "Latitude must be between -90 and 90."
+    if not all(-180 <= lng <= 180 for lng in lngs):
+        return None, None, "Longitude must be between -180 and 180."
+    try:
+        plan_warp.mercator_quad(corners)
+    except ValueError as exc:
+        return None, None, str(exc)
+    return corners, (min(lats), min(lngs), max(lats), max(lngs)), None
+
+
 def _validate_rasterization_output(png_bytes, image_width, image_height):
     """
-    Verify rasterization produced a valid PNG and dimensions.
+    Verify rasterization produced a valid PNG (or WebP, per PLAN_RASTER_ENCODING) and dimensions.
     Returns (True, None) or (False, error_code, message).
     """
     if not png_bytes or not isinstance(png_bytes, bytes) or len(png_bytes) == 0:
@@ -492,8 +539,10 @@ def _validate_rasterization_output(png_bytes, image_width, image_height):
         return False, "rasterization_failed", "Rasterization returned invalid dimensions."
     if w != image_width or h != image_height or w <= 0 or h <= 0:
         return False, "rasterization_failed", "Image dimensions must be positive integers."
-    if len(png_bytes) < 8 or png_bytes[:8] != b"\x89PNG\r\n\x1a\n":
-        return False, "rasterization_failed", "Rasterization did not produce a valid PNG image."
+    is_png = png_bytes[:8] == b"\x89PNG\r\n\x1a\n"
+    is_webp = png_bytes[:4] == b"RIFF" and png_bytes[8:12] == b"WEBP"
+    if not (is_png or is_webp):
+        return False, "rasterization_failed", "Rasterization did not produce a valid PNG or WebP image."
     return True, None, None
 
 
@@ -587,91 +636,254 @@ def _plan_ext_from_filename(filename, mime_type):
     return cleaned if cleaned in ("pdf", "png", "jpeg") else None
 
 
-def _read_plan_file_bytes(file_storage):
-    """Read file bytes from FileStorage. Raises ValueError on empty."""
-    stream = getattr(file_storage, "stream", None)
-    if stream and hasattr(stream, "seek"):
-        stream.seek(0)
-        data = stream.read()
-    else:
-        data = file_storage.read()
-    if not data:
-        raise ValueError("Plan file is empty")
-    return data
+def _plan_tiles_requested(form):
+    """True when the upload asks for a tile pyramid (form "tiles", else PLAN_TILES)."""
+    raw = (form.get("tiles") or "").strip().lower()
+    if not raw:
+        return plan_tiler.tiles_enabled_by_default()
+    return raw in ("1", "on", "true", "yes")
 
 
-@projects_bp.route("/<project_id>/plan", methods=["POST"])
-@jwt_required
-def upload_project_plan(project_id):
-    """Upload a georeferenced project plan. Requires Owner or Administrator."""
+def _parse_plan_page(form):
+    """Parse the PDF sheet to rasterize (form "page", 1-based, default 1). Returns (page, error)."""
+    raw = (form.get("page") or "").strip()
+    if not raw:
+        return 1, None
     try:
-        user_id = _require_auth()
-    except PermissionError as exc:
-        return jsonify({"error": str(exc)}), 401
+        page = int(raw)
+    except ValueError:
+        page = 0
+    if page < 1:
+        return None, "page must be a positive integer."
+    return page, None
 
-    try:
-        _validate_project_id(project_id)
-    except ValueError as exc:
-        return jsonify({"error": str(exc)}), 400
 
-    permission = require_role(project_id, PLAN_ADMIN_ROLES, user_id=user_id)
-    if isinstance(permission, tuple):
-        payload, status_code = permission
-        return jsonify(payload), status_code
+def _plan_async_requested(form):
+    """True when the client asked for 202 + job id instead of waiting (form "async")."""
+    return (form.get("async") or "").strip().lower() in ("1", "on", "true", "yes")
 
-    file_item = request.files.get("file")
-    if not file_item or not getattr(file_item, "filename", None):
-        return _plan_error_response(
-            "invalid_file", "Plan file is required. Include a PDF, PNG, or JPEG file."
-        )
 
-    mime = (getattr(file_item, "mimetype", "") or "").lower()
-    ext = _plan_ext_from_filename(file_item.filename, mime)
-    if not ext:
-        return _plan_error_response(
-            "invalid_metadata", "Plan must be PDF, PNG, or JPEG."
+def _rasterize_plan(file_bytes, filename, mime, with_tiles=False, page=1):
+    """
+    Rasterize a plan (page of a PDF), in an isolated process unless
+    PLAN_RASTER_ISOLATION is off. The overview comes from the content-addressed
+    raster cache when the same file was rasterized before with the same settings.
+    Returns (png_bytes, width, height, tiles); tiles is (width, height, tile iterable)
+    of the pyramid when requested, else None. Raises RasterizeError.
+    """
+    cache = plan_raster_cache.get_plan_raster_cache()
+    cache_key = plan_raster_cache.raster_cache_key(file_bytes, page) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    if cached and not with_tiles:
+        return cached + (None,)
+
+    if plan_raster_pool.isolation_enabled():
+        result = plan_raster_pool.rasterize_plan(
+            file_bytes,
+            filename_hint=filename,
+            mime_hint=mime,
+            with_tiles=with_tiles,
+            with_overview=cached is None,
+            page=page,
         )
+        raster, tiles = (result.png, result.width, result.height), result.tiles
+    else:
+        raster = cached or rasterize_to_png(
+            file_bytes, filename_hint=filename, mime_hint=mime, page=page
+        )
+        tiles = None
+        if with_tiles:
+            source = plan_tiler.render_tile_source(
+                file_bytes, filename_hint=filename, mime_hint=mime, page=page
+            )
+            tiles = (source.width, source.height, plan_tiler.iter_tiles(source))
 
-    min_lat, min_lng, max_lat, max_lng, bounds_err = _parse_plan_bounds(request.form)
-    if bounds_err:
-        return _plan_error_response("invalid_metadata", bounds_err)
+    if cached:
+        raster = cached
+    elif cache:
+        cache.put(cache_key, raster)
+    return raster + (tiles,)
 
-    existing = plan_service.get_plan_by_project_id(project_id)
-    if existing:
-        return _plan_error_response(
-            "plan_already_exists",
-            "Project already has a plan. Use Replace plan to overwrite.",
-            409,
-        )
 
-    if not r2_client.client:
-        config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
-        return _plan_error_response("storage_not_configured", config_msg, 500)
+def _index_plan_pages(file_bytes):
+    """
+    Page index of a multi-page plan PDF (see plan_pages), or None for a
+    single page. A PDF that cannot be indexed is stored as a single sheet.
+    """
+    try:
+        if plan_raster_pool.isolation_enabled():
+            index = plan_raster_pool.index_pdf_pages(file_bytes)
+        else:
+            index = pdf_page_index(file_bytes)
+    except RasterizeError as e:
+        logger.warning("Could not index plan PDF pages: %s", e.message)
+        return None
+    return index if len(index) > 1 else None
 
-    if not supabase_client.client:
-        return _plan_error_response(
-            "database_not_configured",
-            "Check Supabase environment variables.",
-            500,
+
+def _upload_plan_tiles(project_id, tiles):
+    """
+    Upload a rendered tile pyramid.
+    Returns (tile_metadata, tile_keys, error_response); error_response is None on success.
+    """
+    width, height, tile_iter = tiles
+    try:
+        metadata, tile_keys = plan_tiler.upload_tiles(
+            project_id, width, height, tile_iter, r2_client
         )
+    except RasterizeError as e:
+        # Isolated tiles stream in while uploading; the worker failed midway.
+        return None, None, _plan_error_response("rasterization_failed", e.message)
+    except Exception:
+        return None, None, _plan_error_response(
+            "upload_failed", "Failed to upload plan tiles to storage.", 502
+        )
+    return metadata, tile_keys, None
+
+
+def _discard_plan_tiles(tiles):
+    """Stop a tile stream that will not be uploaded (frees its raster worker)."""
+    if tiles and hasattr(tiles[2], "close"):
+        tiles[2].close()
 
+
+def _plan_tiles_payload(project_id, plan):
+    """
+    Describe a plan's tile pyramid for clients, or None when it has none.
+    Image-space Deep Zoom levels, not XYZ map tiles; see plan_tiler.
+    """
+    if not plan or not plan.get("tiles_path") or plan.get("tile_max_zoom") is None:
+        return None
+    return {
+        "tile_size": plan.get("tile_size"),
+        "max_zoom": plan.get("tile_max_zoom"),
+        "width": plan.get("tile_width"),
+        "height": plan.get("tile_height"),
+        "url_template": f"{projects_bp.url_prefix}/{project_id}/plan/tiles/{{z}}/{{x}}/{{y}}.png",
+    }
+
+
+def _plan_pages_payload(project_id, plan):
+    """Describe the sheets of a multi-page plan PDF for clients, or None."""
+    if not plan or not plan.get("pages_path") or not plan.get("pages"):
+        return None
+    pages_path = plan["pages_path"]
+    sheets = []
+    for info in plan["pages"]:
+        thumb_key = plan_pages.thumb_key(pages_path, info.get("page"))
+        sheets.append({
+            "page": info.get("page"),
+            "width": info.get("width"),
+            "height": info.get("height"),
+            "thumbnail_url": r2_client.generate_presigned_url(thumb_key, expires_in=600),
+        })
+    return {
+        "count": plan.get("page_count") or len(sheets),
+        "source_page": plan.get("source_page") or 1,
+        "url_template": f"{projects_bp.url_prefix}/{project_id}/plan/pages/{{page}}",
+        "sheets": sheets,
+    }
+
+
+def _warp_plan(project_id, png_bytes, image_width, image_height, corners):
+    """
+    Resample a plan calibrated with rotated or skewed corners into a north-up
+    Web Mercator raster (see plan_warp), reusing the stored one for a repeated
+    calibration. Returns (warp_fields, error_response); both are None when
+    the corners need no warp.
+    """
+    if not corners or plan_warp.is_axis_aligned(corners):
+        return None, None
     try:
-        file_bytes = _read_plan_file_bytes(file_item)
+        warp = plan_warp.plan_warp(image_width, image_height, corners)
     except ValueError as exc:
-        return _plan_error_response("invalid_file", str(exc))
+        return None, _plan_error_response("invalid_geometry", str(exc))
+    key = plan_warp.warp_key(project_id, png_bytes, corners, raster_extension())
+    if not r2_client.file_exists(key):
+        warped = plan_warp.warp_raster(png_bytes, warp)
+        _, warped_mime = raster_format(warped)
+        if not r2_client.upload_bytes(warped, key, content_type=warped_mime):
+            return None, _plan_error_response(
+                "upload_failed", "Failed to upload warped plan to storage.", 502
+            )
+    return {
+        "warped_r2_path": key,
+        "warped_width": warp.width,
+        "warped_height": warp.height,
+        "warped_min_lat": warp.min_lat,
+        "warped_min_lng": warp.min_lng,
+        "warped_max_lat": warp.max_lat,
+        "warped_max_lng": warp.max_lng,
+    }, None
+
+
+def _plan_warp_payload(plan):
+    """Describe a plan's pre-aligned (warped) raster for clients, or None."""
+    if not plan or not plan.get("warped_r2_path"):
+        return None
+    return {
+        "image_url": r2_client.generate_presigned_url(plan["warped_r2_path"], expires_in=600),
+        "image_width": plan.get("warped_width"),
+        "image_height": plan.get("warped_height"),
+        "min_lat": plan.get("warped_min_lat"),
+        "min_lng": plan.get("warped_min_lng"),
+        "max_lat": plan.get("warped_max_lat"),
+        "max_lng": plan.get("warped_max_lng"),
+    }
 
-    if len(file_bytes) > MAX_PLAN_BYTES:
-        return _plan_error_response(
-            "invalid_file",
-            f"Plan file too large (max {MAX_PLAN_BYTES // (1024 * 1024)}MB).",
-            413,
-        )
+
+def _plan_job_url(project_id, job_id):
+    return f"{projects_bp.url_prefix}/{project_id}/plan/jobs/{job_id}"
+
+
+def _accept_plan_job(project_id, kind, work):
+    """Run work() as a background plan job and answer 202 with its id."""
+    app = current_app._get_current_object()
+
+    def _run():
+        with app.app_context():
+            response, status_code = work()
+            return response.get_json(), status_code
+
+    job_id = plan_jobs.submit_plan_job(project_id, kind, _run)
+    status_url = _plan_job_url(project_id, job_id)
+    return (
+        jsonify({"job_id": job_id, "status": plan_jobs.PENDING, "status_url": status_url}),
+        202,
+        {"Location": status_url},
+    )
+
+
+def _read_plan_file_bytes(file_storage):
+    """Read file bytes from FileStorage. Raises ValueError on empty."""
+    stream = getattr(file_storage, "stream", None)
+    if stream and hasattr(stream, "seek"):
+        stream.seek(0)
+        data = stream.read()
+    else:
+        data = file_storage.read()
+    if not data:
+        raise ValueError("Plan file is empty")
+    return data
+
+
+def _store_plan(
+    project_id, user_id, existing, file_bytes, filename, mime, bounds, with_tiles,
+    page=1, corners=None,
+):
+    """
+    Rasterize, upload and record a plan (create when existing is None, else replace).
+    The overview shows sheet page of a PDF; multi-page PDFs are also stored
+    with a page index so other sheets can be rendered on demand. Rotated or
+    skewed corners are recorded as given and get a pre-aligned raster.
+    Runs after request validation, inline or as a background job; uses no request state.
+    """
+    min_lat, min_lng, max_lat, max_lng = bounds
+    replacing = existing is not None
 
     try:
-        png_bytes, image_width, image_height = rasterize_to_png(
-            file_bytes,
-            filename_hint=file_item.filename or "",
-            mime_hint=mime,
+        png_bytes, image_width, image_height, tiles = _rasterize_plan(
+            file_bytes, filename, mime, with_tiles=with_tiles, page=page
         )
     except RasterizeError as e:
         return _plan_error_response("rasterization_failed", e.message)
@@ -680,17 +892,14 @@ def upload_project_plan(project_id):
         png_bytes, image_width, image_height
     )
     if not ok:
+        _discard_plan_tiles(tiles)
         return _plan_error_response(err_code, err_msg)
 
-    ok, err_code, err_msg = _validate_plan_geometry(
-        min_lat, min_lng, max_lat, max_lng
-    )
-    if not ok:
-        return _plan_error_response(err_code, err_msg)
-
+    raster_ext, raster_mime = raster_format(png_bytes)
+    file_name = f"plan.{raster_ext}"
     ok, err_code, err_msg = _validate_plan_metadata(
         project_id,
-        "plan.png",
+        file_name,
         image_width,
         image_height,
         min_lat,
@@ -699,51 +908,128 @@ def upload_project_plan(project_id):
         max_lng,
     )
     if not ok:
+        _discard_plan_tiles(tiles)
         return _plan_error_response(err_code, err_msg)
 
     try:
         r2_key = r2_client.upload_project_plan(
-            project_id, png_bytes, "png", content_type=PNG_MIME
+            project_id, png_bytes, raster_ext, content_type=raster_mime
         )
     except Exception:
+        _discard_plan_tiles(tiles)
         return _plan_error_response(
             "upload_failed", "Failed to upload plan to storage.", 500
         )
 
     if not r2_key:
+        _discard_plan_tiles(tiles)
         return _plan_error_response(
             "upload_failed", "Failed to upload plan to storage.", 502
         )
 
-    try:
-        supabase_client.ensure_user_exists(user_id)
-    except Exception:
-        pass
-
-    try:
-        record = plan_service.create_plan_record(
-            project_id=project_id,
-            r2_path=r2_key,
-            file_name="plan.png",
-            file_type=PNG_MIME,
-            user_id=user_id,
-            min_lat=min_lat,
-            min_lng=min_lng,
-            max_lat=max_lat,
-            max_lng=max_lng,
-            image_width=image_width,
-            image_height=image_height,
-        )
-    except Exception:
+    # Tiles of a failed create are removed; a failed replace keeps the old
+    # plan's tiles (already partly overwritten, like plan.png itself).
+    drop_tiles_on_failure = not (replacing and existing.get("tiles_path"))
+    tile_fields, tile_keys = None, None
+    if tiles:
+        tile_fields, tile_keys, error = _upload_plan_tiles(project_id, tiles)
+        if error:
+            r2_client.delete_file(r2_key)
+            if drop_tiles_on_failure:
+                plan_service.delete_plan_tiles(project_id)
+            return error
+
+    warp_fields, error = _warp_plan(
+        project_id, png_bytes, image_width, image_height, corners
+    )
+    if error:
         r2_client.delete_file(r2_key)
-        return _plan_error_response(
-            "database_error", "Failed to store plan metadata.", 500
+        if tile_fields and drop_tiles_on_failure:
+            plan_service.delete_plan_tiles(project_id)
+        return error
+
+    page_fields = None
+    index = None
+    if _plan_ext_from_filename(filename, mime) == "pdf":
+        index = _index_plan_pages(file_bytes)
+    if index:
+        # Re-sending the current PDF reuses its revision (and rendered sheets).
+        pages_path = plan_pages.revision_path(project_id, file_bytes)
+        drop_pages_on_failure = not (
+            replacing and existing.get("pages_path") == pages_path
         )
+        try:
+            page_fields = plan_pages.upload_pages(
+                project_id, file_bytes, page, index, r2_client
+            )
+        except Exception:
+            r2_client.delete_file(r2_key)
+            if tile_fields and drop_tiles_on_failure:
+                plan_service.delete_plan_tiles(project_id)
+            if drop_pages_on_failure:
+                plan_service.delete_plan_pages(project_id, pages_path)
+            return _plan_error_response(
+                "upload_failed", "Failed to upload plan pages to storage.", 502
+            )
+
+    verb = "update" if replacing else "store"
+    try:
+        if replacing:
+            record = plan_service.replace_plan(
+                project_id=project_id,
+                r2_path=r2_key,
+                file_name=file_name,
+                file_type=raster_mime,
+                user_id=user_id,
+                min_lat=min_lat,
+                min_lng=min_lng,
+                max_lat=max_lat,
+                max_lng=max_lng,
+                image_width=image_width,
+                image_height=image_height,
+                tiles=tile_fields,
+                tile_keys=tile_keys or (),
+                pages=page_fields,
+                corners=corners,
+                warp=warp_fields,
+            )
+        else:
+            try:
+                supabase_client.ensure_user_exists(user_id)
+            except Exception:
+                pass
+            record = plan_service.create_plan_record(
+                project_id=project_id,
+                r2_path=r2_key,
+                file_name=file_name,
+                file_type=raster_mime,
+                user_id=user_id,
+                min_lat=min_lat,
+                min_lng=min_lng,
+                max_lat=max_lat,
+                max_lng=max_lng,
+                image_width=image_width,
+                image_height=image_height,
+                tiles=tile_fields,
+                pages=page_fields,
+                corners=corners,
+                warp=warp_fields,
+            )
+    except Exception:
+        record, failure_status = None, 500
+    else:
+        failure_status = 502
 
     if not record:
         r2_client.delete_file(r2_key)
+        if tile_fields and drop_tiles_on_failure:
+            plan_service.delete_plan_tiles(project_id)
+        if page_fields and drop_pages_on_failure:
+            plan_service.delete_plan_pages(project_id, page_fields["pages_path"])
+        if warp_fields and not replacing:
+            plan_service.delete_plan_warps(project_id)
         return _plan_error_response(
-            "database_error", "Failed to store plan metadata.", 502
+            "database_error", f"Failed to {verb} plan metadata.", failure_status
         )
 
     signed_url = r2_client.generate_presigned_url(r2_key, expires_in=600)
@@ -762,18 +1048,63 @@ def upload_project_plan(project_id):
         "max_lat": max_lat_r,
         "max_lng": max_lng_r,
         "image_url": signed_url,
+        "tiles": _plan_tiles_payload(project_id, record),
+        "pages": _plan_pages_payload(project_id, record),
+        "warped": _plan_warp_payload(record),
         "uploaded_at": record.get("uploaded_at"),
     }
-    return jsonify(response_data), 201
+    return jsonify(response_data), 200 if replacing else 201
 
 
-CALIBRATION_PLAN_KEY_TEMPLATE = "projects/{project_id}/plans/calibration.png"
+def _store_calibration_plan(project_id, file_bytes, filename, mime, page=1):
+    """Rasterize and upload a calibration image (sheet page of a PDF). No DB write."""
+    try:
+        png_bytes, image_width, image_height, _ = _rasterize_plan(
+            file_bytes, filename, mime, page=page
+        )
+    except RasterizeError as e:
+        return _plan_error_response("rasterization_failed", e.message)
 
+    ok, err_code, err_msg = _validate_rasterization_output(
+        png_bytes, image_width, image_height
+    )
+    if not ok:
+        return _plan_error_response(err_code, err_msg)
 
-@projects_bp.route("/<project_id>/plan/calibration", methods=["POST"])
+    raster_ext, raster_mime = raster_format(png_bytes)
+    key = CALIBRATION_PLAN_KEY_TEMPLATE.format(project_id=project_id, ext=raster_ext)
+    try:
+        ok = r2_client.upload_bytes(png_bytes, key, content_type=raster_mime)
+    except Exception:
+        return _plan_error_response(
+            "upload_failed", "Failed to upload calibration image.", 500
+        )
+
+    if not ok:
+        return _plan_error_response(
+            "upload_failed", "Failed to upload calibration image.", 502
+        )
+
+    signed_url = r2_client.generate_presigned_url(key, expires_in=600)
+    return (
+        jsonify({
+            "image_url": signed_url,
+            "image_width": image_width,
+            "image_height": image_height,
+            "page": page,
+        }),
+        200,
+    )
+
+
+@projects_bp.route("/<project_id>/plan", methods=["POST"])
 @jwt_required
-def upload_project_plan_calibration(project_id):
-    """Upload a plan file for calibration only. Rasterizes and returns image URL + dimensions. No DB write."""
+def upload_project_plan(project_id):
+    """
+    Upload a georeferenced project plan. Requires Owner or Administrator.
+    Georeferenced by min/max bounds, or by the four corner_* points of a rotated calibration.
+    With form field async=1, answers 202 + job id and processes in the background.
+    """
     try:
         user_id = _require_auth()
     except PermissionError as exc:
@@ -802,10 +1133,45 @@ def upload_project_plan_calibration(project_id):
             "invalid_metadata", "Plan must be PDF, PNG, or JPEG."
         )
 
+    corners, corner_bounds, corners_err = _parse_plan_corners(request.form)
+    if corners_err:
+        return _plan_error_response("invalid_metadata", corners_err)
+    if corners:
+        min_lat, min_lng, max_lat, max_lng = corner_bounds
+    else:
+        min_lat, min_lng, max_lat, max_lng, bounds_err = _parse_plan_bounds(request.form)
+        if bounds_err:
+            return _plan_error_response("invalid_metadata", bounds_err)
+
+    ok, err_code, err_msg = _validate_plan_geometry(
+        min_lat, min_lng, max_lat, max_lng
+    )
+    if not ok:
+        return _plan_error_response(err_code, err_msg)
+
+    page, page_err = _parse_plan_page(request.form)
+    if page_err:
+        return _plan_error_response("invalid_metadata", page_err)
+
+    existing = plan_service.get_plan_by_project_id(project_id)
+    if existing:
+        return _plan_error_response(
+            "plan_already_exists",
+            "Project already has a plan. Use Replace plan to overwrite.",
+            409,
+        )
+
     if not r2_client.client:
         config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
         return _plan_error_response("storage_not_configured", config_msg, 500)
 
+    if not supabase_client.client:
+        return _plan_error_response(
+            "database_not_configured",
+            "Check Supabase environment variables.",
+            500,
+        )
+
     try:
         file_bytes = _read_plan_file_bytes(file_item)
     except ValueError as exc:
@@ -818,43 +1184,94 @@ def upload_project_plan_calibration(project_id):
             413,
         )
 
-    try:
-        png_bytes, image_width, image_height = rasterize_to_png(
+    filename = file_item.filename or ""
+    with_tiles = _plan_tiles_requested(request.form)
+
+    def work():
+        return _store_plan(
+            project_id,
+            user_id,
+            None,
             file_bytes,
-            filename_hint=file_item.filename or "",
-            mime_hint=mime,
+            filename,
+            mime,
+            (min_lat, min_lng, max_lat, max_lng),
+            with_tiles,
+            page,
+            corners,
         )
-    except RasterizeError as e:
-        return _plan_error_response("rasterization_failed", e.message)
 
-    ok, err_code, err_msg = _validate_rasterization_output(
-        png_bytes, image_width, image_height
-    )
-    if not ok:
-        return _plan_error_response(err_code, err_msg)
+    if _plan_async_requested(request.form):
+        return _accept_plan_job(project_id, "upload", work)
+    return work()
+
 
-    key = CALIBRATION_PLAN_KEY_TEMPLATE.format(project_id=project_id)
+CALIBRATION_PLAN_KEY_TEMPLATE = "projects/{project_id}/plans/calibration.{ext}"
+
+
+@projects_bp.route("/<project_id>/plan/calibration", methods=["POST"])
+@jwt_required
+def upload_project_plan_calibration(project_id):
+    """
+    Upload a plan file for calibration only. Rasterizes and returns image URL + dimensions. No DB write.
+    With form field async=1, answers 202 + job id and processes in the background.
+    """
     try:
-        ok = r2_client.upload_bytes(png_bytes, key, content_type=PNG_MIME)
-    except Exception:
+        user_id = _require_auth()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    try:
+        _validate_project_id(project_id)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    permission = require_role(project_id, PLAN_ADMIN_ROLES, user_id=user_id)
+    if isinstance(permission, tuple):
+        payload, status_code = permission
+        return jsonify(payload), status_code
+
+    file_item = request.files.get("file")
+    if not file_item or not getattr(file_item, "filename", None):
         return _plan_error_response(
-            "upload_failed", "Failed to upload calibration image.", 500
+            "invalid_file", "Plan file is required. Include a PDF, PNG, or JPEG file."
         )
 
-    if not ok:
+    mime = (getattr(file_item, "mimetype", "") or "").lower()
+    ext = _plan_ext_from_filename(file_item.filename, mime)
+    if not ext:
         return _plan_error_response(
-            "upload_failed", "Failed to upload calibration image.", 502
+            "invalid_metadata", "Plan must be PDF, PNG, or JPEG."
         )
 
-    signed_url = r2_client.generate_presigned_url(key, expires_in=600)
-    return (
-        jsonify({
-            "image_url": signed_url,
-            "image_width": image_width,
-            "image_height": image_height,
-        }),
-        200,
-    )
+    if not r2_client.client:
+        config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
+        return _plan_error_response("storage_not_configured", config_msg, 500)
+
+    try:
+        file_bytes = _read_plan_file_bytes(file_item)
+    except ValueError as exc:
+        return _plan_error_response("invalid_file", str(exc))
+
+    if len(file_bytes) > MAX_PLAN_BYTES:
+        return _plan_error_response(
+            "invalid_file",
+            f"Plan file too large (max {MAX_PLAN_BYTES // (1024 * 1024)}MB).",
+            413,
+        )
+
+    page, page_err = _parse_plan_page(request.form)
+    if page_err:
+        return _plan_error_response("invalid_metadata", page_err)
+
+    filename = file_item.filename or ""
+
+    def work():
+        return _store_calibration_plan(project_id, file_bytes, filename, mime, page)
+
+    if _plan_async_requested(request.form):
+        return _accept_plan_job(project_id, "calibration", work)
+    return work()
 
 
 @projects_bp.route("/<project_id>/plan", methods=["GET"])
@@ -899,16 +1316,137 @@ def get_project_plan(project_id):
             "max_lat": max_lat_p,
             "max_lng": max_lng_p,
             "image_url": signed_url,
+            "tiles": _plan_tiles_payload(project_id, plan),
+            "pages": _plan_pages_payload(project_id, plan),
+            "warped": _plan_warp_payload(plan),
             "uploaded_at": plan.get("uploaded_at"),
         }
     }
     return jsonify(response_data), 200
 
 
+@projects_bp.route("/<project_id>/plan/tiles/<int:z>/<int:x>/<int:y>.png", methods=["GET"])
+@jwt_required
+def get_project_plan_tile(project_id, z, x, y):
+    """Redirect to a signed URL for one plan tile. Requires project membership."""
+    try:
+        user_id = _require_auth()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    try:
+        _validate_project_id(project_id)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    permission = require_role(project_id, VIEW_ROLES, user_id=user_id)
+    if isinstance(permission, tuple):
+        payload, status_code = permission
+        return jsonify(payload), status_code
+
+    if not r2_client.client:
+        config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
+        return _plan_error_response("storage_not_configured", config_msg, 500)
+
+    plan = plan_service.get_plan_by_project_id(project_id)
+    if not plan or not plan.get("tiles_path") or plan.get("tile_max_zoom") is None:
+        return _plan_error_response("not_found", "Plan has no tiles.", 404)
+    if not plan_tiler.has_tile(plan, z, x, y):
+        return _plan_error_response("not_found", "Tile not available.", 404)
+
+    key = f"{plan['tiles_path']}{z}/{x}/{y}.png"
+    signed_url = r2_client.generate_presigned_url(key, expires_in=600)
+    if not signed_url:
+        return _plan_error_response("not_found", "Tile not available.", 404)
+    # Signed URLs live 10 minutes; let the map reuse the redirect for most of that.
+    return redirect(signed_url, code=302), {"Cache-Control": "private, max-age=300"}
+
+
+@projects_bp.route("/<project_id>/plan/pages/<int:page>", methods=["GET"])
+@jwt_required
+def get_project_plan_page(project_id, page):
+    """
+    Signed URL and dimensions of one sheet of the project plan. Requires project membership.
+    Sheets of a multi-page PDF other than the overview are rasterized from the
+    stored PDF on first request and kept for later ones.
+    """
+    try:
+        user_id = _require_auth()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
+
+    try:
+        _validate_project_id(project_id)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    permission = require_role(project_id, VIEW_ROLES, user_id=user_id)
+    if isinstance(permission, tuple):
+        payload, status_code = permission
+        return jsonify(payload), status_code
+
+    if not r2_client.client:
+        config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
+        return _plan_error_response("storage_not_configured", config_msg, 500)
+
+    plan = plan_service.get_plan_by_project_id(project_id)
+    if not plan:
+        return _plan_error_response("not_found", "No plan exists for this project", 404)
+
+    pages_path = plan.get("pages_path")
+    info = plan_pages.page_info(plan, page) if pages_path else None
+    if page == (plan.get("source_page") or 1):
+        key = plan.get("r2_path")
+        image_width, image_height = plan.get("image_width"), plan.get("image_height")
+    elif not info:
+        return _plan_error_response("not_found", "Plan has no such page.", 404)
+    else:
+        key = plan_pages.page_raster_key(pages_path, page, raster_extension())
+        image_width, image_height = info.get("width"), info.get("height")
+        if not r2_client.file_exists(key):
+            source = r2_client.download_bytes(plan_pages.source_key(pages_path))
+            if not source:
+                return _plan_error_response(
+                    "storage_error", "Stored plan PDF is not available.", 502
+                )
+            try:
+                png_bytes, image_width, image_height, _ = _rasterize_plan(
+                    source, plan_pages.SOURCE_NAME, plan_pages.SOURCE_MIME, page=page
+                )
+            except RasterizeError as e:
+                return _plan_error_response("rasterization_failed", e.message)
+            ok, err_code, err_msg = _validate_rasterization_output(
+                png_bytes, image_width, image_height
+            )
+            if not ok:
+                return _plan_error_response(err_code, err_msg)
+            raster_ext, raster_mime = raster_format(png_bytes)
+            key = plan_pages.page_raster_key(pages_path, page, raster_ext)
+            if not r2_client.upload_bytes(png_bytes, key, content_type=raster_mime):
+                return _plan_error_response(
+                    "upload_failed", "Failed to upload plan page to storage.", 502
+                )
+
+    return (
+        jsonify({
+            "project_id": project_id,
+            "page": page,
+            "image_url": r2_client.generate_presigned_url(key, expires_in=600),
+            "image_width": image_width,
+            "image_height": image_height,
+        }),
+        200,
+    )
+
+
 @projects_bp.route("/<project_id>/plan", methods=["PATCH"])
 @jwt_required
 def replace_project_plan(project_id):
-    """Replace the existing project plan. Requires Owner or Administrator."""
+    """
+    Replace the existing project plan. Requires Owner or Administrator.
+    Georeferenced by min/max bounds, or by the four corner_* points of a rotated calibration.
+    With form field async=1, answers 202 + job id and processes in the background.
+    """
     try:
         user_id = _require_auth()
     except PermissionError as exc:
@@ -943,9 +1481,25 @@ def replace_project_plan(project_id):
             "invalid_metadata", "Plan must be PDF, PNG, or JPEG."
         )
 
-    min_lat, min_lng, max_lat, max_lng, bounds_err = _parse_plan_bounds(request.form)
-    if bounds_err:
-        return _plan_error_response("invalid_metadata", bounds_err)
+    corners, corner_bounds, corners_err = _parse_plan_corners(request.form)
+    if corners_err:
+        return _plan_error_response("invalid_metadata", corners_err)
+    if corners:
+        min_lat, min_lng, max_lat, max_lng = corner_bounds
+    else:
+        min_lat, min_lng, max_lat, max_lng, bounds_err = _parse_plan_bounds(request.form)
+        if bounds_err:
+            return _plan_error_response("invalid_metadata", bounds_err)
+
+    ok, err_code, err_msg = _validate_plan_geometry(
+        min_lat, min_lng, max_lat, max_lng
+    )
+    if not ok:
+        return _plan_error_response(err_code, err_msg)
+
+    page, page_err = _parse_plan_page(request.form)
+    if page_err:
+        return _plan_error_response("invalid_metadata", page_err)
 
     if not r2_client.client:
         config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
@@ -963,99 +1517,66 @@ def replace_project_plan(project_id):
             413,
         )
 
-    try:
-        png_bytes, image_width, image_height = rasterize_to_png(
+    filename = file_item.filename or ""
+    with_tiles = _plan_tiles_requested(request.form)
+
+    def work():
+        return _store_plan(
+            project_id,
+            user_id,
+            existing,
             file_bytes,
-            filename_hint=file_item.filename or "",
-            mime_hint=mime,
+            filename,
+            mime,
+            (min_lat, min_lng, max_lat, max_lng),
+            with_tiles,
+            page,
+            corners,
         )
-    except RasterizeError as e:
-        return _plan_error_response("rasterization_failed", e.message)
 
-    ok, err_code, err_msg = _validate_rasterization_output(
-        png_bytes, image_width, image_height
-    )
-    if not ok:
-        return _plan_error_response(err_code, err_msg)
+    if _plan_async_requested(request.form):
+        return _accept_plan_job(project_id, "replace", work)
+    return work()
 
-    ok, err_code, err_msg = _validate_plan_geometry(
-        min_lat, min_lng, max_lat, max_lng
-    )
-    if not ok:
-        return _plan_error_response(err_code, err_msg)
-
-    ok, err_code, err_msg = _validate_plan_metadata(
-        project_id,
-        "plan.png",
-        image_width,
-        image_height,
-        min_lat,
-        min_lng,
-        max_lat,
-        max_lng,
-    )
-    if not ok:
-        return _plan_error_response(err_code, err_msg)
 
+@projects_bp.route("/<project_id>/plan/jobs/<job_id>", methods=["GET"])
+@jwt_required
+def get_project_plan_job(project_id, job_id):
+    """
+    Status of a background plan upload/replace/calibration job. Requires Owner or Administrator.
+    Once finished, "result" holds the body the synchronous request would have returned.
+    """
     try:
-        r2_key = r2_client.upload_project_plan(
-            project_id, png_bytes, "png", content_type=PNG_MIME
-        )
-    except Exception:
-        return _plan_error_response(
-            "upload_failed", "Failed to upload plan to storage.", 500
-        )
-
-    if not r2_key:
-        return _plan_error_response(
-            "upload_failed", "Failed to upload plan to storage.", 502
-        )
+        user_id = _require_auth()
+    except PermissionError as exc:
+        return jsonify({"error": str(exc)}), 401
 
     try:
-        record = plan_service.replace_plan(
-            project_id=project_id,
-            r2_path=r2_key,
-            file_name="plan.png",
-            file_type=PNG_MIME,
-            user_id=user_id,
-            min_lat=min_lat,
-            min_lng=min_lng,
-            max_lat=max_lat,
-            max_lng=max_lng,
-            image_width=image_width,
-            image_height=image_height,
-        )
-    except Exception:
-        r2_client.delete_file(r2_key)
-        return _plan_error_response(
-            "database_error", "Failed to update plan metadata.", 500
-        )
+        _validate_project_id(project_id)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
-    if not record:
-        r2_client.delete_file(r2_key)
-        return _plan_error_response(
-            "database_error", "Failed to update plan metadata.", 502
-        )
+    permission = require_role(project_id, PLAN_ADMIN_ROLES, user_id=user_id)
+    if isinstance(permission, tuple):
+        payload, status_code = permission
+        return jsonify(payload), status_code
 
-    signed_url = r2_client.generate_presigned_url(r2_key, expires_in=600)
-    bounds = _bounds_from_plan(record)
-    min_lat_r, min_lng_r, max_lat_r, max_lng_r = bounds if bounds else (min_lat, min_lng, max_lat, max_lng)
-    response_data = {
-        "project_id": project_id,
-        "r2_path": r2_key,
-        "file_name": record.get("file_name"),
-        "file_type": record.get("file_type"),
-        "user_id": record.get("uploaded_by_user_id"),
-        "image_width": record.get("image_width"),
-        "image_height": record.get("image_height"),
-        "min_lat": min_lat_r,
-        "min_lng": min_lng_r,
-        "max_lat": max_lat_r,
-        "max_lng": max_lng_r,
-        "image_url": signed_url,
-        "uploaded_at": record.get("uploaded_at"),
-    }
-    return jsonify(response_data), 200
+    store = plan_jobs.get_plan_job_store()
+    job = store.get(job_id)
+    if not job or job["project_id"] != project_id:
+        return jsonify({"error": "not_found", "message": "No such plan job"}), 404
+    job = store.fail_if_stale(job)
+
+    return (
+        jsonify({
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "status_code": job["status_code"],
+            "result": job["result"],
+        }),
+        200,
+    )
 
 
 @projects_bp.route("/<project_id>/plan", methods=["DELETE"])
@@ -4,18 +4,21 @@ Upload route handlers for project-scoped photo storage.
 
 import os
 import io
+from functools import partial
 from typing import Optional, List, Tuple
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from flask import jsonify, request, g
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 from PIL import Image, ImageFile, ImageOps
 from PIL.ExifTags import TAGS, GPSTAGS
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from app.services.storage.supabase_client import supabase_client
 from app.services.storage.r2_client import r2_client
+from app.services.exif_reader import HEADER_BYTES, read_exif
+from app.services.photo_derivatives import submit_derivative
 from app.middleware.auth_middleware import jwt_required
 from app.services.auth.permissions import require_role
 
@@ -24,6 +27,14 @@ ALLOWED_UPLOAD_ROLES = {"Owner", "Administrator", "Editor"}
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_DIRECT_UPLOAD_FILES = 100
+# Lifetime of the presigned PUT URLs handed out by /api/photos/uploads.
+DIRECT_UPLOAD_EXPIRES = 15 * 60
+# A reservation outlives its URL so a PUT started just before the URL expired
+# can still be finalized; after that the sweep deletes it and its object.
+DIRECT_UPLOAD_RESERVATION_TTL = 60 * 60
+# Expired reservations removed per init request.
+DIRECT_UPLOAD_SWEEP_LIMIT = 50
 
 
 def registerUploadRoutes(blueprint):
@@ -132,20 +143,14 @@ def registerUploadRoutes(blueprint):
                     413,
                 )
 
-            try:
-                pil_image = _load_image(originalBytes)
-            except ValueError as exc:
-                return (
-                    jsonify({"status": "error", "message": str(exc)}),
-                    400,
-                )
-
             safeName = secure_filename(fileItem.filename or "") or "uploaded_file"
             fileSize = len(originalBytes)
             extension = _extractExtension(safeName, mimeType)
 
+            # Metadata comes from the file header; the pixels are decoded
+            # below, only for uploads that are stored and need a thumbnail.
             exif_data, captured_at, gps_decimal = _extract_exif_data(
-                pil_image, originalBytes
+                None, originalBytes
             )
 
             # Check for duplicate photos before uploading
@@ -160,6 +165,14 @@ def registerUploadRoutes(blueprint):
                 # Skip this file as it's a duplicate
                 continue
 
+            try:
+                pil_image = _load_image(originalBytes)
+            except ValueError as exc:
+                return (
+                    jsonify({"status": "error", "message": str(exc)}),
+                    400,
+                )
+
             location_id = None
             if gps_decimal and gps_decimal.get("lat") is not None and gps_decimal.get(
                 "lon"
@@ -381,6 +394,443 @@ def registerUploadRoutes(blueprint):
 
         return jsonify({"status": "success", "uploaded": results}), 201
 
+    @blueprint.route("/api/photos/uploads", methods=["POST"])
+    @jwt_required
+    def initDirectUpload():
+        """
+        Reserve photo ids and presigned PUT URLs so the browser uploads the
+        files straight to R2; /api/photos/uploads/finalize then records them.
+        """
+        body = request.get_json(silent=True) or {}
+        try:
+            projectId = _validateProjectId(str(body.get("project_id") or "").strip())
+        except ValueError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+        permission = require_role(projectId, ALLOWED_UPLOAD_ROLES)
+        if isinstance(permission, tuple):
+            payload, status_code = permission
+            return jsonify(payload), status_code
+
+        unavailable = _storage_unavailable()
+        if unavailable:
+            return unavailable
+
+        files = body.get("files")
+        if not isinstance(files, list) or not files:
+            return jsonify({"status": "error", "message": "files is required"}), 400
+        if len(files) > MAX_DIRECT_UPLOAD_FILES:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": f"At most {MAX_DIRECT_UPLOAD_FILES} files per request",
+                    }
+                ),
+                400,
+            )
+
+        _sweep_expired_reservations()
+
+        userId = permission.get("user_id")
+        expiresAt = (
+            datetime.now(timezone.utc)
+            + timedelta(seconds=DIRECT_UPLOAD_RESERVATION_TTL)
+        ).isoformat()
+        uploads = []
+        reservations = []
+        for item in files:
+            item = item if isinstance(item, dict) else {}
+            originalName = str(item.get("file_name") or "")
+            mimeType = str(item.get("content_type") or "").lower()
+            if not mimeType.startswith("image/"):
+                return (
+                    jsonify({"status": "error", "message": "Invalid file type. Image required"}),
+                    400,
+                )
+            try:
+                size = int(item.get("size"))
+            except (TypeError, ValueError):
+                return jsonify({"status": "error", "message": "size is required"}), 400
+            if size <= 0:
+                return jsonify({"status": "error", "message": "Uploaded file is empty"}), 400
+            if size > MAX_UPLOAD_BYTES:
+                return (
+                    jsonify({"status": "error", "message": "File too large (max 20MB)"}),
+                    413,
+                )
+
+            safeName = secure_filename(originalName) or "uploaded_file"
+            photoId = str(uuid4())
+            r2Key = r2_client.project_photo_key(
+                projectId, photoId, _extractExtension(safeName, mimeType)
+            )
+            uploadUrl = r2_client.generate_presigned_upload_url(
+                r2Key,
+                content_type=mimeType,
+                expires_in=DIRECT_UPLOAD_EXPIRES,
+                content_length=size,
+            )
+            if not uploadUrl:
+                return (
+                    jsonify({"status": "error", "message": "Failed to sign upload URL"}),
+                    502,
+                )
+            uploads.append(
+                {
+                    "photo_id": photoId,
+                    "key": r2Key,
+                    "upload_url": uploadUrl,
+                    "method": "PUT",
+                    "headers": {"Content-Type": mimeType},
+                    "file_name": safeName,
+                    "original_filename": originalName,
+                }
+            )
+            reservations.append(
+                {
+                    "photo_id": photoId,
+                    "project_id": projectId,
+                    "user_id": userId,
+                    "r2_key": r2Key,
+                    "content_type": mimeType,
+                    "file_size": size,
+                    "expires_at": expiresAt,
+                }
+            )
+
+        try:
+            supabase_client.create_upload_reservations(reservations)
+        except Exception as exc:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": f"Failed to reserve uploads: {exc}",
+                    }
+                ),
+                500,
+            )
+
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "uploads": uploads,
+                    "expires_in": DIRECT_UPLOAD_EXPIRES,
+                }
+            ),
+            200,
+        )
+
+    @blueprint.route("/api/photos/uploads/finalize", methods=["POST"])
+    @jwt_required
+    def finalizeDirectUpload():
+        """
+        Record photos uploaded with /api/photos/uploads: check each against
+        the caller's reservation, verify the object, read EXIF from its first
+        bytes, store the row and queue the thumbnail.
+        """
+        body = request.get_json(silent=True) or {}
+        try:
+            projectId = _validateProjectId(str(body.get("project_id") or "").strip())
+        except ValueError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+        permission = require_role(projectId, ALLOWED_UPLOAD_ROLES)
+        if isinstance(permission, tuple):
+            payload, status_code = permission
+            return jsonify(payload), status_code
+        userId = permission.get("user_id")
+
+        unavailable = _storage_unavailable()
+        if unavailable:
+            return unavailable
+
+        items = body.get("uploads")
+        if not isinstance(items, list) or not items:
+            return jsonify({"status": "error", "message": "uploads is required"}), 400
+
+        # Validate every entry before touching storage.
+        pending = []
+        for item in items:
+            item = item if isinstance(item, dict) else {}
+            try:
+                photoId = str(UUID(str(item.get("photo_id") or "")))
+            except ValueError:
+                return (
+                    jsonify({"status": "error", "message": "photo_id must be a valid UUID"}),
+                    400,
+                )
+            r2Key = str(item.get("key") or "")
+            prefix = r2_client.project_photo_key(projectId, photoId, "")
+            if not r2Key.startswith(prefix) or not r2Key[len(prefix):].isalnum():
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "key does not belong to this photo",
+                        }
+                    ),
+                    400,
+                )
+            latitudeValue = longitudeValue = None
+            if item.get("latitude") not in (None, "") and item.get("longitude") not in (None, ""):
+                try:
+                    latitudeValue = float(item["latitude"])
+                    longitudeValue = float(item["longitude"])
+                except (TypeError, ValueError):
+                    return (
+                        jsonify({"status": "error", "message": "Invalid latitude/longitude"}),
+                        400,
+                    )
+            pending.append((photoId, r2Key, item, latitudeValue, longitudeValue))
+
+        # Only uploads this user reserved, and has not finalized yet, are
+        # accepted; anything else is never read or deleted.
+        reservations = supabase_client.get_upload_reservations(
+            [photoId for photoId, *_ in pending]
+        )
+        now = datetime.now(timezone.utc)
+        accepted = []
+        skipped = []
+        for photoId, r2Key, item, latitudeValue, longitudeValue in pending:
+            reservation = reservations.get(photoId)
+            if reservation is None:
+                existing = supabase_client.get_photo_metadata(photoId)
+                if (
+                    existing
+                    and existing.get("project_id") == projectId
+                    and existing.get("r2_path") == r2Key
+                ):
+                    # A repeated finalize of a photo that is already stored.
+                    skipped.append(
+                        {
+                            "photo_id": photoId,
+                            "original_filename": str(
+                                item.get("original_filename")
+                                or item.get("file_name")
+                                or ""
+                            ),
+                        }
+                    )
+                    continue
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": f"No pending upload {photoId}",
+                        }
+                    ),
+                    404,
+                )
+            if (
+                reservation.get("project_id") != projectId
+                or reservation.get("user_id") != userId
+                or reservation.get("r2_key") != r2Key
+            ):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "key does not belong to this photo",
+                        }
+                    ),
+                    400,
+                )
+            if _parse_timestamp(reservation.get("expires_at")) <= now:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": f"Upload {photoId} has expired",
+                        }
+                    ),
+                    410,
+                )
+            accepted.append(
+                (photoId, r2Key, item, latitudeValue, longitudeValue, reservation)
+            )
+
+        results = []
+        for (
+            photoId,
+            r2Key,
+            item,
+            latitudeValue,
+            longitudeValue,
+            reservation,
+        ) in accepted:
+            originalName = str(item.get("original_filename") or item.get("file_name") or "")
+            safeName = secure_filename(str(item.get("file_name") or originalName)) or "uploaded_file"
+
+            head = r2_client.head_file(r2Key)
+            if not head:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": f"Upload {photoId} was not found in storage",
+                        }
+                    ),
+                    404,
+                )
+            fileSize = int(head.get("ContentLength") or 0)
+            mimeType = (head.get("ContentType") or "").split(";")[0].strip().lower()
+            if fileSize != int(reservation.get("file_size") or 0):
+                _discard_reserved_upload(photoId, r2Key)
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Uploaded size does not match the reservation",
+                        }
+                    ),
+                    400,
+                )
+            if fileSize > MAX_UPLOAD_BYTES:
+                _discard_reserved_upload(photoId, r2Key)
+                return (
+                    jsonify({"status": "error", "message": "File too large (max 20MB)"}),
+                    413,
+                )
+            if fileSize <= 0 or not mimeType.startswith("image/"):
+                _discard_reserved_upload(photoId, r2Key)
+                return (
+                    jsonify({"status": "error", "message": "Invalid file type. Image required"}),
+                    400,
+                )
+
+            headerBytes = _read_upload_header(r2Key, fileSize)
+            if headerBytes is None:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Failed to read upload from storage",
+                        }
+                    ),
+                    502,
+                )
+            # The declared ContentType is the client's word; the bytes must
+            # parse as an image, as the multipart path requires.
+            if not _is_image_header(headerBytes):
+                _discard_reserved_upload(photoId, r2Key)
+                return (
+                    jsonify({"status": "error", "message": "Invalid file type. Image required"}),
+                    400,
+                )
+            exif_data, captured_at, gps_decimal = _extract_exif_data(
+                None, headerBytes
+            )
+
+            duplicate = supabase_client.check_duplicate_photo(
+                project_id=projectId,
+                file_name=safeName,
+                file_size=fileSize,
+                captured_at=captured_at,
+            )
+            if duplicate:
+                # A repeated finalize finds its own row; keep that object.
+                if duplicate.get("id") != photoId:
+                    _discard_reserved_upload(photoId, r2Key)
+                else:
+                    _release_reservations([photoId])
+                skipped.append(
+                    {"photo_id": photoId, "original_filename": originalName}
+                )
+                continue
+
+            location_id = None
+            if gps_decimal and gps_decimal.get("lat") is not None and gps_decimal.get(
+                "lon"
+            ) is not None:
+                location_id = supabase_client.get_or_create_location(
+                    gps_decimal["lat"], gps_decimal["lon"], gps_decimal.get("alt"), project_id=projectId
+                )
+
+            fileUrl = r2_client.get_file_url(r2Key)
+            if not fileUrl:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Failed to generate file URL",
+                        }
+                    ),
+                    500,
+                )
+
+            metadataPayload = {
+                "id": photoId,
+                "project_id": projectId,
+                "user_id": userId,
+                "exif_data": exif_data or None,
+                "file_name": safeName,
+                "original_filename": originalName or safeName,
+                "file_type": mimeType or None,
+                "file_size": fileSize,
+                "latitude": latitudeValue
+                if gps_decimal is None
+                else gps_decimal.get("lat", latitudeValue),
+                "longitude": longitudeValue
+                if gps_decimal is None
+                else gps_decimal.get("lon", longitudeValue),
+                "location_id": location_id,
+                "show_on_photos": True,
+                "r2_path": r2Key,
+                "r2_url": fileUrl,
+                "r2_key": r2Key,
+                "url": fileUrl,
+            }
+            timestamp = item.get("timestamp")
+            if timestamp:
+                metadataPayload["captured_at"] = timestamp
+            elif captured_at:
+                metadataPayload["captured_at"] = captured_at
+            metadataPayload = _strip_null_bytes(metadataPayload)
+
+            try:
+                record = supabase_client.store_photo_metadata(metadataPayload)
+            except Exception as exc:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": f"Failed to create photo record: {exc}",
+                        }
+                    ),
+                    500,
+                )
+            if not record or not isinstance(record, dict):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Could not persist photo metadata",
+                        }
+                    ),
+                    502,
+                )
+
+            _release_reservations([photoId])
+            submit_derivative(
+                photoId,
+                partial(_store_thumbnail, projectId, photoId, r2Key, mimeType, record),
+            )
+            results.append(
+                {
+                    "photo_id": photoId,
+                    "r2_url": fileUrl,
+                    "r2_path": r2Key,
+                    "thumbnail_pending": True,
+                    "original_filename": originalName,
+                }
+            )
+
+        return (
+            jsonify({"status": "success", "uploaded": results, "skipped": skipped}),
+            201,
+        )
+
 
 def _validateProjectId(projectId: str) -> str:
     if not projectId:
@@ -391,6 +841,112 @@ def _validateProjectId(projectId: str) -> str:
         raise ValueError("project_id must be a valid UUID") from exc
 
 
+def _storage_unavailable():
+    """The error response for a missing R2 or Supabase configuration, or None."""
+    if not r2_client.client:
+        config_msg = getattr(r2_client, "_config_error", None) or "Check R2 environment variables."
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"Storage not configured. {config_msg}",
+                }
+            ),
+            500,
+        )
+    if not supabase_client.client:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Database not configured. Check Supabase environment variables.",
+                }
+            ),
+            500,
+        )
+    return None
+
+
+def _parse_timestamp(value) -> datetime:
+    """A stored ``timestamptz`` as an aware datetime (epoch when unreadable)."""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.fromtimestamp(0, timezone.utc)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _release_reservations(photoIds: List[str]) -> None:
+    try:
+        supabase_client.delete_upload_reservations(photoIds)
+    except Exception:
+        pass
+
+
+def _discard_reserved_upload(photoId: str, r2Key: str) -> None:
+    """Delete a reserved, unfinalized upload and its reservation."""
+    _cleanupR2Object(r2Key)
+    _release_reservations([photoId])
+
+
+def _sweep_expired_reservations() -> None:
+    """Delete expired direct upload reservations and the objects they cover."""
+    try:
+        expired = supabase_client.list_expired_upload_reservations(
+            datetime.now(timezone.utc).isoformat(), limit=DIRECT_UPLOAD_SWEEP_LIMIT
+        )
+        photoIds = [str(reservation.get("photo_id")) for reservation in expired]
+        # A photo stored before its reservation could be released keeps its object.
+        stored = supabase_client.existing_photo_ids(photoIds)
+    except Exception:
+        return
+    for reservation in expired:
+        if str(reservation.get("photo_id")) not in stored:
+            _cleanupR2Object(reservation.get("r2_key"))
+    _release_reservations(photoIds)
+
+
+def _read_upload_header(r2Key: str, fileSize: int) -> Optional[bytes]:
+    """
+    The first HEADER_BYTES of a stored upload, which hold its EXIF block; the
+    whole object when the EXIF cannot be located in that prefix (e.g. a PNG
+    with eXIf after the image data).
+    """
+    headerBytes = r2_client.download_bytes(
+        r2Key, byte_range=f"bytes=0-{HEADER_BYTES - 1}"
+    )
+    if headerBytes is None:
+        return None
+    if read_exif(headerBytes) is None and fileSize > len(headerBytes):
+        return r2_client.download_bytes(r2Key)
+    return headerBytes
+
+
+def _store_thumbnail(
+    projectId: str, photoId: str, r2Key: str, mimeType: str, record: dict
+) -> None:
+    """Derivative job of a direct upload: thumbnail the stored original."""
+    originalBytes = r2_client.download_bytes(r2Key)
+    if originalBytes is None:
+        raise RuntimeError(f"{r2Key} could not be downloaded")
+    thumbBytes, thumbExt, thumbMime = _generate_thumbnail_bytes(
+        _load_image(originalBytes), mimeType
+    )
+    thumbnailKey = f"projects/{projectId}/photos/{photoId}_thumb.{thumbExt}"
+    if not r2_client.upload_bytes(thumbBytes, thumbnailKey, content_type=thumbMime):
+        raise RuntimeError(f"{thumbnailKey} could not be uploaded")
+    thumbnailUrl = r2_client.get_file_url(thumbnailKey)
+    updates = supabase_client.build_thumbnail_updates(
+        thumbnail_path=thumbnailKey,
+        thumbnail_url=thumbnailUrl,
+        record_hint=record,
+    )
+    updated = supabase_client.update_photo_metadata(
+        photoId, _strip_null_bytes(updates)
+    )
+    supabase_client.update_thumbnail_column_hint(updated)
+
+
 def _extractExtension(filename: str, mimeType: str) -> str:
     _, ext = os.path.splitext(filename)
     cleaned = ext.lstrip(".").lower()
@@ -445,6 +1001,15 @@ def _load_image(data: bytes) -> Image.Image:
         raise ValueError("Unable to decode image") from exc
 
 
+def _is_image_header(data: bytes) -> bool:
+    """True when Pillow recognizes *data* (a file prefix) as an image."""
+    try:
+        with Image.open(io.BytesIO(data)):
+            return True
+    except Exception:
+        return False
+
+
 def _has_transparency(image: Image.Image) -> bool:
     if image.mode in ("RGBA", "LA"):
         return True
@@ -521,18 +1086,30 @@ def _dms_to_decimal(dms, ref):
         return None
 
 
-def _extract_exif_data(image: Image.Image, original_bytes: bytes):
+def _pillow_exif(image: Optional[Image.Image], original_bytes: bytes):
+    # Image.open only parses the header; _getexif() loads the pixels when the
+    # format keeps EXIF after the image data.
+    try:
+        if image is None:
+            image = Image.open(io.BytesIO(original_bytes))
+        return image._getexif() or {}
+    except Exception:
+        return {}
+
+
+def _extract_exif_data(image: Optional[Image.Image], original_bytes: bytes):
     # We intentionally store a minimal, stable EXIF payload in Supabase:
     # - only the canonical GPS decimal coordinates (+ a few optional fields)
     # - avoids huge/non-deterministic fields like MakerNote that may contain null bytes
+    # JPEG/PNG/WebP EXIF is read from the file header without decoding the
+    # image; other formats (or an unreadable header) go through Pillow.
     exif_data = {}
     gps_decimal = {}
     captured_at = None
 
-    try:
-        raw_exif = image._getexif() or {}
-    except Exception:
-        raw_exif = {}
+    raw_exif = read_exif(original_bytes)
+    if raw_exif is None:
+        raw_exif = _pillow_exif(image, original_bytes)
 
     def _safe_value(val):
         # Convert EXIF rationals and other non-JSON types to plain floats/strings
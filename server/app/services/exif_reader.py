@@ -0,0 +1,205 @@
+"""
+EXIF from the file header, without decoding the image.
+
+Photo uploads need only a few EXIF tags: the capture time, its UTC offset and
+the GPS block. Pillow exposes them once the image is open (and, for some
+formats, loaded), which costs a full pixel decode of a 12 MP photo. The
+EXIF block itself is a small TIFF structure near the start of the file:
+
+* JPEG — the first APP1 ``Exif\\0\\0`` segment, before the scan data;
+* PNG  — the ``eXIf`` chunk;
+* WebP — the ``EXIF`` chunk of the RIFF container.
+
+``read_exif`` finds that block by walking segment/chunk headers only and
+parses the TIFF IFDs with ``struct``. It returns the same mapping as
+Pillow's ``Image._getexif()`` (IFD0 merged with the Exif IFD, the GPS IFD as
+a dict under 34853), with rationals as floats, so callers can use either.
+
+For JPEG the block lies within the first HEADER_BYTES of the file, so a
+prefix of that length is enough.
+"""
+
+import struct
+from typing import Any, Dict, Optional
+
+# JPEG APP segments are at most 64 KB; EXIF sits in one of the first few.
+HEADER_BYTES = 64 * 1024
+
+EXIF_IFD_TAG = 34665
+GPS_IFD_TAG = 34853
+
+_EXIF_PREFIX = b"Exif\x00\x00"
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_TEXT_CHUNKS = (b"tEXt", b"zTXt", b"iTXt")
+_PNG_RAW_EXIF_KEYWORD = b"Raw profile type exif"
+
+# TIFF field type -> (struct code, size in bytes).
+_FIELD_TYPES = {
+    1: ("B", 1),  # BYTE
+    2: ("c", 1),  # ASCII
+    3: ("H", 2),  # SHORT
+    4: ("L", 4),  # LONG
+    5: ("L", 8),  # RATIONAL (two LONGs)
+    6: ("b", 1),  # SBYTE
+    7: ("B", 1),  # UNDEFINED
+    8: ("h", 2),  # SSHORT
+    9: ("l", 4),  # SLONG
+    10: ("l", 8),  # SRATIONAL (two SLONGs)
+    11: ("f", 4),  # FLOAT
+    12: ("d", 8),  # DOUBLE
+    13: ("L", 4),  # IFD
+}
+_MAX_IFD_ENTRIES = 1024
+
+
+def read_exif(data: bytes) -> Optional[Dict[int, Any]]:
+    """
+    EXIF tags of a JPEG, PNG or WebP file, read from its header.
+
+    Returns ``{}`` when the file has no EXIF block, and None when the format
+    is not one of those, the block cannot be located (e.g. *data* is a
+    truncated prefix) or it is malformed; callers then fall back to Pillow.
+    """
+    try:
+        if data[:2] == b"\xff\xd8":
+            block = _jpeg_exif(data)
+        elif data[:8] == _PNG_SIGNATURE:
+            block = _png_exif(data)
+        elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            block = _webp_exif(data)
+        else:
+            return None
+        if block is None:
+            return None
+        if not block:
+            return {}
+        if block.startswith(_EXIF_PREFIX):
+            block = block[len(_EXIF_PREFIX) :]
+        return _parse_tiff(block)
+    except (struct.error, ValueError, IndexError):
+        return None
+
+
+def _jpeg_exif(data: bytes) -> Optional[bytes]:
+    offset = 2
+    size = len(data)
+    while offset + 4 <= size:
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # no length field
+            offset += 2
+            continue
+        if marker in (0xD9, 0xDA):  # end of image / start of scan: no EXIF
+            return b""
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        end = offset + 2 + length
+        if length < 2 or end > size:
+            return None
+        if marker == 0xE1 and data[offset + 4 : offset + 10] == _EXIF_PREFIX:
+            return data[offset + 4 : end]
+        offset = end
+    return None
+
+
+def _png_exif(data: bytes) -> Optional[bytes]:
+    offset = len(_PNG_SIGNATURE)
+    size = len(data)
+    while offset + 8 <= size:
+        length, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        start = offset + 8
+        end = start + length
+        if kind == b"IEND":
+            return b""
+        if end > size:
+            return None
+        if kind == b"eXIf":
+            return data[start:end]
+        if kind in _PNG_TEXT_CHUNKS and data[start:end].startswith(
+            _PNG_RAW_EXIF_KEYWORD
+        ):
+            return None  # ImageMagick-style hex profile; leave it to Pillow
+        offset = end + 4  # CRC
+    return None
+
+
+def _webp_exif(data: bytes) -> Optional[bytes]:
+    offset = 12
+    size = len(data)
+    while offset + 8 <= size:
+        kind, length = struct.unpack("<4sI", data[offset : offset + 8])
+        start = offset + 8
+        end = start + length
+        if end > size:
+            return None
+        if kind == b"EXIF":
+            return data[start:end]
+        offset = end + (length & 1)  # chunks are padded to an even size
+    return b"" if offset >= size else None
+
+
+def _parse_tiff(block: bytes) -> Dict[int, Any]:
+    if block[:4] == b"II*\x00":
+        order = "<"
+    elif block[:4] == b"MM\x00*":
+        order = ">"
+    else:
+        raise ValueError("Not a TIFF header")
+    (ifd0,) = struct.unpack(order + "L", block[4:8])
+    tags = _read_ifd(block, ifd0, order)
+
+    exif_offset = tags.get(EXIF_IFD_TAG)
+    if isinstance(exif_offset, int):
+        tags.update(_read_ifd(block, exif_offset, order))
+    gps_offset = tags.get(GPS_IFD_TAG)
+    if isinstance(gps_offset, int):
+        tags[GPS_IFD_TAG] = _read_ifd(block, gps_offset, order)
+    return tags
+
+
+def _read_ifd(block: bytes, offset: int, order: str) -> Dict[int, Any]:
+    (count,) = struct.unpack(order + "H", block[offset : offset + 2])
+    if count > _MAX_IFD_ENTRIES:
+        raise ValueError("Implausible IFD entry count")
+    tags: Dict[int, Any] = {}
+    for index in range(count):
+        entry = offset + 2 + index * 12
+        tag, field_type, value_count = struct.unpack(
+            order + "HHL", block[entry : entry + 8]
+        )
+        if field_type not in _FIELD_TYPES:
+            continue
+        code, unit = _FIELD_TYPES[field_type]
+        length = unit * value_count
+        if length <= 4:
+            raw = block[entry + 8 : entry + 8 + length]
+        else:
+            (value_offset,) = struct.unpack(order + "L", block[entry + 8 : entry + 12])
+            raw = block[value_offset : value_offset + length]
+        if len(raw) != length:
+            continue  # points outside the block (e.g. a truncated MakerNote)
+        tags[tag] = _decode_value(raw, field_type, code, value_count, order)
+    return tags
+
+
+def _decode_value(raw: bytes, field_type: int, code: str, count: int, order: str):
+    # Shapes follow Pillow's TiffImagePlugin: bytes for BYTE/UNDEFINED, str for
+    # ASCII, a scalar for single values and a tuple otherwise.
+    if field_type in (1, 7):
+        return raw
+    if field_type == 2:
+        if raw.endswith(b"\x00"):
+            raw = raw[:-1]
+        return raw.decode("latin-1", "replace")
+    if field_type in (5, 10):
+        parts = struct.unpack(f"{order}{count * 2}{code}", raw)
+        values = tuple(
+            num / den if den else float("nan")
+            for num, den in zip(parts[::2], parts[1::2])
+        )
+    else:
+        values = struct.unpack(f"{order}{count}{code}", raw)
+    return values[0] if len(values) == 1 else values
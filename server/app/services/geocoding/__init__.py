@@ -1,5 +1,12 @@
 """Geocoding services package."""
 
+from .client import BACKGROUND, INTERACTIVE, get_geocoding_client
 from .nominatim_client import forward_geocode, reverse_geocode
 
-__all__ = ["forward_geocode", "reverse_geocode"]
+__all__ = [
+    "BACKGROUND",
+    "INTERACTIVE",
+    "forward_geocode",
+    "get_geocoding_client",
+    "reverse_geocode",
+]
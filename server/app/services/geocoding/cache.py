@@ -0,0 +1,270 @@
+"""
+Persistent geocode cache shared by all workers on a host.
+
+Results are stored in a SQLite file (WAL mode, so gunicorn workers read
+concurrently and serialize only on writes). Forward lookups are keyed on the
+normalized address text; reverse lookups on the coordinates rounded to a
+precision that matches the Nominatim zoom level, so nearby points at street
+zoom share an entry and whole towns share one at city zoom.
+
+Negative answers (no results, ambiguous address) are cached too, with their
+own shorter TTL; transient failures (timeouts, HTTP errors) never are.
+Expired rows are deleted by the first write of each worker and then at most
+once per GEOCODE_CACHE_PURGE_INTERVAL, so the file does not keep every key
+it has ever seen.
+Lookups are counted per process in ``stats()`` and exported to ``/metrics``
+as ``swallow_cache_lookups_total{cache="geocode",kind,result}``.
+
+Configuration (environment variables):
+    GEOCODE_CACHE                — "off" disables the cache (default: on)
+    GEOCODE_CACHE_PATH           — SQLite file (default: <tmpdir>/swallow-skyer-geocode.sqlite3)
+    GEOCODE_CACHE_TTL            — seconds a positive result is kept (default: 2592000, 30 days)
+    GEOCODE_CACHE_NEGATIVE_TTL   — seconds a negative result is kept (default: 86400)
+    GEOCODE_CACHE_PURGE_INTERVAL — seconds between purges of expired rows (default: 3600)
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.services.instrumentation import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+_MISS = "miss"
+_HIT = "hit"
+_NEGATIVE_HIT = "negative_hit"
+
+# Coarsest zoom level first: (minimum zoom, decimal places kept).
+# 4 decimals is ~11 m, 2 decimals ~1.1 km of latitude.
+_ZOOM_PRECISION = ((18, 5), (16, 4), (13, 3), (10, 2), (0, 1))
+
+_PUNCTUATION = re.compile(r"[^\w\s,#-]")
+_SEPARATORS = re.compile(r"\s*,\s*")
+_SPACES = re.compile(r"\s+")
+
+
+def _cache_enabled() -> bool:
+    return (os.getenv("GEOCODE_CACHE") or "on").strip().lower() not in (
+        "0",
+        "off",
+        "false",
+        "no",
+    )
+
+
+def _cache_path() -> str:
+    return os.getenv("GEOCODE_CACHE_PATH") or os.path.join(
+        tempfile.gettempdir(), "swallow-skyer-geocode.sqlite3"
+    )
+
+
+def _env_seconds(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def normalize_address(address: str) -> str:
+    """Case-, accent-width- and whitespace-insensitive form of an address query."""
+    text = unicodedata.normalize("NFKC", address or "").casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _SEPARATORS.sub(", ", text)
+    return _SPACES.sub(" ", text).strip(" ,")
+
+
+def coordinate_precision(zoom: int) -> int:
+    """Decimal places of lat/lng that still resolve to the same place at *zoom*."""
+    for min_zoom, decimals in _ZOOM_PRECISION:
+        if zoom >= min_zoom:
+            return decimals
+    return _ZOOM_PRECISION[-1][1]
+
+
+def forward_key(provider: str, address: str) -> str:
+    return f"forward:{provider}:{normalize_address(address)}"
+
+
+def reverse_key(provider: str, lat: float, lng: float, zoom: int) -> str:
+    decimals = coordinate_precision(zoom)
+    # "+ 0.0" folds -0.0 into 0.0 so both round to the same key.
+    return (
+        f"reverse:{provider}:z{zoom}:"
+        f"{round(lat, decimals) + 0.0:.{decimals}f},"
+        f"{round(lng, decimals) + 0.0:.{decimals}f}"
+    )
+
+
+class CachedResult(NamedTuple):
+    value: Any
+    negative: bool
+
+
+class GeocodeCache:
+    """SQLite-backed key/value store with per-entry expiry and hit counters."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 30 * 86400,
+        negative_ttl_seconds: float = 86400,
+        purge_interval_seconds: float = 3600,
+    ):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.negative_ttl_seconds = float(negative_ttl_seconds)
+        self.purge_interval_seconds = float(purge_interval_seconds)
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                " key TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " negative INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS geocode_cache_expires"
+                " ON geocode_cache (expires_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _count(self, kind: str, result: str) -> None:
+        kind_counts = self._counts.setdefault(
+            kind, {_HIT: 0, _NEGATIVE_HIT: 0, _MISS: 0}
+        )
+        kind_counts[result] += 1
+        record_cache_lookup("geocode", kind, result)
+
+    def get(self, kind: str, key: str) -> Optional[CachedResult]:
+        """The unexpired entry for *key*, or None. Storage errors count as misses."""
+        row = None
+        with self._lock:
+            try:
+                row = (
+                    self._connection()
+                    .execute(
+                        "SELECT value, negative FROM geocode_cache"
+                        " WHERE key = ? AND expires_at > ?",
+                        (key, time.time()),
+                    )
+                    .fetchone()
+                )
+            except sqlite3.Error as exc:
+                logger.warning("Geocode cache read failed: %s", exc)
+            if row is None:
+                self._count(kind, _MISS)
+                return None
+            negative = bool(row[1])
+            self._count(kind, _NEGATIVE_HIT if negative else _HIT)
+        return CachedResult(json.loads(row[0]), negative)
+
+    def set(self, kind: str, key: str, value: Any, negative: bool = False) -> None:
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        if ttl <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache"
+                    " (key, kind, value, negative, created_at, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value), int(negative), now, now + ttl),
+                )
+                if now >= self._next_purge:
+                    self._next_purge = now + self.purge_interval_seconds
+                    self._delete_expired(conn, now)
+                conn.commit()
+            except sqlite3.Error as exc:
+                logger.warning("Geocode cache write failed: %s", exc)
+
+    @staticmethod
+    def _delete_expired(conn: sqlite3.Connection, now: float) -> int:
+        cursor = conn.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (now,))
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Delete expired rows; returns how many were removed."""
+        with self._lock:
+            conn = self._connection()
+            removed = self._delete_expired(conn, time.time())
+            conn.commit()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-kind lookup counts and hit rate for this process."""
+        with self._lock:
+            result: Dict[str, Any] = {}
+            for kind, counts in sorted(self._counts.items()):
+                lookups = sum(counts.values())
+                hits = counts[_HIT] + counts[_NEGATIVE_HIT]
+                result[kind] = dict(
+                    counts,
+                    lookups=lookups,
+                    hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+                )
+            return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[GeocodeCache] = None
+
+
+def get_geocode_cache() -> Optional[GeocodeCache]:
+    """Process-wide cache, or None when GEOCODE_CACHE is off."""
+    global _cache
+    if not _cache_enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeocodeCache(
+                _cache_path(),
+                ttl_seconds=_env_seconds("GEOCODE_CACHE_TTL", 30 * 86400),
+                negative_ttl_seconds=_env_seconds("GEOCODE_CACHE_NEGATIVE_TTL", 86400),
+                purge_interval_seconds=_env_seconds(
+                    "GEOCODE_CACHE_PURGE_INTERVAL", 3600
+                ),
+            )
+        return _cache
+
+
+def reset_geocode_cache() -> None:
+    """Forget the process-wide cache; the next call reopens it from the environment."""
+    global _cache, _cache_lock
+    _cache_lock = threading.Lock()
+    _cache = None
+
+
+# SQLite connections must not cross a fork; children reopen the same file.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_geocode_cache)
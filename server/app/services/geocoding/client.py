@@ -0,0 +1,390 @@
+"""
+Shared Nominatim HTTP client.
+
+Every outbound geocoding request in the process goes through one
+``GeocodingClient`` so that:
+
+* the fair-use rate limit is enforced across all gunicorn workers on the host
+  by a token bucket kept in a small state file and guarded by ``flock``;
+* identical queries already in flight in this process share one request
+  (single flight) instead of each spending a token;
+* user-facing lookups (project create/update) take the ``INTERACTIVE`` lane and
+  queue for the next slot; background enrichment (photo locations) takes the
+  ``BACKGROUND`` lane and only uses slots no interactive request is waiting for;
+* requests made inside ``geocode_deadline(seconds)`` fail fast with
+  ``GeocodeDeadlineExceeded`` when their queue position means they cannot be
+  answered in time, rather than holding a worker thread until they time out.
+
+Callers get the decoded JSON body or the exception, unchanged; mapping
+failures to result dicts stays with the callers.
+
+Configuration (environment variables):
+    NOMINATIM_BASE_URL       — API base URL (default: https://nominatim.openstreetmap.org)
+    NOMINATIM_TIMEOUT        — request timeout in seconds (default: 10)
+    NOMINATIM_USER_AGENT     — User-Agent header value (default: swallow-skyer/1.0)
+    GEOCODE_RATE_LIMIT       — requests per second for the whole host (default: 1; 0 disables)
+    GEOCODE_RATE_BURST       — tokens the bucket can hold (default: 1)
+    GEOCODE_RATE_STATE_PATH  — bucket state file (default: <tmpdir>/swallow-skyer-geocode-rate)
+"""
+
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+try:
+    # Optional dependency; reverse_geocoder degrades to empty answers without it.
+    import requests  # type: ignore
+except Exception:  # pragma: no cover
+    requests = None
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    fcntl = None
+
+from app.services.instrumentation import timed
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Theoretical arrival time of the next request (wall clock, shared by processes).
+_STATE = struct.Struct("<d")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("geocode_deadline", default=None)
+
+
+class GeocodeDeadlineExceeded(Exception):
+    """The request could not be sent and answered before its deadline."""
+
+
+@contextmanager
+def geocode_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound geocoding requests made inside the block to *seconds* from now.
+
+    The budget covers the wait in the rate-limit queue plus the HTTP call;
+    requests that cannot make it raise ``GeocodeDeadlineExceeded`` up front
+    instead of queueing. Nested blocks keep the tighter deadline.
+    """
+    outer = _deadline.get()
+    deadline = None if seconds is None else time.monotonic() + seconds
+    if outer is not None:
+        deadline = outer if deadline is None else min(outer, deadline)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def _state_path() -> str:
+    return os.getenv("GEOCODE_RATE_STATE_PATH") or os.path.join(
+        tempfile.gettempdir(), "swallow-skyer-geocode-rate"
+    )
+
+
+class RateLimiter:
+    """
+    Host-wide request queue: a GCRA token bucket whose state lives in *path*.
+
+    The file holds one timestamp, the theoretical arrival time of the next
+    request. Interactive callers reserve the next free slot under ``flock``
+    and sleep until it, so the queue is FIFO across workers and every caller
+    knows its wait before committing to it; a caller whose slot would fall
+    after its deadline reserves nothing and fails fast. Background callers
+    never reserve: they only take a slot that is free right now and otherwise
+    poll, so queued interactive requests always go first.
+
+    ``rate`` is requests per second; ``rate <= 0`` disables limiting. Without
+    ``fcntl`` (non-POSIX) the queue still works but only within one process.
+    """
+
+    def __init__(self, path: str, rate: float = 1.0, burst: float = 1.0):
+        self.path = path
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._local_lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _reserve(
+        self, priority: int, now: float, max_wait: Optional[float] = None
+    ) -> Tuple[bool, float]:
+        """
+        ``(True, wait)`` when a slot *wait* seconds from *now* was reserved;
+        ``(False, wait)`` when nothing was reserved and the next slot is *wait*
+        seconds away.
+        """
+        interval = 1.0 / self.rate
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.pread(fd, _STATE.size, 0)
+            tat = _STATE.unpack(raw)[0] if len(raw) == _STATE.size else now
+            tat = max(tat, now)
+            wait = max(0.0, tat - (self.burst - 1.0) * interval - now)
+            if (priority != INTERACTIVE and wait > 0) or (
+                max_wait is not None and wait > max_wait
+            ):
+                return False, wait
+            os.pwrite(fd, _STATE.pack(tat + interval), 0)
+            return True, wait
+        finally:
+            os.close(fd)  # also releases the flock
+
+    def acquire(
+        self,
+        priority: Union[int, Callable[[], int]] = INTERACTIVE,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Wait for a request slot; False (without waiting) once it is clear the
+        slot cannot start within *timeout* seconds.
+
+        *priority* may be a callable, re-read on every attempt, so a polling
+        background request can be promoted to a reservation.
+        """
+        if self.rate <= 0:
+            return True
+        started = time.monotonic()
+        while True:
+            remaining = None
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining < 0:
+                    return False
+            lane = priority() if callable(priority) else priority
+            with self._local_lock:
+                reserved, wait = self._reserve(lane, time.time(), remaining)
+            if reserved:
+                if wait > 0:
+                    time.sleep(wait)
+                self.waited_seconds += time.monotonic() - started
+                return True
+            if lane == INTERACTIVE or (remaining is not None and wait > remaining):
+                return False
+            time.sleep(max(wait, 0.001))
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.coalesced = 0
+
+    def do(
+        self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run *fn*, or wait for the identical call already running.
+
+        A caller that joins someone else's flight waits at most *timeout*
+        seconds before raising ``GeocodeDeadlineExceeded``.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise GeocodeDeadlineExceeded("still waiting for an identical request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+class GeocodingClient:
+    """Rate-limited, coalescing GET client for the Nominatim API."""
+
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str,
+        timeout: float,
+        limiter: RateLimiter,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.limiter = limiter
+        self._flights = SingleFlight()
+        # Callers waiting on each in-flight query, counted per lane.
+        self._lanes: Dict[Hashable, Dict[int, int]] = {}
+        self._lanes_lock = threading.Lock()
+        self.requests_sent = 0
+        self.deadline_exceeded = 0
+
+    def get(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any],
+        priority: int = INTERACTIVE,
+    ) -> Any:
+        """
+        Decoded JSON from ``GET {base_url}/{endpoint}``.
+
+        Raises ``requests`` errors, or ``GeocodeDeadlineExceeded`` when the
+        enclosing ``geocode_deadline`` cannot be met.
+        """
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+        deadline = _deadline.get()
+        self._join(key, priority)
+        try:
+            return self._flights.do(
+                key,
+                lambda: self._fetch(
+                    endpoint, params, self._lane_of(key, priority), deadline
+                ),
+                timeout=_remaining(deadline),
+            )
+        except GeocodeDeadlineExceeded:
+            self.deadline_exceeded += 1
+            raise
+        finally:
+            self._leave(key, priority)
+
+    def _join(self, key: Hashable, lane: int) -> None:
+        with self._lanes_lock:
+            waiters = self._lanes.setdefault(key, {})
+            waiters[lane] = waiters.get(lane, 0) + 1
+
+    def _leave(self, key: Hashable, lane: int) -> None:
+        with self._lanes_lock:
+            waiters = self._lanes.get(key)
+            if waiters is None:
+                return
+            waiters[lane] -= 1
+            if not waiters[lane]:
+                del waiters[lane]
+            if not waiters:
+                del self._lanes[key]
+
+    def _lane_of(self, key: Hashable, default: int) -> Callable[[], int]:
+        # An interactive caller joining a background flight promotes it for
+        # as long as any interactive caller is still waiting on it.
+        def lane() -> int:
+            with self._lanes_lock:
+                waiters = self._lanes.get(key)
+                return min(waiters) if waiters else default
+
+        return lane
+
+    def _fetch(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any],
+        lane: Callable[[], int],
+        deadline: Optional[float],
+    ) -> Any:
+        if not self.limiter.acquire(lane, timeout=_remaining(deadline)):
+            raise GeocodeDeadlineExceeded(f"no {endpoint} slot before the deadline")
+        timeout = self.timeout
+        remaining = _remaining(deadline)
+        if remaining is not None:
+            if remaining <= 0:
+                raise GeocodeDeadlineExceeded(f"{endpoint} slot came too late")
+            timeout = min(timeout, remaining)
+        self.requests_sent += 1
+        with timed("nominatim", endpoint):
+            resp = requests.get(
+                f"{self.base_url}/{endpoint}",
+                params=dict(params),
+                headers={"User-Agent": self.user_agent},
+                timeout=timeout,
+            )
+            resp.raise_for_status()
+        return resp.json()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests_sent,
+            "coalesced": self._flights.coalesced,
+            "deadline_exceeded": self.deadline_exceeded,
+            "throttled_seconds": round(self.limiter.waited_seconds, 3),
+        }
+
+
+_client_lock = threading.Lock()
+_client: Optional[GeocodingClient] = None
+
+
+def get_geocoding_client() -> GeocodingClient:
+    """Process-wide client configured from the environment."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeocodingClient(
+                base_url=os.getenv(
+                    "NOMINATIM_BASE_URL", "https://nominatim.openstreetmap.org"
+                ),
+                user_agent=os.getenv("NOMINATIM_USER_AGENT", "swallow-skyer/1.0"),
+                timeout=_env_number("NOMINATIM_TIMEOUT", 10),
+                limiter=RateLimiter(
+                    _state_path(),
+                    rate=_env_number("GEOCODE_RATE_LIMIT", 1.0),
+                    burst=_env_number("GEOCODE_RATE_BURST", 1.0),
+                ),
+            )
+        return _client
+
+
+def reset_geocoding_client() -> None:
+    """Forget the process-wide client; the next call rebuilds it from the environment."""
+    global _client, _client_lock
+    _client_lock = threading.Lock()
+    _client = None
+
+
+# In-flight bookkeeping and locks must not cross a fork.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_geocoding_client)
@@ -0,0 +1,349 @@
+"""
+Offline reverse geocoding against a local gazetteer.
+
+A gazetteer (e.g. the GeoNames ``cities1000.txt`` dump) is compiled once by
+``scripts/build_gazetteer.py`` into a directory of NumPy files:
+
+    points.npy   float32 (N, 3)  unit vectors on the sphere, in KD-tree order
+    axes.npy     int8    (N,)    split axis of the node whose median is at i
+    labels.npy   int32   (N, 3)  city / state / country ids into the string table
+    offsets.npy  int64   (S+1,)  byte offsets of each string in strings.bin
+    strings.bin  utf-8 blob
+
+The KD-tree is implicit: a node covering ``[lo, hi)`` splits at
+``mid = (lo + hi) // 2`` on ``axes[mid]``, so no node objects exist and every
+array can be memory-mapped. Gunicorn workers opening the same directory share
+the page cache instead of each holding a copy. Points are 3-D unit vectors, so
+chord distance is monotonic in great-circle distance and the antimeridian needs
+no special casing.
+
+Lookups answer ``{city, state, country}`` for the nearest place within
+``max_km``; points farther than that from any place (open sea) answer None so
+callers can fall back to the network geocoder.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    # Optional dependency; without it the offline provider is unavailable.
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 16
+
+_FILES = ("points.npy", "axes.npy", "labels.npy", "offsets.npy", "strings.bin")
+
+Place = Dict[str, Optional[str]]
+
+
+def _unit_vectors(lats, lngs):
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], -1)
+
+
+def _chord_sq(km: float) -> float:
+    """Squared chord length on the unit sphere for a surface distance in km."""
+    chord = 2.0 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2.0)
+    return chord * chord
+
+
+def _surface_km(chord_sq: float) -> float:
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_sq) / 2.0))
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+def _build_tree(points) -> Tuple[object, object]:
+    """Reorder *points* into implicit KD-tree layout; returns (order, axes)."""
+    count = len(points)
+    order = np.arange(count)
+    axes = np.full(count, -1, dtype=np.int8)
+    stack = [(0, count)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo <= LEAF_SIZE:
+            continue
+        segment = order[lo:hi]
+        coords = points[segment]
+        axis = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+        mid = (lo + hi) // 2
+        part = np.argpartition(coords[:, axis], mid - lo)
+        order[lo:hi] = segment[part]
+        axes[mid] = axis
+        stack.append((lo, mid))
+        stack.append((mid + 1, hi))
+    return order, axes
+
+
+def write_gazetteer(
+    directory: str,
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    places: Sequence[Tuple[Optional[str], Optional[str], Optional[str]]],
+) -> int:
+    """Compile (lat, lng, (city, state, country)) rows into *directory*."""
+    if np is None:
+        raise RuntimeError("Building a gazetteer requires numpy")
+    os.makedirs(directory, exist_ok=True)
+    strings: List[str] = [""]
+    ids: Dict[str, int] = {"": 0}
+
+    def _intern(value: Optional[str]) -> int:
+        value = value or ""
+        if value not in ids:
+            ids[value] = len(strings)
+            strings.append(value)
+        return ids[value]
+
+    labels = np.array(
+        [
+            [_intern(city), _intern(state), _intern(country)]
+            for city, state, country in places
+        ],
+        dtype=np.int32,
+    ).reshape(-1, 3)
+    points = _unit_vectors(lats, lngs).astype(np.float32).reshape(-1, 3)
+    order, axes = _build_tree(points)
+
+    blob = bytearray()
+    offsets = [0]
+    for value in strings:
+        blob.extend(value.encode("utf-8"))
+        offsets.append(len(blob))
+
+    np.save(os.path.join(directory, "points.npy"), points[order])
+    np.save(os.path.join(directory, "axes.npy"), axes)
+    np.save(os.path.join(directory, "labels.npy"), labels[order])
+    np.save(os.path.join(directory, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(directory, "strings.bin"), "wb") as handle:
+        handle.write(bytes(blob))
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as handle:
+        json.dump({"places": int(len(points)), "leaf_size": LEAF_SIZE}, handle)
+    return int(len(points))
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+
+class Gazetteer:
+    """Memory-mapped nearest-place index built by ``write_gazetteer``."""
+
+    def __init__(self, directory: str, max_km: float = 30.0):
+        if np is None:
+            raise RuntimeError("The offline gazetteer requires numpy")
+        self.directory = directory
+        self.max_km = float(max_km)
+        self._max_chord_sq = _chord_sq(self.max_km)
+        self.points = self._map("points.npy")
+        self.axes = self._map("axes.npy")
+        self.labels = self._map("labels.npy")
+        self.offsets = self._map("offsets.npy")
+        strings_path = os.path.join(directory, "strings.bin")
+        # np.memmap refuses empty files (a gazetteer with no names at all).
+        self.strings = (
+            np.memmap(strings_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(strings_path)
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    def _map(self, name: str):
+        # Plain ndarray views over the mapping: same shared pages, without the
+        # np.memmap subclass overhead on every element access.
+        return np.asarray(np.load(os.path.join(self.directory, name), mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return int(len(self.points))
+
+    def _string(self, index: int) -> Optional[str]:
+        if index == 0:
+            return None
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return bytes(self.strings[start:end]).decode("utf-8")
+
+    def _place(self, position: int) -> Place:
+        city, state, country = (int(v) for v in self.labels[position])
+        return {
+            "city": self._string(city),
+            "state": self._string(state),
+            "country": self._string(country),
+        }
+
+    def _nearest(self, query, best: int = -1, best_d: float = math.inf):
+        """Exact nearest position to unit vector *query* (scalar descent)."""
+        points, axes = self.points, self.axes
+        qx, qy, qz = (float(v) for v in query)
+        q = (qx, qy, qz)
+        # (lo, hi, squared distance from query to the node's splitting plane)
+        stack = [(0, len(points), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= best_d:
+                continue
+            if hi - lo <= LEAF_SIZE:
+                if hi > lo:
+                    diff = points[lo:hi] - query
+                    dist = np.einsum("ij,ij->i", diff, diff)
+                    i = int(dist.argmin())
+                    if dist[i] < best_d:
+                        best, best_d = lo + i, float(dist[i])
+                continue
+            mid = (lo + hi) // 2
+            # Three floats: plain Python arithmetic beats numpy dispatch here.
+            px, py, pz = points[mid].tolist()
+            d = (px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2
+            if d < best_d:
+                best, best_d = mid, d
+            axis = int(axes[mid])
+            gap = q[axis] - (px, py, pz)[axis]
+            if gap < 0:
+                stack.append((mid + 1, hi, max(bound, gap * gap)))
+                stack.append((lo, mid, bound))
+            else:
+                stack.append((lo, mid, max(bound, gap * gap)))
+                stack.append((mid + 1, hi, bound))
+        return best, best_d
+
+    def _candidates(self, queries):
+        """
+        Vectorized descent of all queries to their leaf.
+
+        Returns (best, best_d, exact): the nearest point seen on the way down,
+        and whether that answer is final because no splitting plane on the
+        path is closer to the query than it.
+        """
+        count = len(queries)
+        lo = np.zeros(count, dtype=np.int64)
+        hi = np.full(count, len(self.points), dtype=np.int64)
+        best = np.full(count, -1, dtype=np.int64)
+        best_d = np.full(count, np.inf)
+        plane_d = np.full(count, np.inf)
+        rows = np.arange(count)
+        active = hi - lo > LEAF_SIZE
+        while active.any():
+            idx = rows[active]
+            mid = (lo[idx] + hi[idx]) // 2
+            axis = self.axes[mid].astype(np.int64)
+            pivots = self.points[mid]
+            d = np.einsum("ij,ij->i", pivots - queries[idx], pivots - queries[idx])
+            better = d < best_d[idx]
+            best[idx[better]] = mid[better]
+            best_d[idx[better]] = d[better]
+            gap = queries[idx, axis] - pivots[np.arange(len(idx)), axis]
+            plane_d[idx] = np.minimum(plane_d[idx], gap * gap)
+            left = gap < 0
+            hi[idx[left]] = mid[left]
+            lo[idx[~left]] = mid[~left] + 1
+            active = hi - lo > LEAF_SIZE
+        for offset in range(LEAF_SIZE):
+            position = lo + offset
+            inside = position < hi
+            if not inside.any():
+                break
+            idx = rows[inside]
+            diff = self.points[position[idx]] - queries[idx]
+            d = np.einsum("ij,ij->i", diff, diff)
+            better = d < best_d[idx]
+            best[idx[better]] = position[idx][better]
+            best_d[idx[better]] = d[better]
+        return best, best_d, best_d <= plane_d
+
+    def lookup(self, lat: float, lng: float) -> Optional[Place]:
+        """Nearest place within ``max_km`` of (lat, lng), or None."""
+        if not len(self.points):
+            return None
+        query = _unit_vectors([lat], [lng])[0].astype(np.float32)
+        position, dist = self._nearest(query)
+        if dist > self._max_chord_sq:
+            return None
+        return self._place(position)
+
+    def lookup_many(
+        self, lats: Iterable[float], lngs: Iterable[float]
+    ) -> List[Optional[Place]]:
+        """Vectorized ``lookup`` over many coordinates."""
+        queries = (
+            _unit_vectors(list(lats), list(lngs)).astype(np.float32).reshape(-1, 3)
+        )
+        if not len(self.points) or not len(queries):
+            return [None] * len(queries)
+        best, best_d, exact = self._candidates(queries)
+        results: List[Optional[Place]] = []
+        for query, position, dist, done in zip(queries, best, best_d, exact):
+            if not done:
+                # A closer point may sit across a split; seeding the exact
+                # search with the leaf answer prunes almost every branch.
+                position, dist = self._nearest(query, int(position), float(dist))
+            results.append(
+                self._place(position) if dist <= self._max_chord_sq else None
+            )
+        return results
+
+    def distance_km(self, lat: float, lng: float) -> Optional[float]:
+        """Surface distance to the nearest place (for diagnostics)."""
+        if not len(self.points):
+            return None
+        query = _unit_vectors([lat], [lng])[0].astype(np.float32)
+        return _surface_km(self._nearest(query)[1])
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_gazetteer: Optional[Gazetteer] = None
+_load_failed = False
+
+
+def gazetteer_available(directory: Optional[str]) -> bool:
+    return bool(
+        np is not None
+        and directory
+        and all(os.path.exists(os.path.join(directory, name)) for name in _FILES)
+    )
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """The configured gazetteer (GAZETTEER_PATH), or None when unavailable."""
+    global _gazetteer, _load_failed
+    directory = os.getenv("GAZETTEER_PATH")
+    if _gazetteer is not None or _load_failed:
+        return _gazetteer
+    with _lock:
+        if _gazetteer is None and not _load_failed:
+            if not gazetteer_available(directory):
+                logger.warning("Offline gazetteer not available at %r", directory)
+                _load_failed = True
+                return None
+            try:
+                max_km = float(os.getenv("GAZETTEER_MAX_KM", "30"))
+            except ValueError:
+                max_km = 30.0
+            try:
+                _gazetteer = Gazetteer(directory, max_km=max_km)
+            except Exception as exc:
+                logger.warning("Failed to open gazetteer at %r: %s", directory, exc)
+                _load_failed = True
+        return _gazetteer
+
+
+def reset_gazetteer() -> None:
+    global _gazetteer, _load_failed
+    _gazetteer = None
+    _load_failed = False
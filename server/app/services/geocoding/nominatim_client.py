@@ -14,61 +14,100 @@ Error types:
     ambiguous_address   — multiple geographically distinct results found;
                           includes a `candidates` list for UI disambiguation
     timeout             — request exceeded the configured timeout
+    deadline_exceeded   — the rate-limit queue could not serve the request within
+                          the caller's ``geocode_deadline``; nothing was sent
     http_error          — non-2xx HTTP response from Nominatim
     malformed_response  — unexpected JSON shape in the Nominatim response
     unexpected_error    — uncaught exception during the request
 
-Configuration (environment variables):
-    NOMINATIM_BASE_URL   — API base URL (default: https://nominatim.openstreetmap.org)
-    NOMINATIM_TIMEOUT    — Request timeout in seconds (default: 10)
-    NOMINATIM_USER_AGENT — User-Agent header value (default: swallow-skyer/1.0)
+Successful lookups and deterministic misses (no_results, ambiguous_address)
+are kept in the shared geocode cache (see ``cache.py``), so repeat addresses
+and nearby coordinates skip the network and the throttle entirely.
+
+Requests go through the shared ``GeocodingClient`` (see ``client.py``), which
+owns the endpoint configuration, the host-wide rate limit and request
+coalescing. Lookups default to the ``INTERACTIVE`` lane because they back
+project create/update; pass ``priority=BACKGROUND`` from batch jobs.
 """
 
 import logging
-import os
-import threading
-import time
 from math import atan2, cos, radians, sin, sqrt
 from typing import List, Union
 
 import requests
 
-logger = logging.getLogger(__name__)
+from .cache import forward_key, get_geocode_cache, reverse_key
+from .client import (
+    BACKGROUND,
+    INTERACTIVE,
+    GeocodeDeadlineExceeded,
+    get_geocoding_client,
+)
 
-_BASE_URL: str = os.environ.get(
-    "NOMINATIM_BASE_URL", "https://nominatim.openstreetmap.org"
-).rstrip("/")
-_TIMEOUT: int = int(os.environ.get("NOMINATIM_TIMEOUT", "10"))
-_USER_AGENT: str = os.environ.get("NOMINATIM_USER_AGENT", "swallow-skyer/1.0")
+logger = logging.getLogger(__name__)
 
-# Nominatim fair-use policy: at most one request per second.
-_MIN_INTERVAL: float = 1.0
-_rate_lock = threading.Lock()
-_last_request_time: float = 0.0
+__all__ = ["forward_geocode", "reverse_geocode", "INTERACTIVE", "BACKGROUND"]
 
 # Kilometres between the top-two results that triggers ambiguity detection.
 _AMBIGUITY_THRESHOLD_KM: float = 50.0
 # Maximum number of candidates to request from Nominatim for ambiguity detection.
 _FORWARD_RESULT_LIMIT: int = 5
 
+# Zoom passed to /reverse; also selects the coordinate rounding of cache keys.
+_REVERSE_ZOOM: int = 16
+_CACHE_PROVIDER = "nominatim"
+# Failures that Nominatim will answer the same way next time.
+_CACHEABLE_ERRORS = ("no_results", "ambiguous_address")
+
 GeoSuccess = dict  # { address: str, lat: float, lng: float }
 GeoError = dict  # { type: str, message: str, candidates?: list }
 
 
-def _throttle() -> None:
-    """Block until the minimum inter-request interval has elapsed."""
-    global _last_request_time
-    with _rate_lock:
-        elapsed = time.monotonic() - _last_request_time
-        if elapsed < _MIN_INTERVAL:
-            time.sleep(_MIN_INTERVAL - elapsed)
-        _last_request_time = time.monotonic()
-
-
 def _error(error_type: str, message: str) -> GeoError:
     return {"type": error_type, "message": message}
 
 
+def _busy() -> GeoError:
+    return _error(
+        "deadline_exceeded",
+        "Geocoding is busy and could not answer in time. Try again shortly.",
+    )
+
+
+def _no_results_for_address(address: str) -> GeoError:
+    return _error("no_results", f"No results found for address: {address!r}")
+
+
+def _no_results_for_coords(lat: float, lng: float) -> GeoError:
+    return _error("no_results", f"No address found for coordinates ({lat}, {lng}).")
+
+
+def _ambiguous(address: str, candidates: List[dict]) -> GeoError:
+    return {
+        "type": "ambiguous_address",
+        "message": (
+            f"Multiple locations matched '{address}'. "
+            "Select the correct result or enter coordinates directly."
+        ),
+        "candidates": candidates,
+    }
+
+
+def _remember(kind: str, key: str, result: dict) -> None:
+    cache = get_geocode_cache()
+    if cache is None:
+        return
+    if "address" in result:
+        cache.set(kind, key, result)
+    elif result.get("type") in _CACHEABLE_ERRORS:
+        cache.set(
+            kind,
+            key,
+            {"type": result["type"], "candidates": result.get("candidates")},
+            negative=True,
+        )
+
+
 def _build_address(addr: dict) -> str:
     """Assemble a human-readable address string from a Nominatim address object."""
     parts = [
@@ -127,7 +166,9 @@ def _is_ambiguous(data: list) -> bool:
         return False
 
 
-def forward_geocode(address: str) -> Union[GeoSuccess, GeoError]:
+def forward_geocode(
+    address: str, priority: int = INTERACTIVE
+) -> Union[GeoSuccess, GeoError]:
     """
     Convert an address string to coordinates.
 
@@ -139,22 +180,35 @@ def forward_geocode(address: str) -> Union[GeoSuccess, GeoError]:
     if not address or not address.strip():
         return _error("invalid_input", "Address must be a non-empty string.")
 
-    _throttle()
+    key = forward_key(_CACHE_PROVIDER, address)
+    cache = get_geocode_cache()
+    cached = cache.get("forward", key) if cache is not None else None
+    if cached is not None:
+        if not cached.negative:
+            return dict(cached.value)
+        if cached.value.get("type") == "ambiguous_address":
+            return _ambiguous(address, cached.value.get("candidates") or [])
+        return _no_results_for_address(address)
+
+    result = _fetch_forward(address, priority)
+    _remember("forward", key, result)
+    return result
+
 
+def _fetch_forward(address: str, priority: int) -> Union[GeoSuccess, GeoError]:
     try:
-        resp = requests.get(
-            f"{_BASE_URL}/search",
-            params={
+        data = get_geocoding_client().get(
+            "search",
+            {
                 "q": address.strip(),
                 "format": "json",
                 "limit": _FORWARD_RESULT_LIMIT,
                 "addressdetails": 1,
             },
-            headers={"User-Agent": _USER_AGENT},
-            timeout=_TIMEOUT,
+            priority=priority,
         )
-        resp.raise_for_status()
-        data = resp.json()
+    except GeocodeDeadlineExceeded:
+        return _busy()
     except requests.exceptions.Timeout:
         logger.warning(
             "Nominatim forward geocode timeout for address: %.80s", address
@@ -172,18 +226,10 @@ def forward_geocode(address: str) -> Union[GeoSuccess, GeoError]:
         return _error("unexpected_error", "An unexpected error occurred during geocoding.")
 
     if not data:
-        return _error("no_results", f"No results found for address: {address!r}")
+        return _no_results_for_address(address)
 
     if _is_ambiguous(data):
-        candidates = _extract_candidates(data)
-        return {
-            "type": "ambiguous_address",
-            "message": (
-                f"Multiple locations matched '{address}'. "
-                "Select the correct result or enter coordinates directly."
-            ),
-            "candidates": candidates,
-        }
+        return _ambiguous(address, _extract_candidates(data))
 
     try:
         first = data[0]
@@ -203,7 +249,9 @@ def forward_geocode(address: str) -> Union[GeoSuccess, GeoError]:
     return {"address": normalized, "lat": lat, "lng": lng}
 
 
-def reverse_geocode(lat: float, lng: float) -> Union[GeoSuccess, GeoError]:
+def reverse_geocode(
+    lat: float, lng: float, priority: int = INTERACTIVE
+) -> Union[GeoSuccess, GeoError]:
     """
     Convert coordinates to a human-readable address.
 
@@ -219,23 +267,37 @@ def reverse_geocode(lat: float, lng: float) -> Union[GeoSuccess, GeoError]:
     if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
         return _error("invalid_input", "Coordinates are out of valid range.")
 
-    _throttle()
+    key = reverse_key(_CACHE_PROVIDER, lat, lng, _REVERSE_ZOOM)
+    cache = get_geocode_cache()
+    cached = cache.get("reverse", key) if cache is not None else None
+    if cached is not None:
+        if cached.negative:
+            return _no_results_for_coords(lat, lng)
+        # Entries are shared by nearby points; echo the caller's coordinates.
+        return {"address": cached.value["address"], "lat": lat, "lng": lng}
+
+    result = _fetch_reverse(lat, lng, priority)
+    _remember("reverse", key, result)
+    return result
+
 
+def _fetch_reverse(
+    lat: float, lng: float, priority: int
+) -> Union[GeoSuccess, GeoError]:
     try:
-        resp = requests.get(
-            f"{_BASE_URL}/reverse",
-            params={
+        data = get_geocoding_client().get(
+            "reverse",
+            {
                 "lat": lat,
                 "lon": lng,
                 "format": "json",
-                "zoom": 16,
+                "zoom": _REVERSE_ZOOM,
                 "addressdetails": 1,
             },
-            headers={"User-Agent": _USER_AGENT},
-            timeout=_TIMEOUT,
+            priority=priority,
         )
-        resp.raise_for_status()
-        data = resp.json()
+    except GeocodeDeadlineExceeded:
+        return _busy()
     except requests.exceptions.Timeout:
         logger.warning(
             "Nominatim reverse geocode timeout for coords: (%s, %s)", lat, lng
@@ -255,15 +317,13 @@ def reverse_geocode(lat: float, lng: float) -> Union[GeoSuccess, GeoError]:
         )
 
     if not data or "error" in data:
-        return _error("no_results", f"No address found for coordinates ({lat}, {lng}).")
+        return _no_results_for_coords(lat, lng)
 
     try:
         addr_parts = data.get("address") or {}
         normalized = _build_address(addr_parts) or data.get("display_name", "")
         if not normalized:
-            return _error(
-                "no_results", f"No address found for coordinates ({lat}, {lng})."
-            )
+            return _no_results_for_coords(lat, lng)
     except (KeyError, TypeError) as exc:
         logger.warning("Malformed Nominatim reverse geocode response: %s", exc)
         return _error(
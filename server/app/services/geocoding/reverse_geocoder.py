@@ -1,11 +1,21 @@
 """
 Lightweight reverse geocoding helper.
 
-Defaults to a no-op resolver for offline/local environments. Can be swapped to
-use Nominatim or another provider by replacing the implementation of
-`reverse_geocode`.
+Resolves city/state/country for photo locations. Requests go through the
+shared ``GeocodingClient`` on the ``BACKGROUND`` lane, so they share the
+host-wide Nominatim rate limit and yield to interactive project lookups.
+
+Answers (including "nothing here") are kept in the shared geocode cache keyed
+on coordinates rounded for city zoom, so photos taken around the same town
+resolve without another request.
+
+With ``REVERSE_GEOCODER=offline`` the nearest place in the local gazetteer
+(``GAZETTEER_PATH``, see ``gazetteer.py``) answers first, with no network call
+and no rate limit; coordinates with no place within ``GAZETTEER_MAX_KM`` (or a
+missing gazetteer) fall through to Nominatim as before.
 """
 
+import os
 from typing import Optional, Dict
 
 try:
@@ -14,36 +24,85 @@ try:
 except Exception:  # pragma: no cover
     requests = None
 
+from app.services.instrumentation import timed
+from .cache import get_geocode_cache, reverse_key
+from .client import BACKGROUND, get_geocoding_client
+from .gazetteer import get_gazetteer
+
+# City-level zoom: only city/state/country are needed for photo locations.
+_ZOOM = 10
+_EMPTY = {"city": None, "state": None, "country": None}
+
+
+def _provider() -> str:
+    return (os.getenv("REVERSE_GEOCODER") or "nominatim").strip().lower()
+
+
+def _offline_lookup(latitude: float, longitude: float) -> Optional[Dict]:
+    if _provider() != "offline":
+        return None
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    with timed("gazetteer", "reverse"):
+        return gazetteer.lookup(latitude, longitude)
 
-def reverse_geocode(latitude: float, longitude: float) -> Dict[str, Optional[str]]:
+
+def reverse_geocode(
+    latitude: float, longitude: float, priority: int = BACKGROUND
+) -> Dict[str, Optional[str]]:
     """
     Return best-effort geocoded components for the provided coordinates.
 
     Falls back to None fields if geocoding is unavailable or fails.
     """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return dict(_EMPTY)
+
+    place = _offline_lookup(latitude, longitude)
+    if place is not None:
+        return place
+
     # Default: no external calls in tests/local
     if not requests:
-        return {"city": None, "state": None, "country": None}
+        return dict(_EMPTY)
+
+    key = reverse_key("nominatim", latitude, longitude, _ZOOM)
+    cache = get_geocode_cache()
+    cached = cache.get("reverse_place", key) if cache is not None else None
+    if cached is not None:
+        return dict(cached.value)
 
     try:
-        url = "https://nominatim.openstreetmap.org/reverse"
-        params = {
-            "format": "json",
-            "lat": latitude,
-            "lon": longitude,
-            "zoom": 10,
-            "addressdetails": 1,
-        }
-        headers = {"User-Agent": "swallow-skyer/1.0"}
-        resp = requests.get(url, params=params, headers=headers, timeout=5)
-        resp.raise_for_status()
-        data = resp.json() or {}
+        data = (
+            get_geocoding_client().get(
+                "reverse",
+                {
+                    "format": "json",
+                    "lat": latitude,
+                    "lon": longitude,
+                    "zoom": _ZOOM,
+                    "addressdetails": 1,
+                },
+                priority=priority,
+            )
+            or {}
+        )
         address = data.get("address") or {}
-        return {
-            "city": address.get("city") or address.get("town") or address.get("village"),
+        result = {
+            "city": address.get("city")
+            or address.get("town")
+            or address.get("village"),
             "state": address.get("state"),
             "country": address.get("country"),
         }
     except Exception:
-        return {"city": None, "state": None, "country": None}
+        # Transient failure: answer empty but let the next caller retry.
+        return dict(_EMPTY)
 
+    if cache is not None:
+        negative = not any(result.values())
+        cache.set("reverse_place", key, result, negative=negative)
+    return result
@@ -0,0 +1,430 @@
+"""
+Backend round-trip instrumentation.
+
+Every outbound call to PostgREST (via the shared httpx transport), R2 (via
+botocore events) and Nominatim (via ``timed``) is recorded twice:
+
+* process-wide Prometheus counters/histograms labelled by service, operation,
+  target (table, RPC or S3 operation) and Flask route, served as text from
+  ``/metrics``;
+* a per-request tally kept on ``flask.g`` that is summarised into a
+  ``Server-Timing`` response header and a calls-per-request histogram, which is
+  what makes N+1 regressions visible on dashboards.
+
+Metrics live in process memory, so each gunicorn worker exposes its own series;
+scrape every worker (or aggregate with ``sum by``) in multi-worker deployments.
+
+Configuration (environment variables):
+    METRICS_TOKEN  — when set, ``/metrics`` requires ``Authorization: Bearer <token>``;
+                     unset, it only answers loopback clients
+    SERVER_TIMING  — "false" to stop emitting the Server-Timing header (default: true)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from flask import Flask, g, has_request_context, request
+
+_CALLS_ATTR = "_backend_calls"
+_STARTED_ATTR = "_request_started"
+_NO_ROUTE = "-"
+
+_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+_COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_POSTGREST_OPERATIONS = {
+    "GET": "select",
+    "HEAD": "count",
+    "POST": "insert",
+    "PATCH": "update",
+    "PUT": "upsert",
+    "DELETE": "delete",
+}
+
+
+def _server_timing_enabled() -> bool:
+    return (os.getenv("SERVER_TIMING") or "true").strip().lower() not in (
+        "0",
+        "false",
+        "no",
+    )
+
+
+class _Histogram:
+    """Cumulative-bucket histogram matching the Prometheus exposition model."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Thread-safe store for the handful of metric families we export."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, ...], int] = {}
+        self._errors: Dict[Tuple[str, ...], int] = {}
+        self._call_latency: Dict[Tuple[str, ...], _Histogram] = {}
+        self._calls_per_request: Dict[Tuple[str, ...], _Histogram] = {}
+        self._request_latency: Dict[Tuple[str, ...], _Histogram] = {}
+        self._cache_lookups: Dict[Tuple[str, ...], int] = {}
+
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        target: str,
+        route: str,
+        duration: float,
+        error: bool = False,
+    ) -> None:
+        key = (service, operation, target, route)
+        with self._lock:
+            self._calls[key] = self._calls.get(key, 0) + 1
+            if error:
+                self._errors[key] = self._errors.get(key, 0) + 1
+            hist = self._call_latency.get(key)
+            if hist is None:
+                hist = self._call_latency[key] = _Histogram(_LATENCY_BUCKETS)
+            hist.observe(duration)
+
+    def record_request(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        duration: float,
+        calls_by_service: Dict[str, int],
+    ) -> None:
+        with self._lock:
+            key = (route, method, str(status))
+            hist = self._request_latency.get(key)
+            if hist is None:
+                hist = self._request_latency[key] = _Histogram(_LATENCY_BUCKETS)
+            hist.observe(duration)
+            for service, count in calls_by_service.items():
+                ckey = (service, route)
+                chist = self._calls_per_request.get(ckey)
+                if chist is None:
+                    chist = self._calls_per_request[ckey] = _Histogram(_COUNT_BUCKETS)
+                chist.observe(count)
+
+    def record_cache_lookup(self, cache: str, kind: str, result: str) -> None:
+        key = (cache, kind, result)
+        with self._lock:
+            self._cache_lookups[key] = self._cache_lookups.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cache_lookups.clear()
+            self._calls.clear()
+            self._errors.clear()
+            self._call_latency.clear()
+            self._calls_per_request.clear()
+            self._request_latency.clear()
+
+    def render(self) -> str:
+        """Return all series in the Prometheus text exposition format (0.0.4)."""
+        call_labels = ("service", "operation", "target", "route")
+        lines: List[str] = []
+        with self._lock:
+            _render_counter(
+                lines,
+                "swallow_backend_calls_total",
+                "Outbound backend calls by service, operation, target and route.",
+                call_labels,
+                self._calls,
+            )
+            _render_counter(
+                lines,
+                "swallow_backend_call_errors_total",
+                "Outbound backend calls that raised or returned an error status.",
+                call_labels,
+                self._errors,
+            )
+            _render_histograms(
+                lines,
+                "swallow_backend_call_duration_seconds",
+                "Outbound backend call latency.",
+                call_labels,
+                self._call_latency,
+            )
+            _render_histograms(
+                lines,
+                "swallow_backend_calls_per_request",
+                "Outbound backend calls issued while serving one HTTP request.",
+                ("service", "route"),
+                self._calls_per_request,
+            )
+            _render_histograms(
+                lines,
+                "swallow_http_request_duration_seconds",
+                "Time spent serving HTTP requests.",
+                ("route", "method", "status"),
+                self._request_latency,
+            )
+            _render_counter(
+                lines,
+                "swallow_cache_lookups_total",
+                "Shared cache lookups by cache, kind and result (hit, negative_hit, miss).",
+                ("cache", "kind", "result"),
+                self._cache_lookups,
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(
+    names: Tuple[str, ...], values: Tuple[str, ...], extra: str = ""
+) -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _render_counter(lines, name, help_text, label_names, series) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for labels, value in sorted(series.items()):
+        lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+
+
+def _render_histograms(lines, name, help_text, label_names, series) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, hist in sorted(series.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            le = f'le="{_format_number(bound)}"'
+            lines.append(
+                f"{name}_bucket{_format_labels(label_names, labels, le)} {count}"
+            )
+        inf = 'le="+Inf"'
+        lines.append(
+            f"{name}_bucket{_format_labels(label_names, labels, inf)} {hist.total}"
+        )
+        lines.append(f"{name}_sum{_format_labels(label_names, labels)} {hist.sum:.6f}")
+        lines.append(f"{name}_count{_format_labels(label_names, labels)} {hist.total}")
+
+
+registry = MetricsRegistry()
+
+
+def _current_route() -> str:
+    if not has_request_context():
+        return _NO_ROUTE
+    rule = getattr(request, "url_rule", None)
+    return rule.rule if rule is not None else _NO_ROUTE
+
+
+def record_call(
+    service: str,
+    operation: str,
+    target: str,
+    duration: float,
+    error: bool = False,
+) -> None:
+    """Record one outbound call in the registry and the current request's tally."""
+    registry.record_call(service, operation, target, _current_route(), duration, error)
+    if has_request_context():
+        calls = g.get(_CALLS_ATTR)
+        if calls is None:
+            calls = []
+            setattr(g, _CALLS_ATTR, calls)
+        calls.append((service, duration))
+
+
+def record_cache_lookup(cache: str, kind: str, result: str) -> None:
+    """Count one lookup against a shared cache (e.g. the geocode cache)."""
+    registry.record_cache_lookup(cache, kind, result)
+
+
+@contextmanager
+def timed(service: str, operation: str, target: str = "") -> Iterator[None]:
+    """Time the enclosed block as one outbound call; exceptions count as errors."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        record_call(service, operation, target, time.perf_counter() - started, error)
+
+
+def describe_postgrest_request(method: str, url: str) -> Tuple[str, str, str]:
+    """
+    Map a Supabase HTTP request to (service, operation, target).
+
+    ``/rest/v1/photos`` GET -> ("supabase", "select", "photos"),
+    ``/rest/v1/rpc/fn`` -> ("supabase", "rpc", "fn"),
+    ``/auth/v1/user`` -> ("supabase", "auth", "user").
+    """
+    segments = [part for part in urlparse(url).path.split("/") if part]
+    if len(segments) >= 3 and segments[0] == "rest":
+        if segments[2] == "rpc" and len(segments) >= 4:
+            return "supabase", "rpc", segments[3]
+        return (
+            "supabase",
+            _POSTGREST_OPERATIONS.get(method.upper(), method.lower()),
+            segments[2],
+        )
+    if len(segments) >= 2 and segments[0] in ("auth", "storage", "functions"):
+        return "supabase", segments[0], "/".join(segments[2:]) or segments[0]
+    return "supabase", method.lower(), "/".join(segments) or "/"
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """httpx transport wrapper that records each Supabase round trip."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, req: httpx.Request) -> httpx.Response:
+        service, operation, target = describe_postgrest_request(
+            req.method, str(req.url)
+        )
+        if operation == "insert" and "merge-duplicates" in req.headers.get(
+            "prefer", ""
+        ):
+            operation = "upsert"
+        started = time.perf_counter()
+        try:
+            response = self._transport.handle_request(req)
+        except Exception:
+            record_call(service, operation, target, time.perf_counter() - started, True)
+            raise
+        record_call(
+            service,
+            operation,
+            target,
+            time.perf_counter() - started,
+            response.status_code >= 400,
+        )
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _boto_before_call(model=None, context=None, **_kwargs) -> None:
+    if context is not None:
+        context["swallow_started"] = time.perf_counter()
+        context["swallow_operation"] = getattr(model, "name", "unknown")
+
+
+def _boto_finish(context, error: bool) -> None:
+    started = (context or {}).pop("swallow_started", None)
+    if started is None:
+        return
+    operation = context.get("swallow_operation", "unknown")
+    record_call("r2", operation, "", time.perf_counter() - started, error)
+
+
+def _boto_after_call(context=None, http_response=None, **_kwargs) -> None:
+    status = getattr(http_response, "status_code", 200) or 200
+    _boto_finish(context, status >= 400)
+
+
+def _boto_after_call_error(context=None, **_kwargs) -> None:
+    _boto_finish(context, True)
+
+
+def instrument_boto_client(client) -> None:
+    """Attach timing hooks to a botocore client's event system."""
+    events = client.meta.events
+    events.register(
+        "before-call.s3", _boto_before_call, unique_id="swallow-metrics-before"
+    )
+    events.register(
+        "after-call.s3", _boto_after_call, unique_id="swallow-metrics-after"
+    )
+    events.register(
+        "after-call-error.s3", _boto_after_call_error, unique_id="swallow-metrics-error"
+    )
+
+
+def summarize_calls(calls: List[Tuple[str, float]]) -> Dict[str, Tuple[int, float]]:
+    """Collapse a request tally into {service: (count, total_seconds)}."""
+    summary: Dict[str, Tuple[int, float]] = {}
+    for service, duration in calls:
+        count, total = summary.get(service, (0, 0.0))
+        summary[service] = (count + 1, total + duration)
+    return summary
+
+
+def server_timing_header(
+    summary: Dict[str, Tuple[int, float]], total_seconds: Optional[float]
+) -> str:
+    entries = [
+        f'{service};dur={total * 1000:.1f};desc="{count} calls"'
+        for service, (count, total) in sorted(summary.items())
+    ]
+    if total_seconds is not None:
+        entries.append(f"app;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def init_app(app: Flask) -> None:
+    """Register per-request bookkeeping hooks on *app*."""
+
+    @app.before_request
+    def _start_request_metrics():
+        setattr(g, _STARTED_ATTR, time.perf_counter())
+        setattr(g, _CALLS_ATTR, [])
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        started = g.pop(_STARTED_ATTR, None)
+        calls = g.pop(_CALLS_ATTR, None) or []
+        elapsed = time.perf_counter() - started if started is not None else None
+        summary = summarize_calls(calls)
+        route = _current_route()
+        if route != "/metrics":
+            registry.record_request(
+                route,
+                request.method,
+                response.status_code,
+                elapsed or 0.0,
+                {service: count for service, (count, _) in summary.items()},
+            )
+        if _server_timing_enabled():
+            response.headers["Server-Timing"] = server_timing_header(summary, elapsed)
+        return response
@@ -0,0 +1,84 @@
+"""
+Offline stand-ins for Supabase PostgREST and Cloudflare R2.
+
+With ``OFFLINE_BACKENDS=1`` the Supabase client registry hands out a
+SQLite-backed PostgREST fake and R2Client talks to an in-process S3 fake, so
+upload, listing and export paths can be benchmarked and load-tested without
+credentials. Both fakes record their calls in the backend metrics like the real
+transports and can inject latency to approximate network round trips.
+
+Configuration (environment variables):
+    OFFLINE_BACKENDS            — "1" to enable (default: off)
+    OFFLINE_DB_PATH             — SQLite file shared by workers (default: in-memory, per process)
+    OFFLINE_R2_PATH             — directory for stored objects (default: in-memory, per process)
+    OFFLINE_R2_URL_BASE         — base of object URLs (default: http://127.0.0.1:5000/offline/r2)
+    OFFLINE_SUPABASE_LATENCY_MS — delay per PostgREST request, "base" or "base:jitter" (default: 0)
+    OFFLINE_R2_LATENCY_MS       — delay per S3 operation, same format (default: 0)
+"""
+
+import os
+import threading
+from typing import Optional
+
+from .latency import Latency
+from .object_store import FakeS3Client
+from .postgrest import FakePostgrestClient
+
+OFFLINE_BUCKET = "offline"
+
+_lock = threading.Lock()
+_postgrest: Optional[FakePostgrestClient] = None
+_object_store: Optional[FakeS3Client] = None
+
+
+def offline_backends_enabled() -> bool:
+    return (os.getenv("OFFLINE_BACKENDS") or "").strip().lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
+def object_url_base() -> str:
+    return (
+        os.getenv("OFFLINE_R2_URL_BASE") or "http://127.0.0.1:5000/offline/r2"
+    ).rstrip("/")
+
+
+def get_offline_postgrest() -> FakePostgrestClient:
+    """Process-wide PostgREST fake (created on first use)."""
+    global _postgrest
+    with _lock:
+        if _postgrest is None:
+            _postgrest = FakePostgrestClient(
+                path=os.getenv("OFFLINE_DB_PATH") or ":memory:",
+                latency=Latency.from_env("OFFLINE_SUPABASE_LATENCY_MS"),
+            )
+        return _postgrest
+
+
+def get_offline_object_store() -> FakeS3Client:
+    """Process-wide S3 fake (created on first use)."""
+    global _object_store
+    with _lock:
+        if _object_store is None:
+            _object_store = FakeS3Client(
+                root=os.getenv("OFFLINE_R2_PATH") or None,
+                latency=Latency.from_env("OFFLINE_R2_LATENCY_MS"),
+                url_base=object_url_base(),
+            )
+        return _object_store
+
+
+def reset_offline_backends() -> None:
+    """Drop both fakes; the next call recreates them from the environment."""
+    global _postgrest, _object_store, _lock
+    _lock = threading.Lock()
+    _postgrest = None
+    _object_store = None
+
+
+# SQLite connections must not cross a fork; children reopen the same file.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_offline_backends)
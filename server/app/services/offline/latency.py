@@ -0,0 +1,50 @@
+"""
+Injected latency for the offline backend fakes.
+"""
+
+import os
+import random
+import time
+from typing import Optional
+
+
+class Latency:
+    """Sleep a fixed base delay plus uniform jitter (milliseconds) per call."""
+
+    def __init__(
+        self, base_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None
+    ):
+        self.base_ms = max(0.0, float(base_ms))
+        self.jitter_ms = max(0.0, float(jitter_ms))
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> "Latency":
+        """Build from ``"base"`` or ``"base:jitter"``; empty or invalid means none."""
+        if not spec:
+            return cls()
+        base, _, jitter = spec.strip().partition(":")
+        try:
+            return cls(float(base or 0), float(jitter or 0))
+        except ValueError:
+            return cls()
+
+    @classmethod
+    def from_env(cls, name: str) -> "Latency":
+        return cls.parse(os.getenv(name))
+
+    @property
+    def enabled(self) -> bool:
+        return self.base_ms > 0 or self.jitter_ms > 0
+
+    def sample(self) -> float:
+        """One delay in seconds."""
+        if not self.enabled:
+            return 0.0
+        delay = self.base_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, delay) / 1000.0
+
+    def wait(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
@@ -0,0 +1,274 @@
+"""
+In-process stand-in for the boto3 S3 client used by R2Client.
+
+Implements the operations the application calls (``upload_fileobj``,
+``put_object``, ``get_object`` with ``Range``, ``head_object``,
+``delete_object``, ``delete_objects``, ``list_objects_v2``, ``generate_presigned_url``). Missing
+keys raise botocore ``ClientError`` with the same codes S3 returns, so the
+R2Client error handling runs unchanged.
+
+Objects live in memory, or under a directory (``root``) so several worker
+processes can share one store.
+"""
+
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+from app.services.instrumentation import record_call
+from .latency import Latency
+
+
+def _client_error(code: str, status: int, operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": code},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        },
+        operation,
+    )
+
+
+class _StreamingBody(io.BytesIO):
+    """BytesIO with the botocore StreamingBody helpers callers rely on."""
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class FakeS3Client:
+    """S3 client double with injected latency and per-operation metrics."""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        latency: Optional[Latency] = None,
+        url_base: str = "http://127.0.0.1:5000/offline/r2",
+    ):
+        self.root = root
+        self.latency = latency or Latency()
+        self.url_base = url_base.rstrip("/")
+        self._objects: Dict[Tuple[str, str], Tuple[bytes, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    # -- storage ---------------------------------------------------------
+
+    def _path(self, bucket: str, key: str) -> str:
+        digest = hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _store(
+        self, bucket: str, key: str, body: bytes, content_type: Optional[str]
+    ) -> Dict[str, Any]:
+        meta = {
+            "Bucket": bucket,
+            "Key": key,
+            "ContentLength": len(body),
+            "ContentType": content_type or "binary/octet-stream",
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "LastModified": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        if self.root:
+            path = self._path(bucket, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as handle:
+                handle.write(body)
+            with open(f"{tmp}.meta", "w", encoding="utf-8") as handle:
+                json.dump(meta, handle)
+            os.replace(f"{tmp}.meta", f"{path}.meta")
+            os.replace(tmp, path)
+        else:
+            with self._lock:
+                self._objects[(bucket, key)] = (body, meta)
+        return meta
+
+    def _load(
+        self, bucket: str, key: str, operation: str
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        if self.root:
+            path = self._path(bucket, key)
+            try:
+                with open(f"{path}.meta", "r", encoding="utf-8") as handle:
+                    meta = json.load(handle)
+                with open(path, "rb") as handle:
+                    return handle.read(), meta
+            except FileNotFoundError:
+                pass
+        else:
+            with self._lock:
+                found = self._objects.get((bucket, key))
+            if found is not None:
+                return found
+        code = "404" if operation == "HeadObject" else "NoSuchKey"
+        raise _client_error(code, 404, operation)
+
+    def _remove(self, bucket: str, key: str) -> None:
+        if self.root:
+            path = self._path(bucket, key)
+            for candidate in (path, f"{path}.meta"):
+                try:
+                    os.remove(candidate)
+                except FileNotFoundError:
+                    pass
+        else:
+            with self._lock:
+                self._objects.pop((bucket, key), None)
+
+    def _keys(self, bucket: str):
+        if not self.root:
+            with self._lock:
+                return sorted(key for b, key in self._objects if b == bucket)
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".meta"):
+                    continue
+                with open(
+                    os.path.join(directory, name), "r", encoding="utf-8"
+                ) as handle:
+                    meta = json.load(handle)
+                if meta.get("Bucket") == bucket:
+                    keys.append(meta["Key"])
+        return sorted(keys)
+
+    def _timed(self, operation: str, fn):
+        started = time.perf_counter()
+        error = False
+        try:
+            self.latency.wait()
+            return fn()
+        except Exception:
+            error = True
+            raise
+        finally:
+            record_call("r2", operation, "", time.perf_counter() - started, error)
+
+    # -- boto3 surface ---------------------------------------------------
+
+    def upload_fileobj(
+        self, Fileobj: BinaryIO, Bucket: str, Key: str, ExtraArgs=None, **_kwargs
+    ):
+        content_type = (ExtraArgs or {}).get("ContentType")
+        self._timed(
+            "PutObject", lambda: self._store(Bucket, Key, Fileobj.read(), content_type)
+        )
+
+    def put_object(
+        self,
+        Bucket: str,
+        Key: str,
+        Body=b"",
+        ContentType: Optional[str] = None,
+        **_kwargs,
+    ):
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        meta = self._timed(
+            "PutObject", lambda: self._store(Bucket, Key, data, ContentType)
+        )
+        return {"ETag": meta["ETag"]}
+
+    def head_object(self, Bucket: str, Key: str, **_kwargs) -> Dict[str, Any]:
+        _, meta = self._timed(
+            "HeadObject", lambda: self._load(Bucket, Key, "HeadObject")
+        )
+        return {k: v for k, v in meta.items() if k not in ("Bucket", "Key")}
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, **_kwargs):
+        body, meta = self._timed(
+            "GetObject", lambda: self._load(Bucket, Key, "GetObject")
+        )
+        result = {k: v for k, v in meta.items() if k not in ("Bucket", "Key")}
+        if Range:
+            start, end = self._parse_range(Range, len(body))
+            result["ContentRange"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start : end + 1]
+        result["ContentLength"] = len(body)
+        result["Body"] = _StreamingBody(body)
+        return result
+
+    def delete_object(self, Bucket: str, Key: str, **_kwargs):
+        self._timed("DeleteObject", lambda: self._remove(Bucket, Key))
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any], **_kwargs):
+        objects = Delete.get("Objects") or []
+
+        def _delete_all():
+            for item in objects:
+                self._remove(Bucket, item["Key"])
+
+        self._timed("DeleteObjects", _delete_all)
+        return {"Deleted": [{"Key": item["Key"]} for item in objects]}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        MaxKeys: int = 1000,
+        ContinuationToken: Optional[str] = None,
+        **_kwargs,
+    ) -> Dict[str, Any]:
+        def _list():
+            keys = [k for k in self._keys(Bucket) if k.startswith(Prefix)]
+            if ContinuationToken:
+                keys = [k for k in keys if k > ContinuationToken]
+            page = keys[:MaxKeys]
+            contents = []
+            for key in page:
+                _, meta = self._load(Bucket, key, "ListObjectsV2")
+                contents.append(
+                    {"Key": key, "Size": meta["ContentLength"], "ETag": meta["ETag"]}
+                )
+            result: Dict[str, Any] = {
+                "Contents": contents,
+                "KeyCount": len(contents),
+                "IsTruncated": len(keys) > len(page),
+            }
+            if result["IsTruncated"]:
+                result["NextContinuationToken"] = page[-1]
+            return result
+
+        return self._timed("ListObjectsV2", _list)
+
+    def generate_presigned_url(
+        self, ClientMethod: str, Params=None, ExpiresIn: int = 3600, **_kwargs
+    ):
+        params = Params or {}
+        expires = int(time.time()) + int(ExpiresIn)
+        url = f"{self.url_base}/{params.get('Bucket')}/{quote(params.get('Key', ''))}"
+        return f"{url}?X-Amz-Expires={int(ExpiresIn)}&expires={expires}&method={ClientMethod}"
+
+    # -- helpers ---------------------------------------------------------
+
+    @staticmethod
+    def _parse_range(header: str, size: int) -> Tuple[int, int]:
+        """``bytes=a-b`` / ``bytes=a-`` / ``bytes=-n`` clamped to the object size."""
+        spec = header.split("=", 1)[-1]
+        first, _, last = spec.partition("-")
+        if not first:
+            start = max(0, size - int(last))
+            return start, size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+        if start >= size:
+            raise _client_error("InvalidRange", 416, "GetObject")
+        return start, min(end, size - 1)
+
+    def read(self, bucket: str, key: str) -> Tuple[bytes, Dict[str, Any]]:
+        """Object bytes and metadata without latency (used by the offline route)."""
+        return self._load(bucket, key, "GetObject")
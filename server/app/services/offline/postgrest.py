@@ -0,0 +1,779 @@
+"""
+SQLite-backed stand-in for the supabase-py PostgREST client.
+
+Covers the query-builder subset the application uses: ``table()``/``from_()``,
+``select`` (with ``count`` and one level of embedded resources), ``insert``,
+``upsert``, ``update``, ``delete``, the ``eq``/``neq``/``gt``/``gte``/``lt``/
+``lte``/``in_``/``like``/``ilike``/``is_``/``filter`` operators,
+``order``/``limit``/``offset``/``range`` and ``single``/``maybe_single``.
+
+Rows are stored schemaless as JSON documents, one SQLite table per PostgREST
+table, so any column the application writes is accepted. Top-level filters,
+ordering and paging run in SQLite through ``json_extract``; embedded resources
+are joined in Python by foreign-key naming convention (``<table>_id``).
+Responses use postgrest-py's own ``APIResponse``/``APIError`` types.
+"""
+
+import datetime
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from postgrest import APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from postgrest.exceptions import APIError
+
+from app.services.instrumentation import record_call
+from .latency import Latency
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Tables keyed by another column instead of a generated ``id``.
+NO_GENERATED_ID = frozenset(
+    {"project_plans", "project_stats", "photo_upload_reservations"}
+)
+
+# Unique constraints beyond ``id`` (first entry is the default upsert target).
+UNIQUE_KEYS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "project_members": (("project_id", "user_id"),),
+    "project_plans": (("project_id",),),
+    "project_stats": (("project_id",),),
+    "photo_upload_reservations": (("photo_id",),),
+}
+
+# Column defaults the application relies on (mirrors the Supabase schema).
+COLUMN_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "projects": {"show_on_projects": True},
+    "photos": {"show_on_photos": True},
+    "project_members": {"role": "Viewer"},
+    "locations": {"marker": "photo"},
+    "project_stats": {"photo_count": 0, "location_count": 0, "storage_bytes": 0},
+}
+
+# Columns given an expression index in every table.
+_INDEXED_COLUMNS = ("id", "project_id", "user_id")
+
+_SQL_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+}
+
+
+def _now_iso() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def _singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+def _sql_value(value: Any) -> Any:
+    """Bind parameter matching what json_extract returns for the stored value."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _to_doc(row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy a written row, storing dates the way PostgREST returns them (ISO text)."""
+    return {
+        key: (
+            value.isoformat()
+            if isinstance(value, (datetime.date, datetime.datetime))
+            else value
+        )
+        for key, value in (row or {}).items()
+    }
+
+
+def _json_path(column: str) -> str:
+    if not _IDENTIFIER.match(column):
+        raise APIError(
+            {"code": "PGRST100", "message": f"invalid column name {column!r}"}
+        )
+    return f"json_extract(doc, '$.{column}')"
+
+
+def _like_to_regex(pattern: str, ignore_case: bool) -> "re.Pattern[str]":
+    parts = [
+        ".*" if ch in "%*" else "." if ch == "_" else re.escape(ch) for ch in pattern
+    ]
+    return re.compile("^" + "".join(parts) + "$", re.IGNORECASE if ignore_case else 0)
+
+
+def _python_match(value: Any, op: str, criteria: Any) -> bool:
+    """Evaluate one filter against a value in Python (embedded resources)."""
+    if op == "is":
+        if criteria is None or str(criteria).lower() == "null":
+            return value is None
+        return value is (str(criteria).lower() == "true")
+    if op == "in":
+        return value in criteria
+    if value is None:
+        return False
+    if op in ("like", "ilike"):
+        return bool(_like_to_regex(str(criteria), op == "ilike").match(str(value)))
+    if isinstance(criteria, datetime.date):
+        criteria = criteria.isoformat()
+    try:
+        if op == "eq":
+            return value == criteria
+        if op == "neq":
+            return value != criteria
+        if op == "gt":
+            return value > criteria
+        if op == "gte":
+            return value >= criteria
+        if op == "lt":
+            return value < criteria
+        if op == "lte":
+            return value <= criteria
+    except TypeError:
+        return False
+    raise APIError({"code": "PGRST100", "message": f"unsupported operator {op!r}"})
+
+
+def _split_top_level(spec: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for ch in spec:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    tail = "".join(current).strip()
+    if tail:
+        parts.append(tail)
+    return [part for part in parts if part]
+
+
+def _parse_select(spec: str) -> List[Dict[str, Any]]:
+    """Parse a PostgREST select string into column / star / embed items."""
+    items: List[Dict[str, Any]] = []
+    for part in _split_top_level(spec or "*"):
+        alias = None
+        if ":" in part.split("(", 1)[0] and "::" not in part.split("(", 1)[0]:
+            alias, part = part.split(":", 1)
+        if "(" in part:
+            head, inner = part.split("(", 1)
+            table, _, hint = head.strip().partition("!")
+            items.append(
+                {
+                    "kind": "embed",
+                    "table": table,
+                    "alias": (alias or table).strip(),
+                    "inner": hint == "inner",
+                    "items": _parse_select(inner.rsplit(")", 1)[0]),
+                }
+            )
+        elif part == "*":
+            items.append({"kind": "star"})
+        else:
+            column = part.split("::", 1)[0].strip()
+            items.append(
+                {"kind": "column", "column": column, "alias": (alias or column).strip()}
+            )
+    return items
+
+
+class _SqliteStore:
+    """One JSON-document table per PostgREST table in a single SQLite database."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+        self._tables: set = set()
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def ensure_table(self, table: str) -> str:
+        if not _IDENTIFIER.match(table):
+            raise APIError(
+                {"code": "PGRST205", "message": f"invalid table name {table!r}"}
+            )
+        if table not in self._tables:
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" '
+                "(_rowid INTEGER PRIMARY KEY AUTOINCREMENT, doc TEXT NOT NULL)"
+            )
+            for column in _INDEXED_COLUMNS:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}__{column}" '
+                    f'ON "{table}" ({_json_path(column)})'
+                )
+            self._tables.add(table)
+        return f'"{table}"'
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        return self._conn.execute(sql, list(params)).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FakeAuth:
+    """
+    Minimal ``client.auth``: ``get_user(token)`` accepts any non-empty token.
+
+    ``user:<id>`` tokens resolve to that user id; any other token maps to a
+    stable UUID derived from the token so load tests can simulate many users.
+    """
+
+    def get_user(self, token: str):
+        token = (token or "").strip()
+        if not token:
+            raise APIError({"code": "401", "message": "missing token"})
+        if token.startswith("user:"):
+            user_id = token[len("user:") :]
+        else:
+            user_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"offline:{token}"))
+        return SimpleNamespace(user={"id": user_id, "email": f"{user_id}@offline.test"})
+
+
+class FakePostgrestClient:
+    """Drop-in for the ``supabase.Client`` surface used by SupabaseClient."""
+
+    def __init__(self, path: str = ":memory:", latency: Optional[Latency] = None):
+        self.store = _SqliteStore(path)
+        self.latency = latency or Latency()
+        self.auth = FakeAuth()
+
+    def table(self, name: str) -> "_RequestBuilder":
+        return _RequestBuilder(self, name)
+
+    from_ = table
+
+    def seed(self, table: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows directly (no latency, no instrumentation)."""
+        return _Query(self, table, "insert", payload=list(rows))._run()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        """Every stored document of *table*, in insertion order."""
+        with self.store.lock:
+            name = self.store.ensure_table(table)
+            rows = self.store.execute(f"SELECT doc FROM {name} ORDER BY _rowid")
+        return [json.loads(doc) for (doc,) in rows]
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class _RequestBuilder:
+    def __init__(self, client: FakePostgrestClient, table: str):
+        self._client = client
+        self._table = table
+
+    def select(self, *columns: str, count: Optional[str] = None, **_kwargs) -> "_Query":
+        spec = ",".join(columns) if columns else "*"
+        return _Query(self._client, self._table, "select", columns=spec, count=count)
+
+    def insert(
+        self, json_data, count=None, returning=None, upsert=False, default_to_null=True
+    ):
+        op = "upsert" if upsert else "insert"
+        return _Query(self._client, self._table, op, payload=json_data, count=count)
+
+    def upsert(
+        self,
+        json_data,
+        count=None,
+        returning=None,
+        ignore_duplicates=False,
+        on_conflict="",
+        default_to_null=True,
+    ):
+        query = _Query(
+            self._client, self._table, "upsert", payload=json_data, count=count
+        )
+        query.on_conflict = tuple(
+            c.strip() for c in on_conflict.split(",") if c.strip()
+        )
+        query.ignore_duplicates = ignore_duplicates
+        return query
+
+    def update(self, json_data, count=None, returning=None) -> "_Query":
+        return _Query(
+            self._client, self._table, "update", payload=json_data, count=count
+        )
+
+    def delete(self, count=None, returning=None) -> "_Query":
+        return _Query(self._client, self._table, "delete", count=count)
+
+
+class _Query:
+    """Filter/modifier chain terminated by ``execute()``."""
+
+    def __init__(
+        self,
+        client: FakePostgrestClient,
+        table: str,
+        op: str,
+        columns: str = "*",
+        payload: Any = None,
+        count: Optional[str] = None,
+    ):
+        self._client = client
+        self._table = table
+        self._op = op
+        self._columns = columns
+        self._payload = payload
+        self._count = count
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: List[Tuple[str, bool, Optional[bool]]] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._single: Optional[str] = None
+        self.on_conflict: Tuple[str, ...] = ()
+        self.ignore_duplicates = False
+
+    # -- filters ---------------------------------------------------------
+
+    def _add(self, column: str, op: str, value: Any) -> "_Query":
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._add(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._add(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._add(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._add(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._add(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._add(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self._add(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._add(column, "ilike", pattern)
+
+    def is_(self, column, value):
+        return self._add(column, "is", value)
+
+    def in_(self, column, values):
+        return self._add(column, "in", list(values))
+
+    def filter(self, column, operator, criteria):
+        """Raw ``filter(column, "gte", value)`` / ``filter(column, "in", "(a,b)")``."""
+        if operator == "in" and isinstance(criteria, str):
+            criteria = [
+                v.strip().strip('"')
+                for v in criteria.strip("()").split(",")
+                if v.strip()
+            ]
+        return self._add(column, operator, criteria)
+
+    def or_(self, filters, reference_table=None):
+        """``or_("city.is.null,country.eq.US")``; flat (un-nested) lists only."""
+        conditions = []
+        for term in _split_top_level(filters):
+            column, operator, criteria = term.split(".", 2)
+            if operator == "in":
+                criteria = [
+                    v.strip().strip('"')
+                    for v in criteria.strip("()").split(",")
+                    if v.strip()
+                ]
+            conditions.append((column, operator, criteria))
+        return self._add("", "or", conditions)
+
+    # -- modifiers -------------------------------------------------------
+
+    def order(self, column, desc=False, nullsfirst=None, foreign_table=None):
+        self._order.append((column, bool(desc), nullsfirst))
+        return self
+
+    def limit(self, size, foreign_table=None):
+        self._limit = int(size)
+        return self
+
+    def offset(self, size):
+        self._offset = int(size)
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    def single(self):
+        self._single = "single"
+        return self
+
+    def maybe_single(self):
+        self._single = "maybe"
+        return self
+
+    def select(self, *columns: str):
+        """Columns returned by a write (``insert(...).select("id")``)."""
+        self._columns = ",".join(columns) if columns else "*"
+        return self
+
+    # -- execution -------------------------------------------------------
+
+    def execute(self):
+        started = time.perf_counter()
+        error = False
+        try:
+            self._client.latency.wait()
+            rows, count = self._run(with_count=True)
+            return self._respond(rows, count)
+        except Exception:
+            error = True
+            raise
+        finally:
+            record_call(
+                "supabase", self._op, self._table, time.perf_counter() - started, error
+            )
+
+    def _respond(self, rows: List[Dict[str, Any]], count: Optional[int]):
+        if self._single is None:
+            return APIResponse(data=rows, count=count)
+        if len(rows) == 1:
+            return SingleAPIResponse(data=rows[0], count=count)
+        if not rows and self._single == "maybe":
+            return None
+        raise APIError(
+            {
+                "code": "PGRST116",
+                "message": "Cannot coerce the result to a single JSON object",
+                "details": f"The result contains {len(rows)} rows",
+            }
+        )
+
+    def _run(self, with_count: bool = False):
+        store = self._client.store
+        with store.lock:
+            store.ensure_table(self._table)
+            if self._op == "select":
+                rows, count = self._select()
+            elif self._op in ("insert", "upsert"):
+                rows, count = self._write_rows(), None
+            elif self._op == "update":
+                rows, count = self._update(), None
+            elif self._op == "delete":
+                rows, count = self._delete(), None
+            else:  # pragma: no cover - builder only creates the ops above
+                raise APIError(
+                    {"code": "PGRST100", "message": f"unsupported op {self._op}"}
+                )
+            if self._op != "select" and self._columns != "*":
+                items = _parse_select(self._columns)
+                rows = [self._project(row, items) for row in rows]
+        if with_count:
+            return rows, (len(rows) if self._count and count is None else count)
+        return rows
+
+    def _where(self, filters: Sequence[Tuple[str, str, Any]]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, op, value in filters:
+            if op == "or":
+                alternatives = [self._where([condition]) for condition in value]
+                clauses.append(
+                    "("
+                    + " OR ".join(
+                        clause[len(" WHERE ") :] for clause, _ in alternatives
+                    )
+                    + ")"
+                )
+                for _, alternative_params in alternatives:
+                    params.extend(alternative_params)
+                continue
+            path = _json_path(column)
+            if op in _SQL_OPERATORS:
+                clauses.append(f"{path} {_SQL_OPERATORS[op]} ?")
+                params.append(_sql_value(value))
+            elif op == "in":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{path} IN ({','.join('?' for _ in value)})")
+                params.extend(_sql_value(v) for v in value)
+            elif op == "is":
+                if value is None or str(value).lower() == "null":
+                    clauses.append(f"{path} IS NULL")
+                else:
+                    clauses.append(f"{path} = ?")
+                    params.append(1 if str(value).lower() == "true" else 0)
+            elif op == "like":
+                clauses.append(f"{path} GLOB ?")
+                params.append(str(value).replace("%", "*").replace("_", "?"))
+            elif op == "ilike":
+                clauses.append(f"lower({path}) LIKE lower(?)")
+                params.append(str(value).replace("*", "%"))
+            else:
+                raise APIError(
+                    {"code": "PGRST100", "message": f"unsupported operator {op!r}"}
+                )
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _matching(
+        self, filters=None, paged: bool = False
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        table = self._client.store.ensure_table(self._table)
+        where, params = self._where(self._filters if filters is None else filters)
+        sql = f"SELECT _rowid, doc FROM {table}{where}"
+        if self._order:
+            terms = []
+            for column, desc, nullsfirst in self._order:
+                if nullsfirst is None:
+                    nullsfirst = desc  # PostgreSQL default: NULLs sort as largest
+                terms.append(
+                    f"{_json_path(column)} {'DESC' if desc else 'ASC'} "
+                    f"NULLS {'FIRST' if nullsfirst else 'LAST'}"
+                )
+            sql += " ORDER BY " + ", ".join(terms)
+        else:
+            sql += " ORDER BY _rowid"
+        if paged and (self._limit is not None or self._offset):
+            sql += " LIMIT ? OFFSET ?"
+            params += [
+                self._limit if self._limit is not None else -1,
+                self._offset or 0,
+            ]
+        return [
+            (rowid, json.loads(doc))
+            for rowid, doc in self._client.store.execute(sql, params)
+        ]
+
+    # -- select ----------------------------------------------------------
+
+    def _select(self) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        items = _parse_select(self._columns)
+        embeds = [item for item in items if item["kind"] == "embed"]
+        top = [f for f in self._filters if "." not in f[0]]
+        nested = [f for f in self._filters if "." in f[0]]
+        # Inner joins and embedded filters change which parents survive, so
+        # paging and counting have to happen after the join.
+        post_filter = bool(nested) or any(e["inner"] for e in embeds)
+
+        docs = [doc for _, doc in self._matching(top, paged=not post_filter)]
+        for embed in embeds:
+            filters = [
+                (column.split(".", 1)[1], op, value)
+                for column, op, value in nested
+                if column.split(".", 1)[0] == embed["alias"]
+            ]
+            docs = self._attach_embed(docs, embed, filters)
+
+        count = None
+        if post_filter:
+            count = len(docs)
+            start = self._offset or 0
+            docs = docs[
+                start : start + self._limit if self._limit is not None else None
+            ]
+        elif self._count:
+            table = self._client.store.ensure_table(self._table)
+            where, params = self._where(top)
+            sql = f"SELECT count(*) FROM {table}{where}"
+            count = self._client.store.execute(sql, params)[0][0]
+        return [self._project(doc, items) for doc in docs], count
+
+    def _attach_embed(self, docs, embed, filters) -> List[Dict[str, Any]]:
+        child = embed["table"]
+        child_query = _Query(self._client, child, "select")
+        self._client.store.ensure_table(child)
+        fk = f"{_singular(child)}_id"
+        many_to_one = any(fk in doc for doc in docs)
+        if many_to_one:
+            # parent.<child>_id -> child.id
+            keys = list({doc.get(fk) for doc in docs if doc.get(fk) is not None})
+            children = [row for _, row in child_query._matching([("id", "in", keys)])]
+            link, parent_key = "id", fk
+        else:
+            # child.<parent>_id -> parent.id (one-to-one when unique on the child)
+            back = f"{_singular(self._table)}_id"
+            keys = list({doc.get("id") for doc in docs if doc.get("id") is not None})
+            children = [row for _, row in child_query._matching([(back, "in", keys)])]
+            link, parent_key = back, "id"
+
+        # Resolve embeds nested inside this one; inner joins there drop children.
+        for nested in embed["items"]:
+            if nested["kind"] == "embed":
+                children = child_query._attach_embed(children, nested, [])
+
+        grouped: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in children:
+            grouped.setdefault(row.get(link), []).append(row)
+        one = many_to_one or (link,) in UNIQUE_KEYS.get(child, ())
+        for doc in docs:
+            matches = grouped.get(doc.get(parent_key), [])
+            doc[embed["alias"]] = (matches[0] if matches else None) if one else matches
+
+        kept = []
+        for doc in docs:
+            value = doc.get(embed["alias"])
+            rows = [value] if one and value is not None else ([] if one else value)
+            rows = [
+                r
+                for r in rows
+                if all(_python_match(r.get(c), op, v) for c, op, v in filters)
+            ]
+            if one:
+                doc[embed["alias"]] = rows[0] if rows else None
+            else:
+                doc[embed["alias"]] = rows
+            if embed["inner"] and not rows:
+                continue
+            kept.append(doc)
+        return kept
+
+    def _project(
+        self, doc: Dict[str, Any], items: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for item in items:
+            if item["kind"] == "star":
+                aliases = self._embed_aliases(items)
+                out.update({k: v for k, v in doc.items() if k not in aliases})
+            elif item["kind"] == "column":
+                out[item["alias"]] = doc.get(item["column"])
+            else:
+                value = doc.get(item["alias"])
+                if isinstance(value, list):
+                    out[item["alias"]] = [
+                        self._project(v, item["items"]) for v in value
+                    ]
+                elif isinstance(value, dict):
+                    out[item["alias"]] = self._project(value, item["items"])
+                else:
+                    out[item["alias"]] = None
+        return out
+
+    @staticmethod
+    def _embed_aliases(items: List[Dict[str, Any]]) -> set:
+        return {item["alias"] for item in items if item["kind"] == "embed"}
+
+    # -- writes ----------------------------------------------------------
+
+    def _conflict_targets(self) -> Tuple[Tuple[str, ...], ...]:
+        keys = UNIQUE_KEYS.get(self._table, ())
+        if self._table not in NO_GENERATED_ID:
+            keys = (("id",),) + keys
+        return keys
+
+    def _find(
+        self, doc: Dict[str, Any], columns: Tuple[str, ...]
+    ) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if any(doc.get(column) is None for column in columns):
+            return None
+        found = self._matching([(column, "eq", doc[column]) for column in columns])
+        return found[0] if found else None
+
+    def _write_rows(self) -> List[Dict[str, Any]]:
+        payload = self._payload
+        rows = payload if isinstance(payload, list) else [payload]
+        store = self._client.store
+        table = store.ensure_table(self._table)
+        written: List[Dict[str, Any]] = []
+        store.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                doc = _to_doc(row)
+                if self._op == "upsert":
+                    target = self.on_conflict or self._conflict_targets()[0]
+                    existing = self._find(doc, target)
+                    if existing is not None:
+                        if self.ignore_duplicates:
+                            continue
+                        rowid, current = existing
+                        current.update(doc)
+                        store.execute(
+                            f"UPDATE {table} SET doc = ? WHERE _rowid = ?",
+                            [json.dumps(current, default=str), rowid],
+                        )
+                        written.append(current)
+                        continue
+                if self._table not in NO_GENERATED_ID and doc.get("id") is None:
+                    doc["id"] = str(uuid.uuid4())
+                doc.setdefault("created_at", _now_iso())
+                for column, default in COLUMN_DEFAULTS.get(self._table, {}).items():
+                    doc.setdefault(column, default)
+                for columns in self._conflict_targets():
+                    if self._find(doc, columns) is not None:
+                        raise APIError(
+                            {
+                                "code": "23505",
+                                "message": (
+                                    f"duplicate key value violates unique constraint "
+                                    f'"{self._table}_{"_".join(columns)}_key"'
+                                ),
+                            }
+                        )
+                store.execute(
+                    f"INSERT INTO {table} (doc) VALUES (?)",
+                    [json.dumps(doc, default=str)],
+                )
+                written.append(doc)
+            store.execute("COMMIT")
+        except Exception:
+            store.execute("ROLLBACK")
+            raise
+        return written
+
+    def _update(self) -> List[Dict[str, Any]]:
+        store = self._client.store
+        table = store.ensure_table(self._table)
+        changes = _to_doc(self._payload)
+        updated = []
+        store.execute("BEGIN IMMEDIATE")
+        try:
+            for rowid, doc in self._matching():
+                doc.update(changes)
+                store.execute(
+                    f"UPDATE {table} SET doc = ? WHERE _rowid = ?",
+                    [json.dumps(doc, default=str), rowid],
+                )
+                updated.append(doc)
+            store.execute("COMMIT")
+        except Exception:
+            store.execute("ROLLBACK")
+            raise
+        return updated
+
+    def _delete(self) -> List[Dict[str, Any]]:
+        store = self._client.store
+        table = store.ensure_table(self._table)
+        matches = self._matching()
+        if matches:
+            store.execute(
+                f"DELETE FROM {table} WHERE _rowid IN ({','.join('?' for _ in matches)})",
+                [rowid for rowid, _ in matches],
+            )
+        return [doc for _, doc in matches]
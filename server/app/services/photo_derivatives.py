@@ -0,0 +1,68 @@
+"""
+Background derivatives of photos uploaded directly to R2.
+
+A direct upload (``/api/photos/uploads``) is recorded as soon as finalize has
+verified the object and read its EXIF header. The thumbnail needs the whole
+image, so it is made afterwards on a small thread pool in the web worker:
+the job downloads the original from R2, decodes it and stores the thumbnail.
+Until it finishes the photo has no thumbnail columns and clients show the
+original.
+
+Configuration (environment variables):
+    PHOTO_DERIVATIVE_WORKERS — concurrent derivative jobs per web worker (default: 2)
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(_env_number("PHOTO_DERIVATIVE_WORKERS", 2))),
+                    thread_name_prefix="photo-derivatives",
+                )
+    return _executor
+
+
+def submit_derivative(photo_id: str, work: Callable[[], None]) -> None:
+    """Run *work* for *photo_id* in the background; failures are logged."""
+
+    def _run() -> None:
+        try:
+            work()
+        except Exception:
+            logger.exception("Derivative generation failed for photo %s", photo_id)
+
+    _get_executor().submit(_run)
+
+
+def reset_photo_derivatives() -> None:
+    """Forget the pool; the next job re-reads PHOTO_DERIVATIVE_WORKERS."""
+    global _executor, _executor_lock
+    _executor_lock = threading.Lock()
+    _executor = None
+
+
+# Pool threads must not cross a fork.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_photo_derivatives)
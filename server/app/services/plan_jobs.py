@@ -0,0 +1,321 @@
+"""
+Background plan processing jobs.
+
+Plan upload, replace and calibration requests sent with ``async=1`` answer
+202 with a job id as soon as the file has been validated; rasterization,
+storage and the ``project_plans`` write then run on a small thread pool in
+the web worker (the raster itself in an isolated process, see
+plan_raster_pool). Job state is kept in a SQLite file so a status poll can
+land on any worker of the host; the finished job carries the HTTP status and
+body the synchronous request would have returned.
+
+Each row records the pid of the worker that owns it, and a running job
+refreshes its heartbeat every PLAN_JOBS_HEARTBEAT seconds. A status poll that
+finds an unfinished job whose owner has exited, or a running job whose
+heartbeat is older than PLAN_JOBS_STALE_AFTER, marks it failed instead of
+reporting it pending forever.
+
+Configuration (environment variables):
+    PLAN_JOBS_PATH        — SQLite file (default: <tmpdir>/swallow-skyer-plan-jobs.sqlite3)
+    PLAN_JOBS_WORKERS     — concurrent jobs per web worker (default: 2)
+    PLAN_JOBS_TTL         — seconds a finished job stays readable (default: 86400)
+    PLAN_JOBS_HEARTBEAT   — seconds between heartbeats of a running job (default: 10)
+    PLAN_JOBS_STALE_AFTER — seconds without a heartbeat before a running job is lost (default: 60)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+LOST_RESULT = {
+    "error": "job_lost",
+    "message": "Plan processing was interrupted; please try again.",
+}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _jobs_path() -> str:
+    return os.getenv("PLAN_JOBS_PATH") or os.path.join(
+        tempfile.gettempdir(), "swallow-skyer-plan-jobs.sqlite3"
+    )
+
+
+class PlanJobStore:
+    """SQLite-backed job table shared by the workers on a host."""
+
+    def __init__(self, path: str, ttl_seconds: float = 86400, stale_after: float = 60):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_after = float(stale_after)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " project_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " status_code INTEGER,"
+                " result TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " owner_pid INTEGER,"
+                " heartbeat_at REAL)"
+            )
+            # Files written before jobs had owners.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(plan_jobs)")}
+            for column, kind in (("owner_pid", "INTEGER"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE plan_jobs ADD COLUMN {column} {kind}")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def create(self, project_id: str, kind: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "DELETE FROM plan_jobs WHERE updated_at < ? AND status IN (?, ?)",
+                (now - self.ttl_seconds, SUCCEEDED, FAILED),
+            )
+            conn.execute(
+                "INSERT INTO plan_jobs (id, project_id, kind, status,"
+                " created_at, updated_at, owner_pid, heartbeat_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, project_id, kind, PENDING, now, now, os.getpid(), now),
+            )
+            conn.commit()
+        return job_id
+
+    def update(
+        self,
+        job_id: str,
+        status: str,
+        status_code: Optional[int] = None,
+        result: Any = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE plan_jobs SET status = ?, status_code = ?, result = ?,"
+                " updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                (
+                    status,
+                    status_code,
+                    None if result is None else json.dumps(result),
+                    now,
+                    now,
+                    job_id,
+                ),
+            )
+            conn.commit()
+
+    def heartbeat(self, job_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE plan_jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+                (time.time(), job_id, RUNNING),
+            )
+            conn.commit()
+
+    def is_stale(self, job: Dict[str, Any]) -> bool:
+        """True for an unfinished job nobody will finish."""
+        if job["status"] not in (PENDING, RUNNING):
+            return False
+        if job["owner_pid"] is not None and not _pid_alive(job["owner_pid"]):
+            return True
+        if job["status"] == RUNNING or job["owner_pid"] is None:
+            beat = job["heartbeat_at"]
+            if beat is None:
+                beat = job["updated_at"]
+            return time.time() - beat > self.stale_after
+        return False
+
+    def fail_if_stale(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark *job* failed when its owner is gone; returns the current row."""
+        if not self.is_stale(job):
+            return job
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # Guarded on the row we judged, so a job finishing meanwhile wins.
+            conn.execute(
+                "UPDATE plan_jobs SET status = ?, status_code = ?, result = ?,"
+                " updated_at = ? WHERE id = ? AND status = ? AND updated_at = ?"
+                " AND heartbeat_at IS ?",
+                (
+                    FAILED,
+                    500,
+                    json.dumps(LOST_RESULT),
+                    now,
+                    job["job_id"],
+                    job["status"],
+                    job["updated_at"],
+                    job["heartbeat_at"],
+                ),
+            )
+            conn.commit()
+        logger.warning(
+            "Plan job %s (%s) was lost; marked failed", job["job_id"], job["kind"]
+        )
+        return self.get(job["job_id"]) or job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT id, project_id, kind, status, status_code, result,"
+                    " created_at, updated_at, owner_pid, heartbeat_at"
+                    " FROM plan_jobs WHERE id = ?",
+                    (job_id,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "project_id": row[1],
+            "kind": row[2],
+            "status": row[3],
+            "status_code": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "created_at": row[6],
+            "updated_at": row[7],
+            "owner_pid": row[8],
+            "heartbeat_at": row[9],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store_lock = threading.Lock()
+_store: Optional[PlanJobStore] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_plan_job_store() -> PlanJobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlanJobStore(
+                _jobs_path(),
+                ttl_seconds=_env_number("PLAN_JOBS_TTL", 86400),
+                stale_after=_env_number("PLAN_JOBS_STALE_AFTER", 60),
+            )
+        return _store
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _store_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(_env_number("PLAN_JOBS_WORKERS", 2))),
+                    thread_name_prefix="plan-jobs",
+                )
+    return _executor
+
+
+def submit_plan_job(
+    project_id: str, kind: str, work: Callable[[], Tuple[Dict[str, Any], int]]
+) -> str:
+    """
+    Record a pending job and run *work* in the background.
+
+    *work* returns ``(body, status_code)``; a 2xx status marks the job
+    succeeded, anything else (or an exception) failed.
+    """
+    store = get_plan_job_store()
+    job_id = store.create(project_id, kind)
+    interval = max(0.1, _env_number("PLAN_JOBS_HEARTBEAT", 10))
+
+    def _beat(stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                store.heartbeat(job_id)
+            except sqlite3.Error:
+                logger.warning("Plan job %s heartbeat failed", job_id)
+
+    def _run() -> None:
+        store.update(job_id, RUNNING)
+        stop = threading.Event()
+        threading.Thread(
+            target=_beat, args=(stop,), name="plan-job-heartbeat", daemon=True
+        ).start()
+        try:
+            body, status_code = work()
+        except Exception:
+            logger.exception("Plan job %s (%s) crashed", job_id, kind)
+            body = {"error": "internal_error", "message": "Plan processing failed."}
+            status_code = 500
+        finally:
+            stop.set()
+        status = SUCCEEDED if 200 <= status_code < 300 else FAILED
+        store.update(job_id, status, status_code, body)
+
+    _get_executor().submit(_run)
+    return job_id
+
+
+def reset_plan_jobs() -> None:
+    """Forget the store and pool; the next job reopens them from the environment."""
+    global _store, _store_lock, _executor
+    _store_lock = threading.Lock()
+    _store = None
+    _executor = None
+
+
+# SQLite connections and pool threads must not cross a fork.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_plan_jobs)
@@ -0,0 +1,95 @@
+"""
+Sheets of multi-page PDF plans.
+
+Construction plan sets are usually multi-sheet PDFs. When an uploaded plan
+PDF has more than one page, the source PDF is stored once next to a page
+index (each page's size and a low-DPI thumbnail, made in a single pass over
+the document) under a per-revision prefix:
+
+    projects/{project_id}/plans/pages/{revision}/source.pdf
+    projects/{project_id}/plans/pages/{revision}/{page}/thumb.png
+    projects/{project_id}/plans/pages/{revision}/{page}/plan.{ext}
+
+``revision`` is a prefix of the PDF's SHA-256. The overview raster
+(``plans/plan.{ext}``) shows one sheet, ``source_page``; any other sheet is
+rendered from the stored PDF the first time it is requested and kept next to
+its thumbnail, so sheets nobody opens are never rasterized. Replacing the
+plan with a different file starts a new revision and the old prefix is
+deleted as a whole, so a sheet of the previous PDF is never served for the
+new one. Pages are numbered from 1.
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGES_PREFIX_TEMPLATE = "projects/{project_id}/plans/pages/"
+SOURCE_NAME = "source.pdf"
+SOURCE_MIME = "application/pdf"
+THUMB_MIME = "image/png"
+UPLOAD_WORKERS = 8
+
+PageIndex = List[Tuple[Dict[str, Any], bytes]]
+
+
+def pages_prefix(project_id: str) -> str:
+    return PAGES_PREFIX_TEMPLATE.format(project_id=project_id)
+
+
+def revision_path(project_id: str, data: bytes) -> str:
+    """Prefix holding the source, thumbnails and sheet rasters of one PDF."""
+    return f"{pages_prefix(project_id)}{hashlib.sha256(data).hexdigest()[:16]}/"
+
+
+def source_key(pages_path: str) -> str:
+    return f"{pages_path}{SOURCE_NAME}"
+
+
+def thumb_key(pages_path: str, page: int) -> str:
+    return f"{pages_path}{page}/thumb.png"
+
+
+def page_raster_key(pages_path: str, page: int, ext: str) -> str:
+    return f"{pages_path}{page}/plan.{ext}"
+
+
+def page_info(plan: Optional[Dict[str, Any]], page: int) -> Optional[Dict[str, Any]]:
+    """The index entry of *page* in a plan record, or None."""
+    for info in (plan or {}).get("pages") or []:
+        if info.get("page") == page:
+            return info
+    return None
+
+
+def upload_pages(
+    project_id: str, data: bytes, source_page: int, index: PageIndex, r2
+) -> Dict[str, Any]:
+    """
+    Store a multi-page PDF and its thumbnails; returns the project_plans
+    columns describing them. Raises RuntimeError when an upload fails; keys
+    already written are left for the caller to remove with ``r2.delete_prefix``.
+    """
+    path = revision_path(project_id, data)
+    uploads = [(data, source_key(path), SOURCE_MIME)] + [
+        (thumbnail, thumb_key(path, info["page"]), THUMB_MIME)
+        for info, thumbnail in index
+    ]
+    with ThreadPoolExecutor(
+        max_workers=UPLOAD_WORKERS, thread_name_prefix="plan-pages"
+    ) as pool:
+        results = list(pool.map(lambda upload: r2.upload_bytes(*upload), uploads))
+    if not all(results):
+        raise RuntimeError("Failed to upload plan pages")
+
+    logger.info(
+        "Stored %d-page plan PDF for project %s under %s", len(index), project_id, path
+    )
+    return {
+        "pages_path": path,
+        "page_count": len(index),
+        "source_page": source_page,
+        "pages": [info for info, _ in index],
+    }
@@ -0,0 +1,277 @@
+"""
+Content-addressed cache of plan overview rasters.
+
+The calibration step and the upload that follows it usually send the same
+file, and a replace often re-sends an unchanged plan. Rasters are keyed by
+the SHA-256 of the source bytes together with the settings that shape the
+output (render DPI, size cap, encoder preset, PDF page), so a repeat upload
+reuses the encoded raster and its dimensions instead of rendering the PDF
+again, and a settings change never serves a stale raster.
+
+Two tiers:
+
+* memory — an LRU per process, bounded by total bytes;
+* a shared tier, either a directory on the host (``disk``, pruned oldest
+  first past its size budget) or the R2 bucket (``r2``, under
+  ``cache/plan-rasters/``; expire it with a bucket lifecycle rule).
+
+Hits in the shared tier are copied into memory. Lookups are exported to
+``/metrics`` as ``swallow_cache_lookups_total{cache="plan_raster",kind=<tier>}``.
+
+Configuration (environment variables):
+    PLAN_RASTER_CACHE           — "off" disables the cache (default: on)
+    PLAN_RASTER_CACHE_TIER      — disk, r2 or none (default: disk)
+    PLAN_RASTER_CACHE_DIR       — disk tier directory (default: <tmpdir>/swallow-skyer-plan-rasters)
+    PLAN_RASTER_CACHE_DISK_MB   — disk tier budget (default: 1024)
+    PLAN_RASTER_CACHE_MEMORY_MB — memory tier budget per process (default: 64)
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.services.instrumentation import record_cache_lookup
+from app.services.plan_rasterizer import (
+    MAX_RASTER_LONG_EDGE,
+    PDF_RENDER_DPI,
+    encoding_preset,
+    raster_format,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when rasterizer output changes for the same settings.
+CACHE_VERSION = 1
+R2_PREFIX = "cache/plan-rasters/"
+
+Raster = Tuple[bytes, int, int]
+
+
+def _cache_enabled() -> bool:
+    return (os.getenv("PLAN_RASTER_CACHE") or "on").strip().lower() not in (
+        "0",
+        "off",
+        "false",
+        "no",
+    )
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def _cache_dir() -> str:
+    return os.getenv("PLAN_RASTER_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), "swallow-skyer-plan-rasters"
+    )
+
+
+def raster_cache_key(data: bytes, page: int = 1) -> str:
+    """SHA-256 over the rasterizer settings, the PDF page and the source bytes."""
+    digest = hashlib.sha256(
+        f"v{CACHE_VERSION}:{PDF_RENDER_DPI}:{MAX_RASTER_LONG_EDGE}:"
+        f"{encoding_preset()}:p{page}\0".encode("ascii")
+    )
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _decode(encoded: bytes) -> Optional[Raster]:
+    """(bytes, width, height) from an encoded raster; the header is enough."""
+    try:
+        with Image.open(io.BytesIO(encoded)) as img:
+            width, height = img.size
+    except Exception:
+        return None
+    return encoded, width, height
+
+
+class _DiskStore:
+    name = "disk"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            os.utime(path)  # recency for pruning
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class _R2Store:
+    name = "r2"
+
+    def __init__(self, r2):
+        self.r2 = r2
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.r2.download_bytes(f"{R2_PREFIX}{key}")
+
+    def put(self, key: str, data: bytes) -> None:
+        _, mime = raster_format(data)
+        self.r2.upload_bytes(data, f"{R2_PREFIX}{key}", content_type=mime)
+
+
+class PlanRasterCache:
+    """Memory LRU in front of an optional shared store."""
+
+    def __init__(self, memory_bytes: int, store=None):
+        self.memory_bytes = memory_bytes
+        self.store = store
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Raster]" = OrderedDict()
+        self._memory_used = 0
+        self._counts: Dict[str, int] = {"memory": 0, "shared": 0, "miss": 0}
+
+    def _remember(self, key: str, raster: Raster) -> None:
+        size = len(raster[0])
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= len(previous[0])
+            self._memory[key] = raster
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted[0])
+
+    def _count(self, tier: str, result: str) -> None:
+        with self._lock:
+            if result == "miss":
+                self._counts["miss"] += 1
+            else:
+                self._counts["memory" if tier == "memory" else "shared"] += 1
+        record_cache_lookup("plan_raster", tier, result)
+
+    def get(self, key: str) -> Optional[Raster]:
+        with self._lock:
+            raster = self._memory.get(key)
+            if raster is not None:
+                self._memory.move_to_end(key)
+        if raster is not None:
+            self._count("memory", "hit")
+            return raster
+        if self.store is None:
+            self._count("memory", "miss")
+            return None
+        try:
+            encoded = self.store.get(key)
+        except Exception as exc:
+            logger.warning("Plan raster cache read failed: %s", exc)
+            encoded = None
+        raster = _decode(encoded) if encoded else None
+        if raster is None:
+            self._count(self.store.name, "miss")
+            return None
+        self._count(self.store.name, "hit")
+        self._remember(key, raster)
+        return raster
+
+    def put(self, key: str, raster: Raster) -> None:
+        self._remember(key, raster)
+        if self.store is None:
+            return
+        try:
+            self.store.put(key, raster[0])
+        except Exception as exc:
+            logger.warning("Plan raster cache write failed: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._counts,
+                entries=len(self._memory),
+                memory_bytes=self._memory_used,
+                tier=self.store.name if self.store else None,
+            )
+
+
+_cache_lock = threading.Lock()
+_cache: Optional[PlanRasterCache] = None
+
+
+def get_plan_raster_cache() -> Optional[PlanRasterCache]:
+    """Process-wide cache, or None when PLAN_RASTER_CACHE is off."""
+    global _cache
+    if not _cache_enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            tier = (os.getenv("PLAN_RASTER_CACHE_TIER") or "disk").strip().lower()
+            store = None
+            if tier == "disk":
+                store = _DiskStore(
+                    _cache_dir(),
+                    int(_env_number("PLAN_RASTER_CACHE_DISK_MB", 1024) * 1024 * 1024),
+                )
+            elif tier == "r2":
+                from app.services.storage.r2_client import r2_client
+
+                store = _R2Store(r2_client)
+            _cache = PlanRasterCache(
+                int(_env_number("PLAN_RASTER_CACHE_MEMORY_MB", 64) * 1024 * 1024),
+                store,
+            )
+        return _cache
+
+
+def reset_plan_raster_cache() -> None:
+    """Forget the process-wide cache; the next call rebuilds it from the environment."""
+    global _cache, _cache_lock
+    _cache_lock = threading.Lock()
+    _cache = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_plan_raster_cache)
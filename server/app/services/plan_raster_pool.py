@@ -0,0 +1,300 @@
+"""
+Isolated worker processes for plan rasterization.
+
+PyMuPDF rendering and PNG encoding of a large plan can take tens of seconds
+and hundreds of megabytes. ``rasterize_plan`` runs that work in a child
+process, one per job, forked from a forkserver that has already imported
+PyMuPDF and Pillow, so starting a job costs a fork rather than an interpreter.
+The parent enforces:
+
+* a wall-clock timeout per job, and
+* a resident-set limit, read from ``/proc/<pid>/statm`` while the job runs
+  (Linux only; elsewhere only the timeout applies).
+
+A job that breaks either limit is killed and reported as a RasterizeError;
+the web worker and its other requests are unaffected. At most
+PLAN_RASTER_WORKERS jobs run at once per web worker; further callers wait
+for a slot (the wait counts against their timeout).
+
+The child streams results back over a pipe: the overview PNG, then, when
+tiles were requested, every encoded tile of the pyramid (or, for
+``index_pdf_pages``, one message per PDF page). ``run_isolated`` yields each
+message as it arrives, so the parent uploads tiles to R2 while the child is
+still encoding the rest and never holds the whole pyramid; a full pipe
+pauses the child until the parent catches up.
+
+Configuration (environment variables):
+    PLAN_RASTER_ISOLATION    — "off" rasterizes in the request thread (default: on)
+    PLAN_RASTER_WORKERS      — concurrent rasterization processes (default: 2)
+    PLAN_RASTER_TIMEOUT      — seconds per job, including the wait for a slot (default: 120)
+    PLAN_RASTER_MAX_RSS_MB   — resident memory per job before it is killed (default: 1536)
+    PLAN_RASTER_START_METHOD — multiprocessing start method (default: forkserver where available)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.services.plan_rasterizer import (
+    RasterizeError,
+    pdf_page_index,
+    rasterize_to_png,
+)
+from app.services.plan_tiler import iter_tiles, render_tile_source
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_POLL_SECONDS = 0.05
+
+Tile = Tuple[int, int, int, bytes]
+
+
+class RasterResult(NamedTuple):
+    # Overview raster; None when it was not requested.
+    png: Optional[bytes]
+    width: Optional[int]
+    height: Optional[int]
+    # (width, height, tiles) of the tile pyramid, when requested. tiles is a
+    # one-shot iterator streaming from the still-running worker process.
+    tiles: Optional[Tuple[int, int, Iterator[Tile]]]
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def isolation_enabled() -> bool:
+    return (os.getenv("PLAN_RASTER_ISOLATION") or "on").strip().lower() not in (
+        "0",
+        "off",
+        "false",
+        "no",
+    )
+
+
+def plan_raster_messages(
+    data: bytes,
+    filename_hint: str,
+    mime_hint: str,
+    with_tiles: bool,
+    with_overview: bool = True,
+    page: int = 1,
+) -> Iterator[Tuple[Any, ...]]:
+    """The rasterization job: ``("png", bytes, w, h)``, then the pyramid if asked."""
+    if with_overview:
+        png, width, height = rasterize_to_png(
+            data, filename_hint=filename_hint, mime_hint=mime_hint, page=page
+        )
+        yield ("png", png, width, height)
+    if with_tiles:
+        source = render_tile_source(
+            data, filename_hint=filename_hint, mime_hint=mime_hint, page=page
+        )
+        yield ("tile_source", source.width, source.height)
+        for tile in iter_tiles(source):
+            yield ("tile",) + tile
+
+
+def pdf_page_messages(data: bytes) -> Iterator[Tuple[Any, ...]]:
+    """The page index job: ``("page", info, thumbnail_png)`` per PDF page."""
+    for info, thumbnail in pdf_page_index(data):
+        yield ("page", info, thumbnail)
+
+
+def _child_main(conn, job: Callable[..., Iterator[Tuple[Any, ...]]], args) -> None:
+    try:
+        for message in job(*args):
+            conn.send(message)
+        conn.send(("done",))
+    except RasterizeError as exc:
+        conn.send(("error", exc.message))
+    except MemoryError:
+        conn.send(("error", "Plan is too large to rasterize within the memory limit."))
+    except Exception as exc:
+        conn.send(("error", f"Rasterization failed: {exc}"))
+    finally:
+        conn.close()
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm", "r", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _context():
+    method = os.getenv("PLAN_RASTER_START_METHOD")
+    if not method:
+        available = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in available else "spawn"
+    ctx = multiprocessing.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload(["fitz", "PIL.Image", __name__])
+    return ctx
+
+
+_slots_lock = threading.Lock()
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _get_slots() -> threading.BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                workers = max(1, int(_env_number("PLAN_RASTER_WORKERS", 2)))
+                _slots = threading.BoundedSemaphore(workers)
+    return _slots
+
+
+def reset_plan_raster_pool() -> None:
+    """Forget the slot semaphore; the next job re-reads PLAN_RASTER_WORKERS."""
+    global _slots, _slots_lock
+    _slots_lock = threading.Lock()
+    _slots = None
+
+
+def run_isolated(
+    job: Callable[..., Iterator[Tuple[Any, ...]]],
+    args: Tuple[Any, ...],
+    timeout: Optional[float] = None,
+    max_rss_bytes: Optional[int] = None,
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Run the generator function *job* in a child process, yielding what it yields.
+
+    *job* must be importable by the child (a module-level function). Raises
+    RasterizeError when the job reports an error, exceeds *timeout* seconds
+    or *max_rss_bytes*, or dies without finishing. Time the consumer spends
+    between messages does not count against *timeout*. The worker slot and
+    process are held until the generator is exhausted or closed.
+    """
+    if timeout is None:
+        timeout = _env_number("PLAN_RASTER_TIMEOUT", 120)
+    if max_rss_bytes is None:
+        max_rss_bytes = int(_env_number("PLAN_RASTER_MAX_RSS_MB", 1536) * 1024 * 1024)
+    deadline = time.monotonic() + timeout
+
+    slots = _get_slots()
+    if not slots.acquire(timeout=max(0.0, timeout)):
+        raise RasterizeError("Plan rasterization is busy; try again shortly.")
+    try:
+        ctx = _context()
+        receiver, sender = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_child_main, args=(sender, job, args), name="plan-raster"
+        )
+        process.daemon = True
+        process.start()
+        sender.close()
+        try:
+            while True:
+                if time.monotonic() > deadline:
+                    raise RasterizeError(
+                        f"Plan rasterization timed out after {timeout:g}s."
+                    )
+                rss = _rss_bytes(process.pid) if max_rss_bytes > 0 else None
+                if rss is not None and rss > max_rss_bytes:
+                    raise RasterizeError(
+                        "Plan needs more memory to rasterize than allowed "
+                        f"({max_rss_bytes // (1024 * 1024)} MB)."
+                    )
+                if not receiver.poll(_POLL_SECONDS):
+                    if not process.is_alive() and not receiver.poll(0):
+                        raise RasterizeError(
+                            "Plan rasterization worker exited unexpectedly "
+                            f"(exit code {process.exitcode})."
+                        )
+                    continue
+                try:
+                    message = receiver.recv()
+                except EOFError:
+                    raise RasterizeError(
+                        "Plan rasterization worker exited unexpectedly."
+                    ) from None
+                if message[0] == "done":
+                    return
+                if message[0] == "error":
+                    raise RasterizeError(message[1])
+                handed_over = time.monotonic()
+                yield message
+                deadline += time.monotonic() - handed_over
+        finally:
+            receiver.close()
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=5)
+    finally:
+        slots.release()
+
+
+def rasterize_plan(
+    data: bytes,
+    filename_hint: str = "",
+    mime_hint: str = "",
+    with_tiles: bool = False,
+    with_overview: bool = True,
+    page: int = 1,
+) -> RasterResult:
+    """
+    Overview raster and/or the tile pyramid of a plan (of *page*, for a
+    PDF), produced in an isolated process. Raises RasterizeError.
+    """
+    started = time.perf_counter()
+    messages = run_isolated(
+        plan_raster_messages,
+        (data, filename_hint, mime_hint, with_tiles, with_overview, page),
+    )
+    png, width, height, tiles = None, None, None, None
+    # Read up to the pyramid header; the tiles themselves stay in the pipe.
+    for message in messages:
+        if message[0] == "png":
+            png, width, height = message[1:]
+        elif message[0] == "tile_source":
+            tiles = (message[1], message[2], _stream_tiles(messages, started))
+            break
+    logger.info(
+        "Isolated rasterization: %s%s in %.2fs",
+        f"{width}px×{height}px" if png else "no overview",
+        " + tile pyramid (streaming)" if tiles else "",
+        time.perf_counter() - started,
+    )
+    return RasterResult(png, width, height, tiles)
+
+
+def _stream_tiles(
+    messages: Iterator[Tuple[Any, ...]], started: float
+) -> Iterator[Tile]:
+    """The ``tile`` messages left in *messages*; closing this closes the job."""
+    count = 0
+    try:
+        for message in messages:
+            if message[0] == "tile":
+                count += 1
+                yield tuple(message[1:])
+    finally:
+        messages.close()
+    logger.info(
+        "Isolated rasterization streamed %d tiles in %.2fs",
+        count,
+        time.perf_counter() - started,
+    )
+
+
+def index_pdf_pages(data: bytes) -> List[Tuple[Dict[str, Any], bytes]]:
+    """pdf_page_index of *data*, computed in an isolated process. Raises RasterizeError."""
+    return [message[1:] for message in run_isolated(pdf_page_messages, (data,))]
+
+
+# Semaphore state must not cross a fork.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_plan_raster_pool)
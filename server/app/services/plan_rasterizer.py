@@ -1,17 +1,23 @@
 """
 Rasterization utility for project plan uploads.
-Converts PDF (first page) or image (PNG/JPEG) into a PNG buffer suitable for MapLibre overlays.
+Converts a PDF page (the first unless asked) or image (PNG/JPEG) into a PNG buffer
+suitable for MapLibre overlays, and indexes the sheets of multi-page PDFs.
+
+The output encoding is chosen by PLAN_RASTER_ENCODING (see ENCODING_PRESETS);
+the webp-lossless preset makes the "PNG" functions return WebP, which callers
+detect with raster_format().
 """
 
 import io
 import logging
-from typing import Tuple
+import os
+from typing import Any, Dict, List, Optional, Tuple
 
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
-# Target DPI for PDF page-1 rasterization.
+# Target DPI for PDF page rasterization.
 # 150 DPI is sufficient for web-map overlays and keeps memory well under 512 MB.
 PDF_RENDER_DPI = 150
 
@@ -25,6 +31,34 @@ MAX_RASTER_LONG_EDGE = 4096  # pixels
 MAX_RASTER_LONG_EDGE_HARD = MAX_RASTER_LONG_EDGE * 3  # 12 288 px
 
 
+# Encoder presets: name -> (Pillow format, save options, quantize to a palette first).
+# Figures are for the synthetic 4096 px line-art sheet of
+# scripts/benchmark_plan_encoding.py on one core; run it on your own plans
+# before switching.
+ENCODING_PRESETS: Dict[str, Tuple[str, Dict[str, Any], bool]] = {
+    # Smallest lossless PNG, slowest by far (~4 s); the encoder before presets existed.
+    "png-optimize": ("PNG", {"optimize": True}, False),
+    # zlib level 6, default strategy (~0.6 s, ~10% larger than png-optimize).
+    "png-balanced": ("PNG", {"compress_level": 6}, False),
+    # zlib level 1 (~0.4 s, ~65% larger).
+    "png-fast": ("PNG", {"compress_level": 1}, False),
+    # zlib Z_RLE strategy: fast on large flat areas, weaker on hatching (~0.5 s, ~50% larger).
+    "png-rle": ("PNG", {"compress_level": 6, "compress_type": 3}, False),
+    # 256-colour palette without dithering, lossy for photos and scans but
+    # visually lossless for line art (~0.6 s, ~25% smaller).
+    "png-palette": ("PNG", {"compress_level": 6}, True),
+    # Lossless WebP at its fastest effort (~0.5 s, ~15% smaller).
+    "webp-lossless": ("WEBP", {"lossless": True, "method": 0, "quality": 0}, False),
+}
+DEFAULT_ENCODING_PRESET = "png-balanced"
+
+RASTER_MIME_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+# Page thumbnails of multi-page PDFs (see pdf_page_index).
+PAGE_THUMB_DPI = 24
+PAGE_THUMB_LONG_EDGE = 384  # pixels
+
+
 class RasterizeError(Exception):
     """Raised when rasterization fails (unsupported format, corrupted file, etc.)."""
 
@@ -33,21 +67,53 @@ class RasterizeError(Exception):
         super().__init__(message)
 
 
-def _cap_scale(width: int, height: int) -> float:
-    """Return a scale factor ≤ 1.0 that fits both dimensions within MAX_RASTER_LONG_EDGE."""
+def _cap_scale(width: int, height: int, max_long_edge: int = MAX_RASTER_LONG_EDGE) -> float:
+    """Return a scale factor ≤ 1.0 that fits both dimensions within max_long_edge."""
     long_edge = max(width, height)
-    if long_edge <= MAX_RASTER_LONG_EDGE:
+    if long_edge <= max_long_edge:
         return 1.0
-    return MAX_RASTER_LONG_EDGE / long_edge
+    return max_long_edge / long_edge
 
 
-def _pdf_to_png(data: bytes) -> Tuple[bytes, int, int]:
-    """
-    Render the first page of a PDF to PNG.
+def encoding_preset() -> str:
+    """The PLAN_RASTER_ENCODING preset name, falling back to the default when unknown."""
+    name = (os.getenv("PLAN_RASTER_ENCODING") or DEFAULT_ENCODING_PRESET).strip().lower()
+    if name not in ENCODING_PRESETS:
+        logger.warning("Unknown PLAN_RASTER_ENCODING %r; using %s", name, DEFAULT_ENCODING_PRESET)
+        return DEFAULT_ENCODING_PRESET
+    return name
 
-    DPI is capped so the longest pixel edge never exceeds MAX_RASTER_LONG_EDGE.
-    Returns (png_bytes, width, height).
-    """
+
+def encode_raster(img: Image.Image, preset: Optional[str] = None) -> bytes:
+    """Encode a plan raster with one of ENCODING_PRESETS (default: PLAN_RASTER_ENCODING)."""
+    fmt, options, palette = ENCODING_PRESETS[preset or encoding_preset()]
+    if palette and img.mode != "P":
+        img = img.quantize(
+            256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+        )
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **options)
+    return buf.getvalue()
+
+
+def raster_extension(preset: Optional[str] = None) -> str:
+    """File extension of rasters encoded with *preset* (default: PLAN_RASTER_ENCODING)."""
+    return ENCODING_PRESETS[preset or encoding_preset()][0].lower()
+
+
+def raster_format(data: bytes) -> Tuple[str, str]:
+    """(extension, MIME type) of an encoded plan raster: png or webp."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", RASTER_MIME_TYPES["webp"]
+    return "png", RASTER_MIME_TYPES["png"]
+
+
+def _encode_png(img: Image.Image) -> Tuple[bytes, int, int]:
+    return encode_raster(img), img.width, img.height
+
+
+def _open_pdf(data: bytes):
+    """Open a PDF with PyMuPDF; the caller closes it. Raises RasterizeError."""
     try:
         import fitz
     except ImportError:
@@ -57,12 +123,42 @@ def _pdf_to_png(data: bytes) -> Tuple[bytes, int, int]:
         doc = fitz.open(stream=data, filetype="pdf")
     except Exception as e:
         raise RasterizeError(f"Invalid or corrupted PDF: {e}") from e
+    if len(doc) == 0:
+        doc.close()
+        raise RasterizeError("PDF has no pages")
+    return doc
+
+
+def _page_matrix(page, dpi: float, max_long_edge: int):
+    """(render matrix, scale) for *page* at *dpi*, scaled down to fit max_long_edge."""
+    import fitz
+
+    target_w = int(page.rect.width * dpi / 72.0)
+    target_h = int(page.rect.height * dpi / 72.0)
+    scale = _cap_scale(target_w, target_h, max_long_edge)
+    effective_dpi = dpi * scale
+    return fitz.Matrix(effective_dpi / 72.0, effective_dpi / 72.0), scale
+
+
+def _pdf_to_image(
+    data: bytes,
+    dpi: float = PDF_RENDER_DPI,
+    max_long_edge: int = MAX_RASTER_LONG_EDGE,
+    page_number: int = 1,
+) -> Image.Image:
+    """
+    Render one page (1-based) of a PDF to an RGB image.
 
+    DPI is capped so the longest pixel edge never exceeds max_long_edge.
+    """
+    doc = _open_pdf(data)
     try:
-        if len(doc) == 0:
-            raise RasterizeError("PDF has no pages")
+        if not 1 <= page_number <= len(doc):
+            raise RasterizeError(
+                f"PDF has {len(doc)} page(s); page {page_number} does not exist."
+            )
 
-        page = doc[0]
+        page = doc[page_number - 1]
         rect = page.rect
         page_w_pts = rect.width
         page_h_pts = rect.height
@@ -85,17 +181,14 @@ def _pdf_to_png(data: bytes) -> Tuple[bytes, int, int]:
                 f"{PDF_RENDER_DPI} DPI). Please upload a lower-resolution plan."
             )
 
-        # Scale DPI down so the longest edge fits within MAX_RASTER_LONG_EDGE
-        scale = _cap_scale(raw_w, raw_h)
-        effective_dpi = PDF_RENDER_DPI * scale
-
+        # Scale DPI down so the longest edge fits within max_long_edge
+        mat, scale = _page_matrix(page, dpi, max_long_edge)
         if scale < 1.0:
             logger.info(
                 "Downscaling raster: scale=%.3f effective_dpi=%.1f → %dpx×%dpx",
-                scale, effective_dpi, int(raw_w * scale), int(raw_h * scale),
+                scale, dpi * scale, (rect * mat).irect.width, (rect * mat).irect.height,
             )
 
-        mat = fitz.Matrix(effective_dpi / 72.0, effective_dpi / 72.0)
         pix = page.get_pixmap(matrix=mat, alpha=False)
         width = pix.width
         height = pix.height
@@ -105,17 +198,64 @@ def _pdf_to_png(data: bytes) -> Tuple[bytes, int, int]:
             "Final raster: %dpx×%dpx est_mem=%.1fMB", width, height, final_mem_mb
         )
 
-        img = Image.frombytes("RGB", (width, height), pix.samples)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG", optimize=True)
-        return buf.getvalue(), width, height
+        return Image.frombytes("RGB", (width, height), pix.samples)
     finally:
         doc.close()
 
 
-def _image_to_png(data: bytes, format_hint: str) -> Tuple[bytes, int, int]:
+def _pdf_to_png(data: bytes, page_number: int = 1) -> Tuple[bytes, int, int]:
     """
-    Open an image (PNG or JPEG), validate, down-scale if needed, and return as PNG buffer.
+    Render one page (1-based) of a PDF to PNG.
+
+    DPI is capped so the longest pixel edge never exceeds MAX_RASTER_LONG_EDGE.
+    Returns (png_bytes, width, height).
+    """
+    return _encode_png(_pdf_to_image(data, page_number=page_number))
+
+
+def pdf_page_index(
+    data: bytes,
+    thumb_dpi: float = PAGE_THUMB_DPI,
+    thumb_long_edge: int = PAGE_THUMB_LONG_EDGE,
+) -> List[Tuple[Dict[str, Any], bytes]]:
+    """
+    Index the pages of a PDF in one pass: for each page, its size in points,
+    the pixel size rasterize_to_png would produce for it, and a low-DPI PNG
+    thumbnail.
+
+    Returns a list of ({"page", "width_pts", "height_pts", "width", "height",
+    "thumb_width", "thumb_height"}, thumbnail_png) in page order.
+    """
+    doc = _open_pdf(data)
+    try:
+        index = []
+        for number, page in enumerate(doc, start=1):
+            full_matrix, _ = _page_matrix(page, PDF_RENDER_DPI, MAX_RASTER_LONG_EDGE)
+            full = (page.rect * full_matrix).irect
+            thumb_matrix, _ = _page_matrix(page, thumb_dpi, thumb_long_edge)
+            pix = page.get_pixmap(matrix=thumb_matrix, alpha=False)
+            thumb = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            info = {
+                "page": number,
+                "width_pts": round(page.rect.width, 2),
+                "height_pts": round(page.rect.height, 2),
+                "width": full.width,
+                "height": full.height,
+                "thumb_width": pix.width,
+                "thumb_height": pix.height,
+            }
+            index.append((info, encode_raster(thumb, DEFAULT_ENCODING_PRESET)))
+        logger.info("Indexed %d PDF pages", len(index))
+        return index
+    finally:
+        doc.close()
+
+
+def _image_to_image(
+    data: bytes, max_long_edge: int = MAX_RASTER_LONG_EDGE
+) -> Image.Image:
+    """
+    Open an image (PNG or JPEG), validate, normalize the mode and down-scale if needed.
     """
     try:
         img = Image.open(io.BytesIO(data))
@@ -135,7 +275,7 @@ def _image_to_png(data: bytes, format_hint: str) -> Tuple[bytes, int, int]:
     if width <= 0 or height <= 0:
         raise RasterizeError("Image has invalid dimensions")
 
-    scale = _cap_scale(width, height)
+    scale = _cap_scale(width, height, max_long_edge)
     if scale < 1.0:
         new_w = max(1, int(width * scale))
         new_h = max(1, int(height * scale))
@@ -144,34 +284,18 @@ def _image_to_png(data: bytes, format_hint: str) -> Tuple[bytes, int, int]:
             width, height, new_w, new_h,
         )
         out = out.resize((new_w, new_h), Image.LANCZOS)
-        width, height = out.size
-
-    buf = io.BytesIO()
-    out.save(buf, format="PNG", optimize=True)
-    return buf.getvalue(), width, height
+    return out
 
 
-def rasterize_to_png(
-    data: bytes,
-    filename_hint: str = "",
-    mime_hint: str = "",
-) -> Tuple[bytes, int, int]:
+def _image_to_png(data: bytes, format_hint: str) -> Tuple[bytes, int, int]:
     """
-    Convert an uploaded plan file to a PNG image buffer and return pixel dimensions.
-
-    Supports:
-    - PDF: first page rendered at PDF_RENDER_DPI, longest edge capped at MAX_RASTER_LONG_EDGE
-    - PNG / JPEG: validated, normalized, and down-scaled if needed
-
-    Returns:
-        (png_bytes, width, height)
-
-    Raises:
-        RasterizeError: Unsupported format, corrupted file, oversized raster, or conversion failure.
+    Open an image (PNG or JPEG), validate, down-scale if needed, and return as PNG buffer.
     """
-    if not data:
-        raise RasterizeError("No file data provided")
+    return _encode_png(_image_to_image(data))
+
 
+def _detect_format(data: bytes, filename_hint: str, mime_hint: str) -> str:
+    """Return "pdf" or "image" from the filename, MIME type, or magic bytes."""
     ext = ""
     if filename_hint:
         parts = filename_hint.rsplit(".", 1)
@@ -187,16 +311,69 @@ def rasterize_to_png(
             ext = "jpg"
 
     if ext == "pdf":
-        return _pdf_to_png(data)
+        return "pdf"
     if ext in ("png", "jpg", "jpeg"):
-        return _image_to_png(data, ext)
+        return "image"
 
     # Sniff by magic bytes if hint is missing
     if data[:4] == b"%PDF":
-        return _pdf_to_png(data)
+        return "pdf"
     if len(data) >= 8 and data[:8] == b"\x89PNG\r\n\x1a\n":
-        return _image_to_png(data, "png")
+        return "image"
     if data[:2] in (b"\xff\xd8", b"\xFF\xD8"):
-        return _image_to_png(data, "jpeg")
+        return "image"
 
     raise RasterizeError("Unsupported format. Use PDF, PNG, or JPEG.")
+
+
+def rasterize_to_image(
+    data: bytes,
+    filename_hint: str = "",
+    mime_hint: str = "",
+    dpi: float = PDF_RENDER_DPI,
+    max_long_edge: int = MAX_RASTER_LONG_EDGE,
+    page: int = 1,
+) -> Image.Image:
+    """
+    Like rasterize_to_png, but return the decoded image and let the caller pick
+    the PDF render DPI and the long-edge cap (used for tile pyramids).
+    """
+    if not data:
+        raise RasterizeError("No file data provided")
+    if _detect_format(data, filename_hint, mime_hint) == "pdf":
+        return _pdf_to_image(
+            data, dpi=dpi, max_long_edge=max_long_edge, page_number=page
+        )
+    return _image_to_image(data, max_long_edge=max_long_edge)
+
+
+def rasterize_to_png(
+    data: bytes,
+    filename_hint: str = "",
+    mime_hint: str = "",
+    page: int = 1,
+) -> Tuple[bytes, int, int]:
+    """
+    Convert an uploaded plan file to a PNG image buffer and return pixel dimensions.
+
+    Supports:
+    - PDF: page *page* (1-based; default the first) rendered at PDF_RENDER_DPI,
+      longest edge capped at MAX_RASTER_LONG_EDGE
+    - PNG / JPEG: validated, normalized, and down-scaled if needed
+
+    The buffer is encoded with the PLAN_RASTER_ENCODING preset (WebP for
+    webp-lossless; see raster_format).
+
+    Returns:
+        (png_bytes, width, height)
+
+    Raises:
+        RasterizeError: Unsupported format, corrupted file, oversized raster, or conversion failure.
+    """
+    if not data:
+        raise RasterizeError("No file data provided")
+    if _detect_format(data, filename_hint, mime_hint) == "pdf":
+        return _pdf_to_png(data, page_number=page)
+    if page != 1:
+        raise RasterizeError("Images have a single page.")
+    return _image_to_png(data, "")
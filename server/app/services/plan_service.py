@@ -4,8 +4,11 @@ Encapsulates Supabase reads/writes and R2 storage for georeferenced plans.
 Schema: public.project_plans uses corner_* and uploaded_by_user_id (no file_size, no min/max).
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
+from app.services.plan_pages import pages_prefix
+from app.services.plan_tiler import tiles_prefix
+from app.services.plan_warp import warped_prefix
 from app.services.storage.supabase_client import supabase_client
 from app.services.storage.r2_client import r2_client
 
@@ -42,13 +45,21 @@ def create_plan_record(
     image_width: int,
     image_height: int,
     r2_url: Optional[str] = None,
+    tiles: Optional[Dict[str, Any]] = None,
+    pages: Optional[Dict[str, Any]] = None,
+    corners: Optional[Dict[str, float]] = None,
+    warp: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Insert a new plan record into project_plans.
     Caller must ensure project has no existing plan (unique constraint).
     Payload matches schema: no file_size; corners stored as corner_*; user as uploaded_by_user_id.
+    tiles is the plan_tiler.tile_metadata of an uploaded pyramid, if any;
+    pages the plan_pages.upload_pages fields of a multi-page PDF, if any.
+    corners (corner_* fields) records a rotated calibration instead of the
+    bounds box; warp holds the warped_* fields of its pre-aligned raster.
     """
-    corners = _bounds_to_corners(min_lat, min_lng, max_lat, max_lng)
+    corners = corners or _bounds_to_corners(min_lat, min_lng, max_lat, max_lng)
     payload: Dict[str, Any] = {
         "project_id": project_id,
         "r2_path": r2_path,
@@ -59,6 +70,9 @@ def create_plan_record(
         "image_width": image_width,
         "image_height": image_height,
         **corners,
+        **(tiles or {}),
+        **(pages or {}),
+        **(warp or {}),
     }
     return supabase_client.store_project_plan(payload)
 
@@ -70,9 +84,40 @@ def get_plan_by_project_id(project_id: str) -> Optional[Dict[str, Any]]:
     return supabase_client.get_project_plan(project_id)
 
 
+def delete_plan_tiles(project_id: str, keep: Iterable[str] = ()) -> int:
+    """
+    Remove a project's plan tiles from R2, except the keys in keep.
+    Returns the number of tiles deleted.
+    """
+    if not r2_client.client:
+        return 0
+    return r2_client.delete_prefix(tiles_prefix(project_id), keep=keep)
+
+
+def delete_plan_pages(project_id: str, pages_path: Optional[str] = None) -> int:
+    """
+    Remove stored plan PDFs, page thumbnails and sheet rasters from R2: one
+    revision (pages_path) or, by default, all of the project's.
+    Returns the number of objects deleted.
+    """
+    if not r2_client.client:
+        return 0
+    return r2_client.delete_prefix(pages_path or pages_prefix(project_id))
+
+
+def delete_plan_warps(project_id: str, keep: Iterable[str] = ()) -> int:
+    """
+    Remove a project's warped plan rasters from R2, except the keys in keep.
+    Returns the number deleted.
+    """
+    if not r2_client.client:
+        return 0
+    return r2_client.delete_prefix(warped_prefix(project_id), keep=keep)
+
+
 def delete_plan(project_id: str) -> bool:
     """
-    Delete the plan record and R2 file for a project.
+    Delete the plan record and R2 files (image, tiles and any stored PDF pages) for a project.
     Returns True if a plan existed and was deleted.
     """
     plan = get_plan_by_project_id(project_id)
@@ -81,6 +126,12 @@ def delete_plan(project_id: str) -> bool:
     r2_path = plan.get("r2_path")
     if r2_path and r2_client.client:
         r2_client.delete_file(r2_path)
+    if plan.get("tiles_path"):
+        delete_plan_tiles(project_id)
+    if plan.get("pages_path"):
+        delete_plan_pages(project_id)
+    if plan.get("warped_r2_path"):
+        delete_plan_warps(project_id)
     return supabase_client.delete_project_plan(project_id)
 
 
@@ -97,9 +148,19 @@ def replace_plan(
     image_width: int,
     image_height: int,
     r2_url: Optional[str] = None,
+    tiles: Optional[Dict[str, Any]] = None,
+    tile_keys: Iterable[str] = (),
+    pages: Optional[Dict[str, Any]] = None,
+    corners: Optional[Dict[str, float]] = None,
+    warp: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Replace the existing plan: delete old R2 file, update DB record.
+    corners and warp are as for create_plan_record; a previous warped raster
+    other than the new one is removed once the record is updated.
+    New tiles overwrite the old ones in place; once the record is updated,
+    old tiles outside tile_keys (or all of them, without tiles) are removed,
+    as are the stored pages of the old PDF unless it is the same revision.
     Returns updated record or None on failure.
     """
     plan = get_plan_by_project_id(project_id)
@@ -110,8 +171,8 @@ def replace_plan(
     # delete the newly uploaded file (replace PDF→PNG or PNG→PNG both use plan.png).
     if old_r2_path and r2_client.client and old_r2_path != r2_path:
         r2_client.delete_file(old_r2_path)
-    corners = _bounds_to_corners(min_lat, min_lng, max_lat, max_lng)
-    return supabase_client.update_project_plan(
+    corners = corners or _bounds_to_corners(min_lat, min_lng, max_lat, max_lng)
+    updated = supabase_client.update_project_plan(
         project_id=project_id,
         r2_path=r2_path,
         file_name=file_name,
@@ -121,4 +182,20 @@ def replace_plan(
         image_width=image_width,
         image_height=image_height,
         **corners,
+        **(tiles or {}),
+        **(pages or {}),
+        **(warp or {}),
     )
+    if updated and plan.get("tiles_path"):
+        delete_plan_tiles(project_id, keep=tile_keys if tiles else ())
+    old_pages_path = plan.get("pages_path")
+    if updated and old_pages_path and old_pages_path != (pages or {}).get("pages_path"):
+        delete_plan_pages(project_id, old_pages_path)
+    new_warped_path = (warp or {}).get("warped_r2_path")
+    if (
+        updated
+        and plan.get("warped_r2_path")
+        and plan["warped_r2_path"] != new_warped_path
+    ):
+        delete_plan_warps(project_id, keep=[new_warped_path] if new_warped_path else ())
+    return updated
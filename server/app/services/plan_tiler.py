@@ -0,0 +1,207 @@
+"""
+Tile pyramids for project plans.
+
+A plan uploaded with tiling enabled is rendered a second time at higher
+resolution (PDF at PLAN_TILE_DPI, images at their native size) and cut into
+256 px PNG tiles stored under ``projects/{project_id}/plans/tiles/{z}/{x}/{y}.png``.
+
+Zoom levels follow the Deep Zoom convention: ``max_zoom`` is the full-resolution
+raster, each lower level halves it, and level 0 fits in a single tile. Tiles on
+the right and bottom edges are cropped to the image rather than padded, so a
+level ``z`` raster is ``ceil(width / 2**(max_zoom - z))`` pixels wide and has
+``ceil(level_width / 256)`` columns. The single overview PNG is still produced
+by rasterize_to_png for clients that do not tile.
+
+No client reads the pyramid yet; wiring it into the map is a follow-up, and
+PLAN_TILES stays off until then. Tiles are addressed in image pixel space,
+not the map's XYZ Web Mercator grid, so a map raster source cannot use
+``url_template`` directly, and each tile URL is a JWT-gated redirect that
+tile requests would have to authenticate (or be replaced by signed
+per-plan URLs).
+
+Configuration (environment variables):
+    PLAN_TILES               — tile every upload without asking (default: off)
+    PLAN_TILE_DPI            — PDF render DPI for the pyramid (default: 300)
+    PLAN_TILE_MAX_EDGE       — long-edge cap of the full-resolution level (default: 8192)
+    PLAN_TILE_UPLOAD_WORKERS — concurrent tile PUTs per upload (default: 8)
+"""
+
+import io
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from PIL import Image
+
+from app.services.plan_rasterizer import (
+    MAX_RASTER_LONG_EDGE_HARD,
+    rasterize_to_image,
+)
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+TILE_MIME = "image/png"
+TILES_PREFIX_TEMPLATE = "projects/{project_id}/plans/tiles/"
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def tiles_enabled_by_default() -> bool:
+    return (os.getenv("PLAN_TILES") or "off").strip().lower() in (
+        "1",
+        "on",
+        "true",
+        "yes",
+    )
+
+
+def tiles_prefix(project_id: str) -> str:
+    return TILES_PREFIX_TEMPLATE.format(project_id=project_id)
+
+
+def tile_key(project_id: str, z: int, x: int, y: int) -> str:
+    return f"{tiles_prefix(project_id)}{z}/{x}/{y}.png"
+
+
+def max_zoom_for(width: int, height: int) -> int:
+    """Smallest level count such that level 0 fits in one tile."""
+    long_edge = max(width, height)
+    if long_edge <= TILE_SIZE:
+        return 0
+    return int(math.ceil(math.log2(long_edge / TILE_SIZE)))
+
+
+def level_grid(width: int, height: int, max_zoom: int, z: int) -> Tuple[int, int]:
+    """``(columns, rows)`` of level *z* of a width x height pyramid."""
+    scale = 2 ** (max_zoom - z)
+    level_width = max(1, math.ceil(width / scale))
+    level_height = max(1, math.ceil(height / scale))
+    return math.ceil(level_width / TILE_SIZE), math.ceil(level_height / TILE_SIZE)
+
+
+def has_tile(plan: Dict[str, Any], z: int, x: int, y: int) -> bool:
+    """Whether the pyramid described by *plan*'s tile columns contains z/x/y."""
+    max_zoom = plan.get("tile_max_zoom")
+    width, height = plan.get("tile_width"), plan.get("tile_height")
+    if not plan.get("tiles_path") or max_zoom is None or not width or not height:
+        return False
+    if not 0 <= z <= max_zoom or x < 0 or y < 0:
+        return False
+    columns, rows = level_grid(width, height, max_zoom, z)
+    return x < columns and y < rows
+
+
+def render_tile_source(
+    data: bytes, filename_hint: str = "", mime_hint: str = "", page: int = 1
+) -> Image.Image:
+    """Full-resolution raster of *page* for the pyramid (raises RasterizeError)."""
+    max_edge = int(_env_number("PLAN_TILE_MAX_EDGE", 8192))
+    max_edge = max(TILE_SIZE, min(max_edge, MAX_RASTER_LONG_EDGE_HARD))
+    return rasterize_to_image(
+        data,
+        filename_hint=filename_hint,
+        mime_hint=mime_hint,
+        dpi=_env_number("PLAN_TILE_DPI", 300),
+        max_long_edge=max_edge,
+        page=page,
+    )
+
+
+def _encode_tile(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    # optimize=True costs several times the encode time per tile; the
+    # default zlib level is the better trade for thousands of small PNGs.
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def iter_tiles(image: Image.Image) -> Iterator[Tuple[int, int, int, bytes]]:
+    """
+    Yield ``(z, x, y, png_bytes)`` for every tile, highest zoom first.
+
+    Each level is produced by halving the previous one, so the whole pyramid
+    costs about 4/3 of one pass over the full-resolution raster.
+    """
+    level = image
+    z = max_zoom_for(image.width, image.height)
+    while True:
+        for y in range(math.ceil(level.height / TILE_SIZE)):
+            for x in range(math.ceil(level.width / TILE_SIZE)):
+                box = (
+                    x * TILE_SIZE,
+                    y * TILE_SIZE,
+                    min((x + 1) * TILE_SIZE, level.width),
+                    min((y + 1) * TILE_SIZE, level.height),
+                )
+                yield z, x, y, _encode_tile(level.crop(box))
+        if z == 0:
+            return
+        level = level.resize(
+            (max(1, math.ceil(level.width / 2)), max(1, math.ceil(level.height / 2))),
+            Image.LANCZOS,
+        )
+        z -= 1
+
+
+def tile_metadata(project_id: str, width: int, height: int) -> Dict[str, Any]:
+    """project_plans columns describing a pyramid cut from a width x height raster."""
+    return {
+        "tiles_path": tiles_prefix(project_id),
+        "tile_size": TILE_SIZE,
+        "tile_max_zoom": max_zoom_for(width, height),
+        "tile_width": width,
+        "tile_height": height,
+    }
+
+
+def upload_tiles(
+    project_id: str,
+    width: int,
+    height: int,
+    tiles: Iterable[Tuple[int, int, int, bytes]],
+    r2,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    PUT encoded ``(z, x, y, png_bytes)`` tiles with a bounded pool of workers.
+
+    *tiles* is usually ``iter_tiles(image)``, or the tiles an isolated
+    rasterization job sent back. Returns ``(tile_metadata, keys)``. Raises
+    RuntimeError when any tile fails to upload; keys already written are left
+    for the caller to clean up with ``r2.delete_prefix``.
+    """
+    workers = max(1, int(_env_number("PLAN_TILE_UPLOAD_WORKERS", 8)))
+    keys: List[str] = []
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="plan-tiles"
+    ) as pool:
+        pending = []
+        for z, x, y, png in tiles:
+            key = tile_key(project_id, z, x, y)
+            keys.append(key)
+            pending.append(pool.submit(r2.upload_bytes, png, key, TILE_MIME))
+            # Encoding is faster than uploading: cap the tiles held in memory.
+            if len(pending) >= workers * 4:
+                if not all(f.result() for f in pending):
+                    raise RuntimeError("Failed to upload plan tiles")
+                pending = []
+        if not all(f.result() for f in pending):
+            raise RuntimeError("Failed to upload plan tiles")
+
+    metadata = tile_metadata(project_id, width, height)
+    logger.info(
+        "Uploaded %d plan tiles for project %s (%dx%d, max_zoom=%d)",
+        len(keys),
+        project_id,
+        width,
+        height,
+        metadata["tile_max_zoom"],
+    )
+    return metadata, keys
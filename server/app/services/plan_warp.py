@@ -0,0 +1,224 @@
+"""
+Server-side georeferencing of rotated or skewed plans.
+
+A calibration places the four corners of the plan raster anywhere on the
+map. MapLibre image sources (like most web map overlays) are drawn linearly
+in Web Mercator between the corners of an axis-aligned box, so a plan whose
+corners are not such a box would otherwise have to be warped by the browser
+on every render. Instead, the plan is resampled once:
+
+1. the corners are projected to Web Mercator (vectorized over NumPy arrays);
+2. the projective transform (homography) between the raster's pixel corners
+   and the projected corners is solved from the four control points;
+3. the output is the quad's Mercator bounding box at about the source
+   resolution; Pillow's PERSPECTIVE transform maps every output pixel back
+   into the source raster, and pixels outside the plan are transparent.
+
+The warped raster and its lat/lng bounds can be drawn as-is. It is stored
+under a key derived from the source raster and the corners, so repeating a
+calibration reuses it instead of warping again.
+
+Corners use the project_plans column names (``corner_nw_lat`` ...); nw is
+the top-left pixel corner of the raster, ne top-right, se bottom-right and
+sw bottom-left.
+"""
+
+import hashlib
+import io
+import math
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.services.plan_rasterizer import MAX_RASTER_LONG_EDGE, encode_raster
+
+EARTH_RADIUS_M = 6378137.0
+MAX_MERCATOR_LAT = 85.05112878
+WARPED_PREFIX_TEMPLATE = "projects/{project_id}/plans/warped/"
+
+CORNER_NAMES = ("nw", "ne", "se", "sw")
+CORNER_FIELDS = tuple(
+    f"corner_{name}_{axis}" for name in CORNER_NAMES for axis in ("lat", "lng")
+)
+
+
+class PlanWarp(NamedTuple):
+    """Geometry of a warped plan: output size, lat/lng bounds and Pillow coefficients."""
+
+    width: int
+    height: int
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+    coefficients: Tuple[float, ...]
+
+
+def lnglat_to_mercator(lng, lat) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator metres (EPSG:3857) of lng/lat degrees; accepts arrays."""
+    lng = np.asarray(lng, dtype=np.float64)
+    lat = np.clip(
+        np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT
+    )
+    x = np.radians(lng) * EARTH_RADIUS_M
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS_M
+    return x, y
+
+
+def mercator_to_lnglat(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of lnglat_to_mercator; accepts arrays."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lng = np.degrees(x / EARTH_RADIUS_M)
+    lat = np.degrees(2 * np.arctan(np.exp(y / EARTH_RADIUS_M)) - np.pi / 2)
+    return lng, lat
+
+
+def homography(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    3x3 projective transform mapping the four (x, y) points of src onto dst.
+    Raises ValueError when three of the points are collinear.
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    x, y = src[:, 0], src[:, 1]
+    u, v = dst[:, 0], dst[:, 1]
+    zeros, ones = np.zeros(4), np.ones(4)
+    a = np.concatenate(
+        [
+            np.stack([x, y, ones, zeros, zeros, zeros, -u * x, -u * y], axis=1),
+            np.stack([zeros, zeros, zeros, x, y, ones, -v * x, -v * y], axis=1),
+        ]
+    )
+    try:
+        h = np.linalg.solve(a, np.concatenate([u, v]))
+    except np.linalg.LinAlgError as exc:
+        raise ValueError("Control points are degenerate.") from exc
+    return np.append(h, 1.0).reshape(3, 3)
+
+
+def apply_homography(matrix: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Map an (N, 2) array of points through a homography."""
+    points = np.asarray(points, dtype=np.float64)
+    mapped = np.column_stack([points, np.ones(len(points))]) @ matrix.T
+    return mapped[:, :2] / mapped[:, 2:3]
+
+
+def _corner_arrays(corners: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    lats = np.array([corners[f"corner_{name}_lat"] for name in CORNER_NAMES])
+    lngs = np.array([corners[f"corner_{name}_lng"] for name in CORNER_NAMES])
+    return lats, lngs
+
+
+def is_axis_aligned(corners: Dict[str, float], tolerance: float = 1e-9) -> bool:
+    """True when the corners already form a north-up lat/lng box (no warp needed)."""
+    lats, lngs = _corner_arrays(corners)
+    return bool(
+        abs(lats[0] - lats[1]) <= tolerance
+        and abs(lats[2] - lats[3]) <= tolerance
+        and abs(lngs[0] - lngs[3]) <= tolerance
+        and abs(lngs[1] - lngs[2]) <= tolerance
+        and lats[0] > lats[3]
+        and lngs[1] > lngs[0]
+    )
+
+
+def mercator_quad(corners: Dict[str, float]) -> np.ndarray:
+    """
+    The corners as a (4, 2) array of Web Mercator points, nw, ne, se, sw.
+    Raises ValueError when they do not form a convex quadrilateral.
+    """
+    lats, lngs = _corner_arrays(corners)
+    quad = np.column_stack(lnglat_to_mercator(lngs, lats))
+    edges = np.roll(quad, -1, axis=0) - quad
+    following = np.roll(edges, -1, axis=0)
+    turns = edges[:, 0] * following[:, 1] - edges[:, 1] * following[:, 0]
+    if not (np.all(turns > 0) or np.all(turns < 0)):
+        raise ValueError("Plan corners must form a convex quadrilateral.")
+    return quad
+
+
+def plan_warp(
+    image_width: int,
+    image_height: int,
+    corners: Dict[str, float],
+    max_long_edge: int = MAX_RASTER_LONG_EDGE,
+) -> PlanWarp:
+    """
+    Output geometry for warping an image_width x image_height raster onto corners.
+    Raises ValueError when the corners do not form a convex quadrilateral.
+    """
+    quad = mercator_quad(corners)
+
+    # Output resolution: keep the source's pixel density, within the size cap.
+    area = 0.5 * abs(
+        np.sum(
+            quad[:, 0] * np.roll(quad[:, 1], -1) - np.roll(quad[:, 0], -1) * quad[:, 1]
+        )
+    )
+    min_x, min_y = quad.min(axis=0)
+    max_x, max_y = quad.max(axis=0)
+    px_per_m = math.sqrt(image_width * image_height / area)
+    long_edge_m = max(max_x - min_x, max_y - min_y)
+    px_per_m = min(px_per_m, max_long_edge / long_edge_m)
+    width = max(1, int(math.ceil((max_x - min_x) * px_per_m)))
+    height = max(1, int(math.ceil((max_y - min_y) * px_per_m)))
+
+    # Pillow maps output pixels to input pixels: corners in output pixel space
+    # (y grows downwards) onto the raster's pixel corners.
+    out_corners = np.column_stack(
+        [
+            (quad[:, 0] - min_x) * width / (max_x - min_x),
+            (max_y - quad[:, 1]) * height / (max_y - min_y),
+        ]
+    )
+    in_corners = np.array(
+        [[0, 0], [image_width, 0], [image_width, image_height], [0, image_height]],
+        dtype=np.float64,
+    )
+    matrix = homography(out_corners, in_corners)
+
+    (min_lng, max_lng), (min_lat, max_lat) = mercator_to_lnglat(
+        [min_x, max_x], [min_y, max_y]
+    )
+    return PlanWarp(
+        width,
+        height,
+        float(min_lat),
+        float(min_lng),
+        float(max_lat),
+        float(max_lng),
+        tuple(float(c) for c in matrix.flatten()[:8]),
+    )
+
+
+def warp_raster(raster: bytes, warp: PlanWarp) -> bytes:
+    """Resample an encoded plan raster into the warp's output, transparent outside the plan."""
+    with Image.open(io.BytesIO(raster)) as img:
+        source = img.convert("RGBA")
+    warped = source.transform(
+        (warp.width, warp.height),
+        Image.Transform.PERSPECTIVE,
+        warp.coefficients,
+        resample=Image.Resampling.BICUBIC,
+        fillcolor=(0, 0, 0, 0),
+    )
+    return encode_raster(warped)
+
+
+def warp_key(
+    project_id: str, raster: bytes, corners: Dict[str, float], ext: str
+) -> str:
+    """R2 key of the warp of *raster* for one calibration (content-addressed)."""
+    digest = hashlib.sha256(
+        ",".join(f"{corners[field]:.9f}" for field in CORNER_FIELDS).encode("ascii")
+        + b"\0"
+    )
+    digest.update(raster)
+    prefix = WARPED_PREFIX_TEMPLATE.format(project_id=project_id)
+    return f"{prefix}{digest.hexdigest()[:24]}.{ext}"
+
+
+def warped_prefix(project_id: str) -> str:
+    return WARPED_PREFIX_TEMPLATE.format(project_id=project_id)
@@ -10,11 +10,29 @@ of input type.
 Return contract for all public functions:
     Success → (result_dict, None)
     Failure → (None, error_dict)  where error_dict = { error: str, geocode_error?: str }
+
+Geocoding on the request path is bounded by GEOCODE_INTERACTIVE_DEADLINE. When
+the shared rate-limit queue cannot answer in time (``deadline_exceeded``), the
+project write goes ahead without the location, the result carries
+``location_status: "pending"`` (routes answer 202), and the location is
+resolved and persisted by a background thread with GEOCODE_ASYNC_DEADLINE.
+Set GEOCODE_ASYNC_FALLBACK=off to surface ``deadline_exceeded`` instead.
+
+The project row records ``location_status`` (pending → resolved/failed) so
+clients can poll it, and every location change stamps a new
+``location_request_id``; the background write only lands while the row still
+carries the id it was started for, so a slow resolution never overwrites a
+newer update.
 """
 
 import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Dict, Any
 
+from app.services.geocoding.client import geocode_deadline
 from app.services.geocoding.nominatim_client import forward_geocode, reverse_geocode
 from app.services.storage.supabase_client import supabase_client
 
@@ -22,6 +40,43 @@ logger = logging.getLogger(__name__)
 
 Result = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
 
+LOCATION_PENDING = "pending"
+LOCATION_FAILED = "failed"
+LOCATION_RESOLVED = "resolved"
+# Geocode errors that mean "busy", not "wrong input": worth retrying later.
+_DEFERRABLE_ERRORS = ("deadline_exceeded",)
+
+_location_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _env_seconds(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def _async_fallback_enabled() -> bool:
+    return (os.getenv("GEOCODE_ASYNC_FALLBACK") or "on").strip().lower() not in (
+        "0",
+        "off",
+        "false",
+        "no",
+    )
+
+
+def _get_location_executor() -> ThreadPoolExecutor:
+    global _location_executor
+    if _location_executor is None:
+        with _executor_lock:
+            if _location_executor is None:
+                _location_executor = ThreadPoolExecutor(
+                    max_workers=int(_env_seconds("GEOCODE_ASYNC_WORKERS", 2)),
+                    thread_name_prefix="geocode",
+                )
+    return _location_executor
+
 
 def _resolve_location(
     address: Optional[str] = None,
@@ -60,6 +115,89 @@ def _resolve_location(
     return None, None
 
 
+def _resolve_interactive(
+    address: Optional[str] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], bool]:
+    """
+    ``_resolve_location`` within the request-path deadline.
+
+    Returns (geo, err, deferred); deferred means the geocoder was too busy and
+    the caller should write without the location and call ``_defer_location``.
+    """
+    with geocode_deadline(_env_seconds("GEOCODE_INTERACTIVE_DEADLINE", 8)):
+        geo, err = _resolve_location(address=address, lat=lat, lng=lng)
+    if (
+        err
+        and err.get("geocode_error") in _DEFERRABLE_ERRORS
+        and _async_fallback_enabled()
+    ):
+        return None, None, True
+    return geo, err, False
+
+
+def _location_fields(deferred: bool) -> Dict[str, Any]:
+    """location_status/location_request_id for a write that changes the location."""
+    status = LOCATION_PENDING if deferred else LOCATION_RESOLVED
+    return {"location_status": status, "location_request_id": str(uuid.uuid4())}
+
+
+def _defer_location(
+    project_id: str,
+    request_id: str,
+    address: Optional[str],
+    lat: Optional[float],
+    lng: Optional[float],
+) -> None:
+    _get_location_executor().submit(
+        _resolve_deferred_location, project_id, request_id, address, lat, lng
+    )
+
+
+def _resolve_deferred_location(
+    project_id: str,
+    request_id: str,
+    address: Optional[str],
+    lat: Optional[float],
+    lng: Optional[float],
+) -> None:
+    """Background half of a 202: geocode with a generous deadline, then persist."""
+    try:
+        with geocode_deadline(_env_seconds("GEOCODE_ASYNC_DEADLINE", 120)):
+            geo, err = _resolve_location(address=address, lat=lat, lng=lng)
+        if err or not geo:
+            logger.warning(
+                "Deferred geocode for project %s failed: %s",
+                project_id,
+                (err or {}).get("geocode_error"),
+            )
+            supabase_client.update_project(
+                project_id=project_id,
+                location_status=LOCATION_FAILED,
+                location_request_id=request_id,
+                if_location_request_id=request_id,
+            )
+            return
+        updated = supabase_client.update_project(
+            project_id=project_id,
+            address=geo["address"],
+            address_coord={"lat": geo["lat"], "lng": geo["lng"]},
+            location_status=LOCATION_RESOLVED,
+            location_request_id=request_id,
+            if_location_request_id=request_id,
+        )
+        if not updated:
+            logger.info(
+                "Deferred location for project %s superseded by a newer update",
+                project_id,
+            )
+            return
+        _sync_location(project_id, geo)
+    except Exception as exc:
+        logger.error("Deferred location write failed for %s: %s", project_id, exc)
+
+
 def _persist_location(project_id: str, geo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Write the resolved geo result to public.locations as a project marker."""
     return supabase_client.create_project_location(
@@ -97,13 +235,17 @@ def create_project_with_location(
     - Write public.locations row (marker='project').
     - If the location write fails → delete the project row (rollback) and return error.
     - If no location input → create project only; no location row is created.
+    - If the geocoder is too busy → create the project with the address as
+      given, resolve the location in the background, and mark the result
+      ``location_status: "pending"``.
     """
-    geo, err = _resolve_location(address=address, lat=lat, lng=lng)
+    geo, err, deferred = _resolve_interactive(address=address, lat=lat, lng=lng)
     if err:
         return None, err
 
     address_coord = {"lat": geo["lat"], "lng": geo["lng"]} if geo else None
     resolved_address = geo["address"] if geo else address
+    location = _location_fields(deferred) if geo or deferred else {}
 
     try:
         project = supabase_client.create_project(
@@ -111,6 +253,7 @@ def create_project_with_location(
             owner_id=owner_id,
             address=resolved_address,
             address_coord=address_coord,
+            **location,
         )
     except Exception as exc:
         logger.error("Project creation failed: %s", exc)
@@ -131,6 +274,11 @@ def create_project_with_location(
                 "geocode_error": "location_write_failed",
             }
 
+    if deferred:
+        _defer_location(
+            project["id"], location["location_request_id"], address, lat, lng
+        )
+        return dict(project, location_status=LOCATION_PENDING), None
     return project, None
 
 
@@ -154,11 +302,14 @@ def update_project_with_location(
     - Update project row with resolved address and address_coord.
     - Upsert public.locations row (marker='project') if a location was resolved.
     - If no location input in payload → update only the supplied fields.
+    - If the geocoder is too busy → update the other fields now, keep the old
+      location until the background resolution lands, and mark the result
+      ``location_status: "pending"``.
     """
     has_coords = lat is not None and lng is not None
     has_address = address is not None and address.strip() != ""
 
-    geo, err = _resolve_location(
+    geo, err, deferred = _resolve_interactive(
         address=address if has_address else None,
         lat=lat if has_coords else None,
         lng=lng if has_coords else None,
@@ -168,6 +319,10 @@ def update_project_with_location(
 
     address_coord = {"lat": geo["lat"], "lng": geo["lng"]} if geo else None
     resolved_address = geo["address"] if geo else (address if address is not None else None)
+    if deferred:
+        resolved_address = None
+    # Any location change supersedes a background resolution still in flight.
+    location = _location_fields(deferred) if geo or deferred else {}
 
     try:
         updated = supabase_client.update_project(
@@ -176,6 +331,7 @@ def update_project_with_location(
             address=resolved_address,
             address_coord=address_coord,
             show_on_projects=show_on_projects,
+            **location,
         )
     except Exception as exc:
         logger.error("Project update failed for %s: %s", project_id, exc)
@@ -192,6 +348,15 @@ def update_project_with_location(
                 "Location upsert failed for project %s: %s", project_id, exc
             )
 
+    if deferred:
+        _defer_location(
+            project_id,
+            location["location_request_id"],
+            address if has_address else None,
+            lat if has_coords else None,
+            lng if has_coords else None,
+        )
+        return dict(updated, location_status=LOCATION_PENDING), None
     return updated, None
 
 
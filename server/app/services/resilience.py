@@ -0,0 +1,458 @@
+"""
+Resilience primitives for outbound dependencies (Supabase, R2).
+
+* Jittered exponential retries ("full jitter") for idempotent operations, and
+  for any operation whose request provably never left the process (connect
+  failures), within an overall deadline per call. HTTP read timeouts are not
+  retried: the server is already slow, and each attempt would wait the full
+  timeout again.
+* Optional hedged reads: when a read is still outstanding after the
+  dependency's recent latency percentile, a duplicate is issued and the first
+  answer wins.
+* Per-dependency circuit breakers: after N consecutive failed calls, calls fail
+  fast with CircuitOpenError for a cool-down period instead of tying up
+  workers; one trial call is let through afterwards (half-open). A call counts
+  once, after its last attempt, however many times it was retried.
+
+Breaker state is reported by ``/api/health``.
+
+Configuration (environment variables, defaults shown):
+    RESILIENCE_RETRY_ATTEMPTS       — total attempts for retryable calls (3)
+    RESILIENCE_RETRY_BASE_DELAY     — first backoff ceiling in seconds (0.1)
+    RESILIENCE_RETRY_MAX_DELAY      — backoff ceiling in seconds (2.0)
+    RESILIENCE_RETRY_DEADLINE       — no retry starts this many seconds after the
+                                      first attempt began; 0 disables (10)
+    RESILIENCE_HEDGE_ENABLED        — "true" to hedge slow reads (false)
+    RESILIENCE_HEDGE_PERCENTILE     — latency percentile that triggers a hedge (95)
+    RESILIENCE_HEDGE_MIN_DELAY      — never hedge sooner than this, seconds (0.05)
+    RESILIENCE_HEDGE_WORKERS        — threads available for hedged requests (8)
+    RESILIENCE_BREAKER_THRESHOLD    — consecutive failed calls that open a breaker (5)
+    RESILIENCE_BREAKER_RESET        — seconds a breaker stays open (30)
+"""
+
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"{name} is unavailable (circuit open); retry in {retry_after:.0f}s"
+        )
+        self.dependency = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial call."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Return True when a call may proceed (claims the half-open trial slot)."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    logger.warning(
+                        "Circuit breaker %s opened after %s failures",
+                        self.name,
+                        self._failures,
+                    )
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {"state": state, "consecutive_failures": self._failures}
+
+
+class LatencyWindow:
+    """Sliding window of recent call latencies used to pick the hedge delay."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(
+            len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1)
+        )
+        return ordered[index]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    return random.uniform(0.0, min(cap, base * (2**attempt)))
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=int(_env_number("RESILIENCE_HEDGE_WORKERS", 8)),
+                    thread_name_prefix="hedge",
+                )
+    return _hedge_executor
+
+
+def _submit(fn: Callable[[], Any]):
+    # Each task runs in a copy of the caller's context so request-scoped state
+    # (flask.g, metrics tallies) is still visible from the worker thread.
+    return _get_hedge_executor().submit(contextvars.copy_context().run, fn)
+
+
+class Dependency:
+    """Retry, hedge and circuit-breaker policy for one outbound dependency."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(_env_number("RESILIENCE_BREAKER_THRESHOLD", 5)),
+            reset_timeout=_env_number("RESILIENCE_BREAKER_RESET", 30),
+        )
+        self.latency = LatencyWindow()
+        self.attempts = max(1, int(_env_number("RESILIENCE_RETRY_ATTEMPTS", 3)))
+        self.base_delay = _env_number("RESILIENCE_RETRY_BASE_DELAY", 0.1)
+        self.max_delay = _env_number("RESILIENCE_RETRY_MAX_DELAY", 2.0)
+        self.deadline = _env_number("RESILIENCE_RETRY_DEADLINE", 10)
+        self.hedge_enabled = _env_flag("RESILIENCE_HEDGE_ENABLED")
+        self.hedge_percentile = _env_number("RESILIENCE_HEDGE_PERCENTILE", 95)
+        self.hedge_min_delay = _env_number("RESILIENCE_HEDGE_MIN_DELAY", 0.05)
+        self.retries = 0
+        self.hedges = 0
+        self.rejections = 0
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        *,
+        idempotent: bool = False,
+        hedge: bool = False,
+        retryable: Callable[[Exception], bool] = lambda exc: True,
+        is_failure: Callable[[Exception], bool] = lambda exc: True,
+        failed_result: Callable[[Any], bool] = lambda result: False,
+        discard: Callable[[Any], None] = lambda result: None,
+        safe_to_retry: Callable[[Exception], bool] = lambda exc: False,
+    ) -> Any:
+        """
+        Run *fn* under this dependency's policy.
+
+        retryable(exc)      — exception is transient (retried when idempotent)
+        safe_to_retry(exc)  — request never reached the server (always retried)
+        is_failure(exc)     — exception counts against the breaker (4xx should not)
+        failed_result(res)  — a returned value (e.g. a 503 response) is a failure
+        discard(res)        — release a result that will not be returned
+        """
+        attempts = self.attempts
+        deadline = time.monotonic() + self.deadline if self.deadline > 0 else None
+        # One admission per call: retries reuse it (and a half-open trial slot).
+        if not self.breaker.allow():
+            self.rejections += 1
+            raise CircuitOpenError(self.name, self.breaker.retry_after())
+        for attempt in range(attempts):
+            if attempt and self.breaker.state == CircuitBreaker.OPEN:
+                # Other calls opened the breaker meanwhile; stop retrying.
+                self.rejections += 1
+                raise CircuitOpenError(self.name, self.breaker.retry_after())
+            started = time.perf_counter()
+            try:
+                if hedge and self.hedge_enabled:
+                    result = self._hedged(fn, discard)
+                else:
+                    result = fn()
+            except Exception as exc:
+                more = attempt + 1 < attempts
+                if more and (safe_to_retry(exc) or (idempotent and retryable(exc))):
+                    if self._sleep_before_retry(attempt, exc, deadline):
+                        continue
+                if is_failure(exc):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                raise
+            if failed_result(result):
+                if idempotent and attempt + 1 < attempts:
+                    delay = self._retry_delay(attempt, deadline)
+                    if delay is not None:
+                        discard(result)
+                        self._sleep_before_retry(attempt, None, deadline, delay)
+                        continue
+                self.breaker.record_failure()
+                return result
+            self.breaker.record_success()
+            self.latency.observe(time.perf_counter() - started)
+            return result
+        raise RuntimeError(f"{self.name}: retry loop exhausted")  # pragma: no cover
+
+    def _retry_delay(self, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """Backoff before the next attempt, or None when it would start past *deadline*."""
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _sleep_before_retry(
+        self,
+        attempt: int,
+        exc: Optional[Exception],
+        deadline: Optional[float],
+        delay: Optional[float] = None,
+    ) -> bool:
+        """Wait out the backoff; False (no wait) when the deadline rules out a retry."""
+        if delay is None:
+            delay = self._retry_delay(attempt, deadline)
+            if delay is None:
+                logger.info(
+                    "Not retrying %s call: retry deadline reached (%s)",
+                    self.name,
+                    exc or "error response",
+                )
+                return False
+        self.retries += 1
+        logger.info(
+            "Retrying %s call in %.3fs (attempt %s): %s",
+            self.name,
+            delay,
+            attempt + 2,
+            exc or "error response",
+        )
+        time.sleep(delay)
+        return True
+
+    def _hedged(self, fn: Callable[[], Any], discard: Callable[[Any], None]) -> Any:
+        threshold = self.latency.percentile(self.hedge_percentile)
+        if threshold is None:
+            return fn()
+        primary = _submit(fn)
+        done, _ = wait([primary], timeout=max(self.hedge_min_delay, threshold))
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        backup = _submit(fn)
+        pending = {primary, backup}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(
+                            lambda f: (
+                                discard(f.result()) if f.exception() is None else None
+                            )
+                        )
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error  # type: ignore[misc]
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = self.breaker.snapshot()
+        data.update(
+            {
+                "retry_after_seconds": round(self.breaker.retry_after(), 1),
+                "retries": self.retries,
+                "hedged_requests": self.hedges,
+                "rejected_calls": self.rejections,
+            }
+        )
+        return data
+
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _buffered(response: httpx.Response) -> httpx.Response:
+    """Read the body so a hedged response is complete before it is returned."""
+    try:
+        response.read()
+    finally:
+        response.close()
+    return response
+
+
+def _retryable_transport_error(exc: Exception) -> bool:
+    if isinstance(exc, _NOT_SENT_ERRORS):
+        return True
+    return isinstance(exc, httpx.TransportError) and not isinstance(
+        exc, httpx.TimeoutException
+    )
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    httpx transport wrapper applying a Dependency policy to every request.
+
+    GET/HEAD/OPTIONS/PUT/DELETE are retried on transport errors other than
+    read/write timeouts and on 429/5xx gateway statuses; POST/PATCH only when
+    the connection was never made.
+    GETs are hedged when hedging is enabled.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, dependency: str):
+        self._transport = transport
+        self._dependency = dependency
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        method = request.method.upper()
+        hedge = method == "GET"
+
+        def _send() -> httpx.Response:
+            response = self._transport.handle_request(request)
+            return _buffered(response) if hedge else response
+
+        return get_dependency(self._dependency).call(
+            _send,
+            idempotent=method in _IDEMPOTENT_METHODS,
+            hedge=hedge,
+            retryable=_retryable_transport_error,
+            safe_to_retry=lambda exc: isinstance(exc, _NOT_SENT_ERRORS),
+            is_failure=lambda exc: isinstance(exc, httpx.TransportError),
+            failed_result=lambda response: response.status_code in _RETRYABLE_STATUS
+            or response.status_code >= 500,
+            discard=lambda response: response.close(),
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_dependencies: Dict[str, Dependency] = {}
+_dependencies_lock = threading.Lock()
+
+
+def get_dependency(name: str) -> Dependency:
+    """Return the process-wide policy object for *name*, creating it on first use."""
+    dependency = _dependencies.get(name)
+    if dependency is None:
+        with _dependencies_lock:
+            dependency = _dependencies.get(name)
+            if dependency is None:
+                dependency = _dependencies[name] = Dependency(name)
+    return dependency
+
+
+def reset_dependencies() -> None:
+    """Forget all breaker state (tests, and forked children)."""
+    with _dependencies_lock:
+        _dependencies.clear()
+
+
+def dependency_health() -> Dict[str, Dict[str, Any]]:
+    return {name: dep.snapshot() for name, dep in sorted(_dependencies.items())}
+
+
+def _reinit_after_fork() -> None:
+    global _hedge_executor, _executor_lock, _dependencies_lock
+    _hedge_executor = None
+    _executor_lock = threading.Lock()
+    _dependencies_lock = threading.Lock()
+    _dependencies.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
@@ -5,8 +5,24 @@ Cloudflare R2 storage client for file operations.
 import os
 import io
 import boto3
-from typing import BinaryIO, Optional
-from botocore.exceptions import ClientError
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+from app.services.instrumentation import instrument_boto_client
+from app.services.offline import (
+    OFFLINE_BUCKET,
+    get_offline_object_store,
+    object_url_base,
+    offline_backends_enabled,
+)
+from app.services.resilience import CircuitOpenError, get_dependency
 
 # Strings that indicate an env var still holds its placeholder/example value.
 _PLACEHOLDER_FRAGMENTS = (
@@ -21,6 +37,48 @@ _PLACEHOLDER_FRAGMENTS = (
 )
 
 
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _transport_config() -> Config:
+    """
+    Connection-pool settings for the S3 transport.
+
+    R2_HTTP_POOL_SIZE (20), R2_CONNECT_TIMEOUT (5 s) and R2_READ_TIMEOUT (60 s)
+    size the urllib3 pool shared by all threads of a worker; TCP keep-alive keeps
+    idle connections to the R2 endpoint warm between requests.
+    """
+    return Config(
+        max_pool_connections=max(1, int(_env_number("R2_HTTP_POOL_SIZE", 20))),
+        connect_timeout=_env_number("R2_CONNECT_TIMEOUT", 5),
+        read_timeout=_env_number("R2_READ_TIMEOUT", 60),
+        tcp_keepalive=True,
+        # Retries are applied by app.services.resilience so they share the
+        # circuit breaker; botocore makes a single attempt.
+        retries={"mode": "standard", "max_attempts": 1},
+    )
+
+
+_NOT_SENT_ERRORS = (EndpointConnectionError, ConnectTimeoutError)
+_TRANSIENT_ERRORS = _NOT_SENT_ERRORS + (ConnectionClosedError, ReadTimeoutError)
+_TRANSIENT_CODES = {"SlowDown", "Throttling", "RequestTimeout", "InternalError"}
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Network failures, 5xx responses and throttling are worth retrying."""
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return True
+    if isinstance(exc, ClientError):
+        error = exc.response.get("Error", {}) if hasattr(exc, "response") else {}
+        status = (exc.response.get("ResponseMetadata") or {}).get("HTTPStatusCode", 0)
+        return error.get("Code") in _TRANSIENT_CODES or (status or 0) >= 500
+    return False
+
+
 def _is_placeholder(value: Optional[str]) -> bool:
     """Return True if *value* looks like an unfilled template placeholder."""
     if not value:
@@ -48,6 +106,14 @@ class R2Client:
         self.client = None
         self._config_error: Optional[str] = None
 
+        if offline_backends_enabled():
+            # Object URLs are served by the offline blueprint (app/api_routes/offline.py).
+            self.bucket_name = OFFLINE_BUCKET
+            self.endpoint_url = object_url_base()
+            self.public_url = None
+            self.client = self._build_client()
+            return
+
         credentials = {
             "R2_ACCESS_KEY_ID": self.access_key,
             "R2_SECRET_ACCESS_KEY": self.secret_key,
@@ -70,13 +136,26 @@ class R2Client:
             print(f"[r2_client] {self._config_error}")
             return
 
-        self.client = boto3.client(
+        self.client = self._build_client()
+
+    def _build_client(self):
+        if offline_backends_enabled():
+            return get_offline_object_store()
+        client = boto3.client(
             "s3",
             endpoint_url=self.endpoint_url,
             region_name="auto",
             aws_access_key_id=self.access_key,
             aws_secret_access_key=self.secret_key,
+            config=_transport_config(),
         )
+        instrument_boto_client(client)
+        return client
+
+    def reconnect(self) -> None:
+        """Rebuild the S3 client (and its connection pool) if one is configured."""
+        if self.client is not None:
+            self.client = self._build_client()
 
     def _public_base_with_bucket(self) -> Optional[str]:
         """
@@ -109,6 +188,17 @@ class R2Client:
         
         return base
 
+    def _call(self, fn, idempotent: bool = True, hedge: bool = False):
+        """Run one S3 operation under the shared R2 retry/breaker policy."""
+        return get_dependency("r2").call(
+            fn,
+            idempotent=idempotent,
+            hedge=hedge,
+            retryable=_is_transient,
+            safe_to_retry=lambda exc: isinstance(exc, _NOT_SENT_ERRORS),
+            is_failure=_is_transient,
+        )
+
     def _check_client(self) -> None:
         """Raise RuntimeError with a descriptive message when the client is unavailable."""
         if not self.client:
@@ -134,11 +224,22 @@ class R2Client:
         try:
             extra_args = {"ContentType": content_type} if content_type else None
             upload_kwargs = {"ExtraArgs": extra_args} if extra_args else {}
-            self.client.upload_fileobj(file, self.bucket_name, key, **upload_kwargs)
+            seekable = hasattr(file, "seek") and hasattr(file, "tell")
+            start = file.tell() if seekable else None
+
+            def _upload():
+                if start is not None:
+                    file.seek(start)
+                self.client.upload_fileobj(file, self.bucket_name, key, **upload_kwargs)
+
+            # A PUT of the same key is idempotent once the stream can be rewound.
+            self._call(_upload, idempotent=seekable)
             return True
         except ClientError as e:
             print(f"Error uploading file to R2: {e}")
             return False
+        except CircuitOpenError:
+            raise
         except Exception as e:
             # Catch SSL / connection errors (e.g. wrong endpoint, network issues)
             # and re-raise so the upload route can return a useful message.
@@ -229,11 +330,15 @@ class R2Client:
         """
         Upload a project-scoped photo and return the object key if successful.
         """
-        cleaned_ext = ext.lstrip(".")
-        key = f"projects/{project_id}/photos/{photo_id}.{cleaned_ext}"
+        key = self.project_photo_key(project_id, photo_id, ext)
         ok = self.upload_bytes(file_bytes, key, content_type=content_type)
         return key if ok else None
 
+    @staticmethod
+    def project_photo_key(project_id: str, photo_id: str, ext: str) -> str:
+        """Key format: projects/{project_id}/photos/{photo_id}.{ext}"""
+        return f"projects/{project_id}/photos/{photo_id}.{ext.lstrip('.')}"
+
     def generate_presigned_url(self, key: str, expires_in: int = 600) -> Optional[str]:
         """
         Generate presigned URL for private R2 object.
@@ -259,6 +364,61 @@ class R2Client:
             print(f"Error generating presigned URL: {e}")
             return None
 
+    def generate_presigned_upload_url(
+        self,
+        key: str,
+        content_type: Optional[str] = None,
+        expires_in: int = 600,
+        content_length: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Presigned PUT URL so a browser can upload *key* directly to R2.
+
+        When *content_type* or *content_length* is given it is part of the
+        signature and the upload must send the same Content-Type header or
+        exactly that many bytes.
+        """
+        if not self.client:
+            return None
+
+        params = {"Bucket": self.bucket_name, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        if content_length is not None:
+            params["ContentLength"] = int(content_length)
+        try:
+            return self.client.generate_presigned_url(
+                "put_object", Params=params, ExpiresIn=expires_in
+            )
+        except ClientError as e:
+            print(f"Error generating presigned upload URL: {e}")
+            return None
+
+    def download_bytes(
+        self, key: str, byte_range: Optional[str] = None
+    ) -> Optional[bytes]:
+        """
+        Read an object (or the HTTP ``Range`` *byte_range*, e.g. ``"bytes=0-65535"``).
+
+        Returns None when the object does not exist or the read fails.
+        """
+        if not self.client:
+            return None
+
+        kwargs = {"Bucket": self.bucket_name, "Key": key}
+        if byte_range:
+            kwargs["Range"] = byte_range
+        try:
+            response = self._call(
+                lambda: self.client.get_object(**kwargs), hedge=True
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            code = (e.response.get("Error") or {}).get("Code")
+            if code not in ("NoSuchKey", "404"):
+                print(f"Error downloading file from R2: {e}")
+            return None
+
     def get_public_url(self, key: str) -> Optional[str]:
         """
         Get public URL for R2 object (alias for get_file_url for clarity).
@@ -285,12 +445,55 @@ class R2Client:
             return False
 
         try:
-            self.client.delete_object(Bucket=self.bucket_name, Key=key)
+            self._call(
+                lambda: self.client.delete_object(Bucket=self.bucket_name, Key=key)
+            )
             return True
         except ClientError as e:
             print(f"Error deleting file from R2: {e}")
             return False
 
+    def delete_prefix(self, prefix: str, keep: Iterable[str] = ()) -> int:
+        """
+        Delete every object whose key starts with *prefix*, except those in *keep*.
+
+        Keys are listed page by page and removed with one DeleteObjects call
+        per page (at most 1000 keys). Returns the number of objects deleted.
+        """
+        if not self.client or not prefix:
+            return 0
+
+        keep = set(keep)
+        deleted = 0
+        token: Optional[str] = None
+        try:
+            while True:
+                kwargs = {"Bucket": self.bucket_name, "Prefix": prefix}
+                if token:
+                    kwargs["ContinuationToken"] = token
+                page = self._call(
+                    lambda kwargs=kwargs: self.client.list_objects_v2(**kwargs)
+                )
+                doomed = [
+                    {"Key": item["Key"]}
+                    for item in page.get("Contents") or []
+                    if item["Key"] not in keep
+                ]
+                if doomed:
+                    self._call(
+                        lambda doomed=doomed: self.client.delete_objects(
+                            Bucket=self.bucket_name,
+                            Delete={"Objects": doomed, "Quiet": True},
+                        )
+                    )
+                    deleted += len(doomed)
+                if not page.get("IsTruncated"):
+                    return deleted
+                token = page.get("NextContinuationToken")
+        except ClientError as e:
+            print(f"Error deleting prefix {prefix} from R2: {e}")
+            return deleted
+
     def file_exists(self, key: str) -> bool:
         """
         Check if file exists in R2 storage.
@@ -305,11 +508,33 @@ class R2Client:
             return False
 
         try:
-            self.client.head_object(Bucket=self.bucket_name, Key=key)
+            self._call(
+                lambda: self.client.head_object(Bucket=self.bucket_name, Key=key),
+                hedge=True,
+            )
             return True
         except ClientError:
             return False
 
+    def head_file(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        HEAD an object: its ``ContentLength``, ``ContentType``, ``ETag`` and
+        the rest of the S3 response. Returns None when it does not exist.
+        """
+        if not self.client:
+            return None
+
+        try:
+            return self._call(
+                lambda: self.client.head_object(Bucket=self.bucket_name, Key=key),
+                hedge=True,
+            )
+        except ClientError as e:
+            code = (e.response.get("Error") or {}).get("Code")
+            if code not in ("NoSuchKey", "NotFound", "404"):
+                print(f"Error reading file metadata from R2: {e}")
+            return None
+
     def get_file_size(self, key: str) -> Optional[int]:
         """
         Get file size from R2 storage.
@@ -324,7 +549,10 @@ class R2Client:
             return None
 
         try:
-            response = self.client.head_object(Bucket=self.bucket_name, Key=key)
+            response = self._call(
+                lambda: self.client.head_object(Bucket=self.bucket_name, Key=key),
+                hedge=True,
+            )
             return response.get("ContentLength")
         except ClientError as e:
             print(f"Error getting file size: {e}")
@@ -333,3 +561,7 @@ class R2Client:
 
 # Global instance
 r2_client = R2Client()
+
+# boto3 clients are not fork-safe: give each forked worker its own pool.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=r2_client.reconnect)
@@ -0,0 +1,291 @@
+"""
+Schema capability detection for the Supabase tables whose shape varies between
+deployments (optional thumbnail / geocode columns, newer plan fields).
+
+The columns of ``photos``, ``locations``, ``project_plans`` and ``project_stats``
+are read once from the PostgREST OpenAPI document (``GET /rest/v1/``) and cached
+in a local JSON file so fresh workers start with a warm answer. Request handlers only ever
+read the in-memory snapshot; they never wait for schema discovery.
+When the cached snapshot is stale (or missing) a refresh runs on a background
+thread, retried with backoff while it fails; until it lands callers try the
+write and fall back when PostgREST rejects a column. A worker forked from a
+warmed parent re-warms on its first read (file cache first, then a background
+refresh if that is stale).
+
+Configuration (environment variables):
+    SUPABASE_SCHEMA_PROBE      — "off" disables probing and the file cache (default: on)
+    SUPABASE_SCHEMA_CACHE_PATH — cache file (default: <tmpdir>/swallow-skyer-schema.json)
+    SUPABASE_SCHEMA_CACHE_TTL  — seconds before a cached snapshot is refreshed (default: 3600)
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+from app.services.offline import offline_backends_enabled
+from app.services.resilience import backoff_delay
+from app.supabase_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+PROBED_TABLES = ("photos", "locations", "project_plans", "project_stats")
+
+# Backoff between failed background probes (seconds).
+RETRY_BASE_SECONDS = 5.0
+RETRY_CAP_SECONDS = 300.0
+
+
+def _probe_enabled() -> bool:
+    # The offline PostgREST fake is schemaless; there is nothing to probe.
+    if offline_backends_enabled():
+        return False
+    return (os.getenv("SUPABASE_SCHEMA_PROBE") or "on").strip().lower() not in (
+        "0",
+        "off",
+        "false",
+        "no",
+    )
+
+
+def _cache_path() -> str:
+    return os.getenv("SUPABASE_SCHEMA_CACHE_PATH") or os.path.join(
+        tempfile.gettempdir(), "swallow-skyer-schema.json"
+    )
+
+
+def _cache_ttl() -> float:
+    try:
+        return float(os.getenv("SUPABASE_SCHEMA_CACHE_TTL", "3600"))
+    except ValueError:
+        return 3600.0
+
+
+def _supabase_credentials() -> Optional[tuple]:
+    url = (os.getenv("SUPABASE_URL") or "").strip().rstrip("/")
+    key = (
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        or os.getenv("SUPABASE_SERVICE_KEY")
+        or ""
+    ).strip()
+    if not url or not key:
+        return None
+    return url, key
+
+
+class SchemaCapabilities:
+    """Immutable snapshot of the column sets of the probed tables."""
+
+    def __init__(self, tables: Dict[str, Iterable[str]], fetched_at: float):
+        self.tables: Dict[str, FrozenSet[str]] = {
+            name: frozenset(columns) for name, columns in tables.items()
+        }
+        self.fetched_at = fetched_at
+
+    def columns(self, table: str) -> Optional[FrozenSet[str]]:
+        """Column names of *table*, or None when the table was not probed."""
+        return self.tables.get(table)
+
+    def has_columns(self, table: str, *columns: str) -> Optional[bool]:
+        """True/False when *table* is known, None when it is not."""
+        known = self.columns(table)
+        if known is None:
+            return None
+        return all(column in known for column in columns)
+
+    def is_fresh(self, ttl: float) -> bool:
+        return (time.time() - self.fetched_at) < ttl
+
+    def to_json(self, url: str) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "fetched_at": self.fetched_at,
+            "tables": {name: sorted(cols) for name, cols in self.tables.items()},
+        }
+
+    @classmethod
+    def from_json(
+        cls, data: Dict[str, Any], url: str
+    ) -> Optional["SchemaCapabilities"]:
+        if not isinstance(data, dict) or data.get("url") != url:
+            return None
+        tables = data.get("tables")
+        if not isinstance(tables, dict):
+            return None
+        try:
+            return cls(tables, float(data.get("fetched_at", 0)))
+        except (TypeError, ValueError):
+            return None
+
+
+def parse_openapi_columns(
+    document: Dict[str, Any], tables: Iterable[str] = PROBED_TABLES
+) -> Dict[str, FrozenSet[str]]:
+    """
+    Extract column names from a PostgREST OpenAPI (Swagger 2.0) document.
+
+    Each exposed table appears under ``definitions.<table>.properties``.
+    Tables missing from the document are omitted from the result.
+    """
+    definitions = (document or {}).get("definitions") or {}
+    result: Dict[str, FrozenSet[str]] = {}
+    for table in tables:
+        properties = (definitions.get(table) or {}).get("properties")
+        if isinstance(properties, dict):
+            result[table] = frozenset(properties.keys())
+    return result
+
+
+def fetch_capabilities(url: str, key: str, timeout: float = 10.0) -> SchemaCapabilities:
+    """Fetch the OpenAPI document once and return a fresh snapshot."""
+    response = get_http_client().get(
+        f"{url}/rest/v1/",
+        headers={
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/openapi+json",
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return SchemaCapabilities(parse_openapi_columns(response.json()), time.time())
+
+
+def load_cached(path: str, url: str) -> Optional[SchemaCapabilities]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return SchemaCapabilities.from_json(json.load(handle), url)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(path: str, url: str, capabilities: SchemaCapabilities) -> None:
+    """Write the snapshot atomically so concurrent workers never read a torn file."""
+    directory = os.path.dirname(path) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=".schema-", suffix=".json"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(capabilities.to_json(url), handle)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning("Could not write schema capability cache %s: %s", path, exc)
+
+
+class SchemaProbe:
+    """Process-wide holder for the current capability snapshot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capabilities: Optional[SchemaCapabilities] = None
+        self._refreshing = False
+        self._warmed = False
+        self._warm_pending = False
+        self._failures = 0
+        self._retry_timer: Optional[threading.Timer] = None
+
+    def current(self) -> Optional[SchemaCapabilities]:
+        """
+        Return the in-memory snapshot; never waits on the network.
+
+        In a freshly forked worker the first call re-runs ``warm`` so the
+        worker picks up the file cache and refreshes it in the background.
+        """
+        if self._warm_pending:
+            self._warm_pending = False
+            self.warm(background=True)
+        return self._capabilities
+
+    def set(self, capabilities: Optional[SchemaCapabilities]) -> None:
+        self._capabilities = capabilities
+
+    def warm(self, background: bool = True) -> Optional[SchemaCapabilities]:
+        """
+        Load the file cache and refresh it when stale or missing.
+
+        Called once at application start-up. With ``background=True`` the
+        network refresh runs on a daemon thread so boot is never blocked.
+        """
+        if not _probe_enabled():
+            return self._capabilities
+        creds = _supabase_credentials()
+        if creds is None:
+            return self._capabilities
+        url, _ = creds
+        self._warmed = True
+        if self._capabilities is None or not self._capabilities.is_fresh(_cache_ttl()):
+            cached = load_cached(_cache_path(), url)
+            if cached is not None and (
+                self._capabilities is None
+                or cached.fetched_at > self._capabilities.fetched_at
+            ):
+                self._capabilities = cached
+        if self._capabilities is None or not self._capabilities.is_fresh(_cache_ttl()):
+            self.refresh(background=background)
+        return self._capabilities
+
+    def invalidate(self) -> None:
+        """Schema drift detected (e.g. PGRST204): schedule a background refresh."""
+        if _probe_enabled():
+            self.refresh(background=True)
+
+    def refresh(self, background: bool = True) -> None:
+        creds = _supabase_credentials()
+        if creds is None:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        if background:
+            threading.Thread(
+                target=self._refresh,
+                args=creds + (True,),
+                name="schema-probe",
+                daemon=True,
+            ).start()
+        else:
+            self._refresh(*creds)
+
+    def _refresh(self, url: str, key: str, retry: bool = False) -> None:
+        try:
+            capabilities = fetch_capabilities(url, key)
+        except Exception as exc:
+            logger.warning("Schema capability probe failed: %s", exc)
+            if retry:
+                self._schedule_retry()
+            return
+        finally:
+            with self._lock:
+                self._refreshing = False
+        self._failures = 0
+        self._capabilities = capabilities
+        save_cached(_cache_path(), url, capabilities)
+
+    def _schedule_retry(self) -> None:
+        """Probe again after a full-jitter backoff that grows with each failure."""
+        delay = backoff_delay(self._failures, RETRY_BASE_SECONDS, RETRY_CAP_SECONDS)
+        self._failures += 1
+        timer = threading.Timer(delay, self.refresh)
+        timer.daemon = True
+        self._retry_timer = timer
+        timer.start()
+
+    def _reinit_after_fork(self) -> None:
+        # The parent's probe thread and retry timer do not exist in the child.
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._retry_timer = None
+        self._failures = 0
+        self._warm_pending = self._warmed
+
+
+schema_probe = SchemaProbe()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=schema_probe._reinit_after_fork)
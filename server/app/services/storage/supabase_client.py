@@ -2,15 +2,174 @@
 Supabase client for metadata operations.
 """
 
+import json
 import logging
 import os
 import re
 import time
 import datetime
 from copy import deepcopy
-from typing import Dict, Any, Optional, List, Tuple, Sequence
-from supabase import create_client, Client
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from flask import g, has_request_context
+from postgrest.exceptions import APIError
+from supabase import Client
+from app.services.geocoding.client import geocode_deadline
 from app.services.geocoding.reverse_geocoder import reverse_geocode
+from app.services.offline import offline_backends_enabled
+from app.services.resilience import backoff_delay
+from app.supabase_client import get_service_role_client
+from app.utils.ttl_cache import TTLCache
+from .schema_capabilities import schema_probe
+
+# Attribute on flask.g holding the request-scoped identity map.
+_IDENTITY_MAP_ATTR = "_supabase_identity_map"
+_UNSET = object()
+
+# Rows per PostgREST request for the *_many bulk helpers.
+_BULK_CHUNK_SIZE = int(os.getenv("SUPABASE_BULK_CHUNK_SIZE", "100"))
+# Unknown columns a single bulk chunk may strip before giving up.
+_MAX_STRIPPED_COLUMNS = 5
+# Seconds a new photo location may wait on reverse geocoding (queue + call);
+# past it the row is stored without city/state/country for the backfill.
+GEOCODE_UPLOAD_DEADLINE = float(os.getenv("GEOCODE_UPLOAD_DEADLINE", "2"))
+
+# Shape of a project_stats row (see migrations/*_project_stats_counters.sql).
+_PROJECT_STATS_FIELDS = (
+    "photo_count",
+    "location_count",
+    "storage_bytes",
+    "first_captured_at",
+    "last_captured_at",
+)
+
+# Per-user project listings (dashboard). Writes through this client evict the
+# affected entries; the TTL bounds staleness for writes made by other workers
+# and for counters that change with photo uploads.
+PROJECT_LIST_CACHE_TTL = float(os.getenv("PROJECT_LIST_CACHE_TTL", "15"))
+
+
+def reset_identity_map() -> None:
+    """Discard the request-scoped identity map (called at request start/teardown)."""
+    if has_request_context():
+        g.pop(_IDENTITY_MAP_ATTR, None)
+
+
+_THUMBNAIL_COLUMNS = ("thumbnail_r2_path", "thumbnail_r2_url")
+_LOCATION_GEOCODE_COLUMNS = ("city", "state", "country")
+
+
+def _unknown_column_name(exc: Exception) -> Optional[str]:
+    """
+    Supabase PostgREST error PGRST204 indicates an unknown column in schema cache.
+    Example:
+      {'message': "Could not find the 'original_filename' column of 'photos' in the schema cache",
+       'code': 'PGRST204', ...}
+    Returns the column name, or None for any other error.
+    """
+    text = str(exc)
+    if "PGRST204" not in text or "Could not find the" not in text:
+        return None
+    match = re.search(r"Could not find the '([^']+)' column", text)
+    return match.group(1) if match else None
+
+
+def _strip_unknown_column(payload: Dict[str, Any], exc: Exception) -> Optional[Dict[str, Any]]:
+    """
+    Drop the column named by a PGRST204 error so the write can be retried
+    against an older schema. Returns None when the error is something else.
+    """
+    column = _unknown_column_name(exc)
+    if not column or column not in payload:
+        return None
+    next_payload = dict(payload)
+    next_payload.pop(column, None)
+    return next_payload
+
+
+def _is_row_error(exc: Exception) -> bool:
+    """
+    True for PostgREST errors caused by the row data itself: SQLSTATE class 22
+    (data exception) or 23 (integrity constraint violation). Transport
+    failures, open breakers and every other error are not.
+    """
+    return isinstance(exc, APIError) and str(exc.code or "").startswith(("22", "23"))
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        if value is None:
+            return None
+        return float(value)
+    except Exception:
+        return None
+
+
+def _dms_to_decimal(dms: Any, ref: Any) -> Optional[float]:
+    """
+    Convert DMS arrays like [40, 45, 24.43] into decimal degrees.
+    """
+    if not isinstance(dms, (list, tuple)) or len(dms) != 3:
+        return None
+    deg = _to_float(dms[0])
+    minutes = _to_float(dms[1])
+    seconds = _to_float(dms[2])
+    if deg is None or minutes is None or seconds is None:
+        return None
+    decimal = deg + minutes / 60.0 + seconds / 3600.0
+    try:
+        ref_str = str(ref).strip().upper()
+    except Exception:
+        ref_str = ""
+    if ref_str in ("S", "W"):
+        decimal = -decimal
+    return decimal
+
+
+def _canonicalize_exif(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Force a stable, minimal EXIF shape for storage:
+      exif_data = { gps: { lat, lon, alt?, hpe_m? } }
+
+    This prevents non-deterministic/binary-heavy EXIF blobs (e.g. MakerNote)
+    from entering the database and ensures downstream map behavior is stable.
+    """
+    exif = payload.get("exif_data")
+    if not isinstance(exif, dict):
+        return payload
+
+    gps = exif.get("gps") if isinstance(exif.get("gps"), dict) else {}
+
+    lat = _to_float(gps.get("lat"))
+    lon = _to_float(gps.get("lon"))
+    if lat is None or lon is None:
+        # Legacy shape: GPSLatitude/GPSLongitude are DMS arrays + refs.
+        lat = _dms_to_decimal(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
+        lon = _dms_to_decimal(
+            gps.get("GPSLongitude"), gps.get("GPSLongitudeRef")
+        )
+
+    alt = _to_float(gps.get("alt") if "alt" in gps else gps.get("GPSAltitude"))
+    hpe_m = _to_float(
+        gps.get("hpe_m") if "hpe_m" in gps else gps.get("GPSHPositioningError")
+    )
+
+    canonical_gps: Dict[str, Any] = {}
+    if lat is not None and lon is not None:
+        canonical_gps["lat"] = lat
+        canonical_gps["lon"] = lon
+        if alt is not None:
+            canonical_gps["alt"] = alt
+        if hpe_m is not None:
+            canonical_gps["hpe_m"] = hpe_m
+
+        # Also ensure top-level lat/lon columns are populated when missing.
+        if payload.get("latitude") is None:
+            payload["latitude"] = lat
+        if payload.get("longitude") is None:
+            payload["longitude"] = lon
+
+    payload["exif_data"] = {"gps": canonical_gps}
+    return payload
 
 
 class SupabaseClient:
@@ -22,13 +181,94 @@ class SupabaseClient:
         self.key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv(
             "SUPABASE_SERVICE_KEY"
         )
-        self.client: Optional[Client] = None
-
-        if self.url and self.key:
-            self.client = create_client(self.url, self.key)
+        self._client_override: Any = _UNSET
+        # Explicit answers (set by hints or tests) win over the schema snapshot.
         self._thumbnail_columns_supported: Optional[bool] = None
         self._location_geocode_columns: Optional[bool] = None
         self._show_on_photos_supported: Optional[bool] = None
+        # (user_id, show_on_projects) -> listing built by list_projects_for_user.
+        self._project_lists = TTLCache(PROJECT_LIST_CACHE_TTL, max_entries=1024)
+
+    @property
+    def client(self) -> Optional[Client]:
+        """
+        The shared service-role client from the process-wide registry.
+
+        Resolved on every access so forked workers pick up their own pooled
+        transport. Assigning a value pins an explicit client (used by tests).
+        """
+        if self._client_override is not _UNSET:
+            return self._client_override
+        if not (self.url and self.key) and not offline_backends_enabled():
+            return None
+        return get_service_role_client()
+
+    @client.setter
+    def client(self, value: Optional[Client]) -> None:
+        self._client_override = value
+
+    # ------------------------------------------------------------------
+    # Request-scoped identity map
+    # ------------------------------------------------------------------
+    #
+    # Single-entity reads (project, photo, role, location, user) are memoized
+    # in flask.g for the duration of one request so handlers and the permission
+    # layer can re-read the same row without another PostgREST round trip.
+    # Writes made through this client refresh or evict the affected entry.
+    # Outside a request context nothing is cached.
+
+    def _identity_map(self) -> Optional[Dict[Tuple[str, Any], Any]]:
+        if not has_request_context():
+            return None
+        store = g.get(_IDENTITY_MAP_ATTR)
+        if store is None:
+            store = {}
+            setattr(g, _IDENTITY_MAP_ATTR, store)
+        return store
+
+    def _recall(self, kind: str, key: Any) -> Any:
+        store = self._identity_map()
+        if store is None:
+            return _UNSET
+        value = store.get((kind, key), _UNSET)
+        if value is _UNSET or value is None:
+            return value
+        return deepcopy(value)
+
+    def _remember(self, kind: str, key: Any, value: Any) -> None:
+        store = self._identity_map()
+        if store is None:
+            return
+        store[(kind, key)] = deepcopy(value)
+
+    def _forget(self, kind: str, key: Any) -> None:
+        store = self._identity_map()
+        if store is not None:
+            store.pop((kind, key), None)
+
+    # ------------------------------------------------------------------
+    # Per-user project listing cache
+    # ------------------------------------------------------------------
+
+    def invalidate_project_lists(
+        self, user_id: Optional[str] = None, project_id: Optional[str] = None
+    ) -> None:
+        """
+        Evict cached project listings.
+
+        user_id drops every listing of that user (membership changes);
+        project_id drops every listing that contains the project (project,
+        plan or stats changes visible to all of its members).
+        """
+        if user_id is not None:
+            self._project_lists.pop_matching(lambda key, _value: key[0] == user_id)
+        if project_id is not None:
+            self._project_lists.pop_matching(
+                lambda _key, value: any(p.get("id") == project_id for p in value)
+            )
+
+    def clear_project_list_cache(self) -> None:
+        self._project_lists.clear()
 
     def update_thumbnail_column_hint(self, record: Optional[Dict[str, Any]]) -> None:
         """Infer thumbnail column support from a returned record."""
@@ -37,33 +277,84 @@ class SupabaseClient:
         if "thumbnail_r2_path" in record or "thumbnail_r2_url" in record:
             self._thumbnail_columns_supported = True
 
+    # ------------------------------------------------------------------
+    # Schema capabilities
+    # ------------------------------------------------------------------
+    #
+    # Column support is answered from the start-up schema snapshot (see
+    # schema_capabilities.py); no request performs schema discovery. Until the
+    # snapshot is available the helpers assume the shipped migrations ran, and
+    # the writers fall back when PostgREST rejects a column (PGRST204), which
+    # also settles the answer for this process.
+
+    def _schema_has(self, table: str, *columns: str) -> Optional[bool]:
+        capabilities = schema_probe.current()
+        if capabilities is None:
+            return None
+        return capabilities.has_columns(table, *columns)
+
+    def _schema_may_have(self, table: str, *columns: str) -> bool:
+        """
+        False only when the snapshot proves *table* (or a column) is missing.
+
+        A snapshot without the table means its migration has not run yet; no
+        snapshot at all is optimistic and lets the request decide.
+        """
+        if schema_probe.current() is None:
+            return True
+        return bool(self._schema_has(table, *columns))
+
+    def _execute_stripping_unknown(
+        self, payload: Dict[str, Any], send: Callable[[Dict[str, Any]], Any]
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Run ``send(payload)``, dropping each column PostgREST reports missing
+        (PGRST204) and retrying. Returns the response and the payload sent.
+        """
+        stripped = 0
+        while True:
+            try:
+                return send(payload), payload
+            except Exception as exc:
+                next_payload = _strip_unknown_column(payload, exc)
+                if next_payload is None or stripped >= _MAX_STRIPPED_COLUMNS:
+                    raise
+                if stripped == 0:
+                    # The live schema lags this code; refresh the snapshot.
+                    schema_probe.invalidate()
+                payload = next_payload
+                stripped += 1
+
+    def note_missing_column(self, column: Optional[str]) -> None:
+        """Record that the live schema rejected *column* (e.g. via PGRST204)."""
+        if column in _THUMBNAIL_COLUMNS:
+            self._thumbnail_columns_supported = False
+        elif column in _LOCATION_GEOCODE_COLUMNS:
+            self._location_geocode_columns = False
+
     def supports_thumbnail_columns(self) -> bool:
         """Determine whether photos table has thumbnail columns."""
         if self._thumbnail_columns_supported is not None:
             return self._thumbnail_columns_supported
-        if not self.client:
-            self._thumbnail_columns_supported = False
-            return False
-        try:
-            self.client.table("photos").select("thumbnail_r2_path").limit(1).execute()
-            self._thumbnail_columns_supported = True
-        except Exception:
-            self._thumbnail_columns_supported = False
-        return self._thumbnail_columns_supported
+        supported = self._schema_has("photos", *_THUMBNAIL_COLUMNS)
+        # Unknown schema: try the columns; writers fall back to the metadata JSON.
+        return True if supported is None else supported
 
     def supports_show_on_photos(self) -> bool:
         """Determine whether photos table has show_on_photos column."""
         if self._show_on_photos_supported is not None:
             return self._show_on_photos_supported
-        if not self.client:
-            self._show_on_photos_supported = False
-            return False
-        try:
-            self.client.table("photos").select("show_on_photos").limit(1).execute()
-            self._show_on_photos_supported = True
-        except Exception:
-            self._show_on_photos_supported = False
-        return self._show_on_photos_supported
+        supported = self._schema_has("photos", "show_on_photos")
+        # Unknown schema: assume the column from the shipped migration exists.
+        return True if supported is None else supported
+
+    def supports_location_geocode_columns(self) -> bool:
+        """Determine whether locations table has city/state/country columns."""
+        if self._location_geocode_columns is not None:
+            return self._location_geocode_columns
+        supported = self._schema_has("locations", *_LOCATION_GEOCODE_COLUMNS)
+        # Unknown schema: try the columns; a rejected write drops the geocode.
+        return True if supported is None else supported
 
     def extract_thumbnail_fields(
         self, record: Dict[str, Any]
@@ -124,101 +415,6 @@ class SupabaseClient:
         if not self.client:
             raise RuntimeError("Supabase client not initialized - check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
 
-        def _strip_unknown_column(payload: Dict[str, Any], exc: Exception) -> Optional[Dict[str, Any]]:
-            """
-            Supabase PostgREST error PGRST204 indicates an unknown column in schema cache.
-            Example:
-              {'message': "Could not find the 'original_filename' column of 'photos' in the schema cache",
-               'code': 'PGRST204', ...}
-            We parse the column name, drop it, and retry to stay compatible with older schemas.
-            """
-            text = str(exc)
-            if "PGRST204" not in text or "Could not find the" not in text:
-                return None
-            match = re.search(r"Could not find the '([^']+)' column", text)
-            if not match:
-                return None
-            column = match.group(1)
-            if column not in payload:
-                return None
-            next_payload = dict(payload)
-            next_payload.pop(column, None)
-            return next_payload
-
-        def _to_float(value: Any) -> Optional[float]:
-            try:
-                if value is None:
-                    return None
-                return float(value)
-            except Exception:
-                return None
-
-        def _dms_to_decimal(dms: Any, ref: Any) -> Optional[float]:
-            """
-            Convert DMS arrays like [40, 45, 24.43] into decimal degrees.
-            """
-            if not isinstance(dms, (list, tuple)) or len(dms) != 3:
-                return None
-            deg = _to_float(dms[0])
-            minutes = _to_float(dms[1])
-            seconds = _to_float(dms[2])
-            if deg is None or minutes is None or seconds is None:
-                return None
-            decimal = deg + minutes / 60.0 + seconds / 3600.0
-            try:
-                ref_str = str(ref).strip().upper()
-            except Exception:
-                ref_str = ""
-            if ref_str in ("S", "W"):
-                decimal = -decimal
-            return decimal
-
-        def _canonicalize_exif(payload: Dict[str, Any]) -> Dict[str, Any]:
-            """
-            Force a stable, minimal EXIF shape for storage:
-              exif_data = { gps: { lat, lon, alt?, hpe_m? } }
-
-            This prevents non-deterministic/binary-heavy EXIF blobs (e.g. MakerNote)
-            from entering the database and ensures downstream map behavior is stable.
-            """
-            exif = payload.get("exif_data")
-            if not isinstance(exif, dict):
-                return payload
-
-            gps = exif.get("gps") if isinstance(exif.get("gps"), dict) else {}
-
-            lat = _to_float(gps.get("lat"))
-            lon = _to_float(gps.get("lon"))
-            if lat is None or lon is None:
-                # Legacy shape: GPSLatitude/GPSLongitude are DMS arrays + refs.
-                lat = _dms_to_decimal(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
-                lon = _dms_to_decimal(
-                    gps.get("GPSLongitude"), gps.get("GPSLongitudeRef")
-                )
-
-            alt = _to_float(gps.get("alt") if "alt" in gps else gps.get("GPSAltitude"))
-            hpe_m = _to_float(
-                gps.get("hpe_m") if "hpe_m" in gps else gps.get("GPSHPositioningError")
-            )
-
-            canonical_gps: Dict[str, Any] = {}
-            if lat is not None and lon is not None:
-                canonical_gps["lat"] = lat
-                canonical_gps["lon"] = lon
-                if alt is not None:
-                    canonical_gps["alt"] = alt
-                if hpe_m is not None:
-                    canonical_gps["hpe_m"] = hpe_m
-
-                # Also ensure top-level lat/lon columns are populated when missing.
-                if payload.get("latitude") is None:
-                    payload["latitude"] = lat
-                if payload.get("longitude") is None:
-                    payload["longitude"] = lon
-
-            payload["exif_data"] = {"gps": canonical_gps}
-            return payload
-
         last_exc: Optional[Exception] = None
         payload = _canonicalize_exif(dict(photo_data))
         removed_columns = 0
@@ -228,18 +424,23 @@ class SupabaseClient:
                 record = response.data[0] if response.data else None
                 if record:
                     self.update_thumbnail_column_hint(record)
+                    if record.get("id"):
+                        self._remember("photo", record["id"], record)
                 return record
             except OSError as e:
                 last_exc = e
                 # macOS Errno 35: Resource temporarily unavailable (transient)
                 if getattr(e, "errno", None) == 35 and attempt < 2:
-                    time.sleep(0.25 * (attempt + 1))
+                    time.sleep(backoff_delay(attempt, 0.25, 1.0))
                     continue
                 raise RuntimeError(f"Error storing photo metadata: {e}") from e
             except Exception as e:
                 last_exc = e
                 maybe_stripped = _strip_unknown_column(payload, e)
                 if maybe_stripped is not None and removed_columns < 5:
+                    if removed_columns == 0:
+                        # The live schema lags this code; refresh the snapshot.
+                        schema_probe.invalidate()
                     payload = maybe_stripped
                     removed_columns += 1
                     # retry immediately without consuming more attempts
@@ -265,11 +466,17 @@ class SupabaseClient:
             print("Supabase client not initialized - check environment variables")
             return None
 
+        cached = self._recall("photo", photo_id)
+        if cached is not _UNSET:
+            return cached
+
         try:
             response = (
                 self.client.table("photos").select("*").eq("id", photo_id).execute()
             )
-            return response.data[0] if response.data else None
+            record = response.data[0] if response.data else None
+            self._remember("photo", photo_id, record)
+            return record
         except Exception as e:
             print(f"Error retrieving photo metadata: {e}")
             return None
@@ -367,8 +574,10 @@ class SupabaseClient:
             inserted = self.client.table("locations").insert(payload).execute()
             if inserted.data:
                 loc_id = inserted.data[0].get("id")
-                # Enrich with reverse geocode; failures are non-fatal
-                geocode = reverse_geocode(latitude, longitude) or {}
+                # Enrich with reverse geocode; failures (including a busy
+                # geocoder missing the deadline) leave the fields null.
+                with geocode_deadline(GEOCODE_UPLOAD_DEADLINE):
+                    geocode = reverse_geocode(latitude, longitude) or {}
                 if geocode:
                     update_fields = self._build_location_geocode_fields(geocode)
                     if update_fields:
@@ -377,6 +586,7 @@ class SupabaseClient:
                                 "id", loc_id
                             ).execute()
                         except Exception as e:
+                            self.note_missing_column(_unknown_column_name(e))
                             print(f"Error updating location geocode: {e}")
                 return loc_id
         except Exception as e:
@@ -408,6 +618,7 @@ class SupabaseClient:
                 self.client.table("locations").update(update_payload).eq(
                     "id", location_id
                 ).execute()
+                self._forget("location", location_id)
         except Exception as e:
             print(f"Error incrementing location count: {e}")
     
@@ -437,6 +648,7 @@ class SupabaseClient:
                 self.client.table("locations").update(update_payload).eq(
                     "id", location_id
                 ).execute()
+                self._forget("location", location_id)
         except Exception as e:
             print(f"Error decrementing location count: {e}")
 
@@ -466,9 +678,7 @@ class SupabaseClient:
         return distance
 
     def _build_location_geocode_fields(self, geocode: Dict[str, Any]) -> Dict[str, Any]:
-        if self._location_geocode_columns is None:
-            self._location_geocode_columns = self._detect_location_geocode_columns()
-        if self._location_geocode_columns:
+        if self.supports_location_geocode_columns():
             return {
                 "city": geocode.get("city"),
                 "state": geocode.get("state"),
@@ -479,15 +689,6 @@ class SupabaseClient:
         # because PostgREST will reject the update when schema cache is missing it.
         return {}
 
-    def _detect_location_geocode_columns(self) -> bool:
-        if not self.client:
-            return False
-        try:
-            self.client.table("locations").select("city,state,country").limit(1).execute()
-            return True
-        except Exception:
-            return False
-
     def check_duplicate_photo(
         self,
         project_id: str,
@@ -549,62 +750,7 @@ class SupabaseClient:
         # Keep exif_data stable/minimal on updates as well (do not allow a full EXIF blob).
         if "exif_data" in payload and isinstance(payload.get("exif_data"), dict):
             try:
-                exif = payload.get("exif_data") or {}
-                gps = exif.get("gps") if isinstance(exif.get("gps"), dict) else {}
-
-                def _to_float(value: Any) -> Optional[float]:
-                    try:
-                        if value is None:
-                            return None
-                        return float(value)
-                    except Exception:
-                        return None
-
-                def _dms_to_decimal(dms: Any, ref: Any) -> Optional[float]:
-                    if not isinstance(dms, (list, tuple)) or len(dms) != 3:
-                        return None
-                    deg = _to_float(dms[0])
-                    minutes = _to_float(dms[1])
-                    seconds = _to_float(dms[2])
-                    if deg is None or minutes is None or seconds is None:
-                        return None
-                    decimal = deg + minutes / 60.0 + seconds / 3600.0
-                    try:
-                        ref_str = str(ref).strip().upper()
-                    except Exception:
-                        ref_str = ""
-                    if ref_str in ("S", "W"):
-                        decimal = -decimal
-                    return decimal
-
-                lat = _to_float(gps.get("lat"))
-                lon = _to_float(gps.get("lon"))
-                if lat is None or lon is None:
-                    lat = _dms_to_decimal(gps.get("GPSLatitude"), gps.get("GPSLatitudeRef"))
-                    lon = _dms_to_decimal(
-                        gps.get("GPSLongitude"), gps.get("GPSLongitudeRef")
-                    )
-
-                alt = _to_float(gps.get("alt") if "alt" in gps else gps.get("GPSAltitude"))
-                hpe_m = _to_float(
-                    gps.get("hpe_m") if "hpe_m" in gps else gps.get("GPSHPositioningError")
-                )
-
-                canonical_gps: Dict[str, Any] = {}
-                if lat is not None and lon is not None:
-                    canonical_gps["lat"] = lat
-                    canonical_gps["lon"] = lon
-                    if alt is not None:
-                        canonical_gps["alt"] = alt
-                    if hpe_m is not None:
-                        canonical_gps["hpe_m"] = hpe_m
-
-                    if payload.get("latitude") is None:
-                        payload["latitude"] = lat
-                    if payload.get("longitude") is None:
-                        payload["longitude"] = lon
-
-                payload["exif_data"] = {"gps": canonical_gps}
+                payload = _canonicalize_exif(payload)
             except Exception:
                 # If anything goes wrong, fall back to empty gps to avoid bloating rows.
                 payload["exif_data"] = {"gps": {}}
@@ -623,9 +769,11 @@ class SupabaseClient:
                 record = response.data[0] if response.data else None
                 if record:
                     self.update_thumbnail_column_hint(record)
+                    self._remember("photo", photo_id, record)
                 else:
                     # Treat empty data as success and synthesize record
                     record = {"id": photo_id, **payload}
+                    self._forget("photo", photo_id)
                 return record
             except Exception as e:
                 last_exc = e
@@ -636,6 +784,13 @@ class SupabaseClient:
                     match = re.search(r"'([^']+)' column", error_str)
                     if match:
                         unknown_col = match.group(1)
+                        if unknown_col in _THUMBNAIL_COLUMNS and unknown_col in payload:
+                            # Keep the thumbnail in the metadata JSON instead.
+                            self.note_missing_column(unknown_col)
+                            payload = self._thumbnail_columns_to_metadata(
+                                photo_id, payload
+                            )
+                            continue
                         if unknown_col in payload:
                             print(f"Removing unknown column '{unknown_col}' from update payload")
                             del payload[unknown_col]
@@ -644,9 +799,25 @@ class SupabaseClient:
                 break
 
         # If we exhausted retries or hit a non-handled error, fall back but do not fail the upload
+        self._forget("photo", photo_id)
         print(f"Non-fatal: update_photo_metadata failed for {photo_id}: {last_exc}")
         return {"id": photo_id, **payload}
 
+    def _thumbnail_columns_to_metadata(
+        self, photo_id: str, payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Move thumbnail column values of an update into the metadata JSON."""
+        payload = dict(payload)
+        path = payload.pop("thumbnail_r2_path", None)
+        url = payload.pop("thumbnail_r2_url", None)
+        if path or url:
+            payload.update(
+                self.build_thumbnail_updates(
+                    path, url, record_hint=self.get_photo_metadata(photo_id)
+                )
+            )
+        return payload
+
     def delete_photo_metadata(self, photo_id: str) -> bool:
         """
         Delete photo metadata from Supabase.
@@ -663,11 +834,281 @@ class SupabaseClient:
 
         try:
             self.client.table("photos").delete().eq("id", photo_id).execute()
+            self._remember("photo", photo_id, None)
             return True
         except Exception as e:
             print(f"Error deleting photo metadata: {e}")
             return False
 
+    # ------------------------------------------------------------------
+    # Direct upload reservations
+    # ------------------------------------------------------------------
+
+    def create_upload_reservations(self, rows: List[Dict[str, Any]]) -> None:
+        """Record the presigned uploads handed out by /api/photos/uploads."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        self.client.table("photo_upload_reservations").insert(rows).execute()
+
+    def get_upload_reservations(
+        self, photo_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Pending reservations of *photo_ids*, keyed by photo id."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        if not photo_ids:
+            return {}
+        response = (
+            self.client.table("photo_upload_reservations")
+            .select("*")
+            .in_("photo_id", list(photo_ids))
+            .execute()
+        )
+        return {str(row.get("photo_id")): row for row in response.data or []}
+
+    def list_expired_upload_reservations(
+        self, now_iso: str, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Reservations whose ``expires_at`` lies before *now_iso*, oldest first."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        response = (
+            self.client.table("photo_upload_reservations")
+            .select("*")
+            .lt("expires_at", now_iso)
+            .order("expires_at")
+            .limit(limit)
+            .execute()
+        )
+        return response.data or []
+
+    def existing_photo_ids(self, photo_ids: List[str]) -> set:
+        """The subset of *photo_ids* that has a ``photos`` row."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        if not photo_ids:
+            return set()
+        response = (
+            self.client.table("photos")
+            .select("id")
+            .in_("id", list(photo_ids))
+            .execute()
+        )
+        return {str(row.get("id")) for row in response.data or []}
+
+    def delete_upload_reservations(self, photo_ids: List[str]) -> None:
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        if not photo_ids:
+            return
+        self.client.table("photo_upload_reservations").delete().in_(
+            "photo_id", list(photo_ids)
+        ).execute()
+
+    # ------------------------------------------------------------------
+    # Bulk writes
+    # ------------------------------------------------------------------
+    #
+    # The *_many helpers send rows to PostgREST in chunks of
+    # SUPABASE_BULK_CHUNK_SIZE and return one result per input row, in input
+    # order: {"index": i, "ok": bool, "record": dict | None, "error": str | None}.
+    # A chunk rejected for its data (SQLSTATE 22xxx/23xxx) is bisected until the
+    # offending rows are isolated, so one bad row never fails its neighbours;
+    # any other error (transport, open breaker, auth) is raised to the caller.
+    # PGRST204 unknown columns are stripped from the whole chunk and retried,
+    # as in the single-row helpers.
+
+    @staticmethod
+    def _bulk_result(
+        index: int,
+        record: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return {"index": index, "ok": error is None, "record": record, "error": error}
+
+    def _insert_many(
+        self,
+        table: str,
+        payloads: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        on_conflict: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Insert (or upsert when on_conflict is set) rows in chunks."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        size = max(1, chunk_size or _BULK_CHUNK_SIZE)
+        for start in range(0, len(payloads), size):
+            indices = list(range(start, min(start + size, len(payloads))))
+            self._insert_chunk(
+                table, indices, [payloads[i] for i in indices], results, on_conflict
+            )
+        return results  # type: ignore[return-value]
+
+    def _insert_chunk(
+        self,
+        table: str,
+        indices: List[int],
+        rows: List[Dict[str, Any]],
+        results: List[Optional[Dict[str, Any]]],
+        on_conflict: Optional[str],
+        stripped: int = 0,
+    ) -> None:
+        while True:
+            try:
+                builder = self.client.table(table)
+                if on_conflict:
+                    query = builder.upsert(
+                        rows, on_conflict=on_conflict, default_to_null=False
+                    )
+                else:
+                    # missing=default lets rows omit columns that have DB defaults.
+                    query = builder.insert(rows, default_to_null=False)
+                response = query.execute()
+                break
+            except Exception as exc:
+                column = _unknown_column_name(exc)
+                if (
+                    column
+                    and stripped < _MAX_STRIPPED_COLUMNS
+                    and any(column in row for row in rows)
+                ):
+                    if stripped == 0:
+                        schema_probe.invalidate()
+                    rows = [
+                        {k: v for k, v in row.items() if k != column} for row in rows
+                    ]
+                    stripped += 1
+                    continue
+                if not _is_row_error(exc):
+                    raise
+                if len(rows) == 1:
+                    results[indices[0]] = self._bulk_result(indices[0], error=str(exc))
+                    return
+                mid = len(rows) // 2
+                self._insert_chunk(
+                    table, indices[:mid], rows[:mid], results, on_conflict, stripped
+                )
+                self._insert_chunk(
+                    table, indices[mid:], rows[mid:], results, on_conflict, stripped
+                )
+                return
+
+        # PostgREST returns inserted rows in input order.
+        data = response.data or []
+        for position, index in enumerate(indices):
+            record = data[position] if position < len(data) else None
+            results[index] = self._bulk_result(index, record)
+
+    def store_photo_metadata_many(
+        self,
+        photos: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert many photo rows in O(chunks) round trips.
+
+        Each row gets the same EXIF canonicalization and PGRST204 column
+        stripping as store_photo_metadata. Returns one result dict per input row.
+        """
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized - check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        payloads = [_canonicalize_exif(dict(photo)) for photo in photos]
+        results = self._insert_many("photos", payloads, chunk_size)
+        for result in results:
+            record = result["record"]
+            if record:
+                self.update_thumbnail_column_hint(record)
+                if record.get("id"):
+                    self._remember("photo", record["id"], record)
+        return results
+
+    def update_photos_many(
+        self,
+        updates: Sequence[Tuple[str, Dict[str, Any]]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply (photo_id, fields) updates in as few round trips as possible.
+
+        PostgREST can only PATCH one payload per request, so rows sharing an
+        identical payload (the common bulk-edit case, e.g. hiding or moving a
+        selection) are grouped into one ``id=in.(...)`` request per chunk.
+        Returns one result per input pair; ids that matched no row are errors.
+        """
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized - check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(updates)
+        groups: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+        for index, (photo_id, fields) in enumerate(updates):
+            payload = dict(fields)
+            if isinstance(payload.get("exif_data"), dict):
+                payload = _canonicalize_exif(payload)
+            key = json.dumps(payload, sort_keys=True, default=str)
+            groups.setdefault(key, (payload, []))[1].append(index)
+
+        size = max(1, chunk_size or _BULK_CHUNK_SIZE)
+        for payload, indices in groups.values():
+            for start in range(0, len(indices), size):
+                chunk = indices[start : start + size]
+                self._update_chunk(updates, payload, chunk, results)
+        return results  # type: ignore[return-value]
+
+    def _update_chunk(
+        self,
+        updates: Sequence[Tuple[str, Dict[str, Any]]],
+        payload: Dict[str, Any],
+        indices: List[int],
+        results: List[Optional[Dict[str, Any]]],
+        stripped: int = 0,
+    ) -> None:
+        photo_ids = list(dict.fromkeys(str(updates[i][0]) for i in indices))
+        while True:
+            try:
+                if not payload:
+                    # Nothing writable survived schema filtering.
+                    response = None
+                    break
+                response = (
+                    self.client.table("photos")
+                    .update(payload)
+                    .in_("id", photo_ids)
+                    .execute()
+                )
+                break
+            except Exception as exc:
+                stripped_payload = _strip_unknown_column(payload, exc)
+                if stripped_payload is not None and stripped < _MAX_STRIPPED_COLUMNS:
+                    if stripped == 0:
+                        schema_probe.invalidate()
+                    payload = stripped_payload
+                    stripped += 1
+                    continue
+                if not _is_row_error(exc):
+                    raise
+                if len(indices) == 1:
+                    self._forget("photo", str(updates[indices[0]][0]))
+                    results[indices[0]] = self._bulk_result(indices[0], error=str(exc))
+                    return
+                mid = len(indices) // 2
+                self._update_chunk(updates, payload, indices[:mid], results, stripped)
+                self._update_chunk(updates, payload, indices[mid:], results, stripped)
+                return
+
+        by_id = {
+            str(row.get("id")): row for row in (getattr(response, "data", None) or [])
+        }
+        for index in indices:
+            photo_id = str(updates[index][0])
+            record = by_id.get(photo_id)
+            if response is None:
+                results[index] = self._bulk_result(index, {"id": photo_id})
+            elif record is None:
+                self._forget("photo", photo_id)
+                results[index] = self._bulk_result(index, error="photo not found")
+            else:
+                self.update_thumbnail_column_hint(record)
+                self._remember("photo", photo_id, record)
+                results[index] = self._bulk_result(index, record)
+
     def get_photos(
         self,
         limit: Optional[int] = 50,
@@ -828,7 +1269,27 @@ class SupabaseClient:
             offset
         )
 
-        response = query.execute()
+        try:
+            response = query.execute()
+        except Exception as exc:
+            # Unknown schema assumed the thumbnail columns; PostgREST disagreed.
+            if not include_thumbnail_columns or "thumbnail_r2_" not in str(exc):
+                raise
+            self.note_missing_column("thumbnail_r2_path")
+            return self.fetch_project_photos(
+                project_ids,
+                page=page,
+                page_size=page_size,
+                user_id=user_id,
+                date_range=date_range,
+                bbox=bbox,
+                city=city,
+                state=state,
+                country=country,
+                order_desc=order_desc,
+                include_signed_urls=include_signed_urls,
+                signed_url_ttl=signed_url_ttl,
+            )
         records = response.data or []
 
         if include_signed_urls:
@@ -885,26 +1346,17 @@ class SupabaseClient:
             return []
 
         try:
-            response = (
+            query = (
                 self.client.table("photos")
                 .select("*")
                 .gte("latitude", latitude - radius)
                 .lte("latitude", latitude + radius)
                 .gte("longitude", longitude - radius)
                 .lte("longitude", longitude + radius)
-                .execute()
             )
             if self.supports_show_on_photos():
-                response = (
-                    self.client.table("photos")
-                    .select("*")
-                    .gte("latitude", latitude - radius)
-                    .lte("latitude", latitude + radius)
-                    .gte("longitude", longitude - radius)
-                    .lte("longitude", longitude + radius)
-                    .eq("show_on_photos", True)
-                    .execute()
-                )
+                query = query.eq("show_on_photos", True)
+            response = query.execute()
             return response.data if response.data else []
         except Exception as e:
             # Fallback without show_on_photos filter in case the column is missing
@@ -926,6 +1378,9 @@ class SupabaseClient:
     def get_location(self, location_id: str) -> Optional[Dict[str, Any]]:
         if not self.client:
             return None
+        cached = self._recall("location", location_id)
+        if cached is not _UNSET:
+            return cached
         try:
             response = (
                 self.client.table("locations")
@@ -934,7 +1389,9 @@ class SupabaseClient:
                 .maybe_single()
                 .execute()
             )
-            return response.data if hasattr(response, "data") else None
+            location = response.data if hasattr(response, "data") else None
+            self._remember("location", location_id, location)
+            return location
         except Exception as e:
             print(f"Error getting location: {e}")
             return None
@@ -951,6 +1408,8 @@ class SupabaseClient:
         address: Optional[str] = None,
         address_coord: Optional[Dict[str, Any]] = None,
         show_on_projects: Optional[bool] = None,
+        location_status: Optional[str] = None,
+        location_request_id: Optional[str] = None,
     ):
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
@@ -969,7 +1428,12 @@ class SupabaseClient:
             payload["address_coord"] = address_coord
         if show_on_projects is not None:
             payload["show_on_projects"] = show_on_projects
-        response = self.client.table("projects").insert(payload).execute()
+        if location_status is not None:
+            payload["location_status"] = location_status
+            payload["location_request_id"] = location_request_id
+        response, _ = self._execute_stripping_unknown(
+            payload, lambda p: self.client.table("projects").insert(p).execute()
+        )
         if not response.data:
             raise RuntimeError("Failed to create project")
         project = response.data[0]
@@ -979,6 +1443,8 @@ class SupabaseClient:
             project["address"] = address
         if show_on_projects is not None:
             project["show_on_projects"] = show_on_projects
+        if project.get("id"):
+            self._remember("project", project["id"], project)
         return project
 
     def create_project_location(
@@ -999,6 +1465,17 @@ class SupabaseClient:
             raise RuntimeError("Failed to create project location")
         return response.data[0]
 
+    def create_locations_many(
+        self,
+        locations: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Insert many location rows in chunks; returns one result per row."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        payloads = [dict(location) for location in locations]
+        return self._insert_many("locations", payloads, chunk_size)
+
     def upsert_project_location(
         self, project_id: str, lat: float, lng: float
     ) -> Dict[str, Any]:
@@ -1027,6 +1504,7 @@ class SupabaseClient:
                 .eq("id", loc_id)
                 .execute()
             )
+            self._forget("location", loc_id)
             return response.data[0] if response.data else existing.data[0]
         return self.create_project_location(project_id, lat, lng)
 
@@ -1053,13 +1531,17 @@ class SupabaseClient:
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
         try:
-            response = self.client.table("project_plans").insert(payload).execute()
+            response, payload = self._execute_stripping_unknown(
+                payload,
+                lambda row: self.client.table("project_plans").insert(row).execute(),
+            )
             if not response.data or len(response.data) < 1:
                 logging.warning(
                     "project_plans insert returned no row; payload keys=%s",
                     list(payload.keys()),
                 )
                 return None
+            self.invalidate_project_lists(project_id=payload.get("project_id"))
             return response.data[0]
         except Exception as e:
             logging.exception(
@@ -1099,6 +1581,7 @@ class SupabaseClient:
                 .eq("project_id", project_id)
                 .execute()
             )
+            self.invalidate_project_lists(project_id=project_id)
             return bool(response.data)
         except Exception:
             return False
@@ -1121,8 +1604,28 @@ class SupabaseClient:
         corner_se_lng: float,
         corner_sw_lat: float,
         corner_sw_lng: float,
+        tiles_path: Optional[str] = None,
+        tile_size: Optional[int] = None,
+        tile_max_zoom: Optional[int] = None,
+        tile_width: Optional[int] = None,
+        tile_height: Optional[int] = None,
+        pages_path: Optional[str] = None,
+        page_count: Optional[int] = None,
+        source_page: Optional[int] = None,
+        pages: Optional[List[Dict[str, Any]]] = None,
+        warped_r2_path: Optional[str] = None,
+        warped_width: Optional[int] = None,
+        warped_height: Optional[int] = None,
+        warped_min_lat: Optional[float] = None,
+        warped_min_lng: Optional[float] = None,
+        warped_max_lat: Optional[float] = None,
+        warped_max_lng: Optional[float] = None,
     ) -> Optional[Dict[str, Any]]:
-        """Update the plan record for a project. Returns updated record or None."""
+        """
+        Update the plan record for a project. Returns updated record or None.
+        Tile, page and warp fields left as None clear the previous plan's
+        pyramid, page index and warped raster.
+        """
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
         fields: Dict[str, Any] = {
@@ -1141,13 +1644,30 @@ class SupabaseClient:
             "corner_se_lng": corner_se_lng,
             "corner_sw_lat": corner_sw_lat,
             "corner_sw_lng": corner_sw_lng,
+            "tiles_path": tiles_path,
+            "tile_size": tile_size,
+            "tile_max_zoom": tile_max_zoom,
+            "tile_width": tile_width,
+            "tile_height": tile_height,
+            "pages_path": pages_path,
+            "page_count": page_count,
+            "source_page": source_page,
+            "pages": pages,
+            "warped_r2_path": warped_r2_path,
+            "warped_width": warped_width,
+            "warped_height": warped_height,
+            "warped_min_lat": warped_min_lat,
+            "warped_min_lng": warped_min_lng,
+            "warped_max_lat": warped_max_lat,
+            "warped_max_lng": warped_max_lng,
         }
         try:
-            response = (
-                self.client.table("project_plans")
-                .update(fields)
+            response, _ = self._execute_stripping_unknown(
+                fields,
+                lambda row: self.client.table("project_plans")
+                .update(row)
                 .eq("project_id", project_id)
-                .execute()
+                .execute(),
             )
             return response.data[0] if response.data else None
         except Exception:
@@ -1169,6 +1689,7 @@ class SupabaseClient:
         fallback_email = email or f"{user_id}@local.invalid"
         payload = {"id": user_id, "email": fallback_email}
         response = self.client.table("users").upsert(payload).execute()
+        self._forget("user", user_id)
         return response.data[0] if response.data else payload
 
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
@@ -1242,8 +1763,42 @@ class SupabaseClient:
         response = self.client.table("project_members").upsert(
             payload, on_conflict="project_id,user_id"
         ).execute()
+        self._remember(
+            "role", (project_id, user_id), self._normalize_project_role(role)
+        )
+        self.invalidate_project_lists(user_id=user_id)
         return response.data[0] if response.data else None
 
+    def add_project_members_many(
+        self,
+        project_id: str,
+        members: Sequence[Tuple[str, str]],
+        chunk_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Upsert (user_id, role) memberships for one project in chunks."""
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        accessed_at = datetime.datetime.utcnow().isoformat() + "Z"
+        payloads = [
+            {
+                "project_id": project_id,
+                "user_id": user_id,
+                "role": role,
+                "last_accessed_at": accessed_at,
+            }
+            for user_id, role in members
+        ]
+        results = self._insert_many(
+            "project_members", payloads, chunk_size, on_conflict="project_id,user_id"
+        )
+        for result, (user_id, role) in zip(results, members):
+            if result["ok"]:
+                self._remember(
+                    "role", (project_id, user_id), self._normalize_project_role(role)
+                )
+                self.invalidate_project_lists(user_id=user_id)
+        return results
+
     def _normalize_project_role(self, role: Optional[str]) -> Optional[str]:
         if not role:
             return None
@@ -1263,8 +1818,89 @@ class SupabaseClient:
     def list_projects_for_user(
         self, user_id: str, show_on_projects: Optional[bool] = True
     ) -> List[Dict[str, Any]]:
+        """
+        Projects the user belongs to, most recently accessed first.
+
+        Each project carries the caller's role and last_accessed_at plus
+        photo_count, location_count and has_plan, fetched in one embedded
+        request on project_members. Results are cached per user for
+        PROJECT_LIST_CACHE_TTL seconds.
+        """
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
+        cache_key = (user_id, show_on_projects)
+        cached = self._project_lists.get(cache_key)
+        if cached is not None:
+            return deepcopy(cached)
+
+        projects = None
+        try:
+            projects = self._list_projects_embedded(user_id, show_on_projects)
+        except Exception as exc:
+            logging.warning("Embedded project listing failed, using two queries: %s", exc)
+        if projects is None:
+            projects = self._list_projects_two_step(user_id, show_on_projects)
+        projects = sorted(projects, key=self._project_sort_key, reverse=True)
+        self._project_lists.set(cache_key, deepcopy(projects))
+        return projects
+
+    @staticmethod
+    def _project_sort_key(item: Dict[str, Any]) -> str:
+        # Last accessed desc, falling back to updated_at / created_at.
+        return (
+            item.get("last_accessed_at") or item.get("updated_at") or item.get("created_at") or ""
+        )
+
+    @staticmethod
+    def _embedded_one(value: Any) -> Optional[Dict[str, Any]]:
+        # One-to-one embeds arrive as an object (or a single-item list on
+        # older PostgREST versions).
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value if isinstance(value, dict) else None
+
+    def _list_projects_embedded(
+        self, user_id: str, show_on_projects: Optional[bool]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        project_members -> projects -> project_stats / project_plans in one
+        request. Returns None when the schema lacks project_stats.
+        """
+        if not self._schema_may_have("project_stats", "photo_count", "location_count"):
+            return None
+        embeds = ["project_stats(photo_count,location_count)"]
+        with_plans = self._schema_may_have("project_plans", "project_id")
+        if with_plans:
+            embeds.append("project_plans(project_id)")
+        query = (
+            self.client.table("project_members")
+            .select(f"role,last_accessed_at,projects!inner(*,{','.join(embeds)})")
+            .eq("user_id", user_id)
+        )
+        if show_on_projects is not None:
+            query = query.eq("projects.show_on_projects", bool(show_on_projects))
+        response = query.execute()
+
+        projects = []
+        for row in response.data or []:
+            project = self._embedded_one(row.get("projects"))
+            if not project:
+                continue
+            project = dict(project)
+            stats = self._embedded_one(project.pop("project_stats", None)) or {}
+            plan = self._embedded_one(project.pop("project_plans", None))
+            project["role"] = self._normalize_project_role(row.get("role"))
+            project["last_accessed_at"] = row.get("last_accessed_at")
+            project["photo_count"] = int(stats.get("photo_count") or 0)
+            project["location_count"] = int(stats.get("location_count") or 0)
+            project["has_plan"] = bool(plan) if with_plans else None
+            projects.append(project)
+        return projects
+
+    def _list_projects_two_step(
+        self, user_id: str, show_on_projects: Optional[bool]
+    ) -> List[Dict[str, Any]]:
+        """Legacy listing (memberships, then projects) without counters."""
         membership_response = (
             self.client.table("project_members")
             .select("project_id, role, last_accessed_at")
@@ -1290,22 +1926,20 @@ class SupabaseClient:
         for project in projects:
             project["role"] = role_map.get(project["id"])
             project["last_accessed_at"] = access_map.get(project["id"])
-
-        # Sort by last accessed desc, fallback created_at desc
-        def sort_key(item):
-            return (
-                item.get("last_accessed_at") or item.get("updated_at") or item.get("created_at") or ""
-            )
-
-        return sorted(projects, key=sort_key, reverse=True)
+        return projects
 
     def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
+        cached = self._recall("project", project_id)
+        if cached is not _UNSET:
+            return cached
         response = (
             self.client.table("projects").select("*").eq("id", project_id).execute()
         )
-        return response.data[0] if response.data else None
+        project = response.data[0] if response.data else None
+        self._remember("project", project_id, project)
+        return project
 
     def update_project(
         self,
@@ -1314,7 +1948,15 @@ class SupabaseClient:
         address: Optional[str] = None,
         address_coord: Optional[Dict[str, Any]] = None,
         show_on_projects: Optional[bool] = None,
+        location_status: Optional[str] = None,
+        location_request_id: Optional[str] = None,
+        if_location_request_id: Optional[str] = None,
     ) -> Optional[Dict[str, Any]]:
+        """
+        Update the supplied fields. With *if_location_request_id* the row is
+        only written while it still carries that location request (None
+        when a newer location change has superseded it).
+        """
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
         fields: Dict[str, Any] = {}
@@ -1325,17 +1967,36 @@ class SupabaseClient:
             fields["address_coord"] = address_coord
         if show_on_projects is not None:
             fields["show_on_projects"] = show_on_projects
+        if location_status is not None:
+            fields["location_status"] = location_status
+            fields["location_request_id"] = location_request_id
         if not fields:
             return self.get_project(project_id)
-        response = (
-            self.client.table("projects").update(fields).eq("id", project_id).execute()
+        guarded = if_location_request_id is not None and self._schema_may_have(
+            "projects", "location_request_id"
         )
-        return response.data[0] if response.data else None
+
+        def _send(payload: Dict[str, Any]):
+            query = self.client.table("projects").update(payload).eq("id", project_id)
+            if guarded:
+                query = query.eq("location_request_id", if_location_request_id)
+            return query.execute()
+
+        response, _ = self._execute_stripping_unknown(fields, _send)
+        updated = response.data[0] if response.data else None
+        if updated:
+            self._remember("project", project_id, updated)
+        else:
+            self._forget("project", project_id)
+        self.invalidate_project_lists(project_id=project_id)
+        return updated
 
     def delete_project(self, project_id: str) -> bool:
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
         response = self.client.table("projects").delete().eq("id", project_id).execute()
+        self._remember("project", project_id, None)
+        self.invalidate_project_lists(project_id=project_id)
         return bool(response.data)
 
     def touch_project_access(self, project_id: str, user_id: str):
@@ -1346,10 +2007,14 @@ class SupabaseClient:
         self.client.table("project_members").update(
             {"last_accessed_at": now_iso}
         ).eq("project_id", project_id).eq("user_id", user_id).execute()
+        self.invalidate_project_lists(user_id=user_id)
 
     def get_project_role(self, project_id: str, user_id: str) -> Optional[str]:
         if not self.client:
             raise RuntimeError("Supabase client not initialized")
+        cached = self._recall("role", (project_id, user_id))
+        if cached is not _UNSET:
+            return cached
         response = (
             self.client.table("project_members")
             .select("role")
@@ -1357,9 +2022,31 @@ class SupabaseClient:
             .eq("user_id", user_id)
             .execute()
         )
+        role = None
         if response.data:
-            return self._normalize_project_role(response.data[0].get("role"))
-        return None
+            role = self._normalize_project_role(response.data[0].get("role"))
+        self._remember("role", (project_id, user_id), role)
+        return role
+
+    def get_project_roles_for_user(self, user_id: str) -> Dict[str, Optional[str]]:
+        """
+        The user's role in every project they belong to, read from
+        project_members on each call. Authorization uses this rather than the
+        TTL-cached listing, whose entries other workers cannot evict.
+        """
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        response = (
+            self.client.table("project_members")
+            .select("project_id, role")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return {
+            row["project_id"]: self._normalize_project_role(row.get("role"))
+            for row in response.data or []
+            if row.get("project_id")
+        }
 
     def list_project_members(self, project_id: str) -> List[Dict[str, Any]]:
         if not self.client:
@@ -1422,6 +2109,14 @@ class SupabaseClient:
             .eq("user_id", user_id)
             .execute()
         )
+        if response.data:
+            self._remember(
+                "role", (project_id, user_id), self._normalize_project_role(role)
+            )
+        else:
+            # No membership row matched; the user still has no role here.
+            self._forget("role", (project_id, user_id))
+        self.invalidate_project_lists(user_id=user_id)
         return response.data[0] if response.data else None
 
     def remove_project_member(self, project_id: str, user_id: str) -> bool:
@@ -1434,6 +2129,8 @@ class SupabaseClient:
             .eq("user_id", user_id)
             .execute()
         )
+        self._remember("role", (project_id, user_id), None)
+        self.invalidate_project_lists(user_id=user_id)
         return bool(response.data)
 
     def count_owners(self, project_id: str) -> int:
@@ -1448,9 +2145,70 @@ class SupabaseClient:
         )
         return getattr(response, "count", 0) or 0
 
+    @staticmethod
+    def _empty_project_stats() -> Dict[str, Any]:
+        return {
+            "photo_count": 0,
+            "location_count": 0,
+            "storage_bytes": 0,
+            "first_captured_at": None,
+            "last_captured_at": None,
+        }
+
+    def get_project_stats_many(
+        self, project_ids: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Read trigger-maintained counters for several projects in one request.
+
+        Falls back to computing photo/location counts per project when the
+        project_stats table has not been migrated yet.
+        """
+        if not project_ids or not self.client:
+            return {}
+        stats = {pid: self._empty_project_stats() for pid in project_ids}
+        if self._schema_may_have("project_stats", *_PROJECT_STATS_FIELDS):
+            try:
+                response = (
+                    self.client.table("project_stats")
+                    .select("project_id," + ",".join(_PROJECT_STATS_FIELDS))
+                    .in_("project_id", list(project_ids))
+                    .execute()
+                )
+                for row in response.data or []:
+                    pid = row.get("project_id")
+                    if pid in stats:
+                        stats[pid].update(
+                            {field: row.get(field) for field in _PROJECT_STATS_FIELDS}
+                        )
+                        for field in ("photo_count", "location_count", "storage_bytes"):
+                            stats[pid][field] = int(stats[pid][field] or 0)
+                return stats
+            except Exception as exc:
+                logging.warning("project_stats read failed, computing counts: %s", exc)
+
+        for pid in project_ids:
+            photo_count, location_count = self._compute_project_counts(pid)
+            stats[pid]["photo_count"] = photo_count
+            stats[pid]["location_count"] = location_count
+            stats[pid]["storage_bytes"] = None
+        return stats
+
+    def get_project_stats_summary(self, project_id: str) -> Dict[str, Any]:
+        """Return the stats dict for one project (see get_project_stats_many)."""
+        return self.get_project_stats_many([project_id]).get(
+            project_id, self._empty_project_stats()
+        )
+
     def get_project_stats(self, project_id: str) -> tuple:
+        """Return (photo_count, location_count) for a project."""
+        stats = self.get_project_stats_summary(project_id)
+        return stats["photo_count"], stats["location_count"]
+
+    def _compute_project_counts(self, project_id: str) -> tuple:
         """Return (photo_count, location_count) for a project.
 
+        Legacy path for databases without the project_stats counters.
         photo_count = sum of public.locations.number for the project.
         location_count = count of photo locations (marker='individual' or
         marker='multi'), excluding project markers.
@@ -1519,6 +2277,8 @@ class SupabaseClient:
 
         try:
             response = self.client.table("users").insert(user_data).execute()
+            if user_data.get("id"):
+                self._forget("user", user_data["id"])
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error storing user metadata: {e}")
@@ -1538,11 +2298,17 @@ class SupabaseClient:
             print("Supabase client not initialized - check environment variables")
             return None
 
+        cached = self._recall("user", user_id)
+        if cached is not _UNSET:
+            return cached
+
         try:
             response = (
                 self.client.table("users").select("*").eq("id", user_id).execute()
             )
-            return response.data[0] if response.data else None
+            user = response.data[0] if response.data else None
+            self._remember("user", user_id, user)
+            return user
         except Exception as e:
             print(f"Error retrieving user metadata: {e}")
             return None
@@ -4,7 +4,9 @@ Supabase storage service for metadata management.
 
 from typing import Dict, Any, Optional
 import os
-from supabase import create_client, Client
+from supabase import Client
+
+from app.supabase_client import get_service_role_client
 
 
 class SupabaseStorageService:
@@ -18,7 +20,7 @@ class SupabaseStorageService:
         self.client: Optional[Client] = None
 
         if self.url and self.key:
-            self.client = create_client(self.url, self.key)
+            self.client = get_service_role_client()
 
     def store_metadata(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Store photo metadata in Supabase."""
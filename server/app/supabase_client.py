@@ -1,14 +1,41 @@
 """
 Centralized Supabase client initialization and JWT utilities.
+
+This module is the process-wide registry for Supabase clients. Every client
+shares one pooled httpx transport so PostgREST/Auth calls reuse keep-alive
+connections instead of paying a TLS handshake per request. The registry is
+guarded by a lock for threaded workers and is rebuilt in forked children
+(gunicorn --preload) because sockets must not be shared across processes.
+
+Pool configuration (environment variables, defaults shown):
+    SUPABASE_HTTP_POOL_SIZE        — max open connections (20)
+    SUPABASE_HTTP_KEEPALIVE        — max idle keep-alive connections (pool size)
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY — seconds an idle connection is kept (30)
+    SUPABASE_HTTP_TIMEOUT          — read/write/pool timeout in seconds (30)
+    SUPABASE_HTTP_CONNECT_TIMEOUT  — connect timeout in seconds (5)
+    SUPABASE_HTTP2                 — "true" to negotiate HTTP/2 (needs the h2 package)
 """
 
 from __future__ import annotations
 
 import os
+import threading
 from typing import Any, Dict, Optional
 
+import httpx
 from supabase import Client, create_client
 
+from app.services.instrumentation import InstrumentedTransport
+from app.services.offline import get_offline_postgrest, offline_backends_enabled
+from app.services.resilience import ResilientTransport
+
+try:
+    from supabase.lib.client_options import SyncClientOptions
+except ImportError:  # pragma: no cover - older supabase-py without a shared transport
+    SyncClientOptions = None  # type: ignore[assignment,misc]
+
+_registry_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
 _service_role_client: Optional[Client] = None
 _anon_client: Optional[Client] = None
 
@@ -30,12 +57,71 @@ def _get_supabase_url() -> str:
     return (os.getenv("SUPABASE_URL") or "").strip()
 
 
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _http2_enabled() -> bool:
+    if (os.getenv("SUPABASE_HTTP2") or "").strip().lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the shared, pooled httpx client used by every Supabase client.
+    """
+    global _http_client
+
+    if _http_client is not None:
+        return _http_client
+
+    with _registry_lock:
+        if _http_client is None:
+            pool_size = max(1, int(_env_number("SUPABASE_HTTP_POOL_SIZE", 20)))
+            keepalive = int(_env_number("SUPABASE_HTTP_KEEPALIVE", pool_size))
+            transport = httpx.HTTPTransport(
+                http2=_http2_enabled(),
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=max(0, min(keepalive, pool_size)),
+                    keepalive_expiry=_env_number("SUPABASE_HTTP_KEEPALIVE_EXPIRY", 30),
+                ),
+            )
+            _http_client = httpx.Client(
+                transport=ResilientTransport(
+                    InstrumentedTransport(transport), dependency="supabase"
+                ),
+                timeout=httpx.Timeout(
+                    _env_number("SUPABASE_HTTP_TIMEOUT", 30),
+                    connect=_env_number("SUPABASE_HTTP_CONNECT_TIMEOUT", 5),
+                ),
+                follow_redirects=True,
+            )
+    return _http_client
+
+
 def _build_client(api_key: str) -> Optional[Client]:
     url = _get_supabase_url()
     key = (api_key or "").strip()
     if not url or not key:
         return None
-    return create_client(url, key)
+    if SyncClientOptions is None:
+        return create_client(url, key)
+    try:
+        options = SyncClientOptions(httpx_client=get_http_client())
+    except TypeError:
+        # supabase-py releases whose options predate httpx_client: each
+        # client keeps its own transport.
+        return create_client(url, key)
+    return create_client(url, key, options)
 
 
 def get_service_role_client(refresh: bool = False) -> Optional[Client]:
@@ -44,6 +130,9 @@ def get_service_role_client(refresh: bool = False) -> Optional[Client]:
     """
     global _service_role_client
 
+    if offline_backends_enabled():
+        return get_offline_postgrest()  # type: ignore[return-value]
+
     if refresh:
         _service_role_client = None
 
@@ -53,7 +142,10 @@ def get_service_role_client(refresh: bool = False) -> Optional[Client]:
     service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv(
         "SUPABASE_SERVICE_KEY"
     )
-    _service_role_client = _build_client(service_key or "")
+    client = _build_client(service_key or "")
+    with _registry_lock:
+        if _service_role_client is None:
+            _service_role_client = client
     return _service_role_client
 
 
@@ -63,6 +155,9 @@ def get_anon_supabase_client(refresh: bool = False) -> Optional[Client]:
     """
     global _anon_client
 
+    if offline_backends_enabled():
+        return get_offline_postgrest()  # type: ignore[return-value]
+
     if refresh:
         _anon_client = None
 
@@ -70,17 +165,43 @@ def get_anon_supabase_client(refresh: bool = False) -> Optional[Client]:
         return _anon_client
 
     anon_key = os.getenv("SUPABASE_ANON_KEY")
-    _anon_client = _build_client(anon_key or "")
+    client = _build_client(anon_key or "")
+    with _registry_lock:
+        if _anon_client is None:
+            _anon_client = client
     return _anon_client
 
 
 def reset_supabase_clients() -> None:
     """
-    Clear cached client instances. Primarily used by tests.
+    Clear cached client instances and the shared HTTP pool. Primarily used by tests.
+    """
+    global _service_role_client, _anon_client, _http_client
+    with _registry_lock:
+        http_client = _http_client
+        _service_role_client = None
+        _anon_client = None
+        _http_client = None
+    if http_client is not None:
+        try:
+            http_client.close()
+        except Exception:
+            pass
+
+
+def _reinit_after_fork() -> None:
+    """
+    Drop inherited clients in a forked child without touching the parent's sockets.
     """
-    global _service_role_client, _anon_client
+    global _registry_lock, _service_role_client, _anon_client, _http_client
+    _registry_lock = threading.Lock()
     _service_role_client = None
     _anon_client = None
+    _http_client = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
 
 
 def verify_supabase_jwt(access_token: str) -> Dict[str, Any]:
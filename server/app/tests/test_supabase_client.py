@@ -19,9 +19,10 @@ def test_get_service_role_client_initializes(monkeypatch):
     created_client = SimpleNamespace(auth=SimpleNamespace(get_user=lambda _: None))
     captured = {}
 
-    def fake_create(url, key):
+    def fake_create(url, key, options=None):
         captured["url"] = url
         captured["key"] = key
+        captured["http_client"] = getattr(options, "httpx_client", None)
         return created_client
 
     monkeypatch.setattr(supabase_client, "create_client", fake_create)
@@ -32,9 +33,73 @@ def test_get_service_role_client_initializes(monkeypatch):
     assert captured == {
         "url": "https://example.supabase.co",
         "key": "service-role-key",
+        "http_client": supabase_client.get_http_client(),
     }
 
 
+def test_clients_share_one_http_pool(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-role-key")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
+    monkeypatch.setenv("SUPABASE_HTTP_POOL_SIZE", "7")
+
+    transports = []
+    monkeypatch.setattr(
+        supabase_client,
+        "create_client",
+        lambda url, key, options=None: transports.append(options.httpx_client)
+        or SimpleNamespace(key=key),
+    )
+
+    service = supabase_client.get_service_role_client(refresh=True)
+    anon = supabase_client.get_anon_supabase_client(refresh=True)
+
+    assert service.key == "service-role-key"
+    assert anon.key == "anon-key"
+    assert transports[0] is transports[1]
+    transport = transports[0]._transport
+    while not hasattr(transport, "_pool"):
+        transport = transport._transport
+    pool = transport._pool
+    assert pool._max_connections == 7
+
+
+def test_options_without_httpx_client_fall_back(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-role-key")
+
+    class _OldOptions:
+        def __init__(self):
+            pass
+
+    calls = []
+    monkeypatch.setattr(supabase_client, "SyncClientOptions", _OldOptions)
+    monkeypatch.setattr(
+        supabase_client,
+        "create_client",
+        lambda *args: calls.append(args) or SimpleNamespace(),
+    )
+
+    assert supabase_client.get_service_role_client(refresh=True) is not None
+    assert calls == [("https://example.supabase.co", "service-role-key")]
+
+
+def test_registry_resets_after_fork(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-role-key")
+    monkeypatch.setattr(
+        supabase_client, "create_client", lambda *_args, **_kwargs: object()
+    )
+
+    parent_client = supabase_client.get_service_role_client()
+    parent_pool = supabase_client.get_http_client()
+    supabase_client._reinit_after_fork()
+
+    assert supabase_client.get_service_role_client() is not parent_client
+    assert supabase_client.get_http_client() is not parent_pool
+    parent_pool.close()
+
+
 def test_get_anon_supabase_client_initializes(monkeypatch):
     monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
     monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
@@ -0,0 +1,104 @@
+"""
+Small in-process TTL cache.
+
+Entries live in a plain dict guarded by a lock so the cache is safe to share
+between gunicorn threads. Each worker process has its own copy; callers that
+need cross-worker consistency should keep TTLs short.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after a fixed or per-entry TTL."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for *key*, or *default* when missing/expired."""
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                self._entries.pop(key, None)
+                return default
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Store *value* under *key*.
+
+        ttl_seconds overrides the cache default for this entry; values <= 0 are
+        not stored.
+        """
+        if not self.enabled:
+            return
+        ttl = (
+            self.ttl_seconds
+            if ttl_seconds is None
+            else min(ttl_seconds, self.ttl_seconds)
+        )
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[key] = (now + ttl, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for *key*, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = factory()
+        self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove every entry for which predicate(key, value) is true."""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._entries.items() if predicate(k, v)]
+            for key in doomed:
+                self._entries.pop(key, None)
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries; if still full, drop the entry closest to expiry."""
+        expired = [k for k, (exp, _) in self._entries.items() if exp <= now]
+        for key in expired:
+            self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries.items(), key=lambda item: item[1][0])[0]
+            self._entries.pop(oldest, None)
@@ -0,0 +1,138 @@
+"""
+Fixtures for the benchmark suite.
+
+Images are synthesized with Pillow (noise, so JPEG sizes are realistic) at a
+few resolutions, with and without an EXIF GPS block. Supabase and R2 are the
+offline fakes from ``app.services.offline``; nothing leaves the process.
+"""
+
+import io
+import os
+from urllib.parse import unquote, urlsplit
+
+import pytest
+from PIL import ExifTags, Image
+
+# Must be set before the app (and its storage singletons) are imported.
+os.environ.setdefault("OFFLINE_BACKENDS", "1")
+os.environ.setdefault("SUPABASE_SCHEMA_PROBE", "off")
+
+from app import create_app  # noqa: E402
+from app.services.offline import (  # noqa: E402
+    get_offline_object_store,
+    object_url_base,
+)
+
+# Megapixel label -> (width, height).
+IMAGE_SIZES = {
+    "1mp": (1152, 864),
+    "4mp": (2304, 1728),
+    "12mp": (4000, 3000),
+}
+
+
+def make_jpeg(size, with_gps: bool, quality: int = 90) -> bytes:
+    """Noise JPEG of ``size``; ``with_gps`` adds a phone-style EXIF GPS block."""
+    image = Image.merge(
+        "RGB", [Image.effect_noise(size, sigma) for sigma in (30, 45, 60)]
+    )
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Benchmark"
+    exif[ExifTags.Base.Model] = "Synthetic"
+    exif[ExifTags.Base.Orientation] = 6
+    exif.get_ifd(ExifTags.IFD.Exif)[
+        ExifTags.Base.DateTimeOriginal
+    ] = "2025:06:01 12:34:56"
+    if with_gps:
+        exif[ExifTags.IFD.GPSInfo] = {
+            ExifTags.GPS.GPSLatitudeRef: "N",
+            ExifTags.GPS.GPSLatitude: (37.0, 46.0, 30.5),
+            ExifTags.GPS.GPSLongitudeRef: "W",
+            ExifTags.GPS.GPSLongitude: (122.0, 25.0, 9.8),
+            ExifTags.GPS.GPSAltitudeRef: b"\x00",
+            ExifTags.GPS.GPSAltitude: 12.5,
+            ExifTags.GPS.GPSHPositioningError: 4.0,
+        }
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif, quality=quality)
+    return buffer.getvalue()
+
+
+def make_pdf(pages: int = 1, width_pt: float = 2592, height_pt: float = 1728) -> bytes:
+    """Vector PDF roughly shaped like an architectural sheet (36x24in)."""
+    import fitz
+
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page(width=width_pt, height=height_pt)
+        for step in range(0, int(width_pt), 48):
+            page.draw_line((step, 0), (step, height_pt), color=(0.7, 0.7, 0.7))
+        for step in range(0, int(height_pt), 48):
+            page.draw_line((0, step), (width_pt, step), color=(0.7, 0.7, 0.7))
+        page.insert_text((72, 72), f"Sheet A-{index + 1}", fontsize=48)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture(scope="session")
+def jpeg_images():
+    """``{(label, with_gps): bytes}`` for every size in IMAGE_SIZES."""
+    return {
+        (label, with_gps): make_jpeg(size, with_gps)
+        for label, size in IMAGE_SIZES.items()
+        for with_gps in (True, False)
+    }
+
+
+@pytest.fixture(scope="session")
+def plan_pdf():
+    return make_pdf()
+
+
+@pytest.fixture(scope="session")
+def app():
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(monkeypatch):
+    monkeypatch.setattr(
+        "app.middleware.auth_middleware.verify_supabase_jwt",
+        lambda token: {"id": "bench-user", "email": "bench@example.com"},
+    )
+    return {"Authorization": "Bearer bench-token"}
+
+
+class _StoredResponse:
+    """Just enough of ``requests.Response`` for the zip download loop."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+    def raise_for_status(self):
+        return None
+
+
+@pytest.fixture
+def offline_http(monkeypatch):
+    """Serve ``requests.get`` for offline object URLs straight from the S3 fake."""
+    store = get_offline_object_store()
+    base = urlsplit(object_url_base()).path.rstrip("/")
+
+    def _get(url, **_kwargs):
+        path = unquote(urlsplit(url).path)
+        bucket, _, key = path[len(base) + 1 :].partition("/")
+        body, _ = store.read(bucket, key)
+        return _StoredResponse(body)
+
+    monkeypatch.setattr("app.api_routes.v1.photos.requests.get", _get)
+    return store
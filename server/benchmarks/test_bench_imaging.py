@@ -0,0 +1,96 @@
+"""Benchmarks for the upload image pipeline and plan rasterization."""
+
+import io
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("pytest_benchmark")
+
+from app.routes.upload import (  # noqa: E402
+    _extract_exif_data,
+    _generate_thumbnail_bytes,
+    _load_image,
+)
+from app.services.exif_reader import HEADER_BYTES  # noqa: E402
+from app.services.plan_rasterizer import (  # noqa: E402
+    ENCODING_PRESETS,
+    encode_raster,
+    rasterize_to_image,
+    rasterize_to_png,
+)
+
+from .conftest import IMAGE_SIZES  # noqa: E402
+
+SIZES = list(IMAGE_SIZES)
+GPS_CASES = [True, False]
+
+
+def _gps_id(with_gps):
+    return "gps" if with_gps else "nogps"
+
+
+@pytest.mark.parametrize("label", SIZES)
+def test_load_image(benchmark, jpeg_images, label):
+    data = jpeg_images[(label, True)]
+    image = benchmark(_load_image, data)
+    assert image.size == IMAGE_SIZES[label]
+
+
+@pytest.mark.parametrize("with_gps", GPS_CASES, ids=_gps_id)
+@pytest.mark.parametrize("label", SIZES)
+def test_extract_exif_data(benchmark, jpeg_images, label, with_gps):
+    data = jpeg_images[(label, with_gps)]
+    image = _load_image(data)
+    _, _, gps = benchmark(_extract_exif_data, image, data)
+    assert bool(gps) is with_gps
+
+
+@pytest.mark.parametrize("with_gps", GPS_CASES, ids=_gps_id)
+@pytest.mark.parametrize("label", SIZES)
+def test_extract_exif_data_header(benchmark, jpeg_images, label, with_gps):
+    # The upload path: EXIF from the file header, no decode.
+    data = jpeg_images[(label, with_gps)]
+    _, _, gps = benchmark(_extract_exif_data, None, data)
+    assert bool(gps) is with_gps
+    assert _extract_exif_data(None, data[:HEADER_BYTES])[2] == gps
+
+
+@pytest.mark.parametrize("label", SIZES)
+def test_generate_thumbnail_bytes(benchmark, jpeg_images, label):
+    image = _load_image(jpeg_images[(label, True)])
+    thumb, _, _ = benchmark(_generate_thumbnail_bytes, image, "image/jpeg")
+    assert max(Image.open(io.BytesIO(thumb)).size) <= 512
+
+
+@pytest.mark.parametrize("label", SIZES)
+def test_rasterize_image_plan(benchmark, jpeg_images, label):
+    data = jpeg_images[(label, False)]
+    png, width, height = benchmark(
+        rasterize_to_png, data, filename_hint="plan.jpg", mime_hint="image/jpeg"
+    )
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    assert (width, height) == IMAGE_SIZES[label]
+
+
+def test_rasterize_pdf_plan(benchmark, plan_pdf):
+    pytest.importorskip("fitz")
+    png, width, height = benchmark.pedantic(
+        rasterize_to_png,
+        args=(plan_pdf,),
+        kwargs={"filename_hint": "plan.pdf", "mime_hint": "application/pdf"},
+        rounds=5,
+        iterations=1,
+    )
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    assert width > height > 0
+
+
+@pytest.mark.parametrize("preset", list(ENCODING_PRESETS))
+def test_encode_pdf_plan(benchmark, plan_pdf, preset):
+    pytest.importorskip("fitz")
+    image = rasterize_to_image(plan_pdf, filename_hint="plan.pdf")
+    data = benchmark.pedantic(
+        encode_raster, args=(image, preset), rounds=3, iterations=1
+    )
+    assert len(data) > 0
@@ -0,0 +1,135 @@
+"""Benchmarks for photo payload shaping, listing serialization and zip export."""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.api_routes.v1.photos import _serialize_photo  # noqa: E402
+from app.routes.upload import _strip_null_bytes  # noqa: E402
+from app.services.offline import OFFLINE_BUCKET, get_offline_postgrest  # noqa: E402
+from app.services.storage.supabase_client import _canonicalize_exif  # noqa: E402
+
+PAGE_SIZE = 200
+
+
+def _legacy_exif_record(index):
+    """Pre-canonical row: DMS GPS arrays plus a MakerNote full of null bytes."""
+    return {
+        "project_id": "p1",
+        "file_name": f"IMG_{index:04d}.jpg",
+        "exif_data": {
+            "Make": "Benchmark\x00",
+            "MakerNote": "\x00ab\x00" * 256,
+            "gps": {
+                "GPSLatitude": [37.0, 46.0, 30.5 + index / 1000.0],
+                "GPSLatitudeRef": "N",
+                "GPSLongitude": [122.0, 25.0, 9.8],
+                "GPSLongitudeRef": "W",
+                "GPSAltitude": 12.5,
+                "GPSHPositioningError": 4.0,
+            },
+            "tags": [f"tag\x00{n}" for n in range(20)],
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def legacy_records():
+    return [_legacy_exif_record(i) for i in range(PAGE_SIZE)]
+
+
+def test_strip_null_bytes_page(benchmark, legacy_records):
+    cleaned = benchmark(_strip_null_bytes, legacy_records)
+    assert "\x00" not in cleaned[0]["exif_data"]["MakerNote"]
+
+
+def test_canonicalize_exif_page(benchmark, legacy_records):
+    def _run():
+        return [_canonicalize_exif(dict(record)) for record in legacy_records]
+
+    canonical = benchmark(_run)
+    assert set(canonical[0]["exif_data"]["gps"]) == {"lat", "lon", "alt", "hpe_m"}
+
+
+@pytest.fixture(scope="module")
+def photo_page():
+    """A 200-row listing page over 5 projects, 20 locations and 3 uploaders."""
+    db = get_offline_postgrest()
+    projects = db.seed("projects", [{"name": f"Project {n}"} for n in range(5)])
+    locations = db.seed(
+        "locations",
+        [
+            {"latitude": 37.7 + n / 100, "longitude": -122.4, "city": "San Francisco"}
+            for n in range(20)
+        ],
+    )
+    users = db.seed(
+        "users",
+        [
+            {"first_name": "Pat", "last_name": f"Tester {n}", "company": "Skyer"}
+            for n in range(3)
+        ],
+    )
+    records = []
+    for n in range(PAGE_SIZE):
+        project = projects[n % len(projects)]
+        records.append(
+            {
+                "id": f"photo-{n}",
+                "project_id": project["id"],
+                "location_id": locations[n % len(locations)]["id"],
+                "user_id": users[n % len(users)]["id"],
+                "file_name": f"IMG_{n:04d}.jpg",
+                "file_size": 2_400_000,
+                "r2_path": f"projects/{project['id']}/photos/photo-{n}.jpg",
+                "thumbnail_r2_path": (
+                    f"projects/{project['id']}/photos/photo-{n}_thumb.jpg"
+                ),
+                "captured_at": "2025-06-01T12:34:56+00:00",
+                "created_at": "2025-06-02T08:00:00+00:00",
+                "exif_data": {"gps": {"lat": 37.775, "lon": -122.419}},
+            }
+        )
+    return records
+
+
+def test_serialize_photo_page(benchmark, app, photo_page):
+    def _run():
+        # One listing request: caches and the identity map start cold.
+        with app.test_request_context("/api/v1/photos"):
+            project_cache, url_cache, location_cache = {}, {}, {}
+            return [
+                _serialize_photo(record, project_cache, url_cache, location_cache)
+                for record in photo_page
+            ]
+
+    page = benchmark(_run)
+    assert len(page) == PAGE_SIZE
+    assert page[0]["project_name"] == "Project 0"
+    assert page[0]["uploaded_by"]["company"] == "Skyer"
+
+
+@pytest.mark.parametrize("count", [10, 50])
+def test_download_zip(
+    benchmark, client, auth_headers, offline_http, jpeg_images, count
+):
+    from app.services.storage.r2_client import r2_client
+
+    body = jpeg_images[("1mp", True)]
+    items = []
+    for n in range(count):
+        key = f"projects/bench/photos/zip-{n}.jpg"
+        offline_http.put_object(
+            Bucket=OFFLINE_BUCKET, Key=key, Body=body, ContentType="image/jpeg"
+        )
+        items.append({"url": r2_client.resolve_url(key), "name": f"zip-{n}.jpg"})
+    payload = {"items": items}
+
+    def _run():
+        return client.post(
+            "/api/v1/photos/download-zip", json=payload, headers=auth_headers
+        )
+
+    response = benchmark(_run)
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
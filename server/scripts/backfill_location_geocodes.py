@@ -0,0 +1,261 @@
+"""
+Backfill city/state/country on locations saved while geocoding was unavailable.
+
+Usage:
+    python server/scripts/backfill_location_geocodes.py [--batch-size 500] \
+        [--checkpoint PATH] [--restart] [--max-rows N] [--dry-run]
+
+Locations with any of city/state/country null are scanned in id order with
+keyset pagination (``id > last_id``), so each batch is an index range scan no
+matter how far the run has got. Rows in a batch are grouped by coordinate
+rounded to the reverse geocoder's city zoom; each distinct spot is geocoded
+once (and answered from the shared geocode cache or the offline gazetteer when
+those are configured). Lookups use the ``BACKGROUND`` lane of the shared
+geocoding client, so they respect the host-wide Nominatim rate limit and yield
+to project create/update. Rows that resolve to the same place are written with
+one ``update ... where id in (...)`` per place.
+
+After every batch the last id and running totals are written to the
+checkpoint file; an interrupted run picks up from there, and a completed run
+removes it. Spots that could not be resolved (nothing nearby, or Nominatim
+failing) are left null and skipped until the next full pass; ``--restart``
+ignores the checkpoint and rescans from the beginning.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.geocoding.cache import coordinate_precision  # noqa: E402
+from app.services.geocoding.client import BACKGROUND  # noqa: E402
+from app.services.geocoding.reverse_geocoder import reverse_geocode  # noqa: E402
+
+FIELDS = ("city", "state", "country")
+MISSING_FILTER = ",".join(f"{field}.is.null" for field in FIELDS)
+# reverse_geocoder asks Nominatim at city zoom (10); rounding the same way
+# makes one spot here one geocode cache entry there.
+SPOT_DECIMALS = coordinate_precision(10)
+# Ids per ``in.(...)`` filter; keeps the PostgREST query string short.
+UPDATE_CHUNK = 200
+
+Place = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def _default_checkpoint() -> str:
+    return os.path.join(tempfile.gettempdir(), "swallow-skyer-geocode-backfill.json")
+
+
+class Checkpoint:
+    """Resume point and running totals, persisted as JSON after every batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state: Dict[str, Any] = {
+            "last_id": None,
+            "scanned": 0,
+            "spots": 0,
+            "updated": 0,
+            "unresolved": 0,
+        }
+
+    def load(self) -> "Checkpoint":
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as handle:
+                self.state.update(json.load(handle))
+        return self
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.state, handle)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def scan_batches(
+    client, after_id: Optional[str], batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Batches of ``{id, latitude, longitude}`` with a missing field, by id."""
+    while True:
+        query = (
+            client.table("locations")
+            .select("id", "latitude", "longitude")
+            .or_(MISSING_FILTER)
+        )
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        rows = query.order("id").limit(batch_size).execute().data or []
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+
+
+def remaining_count(client, after_id: Optional[str]) -> int:
+    query = client.table("locations").select("id", count="exact").or_(MISSING_FILTER)
+    if after_id is not None:
+        query = query.gt("id", after_id)
+    return query.limit(1).execute().count or 0
+
+
+def spot_key(latitude: Any, longitude: Any) -> Optional[Tuple[float, float]]:
+    try:
+        return (
+            round(float(latitude), SPOT_DECIMALS) + 0.0,
+            round(float(longitude), SPOT_DECIMALS) + 0.0,
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def apply_updates(client, ids_by_place: Dict[Place, List[str]]) -> int:
+    """One update per distinct place (chunked); returns rows written."""
+    written = 0
+    for place, ids in ids_by_place.items():
+        fields = dict(zip(FIELDS, place))
+        for start in range(0, len(ids), UPDATE_CHUNK):
+            chunk = ids[start : start + UPDATE_CHUNK]
+            client.table("locations").update(fields).in_("id", chunk).execute()
+            written += len(chunk)
+    return written
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def backfill(
+    client,
+    checkpoint: Checkpoint,
+    batch_size: int = 500,
+    max_rows: Optional[int] = None,
+    dry_run: bool = False,
+    geocode: Callable[..., Dict[str, Optional[str]]] = reverse_geocode,
+    report: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """Run (or resume) the backfill; returns the checkpoint totals."""
+    state = checkpoint.state
+    remaining = remaining_count(client, state["last_id"])
+    report(f"{remaining} location(s) with missing geocode fields to scan")
+
+    started = time.monotonic()
+    scanned_now = 0
+    # Spots already answered this run, for repeats across batches.
+    places: Dict[Tuple[float, float], Place] = {}
+
+    for rows in scan_batches(client, state["last_id"], batch_size):
+        ids_by_place: Dict[Place, List[str]] = defaultdict(list)
+        for row in rows:
+            key = spot_key(row.get("latitude"), row.get("longitude"))
+            if key is None:
+                state["unresolved"] += 1
+                continue
+            if key not in places:
+                result = geocode(key[0], key[1], priority=BACKGROUND) or {}
+                places[key] = tuple(result.get(field) for field in FIELDS)
+                state["spots"] += 1
+            place = places[key]
+            if any(place):
+                ids_by_place[place].append(row["id"])
+            else:
+                state["unresolved"] += 1
+
+        if not dry_run:
+            state["updated"] += apply_updates(client, ids_by_place)
+        state["scanned"] += len(rows)
+        state["last_id"] = rows[-1]["id"]
+        checkpoint.save()
+
+        scanned_now += len(rows)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rate = scanned_now / elapsed
+        left = max(remaining - scanned_now, 0)
+        report(
+            f"scanned {state['scanned']} ({rate:.1f} rows/s), "
+            f"{state['spots']} spots geocoded, {state['updated']} updated, "
+            f"{state['unresolved']} unresolved; {left} left, "
+            f"ETA {_format_duration(left / rate) if rate else '?'}"
+        )
+        if max_rows is not None and scanned_now >= max_rows:
+            report(f"Stopped after {scanned_now} rows; rerun to resume")
+            break
+    else:
+        # Finished: the next run starts over and picks up rows added since.
+        checkpoint.clear()
+    return state
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--checkpoint",
+        default=_default_checkpoint(),
+        help="progress file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint and rescan"
+    )
+    parser.add_argument(
+        "--max-rows", type=int, help="stop after scanning about this many rows"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="geocode but do not write"
+    )
+    args = parser.parse_args(argv)
+
+    from app.services.storage.schema_capabilities import schema_probe
+    from app.services.storage.supabase_client import supabase_client
+
+    if not supabase_client.client:
+        print("Supabase is not configured")
+        return 1
+    # No app start-up ran the probe; load or fetch the snapshot now.
+    schema_probe.warm(background=False)
+    if not supabase_client.supports_location_geocode_columns():
+        print("locations has no city/state/country columns; nothing to backfill")
+        return 1
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.clear()
+    checkpoint.load()
+    if checkpoint.state["last_id"] is not None:
+        print(f"Resuming after id {checkpoint.state['last_id']}")
+
+    try:
+        state = backfill(
+            supabase_client.client,
+            checkpoint,
+            batch_size=args.batch_size,
+            max_rows=args.max_rows,
+            dry_run=args.dry_run,
+            geocode=reverse_geocode,
+        )
+    except KeyboardInterrupt:
+        print("\nInterrupted; progress is saved in the checkpoint")
+        return 130
+    print(
+        f"Done: {state['scanned']} scanned, {state['updated']} updated, "
+        f"{state['unresolved']} unresolved"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Compare plan raster encoder presets on representative plans.
+
+Usage:
+    python server/scripts/benchmark_plan_encoding.py [PLAN ...] \
+        [--presets png-balanced,webp-lossless] [--repeat 3] [--json PATH]
+
+Each PLAN (PDF, PNG or JPEG) is rasterized once exactly as an upload would be
+(first page, capped at the overview size), then encoded with every preset in
+``plan_rasterizer.ENCODING_PRESETS``. The report gives the median encode time
+and output size per preset, and both relative to ``png-optimize``. Without
+arguments a synthetic line-art sheet is used; real plans give far more useful
+numbers. Pick the winner with ``PLAN_RASTER_ENCODING``.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from app.services.plan_rasterizer import (  # noqa: E402
+    ENCODING_PRESETS,
+    encode_raster,
+    rasterize_to_image,
+)
+
+REFERENCE = "png-optimize"
+
+
+def synthetic_plan(width: int = 4096, height: int = 2731) -> Image.Image:
+    """Grid, walls and labels on white: a stand-in for a rendered site plan."""
+    rng = random.Random(1)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for x in range(0, width, 64):
+        draw.line((x, 0, x, height), fill=(180, 180, 180))
+    for y in range(0, height, 64):
+        draw.line((0, y, width, y), fill=(180, 180, 180))
+    for _ in range(3000):
+        x, y = rng.randrange(width), rng.randrange(height)
+        end = (x + rng.randrange(-300, 300), y + rng.randrange(-300, 300))
+        draw.line((x, y) + end, fill=(0, 0, 0), width=2)
+    for _ in range(800):
+        draw.text((rng.randrange(width), rng.randrange(height)), "ROOM 101", fill=0)
+    return image
+
+
+def measure(image: Image.Image, presets: List[str], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for preset in presets:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = encode_raster(image, preset)
+            timings.append(time.perf_counter() - started)
+        results[preset] = {"seconds": statistics.median(timings), "bytes": len(data)}
+    return results
+
+
+def _report(name: str, image: Image.Image, results: Dict[str, Dict]) -> None:
+    print(f"\n{name} ({image.width}x{image.height}, {image.mode})")
+    print(f"  {'preset':<15} {'encode':>9} {'size':>10}   vs {REFERENCE} (time, size)")
+    reference = results.get(REFERENCE)
+    for preset, result in sorted(results.items(), key=lambda item: item[1]["seconds"]):
+        relative = ""
+        if reference:
+            relative = (
+                f" {result['seconds'] / reference['seconds']:>6.2f}x"
+                f" {result['bytes'] / reference['bytes']:>6.2f}x"
+            )
+        print(
+            f"  {preset:<15} {result['seconds'] * 1000:>7.0f}ms "
+            f"{result['bytes'] / 1024:>8.0f}KB{relative}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("plans", nargs="*", help="PDF/PNG/JPEG plan files")
+    parser.add_argument(
+        "--presets",
+        default=",".join(ENCODING_PRESETS),
+        help="comma-separated presets (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    presets = [name.strip() for name in args.presets.split(",") if name.strip()]
+    unknown = [name for name in presets if name not in ENCODING_PRESETS]
+    if unknown:
+        print(f"Unknown preset(s): {', '.join(unknown)}")
+        return 1
+
+    if args.plans:
+        sources = []
+        for path in args.plans:
+            with open(path, "rb") as handle:
+                image = rasterize_to_image(handle.read(), filename_hint=path)
+            sources.append((os.path.basename(path), image))
+    else:
+        sources = [("synthetic line-art sheet", synthetic_plan())]
+
+    report = {}
+    for name, image in sources:
+        results = measure(image, presets, max(1, args.repeat))
+        _report(name, image, results)
+        report[name] = results
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
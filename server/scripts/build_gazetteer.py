@@ -0,0 +1,108 @@
+"""
+Compile a GeoNames cities dump into the offline reverse-geocoding gazetteer.
+
+Usage:
+    python server/scripts/build_gazetteer.py cities1000.txt OUTPUT_DIR \
+        [--admin1 admin1CodesASCII.txt] [--countries countryInfo.txt] \
+        [--min-population 0]
+
+``cities*.txt`` rows are tab-separated GeoNames records; only the name,
+coordinates, country code, admin1 code and population columns are read.
+Without ``--admin1`` the state is the raw admin1 code, and without
+``--countries`` the country is the ISO code. Point the server at the output
+with ``REVERSE_GEOCODER=offline`` and ``GAZETTEER_PATH=OUTPUT_DIR``.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.geocoding.gazetteer import write_gazetteer  # noqa: E402
+
+# GeoNames "geoname" table columns.
+_NAME, _LAT, _LNG, _COUNTRY, _ADMIN1, _POPULATION = 1, 4, 5, 8, 10, 14
+
+csv.field_size_limit(sys.maxsize)
+
+
+def _rows(path: str) -> Iterator[list]:
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        for row in csv.reader(handle, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if row and not row[0].startswith("#"):
+                yield row
+
+
+def load_admin1(path: Optional[str]) -> Dict[str, str]:
+    """``{"US.CA": "California"}`` from ``admin1CodesASCII.txt``."""
+    return {row[0]: row[1] for row in _rows(path) if len(row) > 1} if path else {}
+
+
+def load_countries(path: Optional[str]) -> Dict[str, str]:
+    """``{"US": "United States"}`` from ``countryInfo.txt``."""
+    return {row[0]: row[4] for row in _rows(path) if len(row) > 4} if path else {}
+
+
+def read_places(
+    path: str,
+    admin1: Dict[str, str],
+    countries: Dict[str, str],
+    min_population: int = 0,
+) -> Iterator[Tuple[float, float, Tuple[str, Optional[str], Optional[str]]]]:
+    for row in _rows(path):
+        try:
+            lat, lng = float(row[_LAT]), float(row[_LNG])
+            population = int(row[_POPULATION] or 0)
+        except (IndexError, ValueError):
+            continue
+        if population < min_population:
+            continue
+        country_code = row[_COUNTRY]
+        admin1_code = row[_ADMIN1]
+        state = admin1.get(f"{country_code}.{admin1_code}", admin1_code or None)
+        country = countries.get(country_code, country_code or None)
+        yield lat, lng, (row[_NAME], state, country)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("cities", help="GeoNames cities*.txt")
+    parser.add_argument("output", help="directory to write the gazetteer into")
+    parser.add_argument("--admin1", help="GeoNames admin1CodesASCII.txt")
+    parser.add_argument("--countries", help="GeoNames countryInfo.txt")
+    parser.add_argument("--min-population", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    lats, lngs, places = [], [], []
+    for lat, lng, place in read_places(
+        args.cities,
+        load_admin1(args.admin1),
+        load_countries(args.countries),
+        args.min_population,
+    ):
+        lats.append(lat)
+        lngs.append(lng)
+        places.append(place)
+    if not places:
+        print(f"No places read from {args.cities}")
+        return 1
+
+    count = write_gazetteer(args.output, lats, lngs, places)
+    size = sum(
+        os.path.getsize(os.path.join(args.output, name))
+        for name in os.listdir(args.output)
+    )
+    print(
+        f"Wrote {count} places to {args.output} "
+        f"({size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Compare two pytest-benchmark JSON reports and flag regressions.
+
+Usage:
+    python server/scripts/compare_benchmarks.py BASELINE.json CURRENT.json \
+        [--threshold 0.10] [--stat median]
+
+Benchmarks are matched by full name. A benchmark regresses when the chosen
+statistic grew by more than ``threshold`` (a fraction: 0.10 = 10%). Exits 1
+when anything regressed, so the command can gate CI.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+STATS = ("min", "max", "mean", "median", "stddev", "iqr")
+
+
+def load_stats(path: Path, stat: str) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """``({fullname: seconds}, machine_info)`` from a ``--benchmark-json`` file."""
+    with open(path, "r", encoding="utf-8") as handle:
+        report = json.load(handle)
+    stats = {
+        bench.get("fullname") or bench["name"]: float(bench["stats"][stat])
+        for bench in report.get("benchmarks", [])
+    }
+    return stats, report.get("machine_info") or {}
+
+
+def compare(
+    baseline: Dict[str, float], current: Dict[str, float], threshold: float
+) -> List[Tuple[str, str, float, float, float]]:
+    """Rows of ``(status, name, baseline, current, change)``; change is a fraction."""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        before = baseline.get(name)
+        after = current.get(name)
+        if before is None:
+            rows.append(("new", name, float("nan"), after, float("nan")))
+            continue
+        if after is None:
+            rows.append(("missing", name, before, float("nan"), float("nan")))
+            continue
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = "REGRESSED"
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((status, name, before, after, change))
+    return rows
+
+
+def _format_ms(seconds: float) -> str:
+    return "-" if seconds != seconds else f"{seconds * 1000:.3f}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed slowdown as a fraction (default: 0.10)",
+    )
+    parser.add_argument("--stat", choices=STATS, default="median")
+    args = parser.parse_args(argv)
+
+    baseline, base_machine = load_stats(args.baseline, args.stat)
+    current, current_machine = load_stats(args.current, args.stat)
+    for field in ("cpu", "python_version"):
+        if base_machine.get(field) != current_machine.get(field):
+            print(
+                f"warning: {field} differs between reports; "
+                "timings may not be comparable"
+            )
+            break
+
+    rows = compare(baseline, current, args.threshold)
+    width = max([len(row[1]) for row in rows] + [9])
+    print(
+        f"{'benchmark':<{width}}  {'base ms':>12}  {'now ms':>12}  "
+        f"{'change':>8}  status"
+    )
+    for status, name, before, after, change in rows:
+        pct = "-" if change != change else f"{change * 100:+.1f}%"
+        print(
+            f"{name:<{width}}  {_format_ms(before):>12}  {_format_ms(after):>12}  "
+            f"{pct:>8}  {status}"
+        )
+
+    regressed = [row for row in rows if row[0] == "REGRESSED"]
+    if regressed:
+        print(
+            f"\n{len(regressed)} benchmark(s) regressed by more than "
+            f"{args.threshold * 100:.0f}% ({args.stat})"
+        )
+        return 1
+    print(f"\nNo regressions beyond {args.threshold * 100:.0f}% ({args.stat})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,625 @@
+"""
+Load generator for the Flask API running under gunicorn.
+
+Starts ``create_app()`` under gunicorn (or targets an already running server
+with ``--url``), seeds a project, then replays a weighted traffic mix from
+concurrent virtual users for a fixed duration:
+
+    poll    — map listing poll: project list + one page of project photos
+    upload  — multi-file photo upload (``--files-per-upload`` JPEGs)
+    public  — public-link burst: project, photo page and a few downloads
+    plan    — plan metadata fetch
+    zip     — zip export of a handful of photos
+
+Reports throughput, p50/p95/p99 latency and error rate per route, and the RSS
+of each gunicorn worker sampled over the run (Linux /proc).
+
+Backends:
+    offline (default) — OFFLINE_BACKENDS=1 with a SQLite file and object
+                        directory shared by all workers; --supabase-latency and
+                        --r2-latency inject "base[:jitter]" milliseconds per call.
+                        Zip exports fetch objects back through the server's
+                        /offline/r2 route, so each one also holds a worker
+                        thread per item; size --threads accordingly.
+    env               — whatever Supabase/R2 the environment points at; pass an
+                        existing project with --project-id and a user token
+                        with --token.
+
+Examples (from server/):
+    python scripts/load_test.py --duration 60 --users 16 --workers 4 --threads 4
+    python scripts/load_test.py --mix poll=80,upload=5,public=15 --json report.json
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import requests
+from PIL import Image
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+
+DEFAULT_MIX = "poll=55,upload=10,public=20,plan=10,zip=5"
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0..100)."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Thread-safe per-route latency and error accounting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, seconds: float, status: Union[int, str]) -> None:
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][str(status)] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            routes = {}
+            for route, samples in sorted(self.latencies.items()):
+                count = len(samples)
+                routes[route] = {
+                    "count": count,
+                    "rps": count / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(samples, 50) * 1000,
+                    "p95_ms": percentile(samples, 95) * 1000,
+                    "p99_ms": percentile(samples, 99) * 1000,
+                    "max_ms": max(samples) * 1000,
+                    "errors": self.errors.get(route, 0),
+                    "error_rate": self.errors.get(route, 0) / count,
+                    "statuses": dict(self.statuses[route]),
+                }
+            total = sum(r["count"] for r in routes.values())
+            errors = sum(r["errors"] for r in routes.values())
+        return {
+            "elapsed_s": elapsed,
+            "requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "routes": routes,
+        }
+
+
+def _read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r") as handle:
+                children.extend(int(p) for p in handle.read().split())
+    except OSError:
+        pass
+    return sorted(set(children))
+
+
+class RssSampler(threading.Thread):
+    """Samples the RSS of every child of the gunicorn master at an interval."""
+
+    def __init__(self, master_pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.samples: List[Dict[str, Any]] = []
+        self._done = threading.Event()
+        self._t0 = time.monotonic()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            workers = {}
+            for pid in _child_pids(self.master_pid):
+                rss = _read_rss_kb(pid)
+                if rss is not None:
+                    workers[pid] = rss
+            self.samples.append(
+                {"t": round(time.monotonic() - self._t0, 2), "rss_kb": workers}
+            )
+            self._done.wait(self.interval)
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join(timeout=self.interval + 1)
+
+    def summary(self) -> Dict[str, Any]:
+        per_worker: Dict[int, List[int]] = defaultdict(list)
+        totals = []
+        for sample in self.samples:
+            totals.append(sum(sample["rss_kb"].values()))
+            for pid, rss in sample["rss_kb"].items():
+                per_worker[pid].append(rss)
+        return {
+            "workers": {
+                str(pid): {
+                    "start_mb": values[0] / 1024,
+                    "peak_mb": max(values) / 1024,
+                    "end_mb": values[-1] / 1024,
+                }
+                for pid, values in sorted(per_worker.items())
+            },
+            "total_peak_mb": max(totals) / 1024 if totals else None,
+            "series": self.samples,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Server lifecycle
+# ---------------------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(args, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--worker-class",
+        args.worker_class,
+        "--timeout",
+        "120",
+        "--log-level",
+        "warning",
+        "app:create_app()",
+    ]
+    log = open(args.server_log, "ab") if args.server_log else subprocess.DEVNULL
+    return subprocess.Popen(
+        command, cwd=str(SERVER_DIR), env=env, stdout=log, stderr=log
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/ping", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+def offline_env(args, workdir: str, base_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "OFFLINE_BACKENDS": "1",
+            "OFFLINE_DB_PATH": os.path.join(workdir, "postgrest.sqlite3"),
+            "OFFLINE_R2_PATH": os.path.join(workdir, "objects"),
+            "OFFLINE_R2_URL_BASE": f"{base_url}/offline/r2",
+            "OFFLINE_SUPABASE_LATENCY_MS": args.supabase_latency,
+            "OFFLINE_R2_LATENCY_MS": args.r2_latency,
+            "SUPABASE_SCHEMA_PROBE": "off",
+        }
+    )
+    return env
+
+
+# ---------------------------------------------------------------------------
+# Traffic
+# ---------------------------------------------------------------------------
+
+
+def make_jpeg(seed: int, size=(1600, 1200)) -> bytes:
+    """Noisy JPEG so upload sizes and decode cost look like phone photos."""
+    rng = random.Random(seed)
+    image = Image.merge(
+        "RGB", [Image.effect_noise(size, rng.uniform(20, 60)) for _ in range(3)]
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def make_plan_png(size=(2400, 1600)) -> bytes:
+    image = Image.new("RGB", size, (250, 250, 250))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Scenario:
+    """Shared state for virtual users: base URL, auth, seeded ids, images."""
+
+    def __init__(self, base_url: str, token: str, recorder: Recorder, args):
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.recorder = recorder
+        self.args = args
+        self.project_id: Optional[str] = args.project_id
+        self.public_token: Optional[str] = args.public_token
+        self.photo_urls: List[str] = []
+        self.photo_ids: List[str] = []
+        self.images = [make_jpeg(seed) for seed in range(8)]
+
+    def call(
+        self, session: requests.Session, route: str, method: str, path: str, **kwargs
+    ) -> Optional[requests.Response]:
+        kwargs.setdefault("timeout", self.args.request_timeout)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, f"{self.base_url}{path}", **kwargs)
+            response.content  # drain the body inside the timed window
+            status = response.status_code
+        except requests.RequestException as exc:
+            # Transport failures are errors too; keep the exception name.
+            response, status = None, type(exc).__name__
+        self.recorder.record(route, time.perf_counter() - started, status)
+        return response
+
+    # -- setup -----------------------------------------------------------
+
+    def seed(self, session: requests.Session) -> None:
+        if not self.project_id:
+            response = session.post(
+                f"{self.base_url}/api/v1/projects",
+                json={"name": "Load test"},
+                headers=self.headers,
+                timeout=60,
+            )
+            response.raise_for_status()
+            self.project_id = response.json()["id"]
+        for batch in range(self.args.seed_photos // self.args.files_per_upload):
+            self._upload(session, batch, record=False)
+        if self.args.mix.get("plan"):
+            session.post(
+                f"{self.base_url}/api/v1/projects/{self.project_id}/plan",
+                files={"file": ("plan.png", make_plan_png(), "image/png")},
+                data={
+                    "min_lat": 37.77,
+                    "min_lng": -122.42,
+                    "max_lat": 37.78,
+                    "max_lng": -122.41,
+                },
+                headers=self.headers,
+                timeout=120,
+            )
+        if self.args.mix.get("public") and not self.public_token:
+            response = session.post(
+                f"{self.base_url}/api/v1/projects/{self.project_id}/public-links",
+                json={},
+                headers=self.headers,
+                timeout=30,
+            )
+            if response.ok:
+                self.public_token = response.json().get("token")
+        self._refresh_photos(session)
+
+    def _refresh_photos(self, session: requests.Session) -> None:
+        response = session.get(
+            f"{self.base_url}/api/v1/photos/",
+            params={"project_id": self.project_id, "page_size": 200},
+            headers=self.headers,
+            timeout=60,
+        )
+        if response.ok:
+            photos = response.json().get("photos") or []
+            self.photo_ids = [p["id"] for p in photos if p.get("id")]
+            self.photo_urls = [p["url"] for p in photos if p.get("url")]
+
+    def _upload(self, session, seed: int, record: bool = True):
+        files = [
+            (
+                "files",
+                (
+                    f"IMG_{seed}_{n}.jpg",
+                    self.images[(seed + n) % len(self.images)],
+                    "image/jpeg",
+                ),
+            )
+            for n in range(self.args.files_per_upload)
+        ]
+        data = {"project_id": self.project_id}
+        if record:
+            return self.call(
+                session,
+                "POST /api/photos/upload",
+                "POST",
+                "/api/photos/upload",
+                files=files,
+                data=data,
+                headers=self.headers,
+            )
+        return session.post(
+            f"{self.base_url}/api/photos/upload",
+            files=files,
+            data=data,
+            headers=self.headers,
+            timeout=120,
+        )
+
+    # -- traffic ---------------------------------------------------------
+
+    def poll(self, session, rng):
+        self.call(
+            session,
+            "GET /api/v1/projects",
+            "GET",
+            "/api/v1/projects",
+            headers=self.headers,
+        )
+        self.call(
+            session,
+            "GET /api/v1/photos",
+            "GET",
+            "/api/v1/photos/",
+            params={"project_id": self.project_id, "page_size": 200},
+            headers=self.headers,
+        )
+
+    def upload(self, session, rng):
+        self._upload(session, rng.randrange(1_000_000))
+
+    def public(self, session, rng):
+        if not self.public_token:
+            return
+        prefix = f"/api/v1/public/{self.public_token}"
+        self.call(
+            session, "GET /api/v1/public/<token>/project", "GET", f"{prefix}/project"
+        )
+        self.call(
+            session, "GET /api/v1/public/<token>/photos", "GET", f"{prefix}/photos"
+        )
+        for photo_id in rng.sample(self.photo_ids, min(3, len(self.photo_ids))):
+            self.call(
+                session,
+                "GET /api/v1/public/<token>/photos/<id>/download",
+                "GET",
+                f"{prefix}/photos/{photo_id}/download",
+                allow_redirects=False,
+            )
+
+    def plan(self, session, rng):
+        self.call(
+            session,
+            "GET /api/v1/projects/<id>/plan",
+            "GET",
+            f"/api/v1/projects/{self.project_id}/plan",
+            headers=self.headers,
+        )
+
+    def zip(self, session, rng):
+        urls = rng.sample(
+            self.photo_urls, min(self.args.zip_items, len(self.photo_urls))
+        )
+        if not urls:
+            return
+        self.call(
+            session,
+            "POST /api/v1/photos/download-zip",
+            "POST",
+            "/api/v1/photos/download-zip",
+            json={"items": [{"url": url} for url in urls]},
+            headers=self.headers,
+        )
+
+
+def virtual_user(scenario: Scenario, index: int, deadline: float, seed: int) -> None:
+    rng = random.Random(seed + index)
+    names = list(scenario.args.mix)
+    weights = [scenario.args.mix[name] for name in names]
+    actions: Dict[str, Callable] = {name: getattr(scenario, name) for name in names}
+    with requests.Session() as session:
+        while time.monotonic() < deadline:
+            actions[rng.choices(names, weights)[0]](session, rng)
+            if scenario.args.think_ms:
+                time.sleep(rng.expovariate(1000.0 / scenario.args.think_ms))
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("poll", "upload", "public", "plan", "zip"):
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    traffic = report["traffic"]
+    print(
+        f"\n{traffic['requests']} requests in {traffic['elapsed_s']:.1f}s — "
+        f"{traffic['throughput_rps']:.1f} req/s, "
+        f"error rate {traffic['error_rate'] * 100:.2f}%\n"
+    )
+    width = max([len(route) for route in traffic["routes"]] + [5])
+    print(
+        f"{'route':<{width}}  {'count':>7}  {'rps':>7}  {'p50 ms':>8}  "
+        f"{'p95 ms':>8}  {'p99 ms':>8}  {'errors':>7}"
+    )
+    for route, stats in traffic["routes"].items():
+        print(
+            f"{route:<{width}}  {stats['count']:>7}  {stats['rps']:>7.1f}  "
+            f"{stats['p50_ms']:>8.1f}  {stats['p95_ms']:>8.1f}  "
+            f"{stats['p99_ms']:>8.1f}  {stats['errors']:>7}"
+        )
+    rss = report.get("rss")
+    if rss and rss["workers"]:
+        print("\nworker RSS (MB)      start     peak      end")
+        for pid, stats in rss["workers"].items():
+            print(
+                f"  pid {pid:<12} {stats['start_mb']:>8.1f} "
+                f"{stats['peak_mb']:>8.1f} {stats['end_mb']:>8.1f}"
+            )
+        print(f"  total peak {rss['total_peak_mb']:.1f} MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a traffic mix against the API under gunicorn."
+    )
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--backends", choices=("offline", "env"), default="offline")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument(
+        "--think-ms",
+        type=float,
+        default=0.0,
+        help="mean pause between actions per user",
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument(
+        "--supabase-latency",
+        default="",
+        help='offline PostgREST delay, "base[:jitter]" ms',
+    )
+    parser.add_argument(
+        "--r2-latency", default="", help='offline R2 delay, "base[:jitter]" ms'
+    )
+    parser.add_argument("--token", help="bearer token (default: offline test user)")
+    parser.add_argument("--project-id", help="use an existing project")
+    parser.add_argument("--public-token", help="use an existing public link token")
+    parser.add_argument("--seed-photos", type=int, default=24)
+    parser.add_argument("--files-per-upload", type=int, default=3)
+    parser.add_argument("--zip-items", type=int, default=5)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server-log", help="append gunicorn output to this file")
+    parser.add_argument("--json", dest="json_path", help="write the full report here")
+    args = parser.parse_args(argv)
+
+    if args.backends == "env" and not (args.token and args.project_id):
+        parser.error("--backends env needs --token and --project-id")
+
+    workdir = tempfile.mkdtemp(prefix="skyer-load-")
+    server = None
+    sampler = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            env = (
+                offline_env(args, workdir, base_url)
+                if args.backends == "offline"
+                else dict(os.environ)
+            )
+            server = start_gunicorn(args, port, env)
+        wait_until_ready(base_url)
+
+        # The offline auth fake maps "user:<id>" tokens to that user id.
+        token = args.token or f"user:{uuid.uuid4()}"
+        recorder = Recorder()
+        scenario = Scenario(base_url, token, recorder, args)
+        with requests.Session() as session:
+            scenario.seed(session)
+        print(
+            f"project {scenario.project_id}: {len(scenario.photo_ids)} photos; "
+            f"{args.users} users for {args.duration:.0f}s against {base_url}"
+        )
+
+        if server is not None:
+            sampler = RssSampler(server.pid, args.rss_interval)
+            sampler.start()
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = [
+            threading.Thread(
+                target=virtual_user,
+                args=(scenario, i, deadline, args.seed),
+                daemon=True,
+            )
+            for i in range(args.users)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+
+        report: Dict[str, Any] = {
+            "config": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("token", "json_path")
+            },
+            "traffic": recorder.summary(elapsed),
+        }
+        if sampler is not None:
+            sampler.stop()
+            report["rss"] = sampler.summary()
+        print_report(report)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+        return 0
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,19 @@
+import os
+
 import pytest
 
-from app import create_app, db
+# Keep the suite hermetic: never probe a live PostgREST schema from tests.
+os.environ.setdefault("SUPABASE_SCHEMA_PROBE", "off")
+# Geocoding tests mock Nominatim per test; a shared cache would replay answers.
+os.environ.setdefault("GEOCODE_CACHE", "off")
+# Nominatim is mocked; don't share (or wait on) the host-wide rate limit.
+os.environ.setdefault("GEOCODE_RATE_LIMIT", "0")
+# Route tests stub rasterize_to_png, which an isolated worker process would not see.
+os.environ.setdefault("PLAN_RASTER_ISOLATION", "off")
+# ...and a raster cached by one test would hide the next test's stub.
+os.environ.setdefault("PLAN_RASTER_CACHE", "off")
+
+from app import create_app, db  # noqa: E402
 
 
 @pytest.fixture(scope="function")
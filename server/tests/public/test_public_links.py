@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 
 import pytest
 
+from app.api_routes.public_links import clear_public_link_caches
 from app.services.storage.supabase_client import supabase_client
 from app.services.storage.r2_client import r2_client
 
@@ -79,7 +80,9 @@ class FakeClient:
 def patch_supabase(monkeypatch):
     storage = {"project_public_links": [], "projects": [], "photos": []}
     supabase_client.client = FakeClient(storage)
-    return storage
+    clear_public_link_caches()
+    yield storage
+    clear_public_link_caches()
 
 
 @pytest.fixture(autouse=True)
@@ -188,3 +191,67 @@ def test_public_download_expired(client, patch_supabase):
     resp = client.get(f"/api/v1/public/{token}/photos/a/download")
     assert resp.status_code == 410
 
+
+
+def test_public_photos_served_from_cache(client, monkeypatch, patch_supabase):
+    token = "cached-token"
+    patch_supabase["project_public_links"].append(
+        {"id": "link-1", "project_id": "proj-1", "token": token, "expires_at": None}
+    )
+    calls = []
+
+    def _fetch(**kwargs):
+        calls.append(kwargs)
+        return {"data": [{"id": "p1", "project_id": "proj-1"}]}
+
+    monkeypatch.setattr(
+        "app.api_routes.public_links.supabase_client.fetch_project_photos", _fetch
+    )
+
+    first = client.get(f"/api/v1/public/{token}/photos")
+    # Remove the backing row: the cached link record must still satisfy the request.
+    patch_supabase["project_public_links"].clear()
+    second = client.get(f"/api/v1/public/{token}/photos")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert len(calls) == 1
+
+
+def test_cached_link_still_honours_expiry(client, monkeypatch, patch_supabase):
+    token = "short-lived"
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    record = {"id": "link-1", "project_id": "proj-1", "token": token, "expires_at": expires_at.isoformat()}
+    patch_supabase["project_public_links"].append(record)
+    monkeypatch.setattr(
+        "app.api_routes.public_links.supabase_client.fetch_project_photos",
+        lambda **kwargs: {"data": []},
+    )
+    assert client.get(f"/api/v1/public/{token}/photos").status_code == 200
+
+    monkeypatch.setattr(
+        "app.api_routes.public_links._now_utc",
+        lambda: expires_at + timedelta(seconds=1),
+    )
+    assert client.get(f"/api/v1/public/{token}/photos").status_code == 410
+
+
+def test_delete_link_invalidates_cache(client, auth_headers, monkeypatch, patch_supabase):
+    monkeypatch.setattr(
+        "app.services.auth.permissions.supabase_client.get_project_role",
+        lambda project_id, user_id: "Owner",
+    )
+    monkeypatch.setattr(
+        "app.api_routes.public_links.supabase_client.fetch_project_photos",
+        lambda **kwargs: {"data": []},
+    )
+    token = "soon-deleted"
+    patch_supabase["project_public_links"].append(
+        {"id": "link-9", "project_id": "proj-1", "token": token, "expires_at": None}
+    )
+    assert client.get(f"/api/v1/public/{token}/photos").status_code == 200
+
+    resp = client.delete("/api/v1/public-links/link-9", headers=auth_headers)
+    assert resp.status_code == 200
+    assert client.get(f"/api/v1/public/{token}/photos").status_code == 404
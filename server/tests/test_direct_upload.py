@@ -0,0 +1,248 @@
+"""Direct-to-R2 photo uploads: presigned init, then finalize."""
+
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+from PIL import ExifTags, Image
+
+from app.services.offline.object_store import FakeS3Client
+from app.services.offline.postgrest import FakePostgrestClient
+
+PROJECT_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+BUCKET = "test-bucket"
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+def _jpeg_with_gps():
+    exif = Image.Exif()
+    exif.get_ifd(ExifTags.IFD.Exif)[
+        ExifTags.Base.DateTimeOriginal
+    ] = "2025:06:01 12:34:56"
+    exif[ExifTags.IFD.GPSInfo] = {
+        ExifTags.GPS.GPSLatitudeRef: "N",
+        ExifTags.GPS.GPSLatitude: (37.0, 46.0, 30.0),
+        ExifTags.GPS.GPSLongitudeRef: "W",
+        ExifTags.GPS.GPSLongitude: (122.0, 25.0, 12.0),
+    }
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (40, 90, 140)).save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    import app.routes.upload as upload_module
+    from app.services import photo_derivatives
+    from app.services.storage.r2_client import r2_client
+    from app.services.storage.supabase_client import supabase_client
+
+    store = FakeS3Client()
+    db = FakePostgrestClient()
+    monkeypatch.setattr(r2_client, "client", store)
+    monkeypatch.setattr(r2_client, "bucket_name", BUCKET)
+    monkeypatch.setattr(r2_client, "public_url", "https://cdn.example")
+    monkeypatch.setattr(supabase_client, "client", db)
+    monkeypatch.setattr(supabase_client, "supports_thumbnail_columns", lambda: True)
+    monkeypatch.setattr(
+        supabase_client,
+        "get_or_create_location",
+        lambda lat, lon, elevation=None, project_id=None: None,
+    )
+    monkeypatch.setattr(
+        upload_module,
+        "require_role",
+        lambda project_id, roles: {"user_id": "user-1"},
+    )
+    monkeypatch.setattr(photo_derivatives, "_get_executor", lambda: _InlineExecutor())
+    yield store, db
+    db.close()
+
+
+def _init(client, auth_headers, data):
+    return client.post(
+        "/api/photos/uploads",
+        json={
+            "project_id": PROJECT_ID,
+            "files": [
+                {
+                    "file_name": "site.jpg",
+                    "content_type": "image/jpeg",
+                    "size": len(data),
+                }
+            ],
+        },
+        headers=auth_headers,
+    )
+
+
+def test_direct_upload_init_put_finalize(client, auth_headers, backends):
+    store, db = backends
+    data = _jpeg_with_gps()
+
+    resp = _init(client, auth_headers, data)
+    assert resp.status_code == 200, resp.data
+    upload = resp.get_json()["uploads"][0]
+    assert upload["key"] == f"projects/{PROJECT_ID}/photos/{upload['photo_id']}.jpg"
+    assert "method=put_object" in upload["upload_url"]
+
+    # The browser PUTs the file to the presigned URL.
+    store.put_object(
+        Bucket=BUCKET, Key=upload["key"], Body=data, ContentType="image/jpeg"
+    )
+
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [upload]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201, resp.data
+    assert resp.get_json()["uploaded"][0]["photo_id"] == upload["photo_id"]
+
+    (row,) = db.rows("photos")
+    assert row["id"] == upload["photo_id"]
+    assert row["r2_path"] == upload["key"]
+    assert row["file_size"] == len(data)
+    assert row["captured_at"].startswith("2025-06-01T12:34:56")
+    assert row["latitude"] == pytest.approx(37.775)
+    assert row["longitude"] == pytest.approx(-122.42)
+    thumb_key = f"projects/{PROJECT_ID}/photos/{upload['photo_id']}_thumb.jpg"
+    assert row["thumbnail_r2_path"] == thumb_key
+    thumb = store.read(BUCKET, thumb_key)[0]
+    assert max(Image.open(io.BytesIO(thumb)).size) == 512
+
+
+def test_finalize_rejects_missing_and_foreign_objects(client, auth_headers, backends):
+    _, db = backends
+    upload = _init(client, auth_headers, _jpeg_with_gps()).get_json()["uploads"][0]
+
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [upload]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 404
+
+    foreign = dict(upload, key="projects/other/photos/x.jpg")
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [foreign]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 400
+    assert db.rows("photos") == []
+
+
+def test_finalize_only_accepts_reserved_uploads(client, auth_headers, backends):
+    store, db = backends
+    data = _jpeg_with_gps()
+    upload = _init(client, auth_headers, data).get_json()["uploads"][0]
+    (reservation,) = db.rows("photo_upload_reservations")
+    assert reservation["photo_id"] == upload["photo_id"]
+    assert reservation["user_id"] == "user-1"
+    assert reservation["file_size"] == len(data)
+
+    # An object under a photo id nobody reserved is neither recorded nor deleted.
+    forged_id = "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"
+    forged_key = f"projects/{PROJECT_ID}/photos/{forged_id}.jpg"
+    store.put_object(Bucket=BUCKET, Key=forged_key, Body=data, ContentType="image/jpeg")
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={
+            "project_id": PROJECT_ID,
+            "uploads": [{"photo_id": forged_id, "key": forged_key}],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 404
+    assert store.read(BUCKET, forged_key)[0] == data
+
+    # Bytes other than the reserved size are discarded with the reservation.
+    store.put_object(
+        Bucket=BUCKET, Key=upload["key"], Body=data + b"x", ContentType="image/jpeg"
+    )
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [upload]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 400
+    with pytest.raises(ClientError):
+        store.read(BUCKET, upload["key"])
+    assert db.rows("photo_upload_reservations") == []
+    assert db.rows("photos") == []
+
+
+def test_expired_reservations_are_swept(client, auth_headers, backends):
+    store, db = backends
+    data = _jpeg_with_gps()
+    stale = _init(client, auth_headers, data).get_json()["uploads"][0]
+    store.put_object(
+        Bucket=BUCKET, Key=stale["key"], Body=data, ContentType="image/jpeg"
+    )
+    db.table("photo_upload_reservations").update(
+        {"expires_at": "2000-01-01T00:00:00+00:00"}
+    ).eq("photo_id", stale["photo_id"]).execute()
+
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [stale]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 410
+
+    fresh = _init(client, auth_headers, data).get_json()["uploads"][0]
+    (reservation,) = db.rows("photo_upload_reservations")
+    assert reservation["photo_id"] == fresh["photo_id"]
+    with pytest.raises(ClientError):
+        store.read(BUCKET, stale["key"])
+
+
+def test_init_rejects_oversized_and_non_image_files(client, auth_headers, backends):
+    resp = client.post(
+        "/api/photos/uploads",
+        json={
+            "project_id": PROJECT_ID,
+            "files": [
+                {"file_name": "big.jpg", "content_type": "image/jpeg", "size": 21 << 20}
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 413
+
+    resp = client.post(
+        "/api/photos/uploads",
+        json={
+            "project_id": PROJECT_ID,
+            "files": [
+                {"file_name": "a.pdf", "content_type": "application/pdf", "size": 9}
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 400
+
+
+def test_finalize_rejects_bytes_that_are_not_an_image(client, auth_headers, backends):
+    store, db = backends
+    data = b"<html>not a photo</html>".ljust(4096, b" ")
+    upload = _init(client, auth_headers, data).get_json()["uploads"][0]
+    store.put_object(
+        Bucket=BUCKET, Key=upload["key"], Body=data, ContentType="image/jpeg"
+    )
+
+    resp = client.post(
+        "/api/photos/uploads/finalize",
+        json={"project_id": PROJECT_ID, "uploads": [upload]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 400
+    with pytest.raises(ClientError):
+        store.read(BUCKET, upload["key"])
+    assert db.rows("photo_upload_reservations") == []
+    assert db.rows("photos") == []
@@ -209,7 +209,7 @@ def test_plan_upload_pdf_converted_to_png_stores_dimensions(client, mock_plan_de
     """POST plan with PDF stores rasterized PNG dimensions (mocked PDF conversion)."""
     png_out = _make_png_bytes(800, 600)
 
-    def mock_rasterize(data, filename_hint="", mime_hint=""):
+    def mock_rasterize(data, filename_hint="", mime_hint="", page=1):
         if data[:4] == b"%PDF" or (filename_hint and "pdf" in filename_hint.lower()):
             return (png_out, 800, 600)
         return rasterize_to_png(data, filename_hint, mime_hint)
@@ -264,3 +264,278 @@ def test_plan_upload_stored_record_has_image_dimensions(client, mock_plan_deps):
     assert stored.get("r2_path", "").endswith(".png")
     uploaded_bytes = mock_plan_deps["uploaded"].get("bytes", b"")
     assert uploaded_bytes[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_plan_upload_async_returns_202_then_job_has_result(
+    client, mock_plan_deps, monkeypatch, tmp_path
+):
+    """async=1 answers 202 with a job id; the job carries the 201 upload body."""
+    import app.routes.projects as projects_routes
+    import app.services.plan_jobs as plan_jobs_module
+
+    monkeypatch.setattr(
+        projects_routes,
+        "require_role",
+        lambda project_id, roles, user_id=None: {"user_id": "user-1", "role": "Owner"},
+    )
+    monkeypatch.setenv("PLAN_JOBS_PATH", str(tmp_path / "jobs.sqlite3"))
+    plan_jobs_module.reset_plan_jobs()
+    monkeypatch.setattr(plan_jobs_module, "_get_executor", lambda: _InlineExecutor())
+
+    resp = client.post(
+        f"/api/v1/projects/{PROJECT_ID}/plan",
+        data={
+            "min_lat": "40.0",
+            "min_lng": "-74.0",
+            "max_lat": "40.1",
+            "max_lng": "-73.9",
+            "async": "1",
+            "file": (io.BytesIO(_make_png_bytes(100, 200)), "plan.png", "image/png"),
+        },
+        headers=AUTH_HEADER,
+    )
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert resp.headers["Location"] == body["status_url"]
+
+    job = client.get(body["status_url"], headers=AUTH_HEADER).get_json()
+    assert job["status"] == "succeeded"
+    assert job["status_code"] == 201
+    assert job["result"]["image_width"] == 100
+    assert mock_plan_deps["stored"]["plan"]["image_height"] == 200
+
+    missing = client.get(
+        f"/api/v1/projects/{PROJECT_ID}/plan/jobs/nope", headers=AUTH_HEADER
+    )
+    assert missing.status_code == 404
+    plan_jobs_module.reset_plan_jobs()
+
+
+def test_plan_job_status_fails_jobs_whose_worker_is_gone(
+    client, monkeypatch, tmp_path
+):
+    """A job left pending by an exited worker, or silent too long, reads as failed."""
+    import subprocess
+    import sys
+
+    import app.routes.projects as projects_routes
+    import app.services.plan_jobs as plan_jobs_module
+
+    monkeypatch.setattr(
+        projects_routes,
+        "require_role",
+        lambda project_id, roles, user_id=None: {"user_id": "user-1", "role": "Owner"},
+    )
+    monkeypatch.setenv("PLAN_JOBS_PATH", str(tmp_path / "jobs.sqlite3"))
+    plan_jobs_module.reset_plan_jobs()
+    store = plan_jobs_module.get_plan_job_store()
+
+    orphan = store.create(PROJECT_ID, "upload")
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    conn = store._connection()
+    conn.execute("UPDATE plan_jobs SET owner_pid = ? WHERE id = ?", (exited.pid, orphan))
+    conn.commit()
+
+    silent = store.create(PROJECT_ID, "upload")
+    store.update(silent, plan_jobs_module.RUNNING)
+    conn.execute("UPDATE plan_jobs SET heartbeat_at = 0 WHERE id = ?", (silent,))
+    conn.commit()
+
+    alive = store.create(PROJECT_ID, "upload")
+    store.update(alive, plan_jobs_module.RUNNING)
+
+    for job_id in (orphan, silent):
+        job = client.get(
+            f"/api/v1/projects/{PROJECT_ID}/plan/jobs/{job_id}", headers=AUTH_HEADER
+        ).get_json()
+        assert job["status"] == "failed"
+        assert job["status_code"] == 500
+        assert job["result"]["error"] == "job_lost"
+
+    job = client.get(
+        f"/api/v1/projects/{PROJECT_ID}/plan/jobs/{alive}", headers=AUTH_HEADER
+    ).get_json()
+    assert job["status"] == "running"
+    plan_jobs_module.reset_plan_jobs()
+
+
+def _make_pdf_bytes(page_sizes):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for width, height in page_sizes:
+        doc.new_page(width=width, height=height)
+    return doc.tobytes()
+
+
+def test_multi_page_pdf_indexes_sheets_and_renders_others_on_demand(
+    client, mock_plan_deps, monkeypatch
+):
+    """A multi-page PDF is stored once with thumbnails; other sheets render on first GET."""
+    import app.routes.projects as projects_routes
+
+    monkeypatch.setattr(
+        projects_routes,
+        "require_role",
+        lambda project_id, roles, user_id=None: {"user_id": "user-1", "role": "Owner"},
+    )
+    objects = {}
+
+    def fake_upload_bytes(data, key, content_type=None):
+        objects[key] = data
+        return True
+
+    monkeypatch.setattr(r2_module.r2_client, "upload_bytes", fake_upload_bytes)
+    monkeypatch.setattr(r2_module.r2_client, "file_exists", lambda key: key in objects)
+    monkeypatch.setattr(
+        r2_module.r2_client, "download_bytes", lambda key, byte_range=None: objects.get(key)
+    )
+
+    pdf = _make_pdf_bytes([(288, 216), (432, 288), (216, 288)])
+    resp = client.post(
+        f"/api/v1/projects/{PROJECT_ID}/plan",
+        data={
+            "min_lat": "40.0",
+            "min_lng": "-74.0",
+            "max_lat": "40.1",
+            "max_lng": "-73.9",
+            "page": "2",
+            "file": (io.BytesIO(pdf), "set.pdf", "application/pdf"),
+        },
+        headers=AUTH_HEADER,
+    )
+    assert resp.status_code == 201
+    body = resp.get_json()
+    # 432x288 pt at 150 DPI.
+    assert (body["image_width"], body["image_height"]) == (900, 600)
+    assert body["pages"]["count"] == 3
+    assert body["pages"]["source_page"] == 2
+    assert [sheet["page"] for sheet in body["pages"]["sheets"]] == [1, 2, 3]
+
+    stored = mock_plan_deps["stored"]["plan"]
+    pages_path = stored["pages_path"]
+    assert objects[f"{pages_path}source.pdf"] == pdf
+    assert all(f"{pages_path}{page}/thumb.png" in objects for page in (1, 2, 3))
+    # Only the overview sheet has been rasterized so far.
+    assert not any(key.endswith("/plan.png") for key in objects)
+
+    monkeypatch.setattr(
+        plan_service_module, "get_plan_by_project_id", lambda project_id: stored
+    )
+    resp = client.get(f"/api/v1/projects/{PROJECT_ID}/plan/pages/3", headers=AUTH_HEADER)
+    assert resp.status_code == 200
+    sheet = resp.get_json()
+    assert (sheet["image_width"], sheet["image_height"]) == (450, 600)
+    assert stored["pages"][2]["width"] == 450
+    assert f"{pages_path}3/plan.png" in objects
+
+    overview = client.get(
+        f"/api/v1/projects/{PROJECT_ID}/plan/pages/2", headers=AUTH_HEADER
+    ).get_json()
+    assert overview["image_url"].endswith(stored["r2_path"])
+    missing = client.get(f"/api/v1/projects/{PROJECT_ID}/plan/pages/4", headers=AUTH_HEADER)
+    assert missing.status_code == 404
+
+
+def test_rotated_calibration_stores_corners_and_a_warped_raster(
+    client, mock_plan_deps, monkeypatch
+):
+    """corner_* fields of a rotated calibration are kept and the plan is pre-warped once."""
+    import app.routes.projects as projects_routes
+
+    monkeypatch.setattr(
+        projects_routes,
+        "require_role",
+        lambda project_id, roles, user_id=None: {"user_id": "user-1", "role": "Owner"},
+    )
+    objects = {}
+
+    def fake_upload_bytes(data, key, content_type=None):
+        objects[key] = data
+        return True
+
+    monkeypatch.setattr(r2_module.r2_client, "upload_bytes", fake_upload_bytes)
+    monkeypatch.setattr(r2_module.r2_client, "file_exists", lambda key: key in objects)
+
+    # A 100x200 plan turned 45 degrees: a diamond around (40.0005, -73.9995).
+    corners = {
+        "corner_nw_lat": "40.0010", "corner_nw_lng": "-73.9995",
+        "corner_ne_lat": "40.0005", "corner_ne_lng": "-73.9990",
+        "corner_se_lat": "40.0000", "corner_se_lng": "-73.9995",
+        "corner_sw_lat": "40.0005", "corner_sw_lng": "-74.0000",
+    }
+
+    def upload():
+        return client.post(
+            f"/api/v1/projects/{PROJECT_ID}/plan",
+            data={
+                **corners,
+                "file": (io.BytesIO(_make_png_bytes(100, 200)), "plan.png", "image/png"),
+            },
+            headers=AUTH_HEADER,
+        )
+
+    resp = upload()
+    assert resp.status_code == 201
+    body = resp.get_json()
+    assert (body["min_lat"], body["max_lng"]) == (40.0, -73.999)
+    stored = mock_plan_deps["stored"]["plan"]
+    assert stored["corner_ne_lat"] == 40.0005
+    warped = body["warped"]
+    assert warped["image_url"].endswith(stored["warped_r2_path"])
+    assert (warped["min_lng"], warped["max_lat"]) == (
+        pytest.approx(-74.0),
+        pytest.approx(40.001),
+    )
+    image = Image.open(io.BytesIO(objects[stored["warped_r2_path"]]))
+    assert image.mode == "RGBA"
+    assert image.size == (warped["image_width"], warped["image_height"])
+
+    # The same calibration again reuses the stored warp.
+    monkeypatch.setattr(
+        r2_module.r2_client,
+        "upload_bytes",
+        lambda data, key, content_type=None: not key.startswith(
+            f"projects/{PROJECT_ID}/plans/warped/"
+        ),
+    )
+    assert upload().status_code == 201
+
+    corners["corner_se_lat"] = "40.0020"  # folds the quad over itself
+    resp = upload()
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid_metadata"
+
+
+def test_plan_tile_route_only_signs_tiles_of_the_stored_pyramid(
+    client, mock_plan_deps, monkeypatch
+):
+    import app.routes.projects as projects_routes
+    from app.services import plan_tiler
+
+    monkeypatch.setattr(
+        projects_routes,
+        "require_role",
+        lambda project_id, roles, user_id=None: {"user_id": "user-1", "role": "Viewer"},
+    )
+    tile_url = f"/api/v1/projects/{PROJECT_ID}/plan/tiles"
+
+    resp = client.get(f"{tile_url}/0/0/0.png", headers=AUTH_HEADER)
+    assert resp.status_code == 404
+
+    plan = plan_tiler.tile_metadata(PROJECT_ID, 600, 300)
+    monkeypatch.setattr(
+        plan_service_module, "get_plan_by_project_id", lambda project_id: plan
+    )
+    resp = client.get(f"{tile_url}/2/2/1.png", headers=AUTH_HEADER)
+    assert resp.status_code == 302
+    assert resp.headers["Location"].endswith(f"{plan['tiles_path']}2/2/1.png")
+
+    for z, x, y in [(3, 0, 0), (2, 3, 0), (1, 0, 1), (0, 1, 0)]:
+        resp = client.get(f"{tile_url}/{z}/{x}/{y}.png", headers=AUTH_HEADER)
+        assert resp.status_code == 404, (z, x, y)
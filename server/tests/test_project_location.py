@@ -513,7 +513,7 @@ def test_update_location_service_uses_upsert_not_insert(monkeypatch):
     monkeypatch.setattr(
         supabase_module.supabase_client,
         "update_project",
-        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None: {
+        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None, **location: {
             "id": project_id,
         },
     )
@@ -819,7 +819,7 @@ def test_update_location_forward_and_reverse_produce_identical_db_structure(
     monkeypatch.setattr(
         supabase_module.supabase_client,
         "update_project",
-        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None: (
+        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None, **location: (
             writes.append(("project", {"address": address, "address_coord": address_coord}))
             or {"id": project_id}
         ),
@@ -165,7 +165,7 @@ def test_delete_project_success(client, monkeypatch):
     monkeypatch.setattr(
         supabase_module.supabase_client,
         "update_project",
-        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None: {
+        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None, **location: {
             "id": project_id,
             "show_on_projects": show_on_projects,
         },
@@ -184,7 +184,7 @@ def test_delete_project_not_found(client, monkeypatch):
     monkeypatch.setattr(
         supabase_module.supabase_client,
         "update_project",
-        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None: None,
+        lambda project_id, name=None, address=None, address_coord=None, show_on_projects=None, **location: None,
     )
     resp = client.delete("/api/v1/projects/proj-1", headers=AUTH_HEADER)
     assert resp.status_code == 404
@@ -256,7 +256,7 @@ def test_create_project_geocode_failure_returns_422_no_db_write(client, monkeypa
     def fake_service(name, owner_id, address=None, lat=None, lng=None):
         return (None, {"error": "No results found", "geocode_error": "no_results"})
 
-    def fake_create(name, owner_id, description=None, address=None, address_coord=None, show_on_projects=None):
+    def fake_create(name, owner_id, description=None, address=None, address_coord=None, show_on_projects=None, **location):
         db_written["flag"] = True
         return {"id": "should-not-happen"}
 
@@ -566,3 +566,148 @@ def test_forward_and_reverse_produce_identical_db_structure(monkeypatch):
     rev_loc = next(w for w in rev_writes if w[0] == "location")[1]
     assert fwd_loc["lat"] == rev_loc["lat"]
     assert fwd_loc["lng"] == rev_loc["lng"]
+
+
+# ---------------------------------------------------------------------------
+# Busy geocoder → 202 with the location resolved in the background
+# ---------------------------------------------------------------------------
+
+
+class _InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_create_project_busy_geocoder_returns_202_and_resolves_later(
+    client, monkeypatch
+):
+    answers = [
+        {"type": "deadline_exceeded", "message": "busy"},
+        {"address": "123 Main St, Springfield", "lat": 37.77, "lng": -122.41},
+    ]
+    writes = {}
+
+    monkeypatch.setattr(
+        project_svc_module, "forward_geocode", lambda address: answers.pop(0)
+    )
+    monkeypatch.setattr(
+        project_svc_module, "_get_location_executor", lambda: _InlineExecutor()
+    )
+
+    def fake_create(name, owner_id, description=None, address=None, address_coord=None, show_on_projects=None, **location):
+        writes["created"] = {"address": address, "address_coord": address_coord}
+        return {"id": "proj-busy", "name": name, "address": address}
+
+    monkeypatch.setattr(supabase_module.supabase_client, "create_project", fake_create)
+    monkeypatch.setattr(
+        supabase_module.supabase_client,
+        "update_project",
+        lambda project_id, **fields: writes.setdefault("updated", fields),
+    )
+    monkeypatch.setattr(
+        supabase_module.supabase_client,
+        "upsert_project_location",
+        lambda project_id, lat, lng: writes.setdefault("location", (lat, lng)),
+    )
+    monkeypatch.setattr(
+        supabase_module.supabase_client,
+        "add_project_member",
+        lambda project_id, user_id, role: {},
+    )
+
+    resp = client.post(
+        "/api/v1/projects",
+        json={"name": "Busy", "address": "123 Main St"},
+        headers=AUTH_HEADER,
+    )
+
+    assert resp.status_code == 202
+    assert resp.get_json()["location_status"] == "pending"
+    assert writes["created"] == {"address": "123 Main St", "address_coord": None}
+    assert writes["updated"]["address_coord"] == {"lat": 37.77, "lng": -122.41}
+    assert writes["location"] == (37.77, -122.41)
+
+
+def test_busy_geocoder_without_async_fallback_returns_503(client, monkeypatch):
+    monkeypatch.setenv("GEOCODE_ASYNC_FALLBACK", "off")
+    monkeypatch.setattr(
+        project_svc_module,
+        "forward_geocode",
+        lambda address: {"type": "deadline_exceeded", "message": "busy"},
+    )
+
+    resp = client.post(
+        "/api/v1/projects",
+        json={"name": "Busy", "address": "123 Main St"},
+        headers=AUTH_HEADER,
+    )
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "5"
+    assert resp.get_json()["geocode_error"] == "deadline_exceeded"
+
+
+class _QueuedExecutor:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def run_next(self):
+        fn, args = self.jobs.pop(0)
+        fn(*args)
+
+
+def test_deferred_location_records_status_and_yields_to_newer_updates(monkeypatch):
+    from app.services.offline.postgrest import FakePostgrestClient
+
+    fake_db = FakePostgrestClient()
+    monkeypatch.setattr(supabase_module.supabase_client, "client", fake_db)
+    monkeypatch.setattr(supabase_module.supabase_client, "ensure_user_exists", lambda uid: None)
+    monkeypatch.setattr(
+        supabase_module.supabase_client, "upsert_project_location", lambda **kw: None
+    )
+    monkeypatch.setattr(project_svc_module, "_sync_location", lambda pid, geo: None)
+    answers = {
+        "Old St": [
+            {"type": "deadline_exceeded", "message": "busy"},
+            {"address": "1 Old St", "lat": 1.0, "lng": 1.0},
+        ],
+        "New St": [{"address": "2 New St", "lat": 2.0, "lng": 2.0}],
+        "Nowhere": [
+            {"type": "deadline_exceeded", "message": "busy"},
+            {"type": "not_found", "message": "no match"},
+        ],
+    }
+    monkeypatch.setattr(
+        project_svc_module, "forward_geocode", lambda address: answers[address].pop(0)
+    )
+    deferred = _QueuedExecutor()
+    monkeypatch.setattr(project_svc_module, "_get_location_executor", lambda: deferred)
+
+    def stored():
+        supabase_module.supabase_client._forget("project", project["id"])
+        return supabase_module.supabase_client.get_project(project["id"])
+
+    project, err = project_svc_module.create_project_with_location(
+        "Site", "user-1", address="Old St"
+    )
+    assert err is None and project["location_status"] == "pending"
+    assert stored()["location_status"] == "pending"
+
+    # A newer address lands before the slow resolution of the old one.
+    updated, err = project_svc_module.update_project_with_location(
+        project["id"], address="New St"
+    )
+    assert err is None and updated["location_status"] == "resolved"
+    deferred.run_next()
+    assert stored()["address"] == "2 New St"
+    assert stored()["location_status"] == "resolved"
+
+    project_svc_module.update_project_with_location(project["id"], address="Nowhere")
+    assert stored()["location_status"] == "pending"
+    deferred.run_next()
+    assert stored()["location_status"] == "failed"
+    assert stored()["address"] == "2 New St"
+    fake_db.close()
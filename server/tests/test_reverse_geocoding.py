@@ -126,3 +126,30 @@ def test_existing_location_not_regeocoded(monkeypatch):
     assert loc_id == "loc-existing"
     assert calls["reverse"] == 0
 
+
+
+def test_new_location_geocode_is_bounded_by_the_upload_deadline(monkeypatch):
+    import app.services.storage.supabase_client as supabase_client_module
+    from app.services.geocoding import client as geocoding_client
+    from app.services.offline.postgrest import FakePostgrestClient
+
+    db = FakePostgrestClient()
+    deadlines = []
+
+    def _busy_geocoder(lat, lon):
+        # A saturated rate-limit queue: the call gives up at the deadline.
+        deadlines.append(geocoding_client._deadline.get())
+        return {"city": None, "state": None, "country": None}
+
+    sb = supabase_client_module.SupabaseClient()
+    sb.client = db
+    sb._location_geocode_columns = True
+    monkeypatch.setattr(supabase_client_module, "reverse_geocode", _busy_geocoder)
+
+    loc_id = sb.get_or_create_location(1.0, 2.0, project_id="proj-1")
+
+    assert deadlines and deadlines[0] is not None
+    (row,) = db.rows("locations")
+    assert row["id"] == loc_id
+    assert row.get("city") is None
+    db.close()
@@ -0,0 +1,120 @@
+"""Unit tests for the resumable location geocode backfill."""
+
+import time
+
+import pytest
+
+from app.services.offline.postgrest import FakePostgrestClient
+from app.services.storage.schema_capabilities import SchemaCapabilities, schema_probe
+from scripts import backfill_location_geocodes as script
+from scripts.backfill_location_geocodes import Checkpoint, backfill
+
+_PLACES = {
+    (37.86, -122.49): {"city": "Sausalito", "state": "CA", "country": "US"},
+    (48.86, 2.35): {"city": "Paris", "state": "IDF", "country": "France"},
+}
+
+
+@pytest.fixture
+def db():
+    client = FakePostgrestClient()
+    client.seed(
+        "locations",
+        [
+            {"id": "a1", "latitude": 37.8591, "longitude": -122.4853},
+            {"id": "a2", "latitude": 48.8566, "longitude": 2.3522},
+            {"id": "a3", "latitude": 37.8612, "longitude": -122.4871},
+            {"id": "a4", "latitude": 0.0, "longitude": -30.0},
+            {"id": "a5", "latitude": 48.8584, "longitude": 2.3545},
+            {
+                "id": "a6",
+                "latitude": 37.86,
+                "longitude": -122.49,
+                "city": "Sausalito",
+                "state": "CA",
+                "country": "US",
+            },
+        ],
+    )
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def geocode():
+    calls = []
+
+    def _geocode(lat, lng, priority):
+        calls.append((lat, lng))
+        return _PLACES.get((lat, lng), {"city": None, "state": None, "country": None})
+
+    _geocode.calls = calls
+    return _geocode
+
+
+def test_geocodes_each_spot_once_and_writes_by_place(db, geocode, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "progress.json"))
+
+    state = backfill(
+        db, checkpoint, batch_size=2, geocode=geocode, report=lambda _: None
+    )
+
+    assert sorted(geocode.calls) == sorted(list(_PLACES) + [(0.0, -30.0)])
+    assert (state["scanned"], state["updated"], state["unresolved"]) == (5, 4, 1)
+    rows = {row["id"]: row for row in db.rows("locations")}
+    assert rows["a3"]["city"] == "Sausalito"
+    assert rows["a5"]["country"] == "France"
+    assert rows["a4"].get("city") is None
+    # A finished run leaves no checkpoint behind.
+    assert not (tmp_path / "progress.json").exists()
+
+
+def test_resumes_from_the_checkpoint(db, geocode, tmp_path):
+    path = str(tmp_path / "progress.json")
+    report = []
+
+    first = backfill(
+        db,
+        Checkpoint(path),
+        batch_size=2,
+        max_rows=2,
+        geocode=geocode,
+        report=report.append,
+    )
+    assert (first["last_id"], first["scanned"]) == ("a2", 2)
+    assert "ETA" in report[1]
+
+    resumed = Checkpoint(path).load()
+    assert resumed.state["last_id"] == "a2"
+    state = backfill(db, resumed, batch_size=2, geocode=geocode, report=report.append)
+
+    assert state["scanned"] == 5
+    assert state["updated"] == 4
+    assert report[-1].startswith("scanned 5")
+
+
+@pytest.mark.parametrize(
+    "columns, exit_code",
+    [(("id", "city", "state", "country"), 0), (("id",), 1)],
+)
+def test_main_checks_columns_against_a_warmed_probe(
+    db, geocode, tmp_path, monkeypatch, columns, exit_code
+):
+    from app.services.storage.supabase_client import supabase_client
+
+    warmed = []
+
+    def _warm(background=True):
+        warmed.append(background)
+        schema_probe.set(SchemaCapabilities({"locations": columns}, time.time()))
+
+    monkeypatch.setattr(supabase_client, "client", db)
+    monkeypatch.setattr(supabase_client, "_location_geocode_columns", None)
+    monkeypatch.setattr(schema_probe, "_capabilities", None)
+    monkeypatch.setattr(schema_probe, "warm", _warm)
+    monkeypatch.setattr(script, "reverse_geocode", geocode)
+
+    assert script.main(["--checkpoint", str(tmp_path / "progress.json")]) == exit_code
+    assert warmed == [False]
+    rows = {row["id"]: row for row in db.rows("locations")}
+    assert (rows["a5"].get("country") == "France") is (exit_code == 0)
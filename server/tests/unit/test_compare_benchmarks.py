@@ -0,0 +1,47 @@
+"""Unit tests for the benchmark regression check."""
+
+import json
+
+from scripts.compare_benchmarks import compare, main
+
+
+def _report(path, medians):
+    path.write_text(
+        json.dumps(
+            {
+                "machine_info": {"python_version": "3.11"},
+                "benchmarks": [
+                    {"name": name, "fullname": name, "stats": {"median": value}}
+                    for name, value in medians.items()
+                ],
+            }
+        )
+    )
+    return str(path)
+
+
+def test_compare_classifies_changes_against_threshold():
+    rows = compare(
+        {"slow": 1.0, "fast": 1.0, "same": 1.0, "gone": 1.0},
+        {"slow": 1.2, "fast": 0.5, "same": 1.05, "added": 1.0},
+        threshold=0.10,
+    )
+
+    assert {name: status for status, name, *_ in rows} == {
+        "added": "new",
+        "fast": "improved",
+        "gone": "missing",
+        "same": "ok",
+        "slow": "REGRESSED",
+    }
+
+
+def test_main_exits_nonzero_only_on_regression(tmp_path, capsys):
+    baseline = _report(tmp_path / "base.json", {"serialize": 0.010})
+    steady = _report(tmp_path / "steady.json", {"serialize": 0.0105})
+    slower = _report(tmp_path / "slower.json", {"serialize": 0.013})
+
+    assert main([baseline, steady]) == 0
+    assert main([baseline, slower, "--threshold", "0.5"]) == 0
+    assert main([baseline, slower]) == 1
+    assert "regressed by more than 10%" in capsys.readouterr().out
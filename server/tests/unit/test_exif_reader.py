@@ -0,0 +1,105 @@
+"""Unit tests for reading EXIF from photo headers without decoding them."""
+
+import io
+import struct
+
+import pytest
+from PIL import ExifTags, Image
+
+from app.routes.upload import _extract_exif_data
+from app.services.exif_reader import HEADER_BYTES, read_exif
+
+
+def _exif(with_gps=True):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Phone"
+    exif[ExifTags.Base.DateTime] = "2024:01:02 03:04:05"
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    exif_ifd[ExifTags.Base.DateTimeOriginal] = "2024:05:06 07:08:09"
+    exif_ifd[ExifTags.Base.OffsetTimeOriginal] = "+02:00"
+    if with_gps:
+        exif[ExifTags.IFD.GPSInfo] = {
+            ExifTags.GPS.GPSLatitudeRef: "S",
+            ExifTags.GPS.GPSLatitude: (33.0, 51.0, 54.5),
+            ExifTags.GPS.GPSLongitudeRef: "E",
+            ExifTags.GPS.GPSLongitude: (151.0, 12.0, 36.25),
+            ExifTags.GPS.GPSAltitudeRef: b"\x01",
+            ExifTags.GPS.GPSAltitude: 12.5,
+            ExifTags.GPS.GPSHPositioningError: 4.0,
+        }
+    return exif
+
+
+def _encode(fmt, exif=None, size=(64, 48)):
+    image = Image.effect_noise(size, 40).convert("RGB")
+    buffer = io.BytesIO()
+    if exif is None:
+        image.save(buffer, format=fmt)
+    else:
+        image.save(buffer, format=fmt, exif=exif)
+    return buffer.getvalue()
+
+
+def _pillow_exif(data):
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        return image._getexif()
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG", "WEBP"])
+def test_read_exif_matches_pillow(fmt):
+    data = _encode(fmt, _exif())
+
+    assert read_exif(data) == _pillow_exif(data)
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG", "WEBP"])
+def test_canonical_metadata_matches_pillow_path(fmt, monkeypatch):
+    import app.routes.upload as upload_module
+
+    data = _encode(fmt, _exif())
+    header = _extract_exif_data(None, data)
+    monkeypatch.setattr(upload_module, "read_exif", lambda data: None)
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        decoded = _extract_exif_data(image, data)
+
+    assert header == decoded
+    exif_data, captured_at, gps = header
+    assert captured_at == "2024-05-06T07:08:09+02:00"
+    assert gps["lat"] == pytest.approx(-(33 + 51 / 60 + 54.5 / 3600))
+    assert gps["lon"] == pytest.approx(151 + 12 / 60 + 36.25 / 3600)
+    assert exif_data["gps"]["hpe_m"] == 4.0
+
+
+def test_jpeg_prefix_is_enough():
+    data = _encode("JPEG", _exif(), size=(1600, 1200))
+    assert len(data) > HEADER_BYTES
+
+    assert read_exif(data[:HEADER_BYTES]) == read_exif(data)
+
+
+def test_files_without_exif_and_unknown_formats():
+    assert read_exif(_encode("JPEG")) == {}
+    assert read_exif(_encode("PNG")) == {}
+    assert read_exif(_encode("GIF")) is None
+    assert read_exif(b"\xff\xd8\xff\xe1\x00") is None  # truncated segment
+
+
+def test_big_endian_tiff():
+    gps_ifd = struct.pack(">H", 2)
+    gps_ifd += struct.pack(">HHL2s2x", 1, 2, 2, b"N\x00")
+    gps_ifd += struct.pack(">HHLL", 2, 5, 3, 8 + 18 + 2 + 24 + 4)
+    gps_ifd += struct.pack(">L", 0)
+    rationals = struct.pack(">6L", 10, 1, 30, 1, 45, 2)
+    ifd0 = struct.pack(">HHHLLL", 1, 34853, 4, 1, 8 + 18, 0)
+    tiff = b"MM\x00*" + struct.pack(">L", 8) + ifd0 + gps_ifd + rationals
+    segment = b"Exif\x00\x00" + tiff
+    data = (
+        b"\xff\xd8\xff\xe1"
+        + struct.pack(">H", len(segment) + 2)
+        + segment
+        + b"\xff\xda"
+    )
+
+    assert read_exif(data) == {34853: {1: "N", 2: (10.0, 30.0, 22.5)}}
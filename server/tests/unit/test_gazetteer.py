@@ -0,0 +1,111 @@
+"""Unit tests for the offline gazetteer and its use by the reverse geocoder."""
+
+import math
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.geocoding import gazetteer as gazetteer_module  # noqa: E402
+from app.services.geocoding import reverse_geocoder  # noqa: E402
+from app.services.geocoding.gazetteer import Gazetteer, write_gazetteer  # noqa: E402
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * gazetteer_module.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@pytest.fixture
+def random_gazetteer(tmp_path):
+    rng = random.Random(7)
+    lats = [rng.uniform(-80, 80) for _ in range(2000)]
+    lngs = [rng.uniform(-180, 180) for _ in range(2000)]
+    places = [(f"city{i}", f"state{i % 7}", None) for i in range(2000)]
+    write_gazetteer(str(tmp_path), lats, lngs, places)
+    return Gazetteer(str(tmp_path), max_km=20000), lats, lngs
+
+
+def test_lookup_matches_brute_force_nearest(random_gazetteer):
+    gazetteer, lats, lngs = random_gazetteer
+    rng = random.Random(11)
+    queries = [(rng.uniform(-85, 85), rng.uniform(-180, 180)) for _ in range(200)]
+
+    batch = gazetteer.lookup_many([q[0] for q in queries], [q[1] for q in queries])
+    for (lat, lng), from_batch in zip(queries, batch):
+        distances = [_haversine_km(lat, lng, a, b) for a, b in zip(lats, lngs)]
+        expected = f"city{distances.index(min(distances))}"
+        assert gazetteer.lookup(lat, lng)["city"] == expected
+        assert from_batch["city"] == expected
+
+
+def test_antimeridian_and_max_distance(tmp_path):
+    write_gazetteer(
+        str(tmp_path),
+        [-17.7, -18.1, 51.5],
+        [179.9, 178.4, -0.1],
+        [("Taveuni", None, "Fiji"), ("Suva", "Central", "Fiji"), ("London", "", "UK")],
+    )
+    gazetteer = Gazetteer(str(tmp_path), max_km=30)
+
+    assert gazetteer.lookup(-17.7, -179.95) == {
+        "city": "Taveuni",
+        "state": None,
+        "country": "Fiji",
+    }
+    assert gazetteer.lookup(0.0, -30.0) is None
+    assert gazetteer.lookup_many([51.49, 0.0], [-0.12, -30.0]) == [
+        {"city": "London", "state": None, "country": "UK"},
+        None,
+    ]
+    assert gazetteer.distance_km(-17.7, 179.9) == pytest.approx(0.0, abs=0.01)
+
+
+@pytest.fixture
+def offline_provider(tmp_path, monkeypatch):
+    write_gazetteer(str(tmp_path), [37.8591], [-122.4853], [("Sausalito", "CA", "US")])
+    monkeypatch.setenv("REVERSE_GEOCODER", "offline")
+    monkeypatch.setenv("GAZETTEER_PATH", str(tmp_path))
+    gazetteer_module.reset_gazetteer()
+    yield
+    gazetteer_module.reset_gazetteer()
+
+
+def test_reverse_geocoder_answers_offline_then_falls_back(
+    offline_provider, monkeypatch
+):
+    response = MagicMock()
+    response.json.return_value = {"address": {"city": "Honolulu", "country": "US"}}
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr(reverse_geocoder.requests, "get", get)
+
+    assert reverse_geocoder.reverse_geocode(37.86, -122.49) == {
+        "city": "Sausalito",
+        "state": "CA",
+        "country": "US",
+    }
+    assert get.call_count == 0
+
+    assert reverse_geocoder.reverse_geocode(21.3, -157.8)["city"] == "Honolulu"
+    assert get.call_count == 1
+
+
+def test_missing_gazetteer_falls_back_to_network(tmp_path, monkeypatch):
+    monkeypatch.setenv("REVERSE_GEOCODER", "offline")
+    monkeypatch.setenv("GAZETTEER_PATH", str(tmp_path / "absent"))
+    gazetteer_module.reset_gazetteer()
+    get = MagicMock(side_effect=RuntimeError("offline"))
+    monkeypatch.setattr(reverse_geocoder.requests, "get", get)
+
+    assert reverse_geocoder.reverse_geocode(1.0, 2.0) == {
+        "city": None,
+        "state": None,
+        "country": None,
+    }
+    assert gazetteer_module.get_gazetteer() is None
+    assert get.call_count == 1
+    gazetteer_module.reset_gazetteer()
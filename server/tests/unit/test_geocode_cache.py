@@ -0,0 +1,148 @@
+"""Unit tests for the persistent geocode cache and its use by the geocoders."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.geocoding import cache as cache_module
+from app.services.geocoding import nominatim_client, reverse_geocoder
+from app.services.geocoding.cache import (
+    GeocodeCache,
+    coordinate_precision,
+    normalize_address,
+    reverse_key,
+)
+from app.services.geocoding.client import get_geocoding_client
+
+
+@pytest.fixture
+def geocode_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GEOCODE_CACHE", "on")
+    monkeypatch.setenv("GEOCODE_CACHE_PATH", str(tmp_path / "geocode.sqlite3"))
+    monkeypatch.setattr(get_geocoding_client().limiter, "rate", 0)
+    cache_module.reset_geocode_cache()
+    yield cache_module.get_geocode_cache()
+    cache_module.get_geocode_cache().close()
+    cache_module.reset_geocode_cache()
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def test_keys_normalize_addresses_and_round_per_zoom():
+    assert normalize_address("  1 Main St ,Springfield  ") == normalize_address(
+        "1 MAIN ST, springfield."
+    )
+    assert coordinate_precision(16) == 4
+    assert coordinate_precision(10) == 2
+    assert reverse_key("n", 37.77491, -122.41942, 16) == reverse_key(
+        "n", 37.77488, -122.41938, 16
+    )
+    assert reverse_key("n", 37.7749, -122.4194, 16) != reverse_key(
+        "n", 37.7749, -122.4194, 10
+    )
+
+
+def test_entries_expire_and_negative_results_use_their_own_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = GeocodeCache(
+        str(tmp_path / "c.sqlite3"), ttl_seconds=100, negative_ttl_seconds=10
+    )
+    cache.set("forward", "a", {"address": "A"})
+    cache.set("forward", "b", {"type": "no_results"}, negative=True)
+
+    now[0] += 50
+    assert cache.get("forward", "a").value == {"address": "A"}
+    assert cache.get("forward", "b") is None
+    now[0] += 60
+    assert cache.get("forward", "a") is None
+    assert cache.purge_expired() == 2
+
+    stats = cache.stats()["forward"]
+    assert (stats["hit"], stats["miss"], stats["lookups"]) == (1, 2, 3)
+    assert stats["hit_rate"] == 0.3333
+
+
+def test_writes_purge_expired_rows_once_per_interval(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = GeocodeCache(
+        str(tmp_path / "c.sqlite3"), ttl_seconds=10, purge_interval_seconds=100
+    )
+
+    def keys():
+        conn = cache._connection()
+        return sorted(row[0] for row in conn.execute("SELECT key FROM geocode_cache"))
+
+    cache.set("forward", "old", {"address": "A"})
+    now[0] += 50
+    cache.set("forward", "mid", {"address": "B"})
+    assert keys() == ["mid", "old"]  # expired, but the interval has not passed
+
+    now[0] += 60
+    cache.set("forward", "new", {"address": "C"})
+    assert keys() == ["new"]
+
+
+def test_repeat_forward_lookup_skips_the_network(geocode_cache, monkeypatch):
+    get = MagicMock(
+        return_value=_response(
+            [{"lat": "37.7749", "lon": "-122.4194", "address": {"city": "SF"}}]
+        )
+    )
+    monkeypatch.setattr(nominatim_client.requests, "get", get)
+
+    first = nominatim_client.forward_geocode("San Francisco, CA")
+    second = nominatim_client.forward_geocode("  san francisco ,ca ")
+
+    assert first == second == {"address": "SF", "lat": 37.7749, "lng": -122.4194}
+    assert get.call_count == 1
+    assert geocode_cache.stats()["forward"]["hit"] == 1
+
+
+def test_no_results_are_cached_but_transient_errors_are_not(geocode_cache, monkeypatch):
+    import requests
+
+    get = MagicMock(
+        side_effect=[requests.exceptions.Timeout(), _response({"error": "none"})]
+    )
+    monkeypatch.setattr(nominatim_client.requests, "get", get)
+
+    assert nominatim_client.reverse_geocode(0.5, 0.5)["type"] == "timeout"
+    assert nominatim_client.reverse_geocode(0.5, 0.5)["type"] == "no_results"
+    cached = nominatim_client.reverse_geocode(0.50001, 0.5)
+
+    assert cached["type"] == "no_results"
+    assert "0.50001" in cached["message"]
+    assert get.call_count == 2
+    assert geocode_cache.stats()["reverse"]["negative_hit"] == 1
+
+
+def test_reverse_hits_echo_the_callers_coordinates(geocode_cache, monkeypatch):
+    get = MagicMock(return_value=_response({"address": {"road": "Market St"}}))
+    monkeypatch.setattr(nominatim_client.requests, "get", get)
+
+    nominatim_client.reverse_geocode(37.77491, -122.41942)
+    nearby = nominatim_client.reverse_geocode(37.77488, -122.41938)
+
+    assert nearby == {"address": "Market St", "lat": 37.77488, "lng": -122.41938}
+    assert get.call_count == 1
+
+
+def test_place_lookups_share_entries_across_a_town(geocode_cache, monkeypatch):
+    get = MagicMock(
+        return_value=_response(
+            {"address": {"town": "Sausalito", "state": "CA", "country": "US"}}
+        )
+    )
+    monkeypatch.setattr(reverse_geocoder.requests, "get", get)
+
+    first = reverse_geocoder.reverse_geocode(37.8591, -122.4853)
+    second = reverse_geocoder.reverse_geocode(37.8612, -122.4871)
+
+    assert first == second == {"city": "Sausalito", "state": "CA", "country": "US"}
+    assert get.call_count == 1
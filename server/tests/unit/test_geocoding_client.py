@@ -0,0 +1,170 @@
+"""Unit tests for the shared rate-limited, coalescing geocoding client."""
+
+import multiprocessing
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.geocoding import nominatim_client
+from app.services.geocoding.client import (
+    BACKGROUND,
+    INTERACTIVE,
+    GeocodingClient,
+    RateLimiter,
+    SingleFlight,
+    geocode_deadline,
+)
+
+
+def _take_tokens(path, count, out):
+    limiter = RateLimiter(path, rate=20)
+    for _ in range(count):
+        limiter.acquire()
+        out.put(time.time())
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "bucket")
+    context = multiprocessing.get_context("fork")
+    out = context.Queue()
+    workers = [
+        context.Process(target=_take_tokens, args=(path, 3, out)) for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    stamps = sorted(out.get(timeout=1) for _ in range(9))
+
+    # Nine tokens at 20/s with a burst of one: at least 8 refill intervals.
+    assert stamps[-1] - stamps[0] >= 8 / 20 - 0.02
+    assert min(b - a for a, b in zip(stamps, stamps[1:])) >= 1 / 20 - 0.01
+
+
+def test_interactive_requests_queue_and_background_never_jumps_ahead(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "bucket"), rate=1)
+
+    assert limiter._reserve(INTERACTIVE, 100.0) == (True, 0.0)
+    assert limiter._reserve(INTERACTIVE, 100.2) == (True, pytest.approx(0.8))
+    assert limiter._reserve(INTERACTIVE, 100.2) == (True, pytest.approx(1.8))
+    # Background takes only a slot that is free now, and reserves nothing.
+    assert limiter._reserve(BACKGROUND, 100.5) == (False, pytest.approx(2.5))
+    assert limiter._reserve(BACKGROUND, 103.0) == (True, 0.0)
+
+
+def test_acquire_fails_fast_when_the_queue_outlasts_the_timeout(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "bucket"), rate=0.5)
+    assert limiter.acquire(timeout=0.1)
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=1.0)
+    assert not limiter.acquire(BACKGROUND, timeout=1.0)
+    assert time.monotonic() - started < 0.1
+
+
+def test_deadline_turns_a_long_queue_into_a_distinct_error(tmp_path, monkeypatch):
+    limiter = RateLimiter(str(tmp_path / "bucket"), rate=0.2)
+    client = GeocodingClient("https://nominatim.test", "ua", 5, limiter)
+    monkeypatch.setattr(nominatim_client, "get_geocoding_client", lambda: client)
+    get = MagicMock()
+    monkeypatch.setattr(nominatim_client.requests, "get", get)
+    assert limiter.acquire()  # someone else holds the next five seconds
+
+    with geocode_deadline(1.0):
+        result = nominatim_client.forward_geocode("1 Main St")
+
+    assert result["type"] == "deadline_exceeded"
+    assert get.call_count == 0
+    assert client.stats()["deadline_exceeded"] == 1
+
+
+def test_single_flight_shares_results_and_errors():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        if len(calls) > 1:
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == [{"ok": True}] * 5
+    assert len(calls) == 1
+    assert flights.coalesced == 4
+
+    calls.append(1)
+    with pytest.raises(RuntimeError):
+        flights.do("k", slow)
+
+
+def test_concurrent_identical_lookups_make_one_request(tmp_path, monkeypatch):
+    client = GeocodingClient(
+        "https://nominatim.test", "ua", 5, RateLimiter(str(tmp_path / "b"), rate=0)
+    )
+    monkeypatch.setattr(nominatim_client, "get_geocoding_client", lambda: client)
+
+    def slow_get(*_args, **_kwargs):
+        time.sleep(0.1)
+        response = MagicMock()
+        response.json.return_value = {"address": {"road": "Market St"}}
+        return response
+
+    get = MagicMock(side_effect=slow_get)
+    monkeypatch.setattr(nominatim_client.requests, "get", get)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                nominatim_client.reverse_geocode(37.7749, -122.4194)
+            )
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert [r["address"] for r in results] == ["Market St"] * 4
+    assert get.call_count == 1
+    assert client.stats()["coalesced"] == 3
+
+
+def test_flight_keeps_its_best_lane_until_the_last_such_waiter_leaves(tmp_path):
+    client = GeocodingClient(
+        "https://nominatim.test", "ua", 5, RateLimiter(str(tmp_path / "b"), rate=0)
+    )
+    key = ("reverse", ())
+    lane = client._lane_of(key, BACKGROUND)
+
+    client._join(key, BACKGROUND)
+    client._join(key, INTERACTIVE)
+    client._join(key, INTERACTIVE)
+    assert lane() == INTERACTIVE
+
+    # One interactive joiner gives up (e.g. its deadline passed).
+    client._leave(key, INTERACTIVE)
+    assert lane() == INTERACTIVE
+    client._leave(key, INTERACTIVE)
+    assert lane() == BACKGROUND
+    client._leave(key, BACKGROUND)
+    assert key not in client._lanes
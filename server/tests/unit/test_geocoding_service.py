@@ -9,6 +9,7 @@ from unittest.mock import MagicMock
 import pytest
 import requests as requests_lib
 
+from app.services.geocoding.client import get_geocoding_client
 from app.services.geocoding.nominatim_client import (
     forward_geocode,
     reverse_geocode,
@@ -68,9 +69,7 @@ def _mock_http_error(status_code):
 @pytest.fixture(autouse=True)
 def no_throttle(monkeypatch):
     """Disable rate-limiting sleep so tests run at full speed."""
-    monkeypatch.setattr(
-        "app.services.geocoding.nominatim_client._throttle", lambda: None
-    )
+    monkeypatch.setattr(get_geocoding_client().limiter, "rate", 0)
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,110 @@
+"""Unit tests for backend round-trip instrumentation and /metrics."""
+
+import httpx
+import pytest
+
+from app.services import instrumentation
+from app.services.instrumentation import (
+    InstrumentedTransport,
+    describe_postgrest_request,
+    registry,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_describe_postgrest_request_maps_tables_and_rpcs():
+    base = "https://example.supabase.co"
+    assert describe_postgrest_request("GET", f"{base}/rest/v1/photos?id=eq.1") == (
+        "supabase",
+        "select",
+        "photos",
+    )
+    assert describe_postgrest_request("PATCH", f"{base}/rest/v1/projects") == (
+        "supabase",
+        "update",
+        "projects",
+    )
+    assert describe_postgrest_request("POST", f"{base}/rest/v1/rpc/stats") == (
+        "supabase",
+        "rpc",
+        "stats",
+    )
+    assert describe_postgrest_request("GET", f"{base}/auth/v1/user") == (
+        "supabase",
+        "auth",
+        "user",
+    )
+
+
+def test_instrumented_transport_records_each_round_trip():
+    inner = httpx.MockTransport(
+        lambda req: httpx.Response(404 if "missing" in req.url.path else 200, json=[])
+    )
+    with httpx.Client(transport=InstrumentedTransport(inner)) as client:
+        client.get("https://example.supabase.co/rest/v1/photos")
+        client.get("https://example.supabase.co/rest/v1/photos")
+        client.get("https://example.supabase.co/rest/v1/missing")
+
+    text = registry.render()
+    assert (
+        'swallow_backend_calls_total{service="supabase",operation="select",'
+        'target="photos",route="-"} 2'
+    ) in text
+    assert (
+        'swallow_backend_call_errors_total{service="supabase",operation="select",'
+        'target="missing",route="-"} 1'
+    ) in text
+
+
+def test_timed_counts_exceptions_as_errors():
+    with pytest.raises(RuntimeError):
+        with timed("nominatim", "reverse"):
+            raise RuntimeError("boom")
+
+    text = registry.render()
+    assert (
+        'swallow_backend_call_errors_total{service="nominatim",operation="reverse"'
+        in text
+    )
+
+
+def test_requests_get_server_timing_and_per_route_histograms(app, client, monkeypatch):
+    @app.route("/_instrumented/<item_id>")
+    def _instrumented(item_id):
+        for _ in range(3):
+            instrumentation.record_call("supabase", "select", "photos", 0.002)
+        return {"id": item_id}
+
+    response = client.get("/_instrumented/abc")
+    assert response.status_code == 200
+    header = response.headers["Server-Timing"]
+    assert 'supabase;dur=6.0;desc="3 calls"' in header
+    assert "app;dur=" in header
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.mimetype == "text/plain"
+    body = metrics.get_data(as_text=True)
+    assert (
+        'swallow_backend_calls_per_request_count{service="supabase",'
+        'route="/_instrumented/<item_id>"} 1'
+    ) in body
+    assert (
+        'swallow_backend_calls_total{service="supabase",operation="select",'
+        'target="photos",route="/_instrumented/<item_id>"} 3'
+    ) in body
+
+    remote = client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.5"})
+    assert remote.status_code == 403
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    authed = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert authed.status_code == 200
@@ -0,0 +1,37 @@
+"""Unit tests for the load-test harness bookkeeping."""
+
+import argparse
+
+import pytest
+
+from scripts.load_test import Recorder, parse_mix, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+
+
+def test_recorder_counts_http_and_transport_errors():
+    recorder = Recorder()
+    recorder.record("GET /a", 0.010, 200)
+    recorder.record("GET /a", 0.030, 503)
+    recorder.record("GET /a", 0.020, "ConnectionError")
+
+    route = recorder.summary(elapsed=2.0)["routes"]["GET /a"]
+
+    assert route["count"] == 3
+    assert route["errors"] == 2
+    assert route["rps"] == 1.5
+    assert route["p50_ms"] == pytest.approx(20.0)
+    assert route["statuses"] == {"200": 1, "503": 1, "ConnectionError": 1}
+
+
+def test_parse_mix_drops_zero_weights_and_rejects_unknown_scenarios():
+    assert parse_mix("poll=3,upload=0,zip") == {"poll": 3.0, "zip": 1.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("poll=1,crawl=2")
@@ -0,0 +1,184 @@
+"""Unit tests for the offline PostgREST and S3 stand-ins."""
+
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+from postgrest.exceptions import APIError
+
+from app.services import offline
+from app.services.offline.latency import Latency
+from app.services.offline.object_store import FakeS3Client
+from app.services.offline.postgrest import FakePostgrestClient
+from app.services.storage import supabase_client as supabase_module
+from app.services.storage.r2_client import R2Client
+from app.services.storage.supabase_client import SupabaseClient
+
+
+@pytest.fixture
+def db():
+    client = FakePostgrestClient()
+    yield client
+    client.close()
+
+
+def test_filters_order_paging_and_count(db):
+    db.seed(
+        "photos",
+        [
+            {"project_id": "p1", "captured_at": f"2025-01-0{day}", "file_size": day}
+            for day in range(1, 6)
+        ]
+        + [{"project_id": "p2", "captured_at": "2025-01-09", "file_size": 9}],
+    )
+
+    response = (
+        db.table("photos")
+        .select("captured_at, file_size", count="exact")
+        .eq("project_id", "p1")
+        .gte("captured_at", "2025-01-02")
+        .order("captured_at", desc=True)
+        .limit(2)
+        .offset(1)
+        .execute()
+    )
+
+    assert response.count == 4
+    assert [row["file_size"] for row in response.data] == [4, 3]
+    assert set(response.data[0]) == {"captured_at", "file_size"}
+    assert (
+        db.table("photos")
+        .select("*")
+        .in_("file_size", [1, 9])
+        .execute()
+        .data[1]["project_id"]
+        == "p2"
+    )
+
+
+def test_defaults_single_rows_and_unique_keys(db):
+    project = db.table("projects").insert({"name": "A"}).execute().data[0]
+    assert project["id"] and project["show_on_projects"] is True
+
+    assert (
+        db.table("projects").select("*").eq("id", "nope").maybe_single().execute()
+        is None
+    )
+    with pytest.raises(APIError):
+        db.table("projects").select("*").eq("id", "nope").single().execute()
+
+    link = (
+        db.table("public_links")
+        .insert({"project_id": project["id"], "token": "t"})
+        .select("id, token")
+        .maybe_single()
+        .execute()
+    )
+    assert set(link.data) == {"id", "token"}
+
+    member = {"project_id": project["id"], "user_id": "u1", "role": "Owner"}
+    db.table("project_members").insert(member).execute()
+    with pytest.raises(APIError) as excinfo:
+        db.table("project_members").insert(member).execute()
+    assert excinfo.value.code == "23505"
+
+    db.table("project_members").upsert(
+        dict(member, role="Viewer"), on_conflict="project_id,user_id"
+    ).execute()
+    assert [row["role"] for row in db.rows("project_members")] == ["Viewer"]
+
+
+def test_update_and_delete_return_affected_rows(db):
+    db.seed("photos", [{"caption": "a"}, {"caption": "b"}, {"caption": "c"}])
+
+    updated = (
+        db.table("photos").update({"hidden": True}).in_("caption", ["a", "c"]).execute()
+    )
+    deleted = db.table("photos").delete().eq("hidden", True).execute()
+
+    assert len(updated.data) == 2
+    assert sorted(row["caption"] for row in deleted.data) == ["a", "c"]
+    assert [row["caption"] for row in db.rows("photos")] == ["b"]
+
+
+def test_embedded_listing_through_supabase_client(db, monkeypatch):
+    monkeypatch.setattr(supabase_module.schema_probe, "current", lambda: None)
+    visible, archived = db.seed(
+        "projects",
+        [{"name": "Visible"}, {"name": "Archived", "show_on_projects": False}],
+    )
+    db.seed(
+        "project_members",
+        [
+            {"project_id": visible["id"], "user_id": "u1", "role": "editor"},
+            {"project_id": archived["id"], "user_id": "u1", "role": "owner"},
+        ],
+    )
+    db.seed("project_stats", [{"project_id": visible["id"], "photo_count": 7}])
+    db.seed("project_plans", [{"project_id": visible["id"], "r2_path": "plan.png"}])
+
+    sb = SupabaseClient()
+    sb.client = db
+    projects = sb.list_projects_for_user("u1")
+
+    assert [p["name"] for p in projects] == ["Visible"]
+    assert projects[0]["role"] == "Editor"
+    assert projects[0]["photo_count"] == 7
+    assert projects[0]["has_plan"] is True
+
+
+def test_object_store_ranges_listing_and_missing_keys():
+    store = FakeS3Client()
+    store.upload_fileobj(
+        io.BytesIO(b"0123456789"), "bucket", "a/1.bin", ExtraArgs={"ContentType": "x/y"}
+    )
+    store.put_object(Bucket="bucket", Key="a/2.bin", Body=b"zz")
+
+    assert store.head_object(Bucket="bucket", Key="a/1.bin")["ContentType"] == "x/y"
+    ranged = store.get_object(Bucket="bucket", Key="a/1.bin", Range="bytes=2-4")
+    assert ranged["Body"].read() == b"234"
+    assert ranged["ContentRange"] == "bytes 2-4/10"
+    listing = store.list_objects_v2(Bucket="bucket", Prefix="a/", MaxKeys=1)
+    assert listing["IsTruncated"] and listing["Contents"][0]["Key"] == "a/1.bin"
+
+    with pytest.raises(ClientError) as excinfo:
+        store.head_object(Bucket="bucket", Key="missing")
+    assert excinfo.value.response["Error"]["Code"] == "404"
+
+
+def test_object_store_shares_objects_through_a_directory(tmp_path):
+    FakeS3Client(root=str(tmp_path)).put_object(Bucket="b", Key="k", Body=b"data")
+
+    other_worker = FakeS3Client(root=str(tmp_path))
+    assert other_worker.get_object(Bucket="b", Key="k")["Body"].read() == b"data"
+    assert other_worker.list_objects_v2(Bucket="b")["KeyCount"] == 1
+
+
+def test_r2_client_uses_offline_store_when_enabled(monkeypatch):
+    monkeypatch.setenv("OFFLINE_BACKENDS", "1")
+    monkeypatch.setenv("OFFLINE_R2_URL_BASE", "http://localhost:9999/offline/r2")
+    offline.reset_offline_backends()
+    try:
+        client = R2Client()
+        assert client.upload_bytes(b"abc", "projects/p/photo.jpg", "image/jpeg")
+        assert client.get_file_size("projects/p/photo.jpg") == 3
+        assert client.file_exists("projects/p/other.jpg") is False
+        assert client.resolve_url("projects/p/photo.jpg") == (
+            "http://localhost:9999/offline/r2/offline/projects/p/photo.jpg"
+        )
+    finally:
+        offline.reset_offline_backends()
+
+
+def test_latency_spec_parsing_and_injection(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("app.services.offline.latency.time.sleep", sleeps.append)
+
+    assert Latency.parse("").enabled is False
+    assert Latency.parse("bogus").enabled is False
+    latency = Latency.parse("20:5")
+    assert (latency.base_ms, latency.jitter_ms) == (20.0, 5.0)
+
+    db = FakePostgrestClient(latency=Latency(10))
+    db.table("photos").select("*").execute()
+    assert sleeps == [0.01]
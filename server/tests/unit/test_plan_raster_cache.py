@@ -0,0 +1,88 @@
+"""Unit tests for the content-addressed plan raster cache."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.services import offline
+from app.services import plan_raster_cache
+from app.services.plan_raster_cache import PlanRasterCache, raster_cache_key
+from app.services.storage.r2_client import R2Client
+
+
+def _raster(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), color=(width % 256, 0, 0)).save(buf, "PNG")
+    return buf.getvalue(), width, height
+
+
+def test_key_covers_content_and_settings(monkeypatch):
+    monkeypatch.delenv("PLAN_RASTER_ENCODING", raising=False)
+    key = raster_cache_key(b"%PDF-1.7 plan")
+
+    assert key == raster_cache_key(b"%PDF-1.7 plan")
+    assert key != raster_cache_key(b"%PDF-1.7 other plan")
+    monkeypatch.setenv("PLAN_RASTER_ENCODING", "webp-lossless")
+    assert key != raster_cache_key(b"%PDF-1.7 plan")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    first, second, third = _raster(10, 10), _raster(20, 20), _raster(30, 30)
+    budget = len(first[0]) + len(second[0]) + len(third[0]) - 1
+    cache = PlanRasterCache(memory_bytes=budget)
+
+    cache.put("a", first)
+    cache.put("b", second)
+    assert cache.get("a") == first  # "b" is now the oldest
+    cache.put("c", third)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == first
+    assert cache.get("c") == third
+    assert cache.stats()["memory"] == 3
+
+
+def test_disk_tier_is_shared_between_processes(tmp_path):
+    raster = _raster(64, 32)
+    writer = PlanRasterCache(
+        1 << 20, plan_raster_cache._DiskStore(str(tmp_path), 1 << 20)
+    )
+    writer.put("ab" * 32, raster)
+
+    reader = PlanRasterCache(
+        1 << 20, plan_raster_cache._DiskStore(str(tmp_path), 1 << 20)
+    )
+    assert reader.get("ab" * 32) == raster
+    assert reader.stats()["shared"] == 1
+    assert reader.get("ab" * 32) == raster
+    assert reader.stats()["memory"] == 1
+
+
+def test_disk_tier_prunes_oldest_past_budget(tmp_path):
+    small = _raster(8, 8)
+    store = plan_raster_cache._DiskStore(str(tmp_path), len(small[0]) * 2)
+    for name in ("aa1", "aa2", "aa3"):
+        store.put(name, small[0])
+
+    remaining = [name for name in ("aa1", "aa2", "aa3") if store.get(name)]
+    assert len(remaining) == 2
+    assert "aa3" in remaining
+
+
+@pytest.fixture
+def offline_r2(monkeypatch):
+    monkeypatch.setenv("OFFLINE_BACKENDS", "1")
+    offline.reset_offline_backends()
+    yield R2Client()
+    offline.reset_offline_backends()
+
+
+def test_r2_tier_round_trip(offline_r2):
+    raster = _raster(40, 20)
+    PlanRasterCache(0, plan_raster_cache._R2Store(offline_r2)).put("k", raster)
+
+    assert offline_r2.file_exists("cache/plan-rasters/k")
+    fresh = PlanRasterCache(1 << 20, plan_raster_cache._R2Store(offline_r2))
+    assert fresh.get("k") == raster
+    assert fresh.get("missing") is None
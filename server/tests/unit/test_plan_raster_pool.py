@@ -0,0 +1,90 @@
+"""Unit tests for isolated plan rasterization (limits and result streaming)."""
+
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from app.services import plan_raster_pool
+from app.services.plan_rasterizer import RasterizeError, rasterize_to_png
+
+
+@pytest.fixture(autouse=True)
+def fork_workers(monkeypatch):
+    # Test jobs live in this module; fork lets the child run them without import.
+    monkeypatch.setenv("PLAN_RASTER_START_METHOD", "fork")
+    plan_raster_pool.reset_plan_raster_pool()
+    yield
+    plan_raster_pool.reset_plan_raster_pool()
+
+
+def _sleepy_job(seconds):
+    yield ("started",)
+    time.sleep(seconds)
+    yield ("finished",)
+
+
+def _greedy_job(megabytes):
+    hog = bytearray(megabytes * 1024 * 1024)
+    for offset in range(0, len(hog), 4096):
+        hog[offset] = 1
+    time.sleep(10)
+    yield ("survived",)
+
+
+def _crashing_job():
+    os._exit(3)
+    yield  # pragma: no cover
+
+
+def test_rasterize_plan_matches_in_process_output():
+    buf = io.BytesIO()
+    Image.new("RGB", (700, 300), color=(20, 40, 60)).save(buf, format="PNG")
+    data = buf.getvalue()
+
+    result = plan_raster_pool.rasterize_plan(data, "plan.png", "image/png", True)
+
+    assert (result.png, result.width, result.height) == rasterize_to_png(
+        data, "plan.png", "image/png"
+    )
+    width, height, stream = result.tiles
+    tiles = list(stream)
+    assert (width, height) == (700, 300)
+    # 3x2 + 2x1 + 1x1 tiles, full-resolution level first.
+    assert tiles[0][:3] == (2, 0, 0)
+    assert len(tiles) == 9
+
+
+def test_timeout_kills_the_worker():
+    started = time.monotonic()
+    with pytest.raises(RasterizeError, match="timed out"):
+        list(plan_raster_pool.run_isolated(_sleepy_job, (30,), timeout=0.5))
+    assert time.monotonic() - started < 5
+
+
+def test_messages_stream_before_the_job_finishes():
+    messages = plan_raster_pool.run_isolated(_sleepy_job, (30,), timeout=10)
+    started = time.monotonic()
+
+    assert next(messages) == ("started",)
+    messages.close()  # kills the worker and frees its slot
+
+    assert time.monotonic() - started < 5
+    assert plan_raster_pool._get_slots().acquire(blocking=False)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_memory_limit_kills_the_worker():
+    with pytest.raises(RasterizeError, match="more memory"):
+        list(
+            plan_raster_pool.run_isolated(
+                _greedy_job, (256,), timeout=20, max_rss_bytes=96 * 1024 * 1024
+            )
+        )
+
+
+def test_worker_crash_is_reported():
+    with pytest.raises(RasterizeError, match="exited unexpectedly"):
+        list(plan_raster_pool.run_isolated(_crashing_job, (), timeout=10))
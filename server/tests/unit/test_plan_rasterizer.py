@@ -6,7 +6,10 @@ import pytest
 from PIL import Image
 
 from app.services.plan_rasterizer import (
+    ENCODING_PRESETS,
     RasterizeError,
+    pdf_page_index,
+    raster_format,
     rasterize_to_png,
 )
 
@@ -89,3 +92,51 @@ def test_rasterize_pdf_invalid_raises():
         rasterize_to_png(b"%PDF-1.4 invalid", filename_hint="plan.pdf")
     msg = exc_info.value.message
     assert "PDF" in msg or "Invalid" in msg or "corrupted" in msg.lower()
+
+
+@pytest.mark.parametrize("preset", sorted(ENCODING_PRESETS))
+def test_encoding_presets_decode_to_the_same_plan(preset, monkeypatch):
+    """Every preset yields a decodable raster; lossless ones are pixel-exact."""
+    monkeypatch.setenv("PLAN_RASTER_ENCODING", preset)
+    img = Image.new("RGB", (64, 32), color=(255, 255, 255))
+    for x in range(0, 64, 4):
+        img.putpixel((x, 10), (x * 4, 0, 0))
+    src = io.BytesIO()
+    img.save(src, format="PNG")
+
+    out, w, h = rasterize_to_png(src.getvalue(), filename_hint="plan.png")
+
+    ext, mime = raster_format(out)
+    assert ext == ("webp" if preset.startswith("webp") else "png")
+    assert mime == f"image/{ext}"
+    decoded = Image.open(io.BytesIO(out)).convert("RGB")
+    assert (w, h) == decoded.size == (64, 32)
+    if preset != "png-palette":
+        assert decoded.tobytes() == img.tobytes()
+
+
+def test_pdf_page_index_predicts_each_sheet_raster():
+    """The one-pass page index matches the size of every page's full raster."""
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for width, height in [(612.3, 792.1), (2448, 1584), (300, 200)]:
+        doc.new_page(width=width, height=height)
+    doc[2].set_rotation(90)
+    pdf = doc.tobytes()
+
+    index = pdf_page_index(pdf)
+
+    assert [info["page"] for info, _ in index] == [1, 2, 3]
+    for info, thumbnail in index:
+        _, w, h = rasterize_to_png(pdf, filename_hint="set.pdf", page=info["page"])
+        assert (info["width"], info["height"]) == (w, h)
+        thumb = Image.open(io.BytesIO(thumbnail))
+        assert thumb.size == (info["thumb_width"], info["thumb_height"])
+        assert max(thumb.size) <= 384
+    # 2448 pt at 150 DPI is 5100 px: capped to the 4096 px long edge.
+    assert index[1][0]["width"] == 4096
+    # Rotated landscape page renders portrait.
+    assert index[2][0]["width"] < index[2][0]["height"]
+
+    with pytest.raises(RasterizeError):
+        rasterize_to_png(pdf, filename_hint="set.pdf", page=4)
@@ -0,0 +1,106 @@
+"""Unit tests for plan tile pyramids (geometry, upload, and cleanup)."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.services import offline
+from app.services import plan_tiler
+from app.services.storage.r2_client import R2Client
+
+
+def _tile_size(png):
+    return Image.open(io.BytesIO(png)).size
+
+
+def test_pyramid_levels_and_edge_tiles():
+    image = Image.new("RGB", (600, 300), color=(200, 10, 10))
+
+    tiles = {
+        (z, x, y): _tile_size(png) for z, x, y, png in plan_tiler.iter_tiles(image)
+    }
+
+    assert plan_tiler.max_zoom_for(600, 300) == 2
+    # z=2: 600x300 -> 3x2 tiles; z=1: 300x150 -> 2x1; z=0: 150x75 -> 1x1.
+    assert sorted(k for k in tiles if k[0] == 2) == [
+        (2, x, y) for x in range(3) for y in range(2)
+    ]
+    assert tiles[(2, 0, 0)] == (256, 256)
+    assert tiles[(2, 2, 1)] == (600 - 512, 300 - 256)
+    assert tiles[(1, 1, 0)] == (300 - 256, 150)
+    assert tiles[(0, 0, 0)] == (150, 75)
+    assert len(tiles) == 6 + 2 + 1
+
+
+def test_has_tile_matches_the_pyramid():
+    image = Image.new("RGB", (600, 300))
+    plan = plan_tiler.tile_metadata("p", 600, 300)
+    expected = {(z, x, y) for z, x, y, _ in plan_tiler.iter_tiles(image)}
+
+    candidates = [
+        (z, x, y) for z in range(-1, 4) for x in range(-1, 4) for y in range(-1, 3)
+    ]
+    assert {c for c in candidates if plan_tiler.has_tile(plan, *c)} == expected
+    assert not plan_tiler.has_tile(dict(plan, tiles_path=None), 0, 0, 0)
+
+
+def test_small_plan_is_a_single_tile():
+    image = Image.new("RGBA", (200, 120))
+    assert [(z, x, y) for z, x, y, _ in plan_tiler.iter_tiles(image)] == [(0, 0, 0)]
+
+
+def test_render_tile_source_is_sharper_than_the_overview(monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page(width=2000, height=1000)  # points; 4166 px at 150 DPI
+    pdf = doc.tobytes()
+    monkeypatch.setenv("PLAN_TILE_DPI", "300")
+    monkeypatch.setenv("PLAN_TILE_MAX_EDGE", "6000")
+
+    source = plan_tiler.render_tile_source(pdf, filename_hint="plan.pdf")
+
+    # Capped by PLAN_TILE_MAX_EDGE (PyMuPDF may round up a pixel).
+    assert source.size == (pytest.approx(6000, abs=1), pytest.approx(3000, abs=1))
+
+
+@pytest.fixture
+def offline_r2(monkeypatch):
+    monkeypatch.setenv("OFFLINE_BACKENDS", "1")
+    offline.reset_offline_backends()
+    yield R2Client()
+    offline.reset_offline_backends()
+
+
+def test_upload_tiles_and_prune_stale_ones(offline_r2):
+    project_id = "p1"
+    big = Image.new("RGB", (1024, 512))
+    tiles, keys = plan_tiler.upload_tiles(
+        project_id, 1024, 512, plan_tiler.iter_tiles(big), offline_r2
+    )
+
+    assert tiles == {
+        "tiles_path": "projects/p1/plans/tiles/",
+        "tile_size": 256,
+        "tile_max_zoom": 2,
+        "tile_width": 1024,
+        "tile_height": 512,
+    }
+    assert len(keys) == 8 + 2 + 1
+    assert offline_r2.file_exists("projects/p1/plans/tiles/2/3/1.png")
+
+    # Replacing with a smaller plan keeps the new tiles and drops the rest.
+    small = Image.new("RGB", (300, 200))
+    _, small_keys = plan_tiler.upload_tiles(
+        project_id, 300, 200, plan_tiler.iter_tiles(small), offline_r2
+    )
+    removed = offline_r2.delete_prefix(
+        plan_tiler.tiles_prefix(project_id), keep=small_keys
+    )
+
+    assert removed == len(set(keys) - set(small_keys))
+    assert all(offline_r2.file_exists(key) for key in small_keys)
+    assert not offline_r2.file_exists("projects/p1/plans/tiles/2/3/1.png")
+    assert offline_r2.delete_prefix(plan_tiler.tiles_prefix(project_id)) == len(
+        small_keys
+    )
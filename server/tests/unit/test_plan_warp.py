@@ -0,0 +1,111 @@
+"""Unit tests for warping rotated plan calibrations into Web Mercator."""
+
+import io
+import math
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import plan_warp
+
+
+def _placer(width, height, degrees, metres_per_px=0.5, lat=40.0, lng=-74.0):
+    """Maps raster pixels to (lat, lng) for a plan rotated about (lat, lng)."""
+    angle = math.radians(degrees)
+
+    def place(px, py):
+        dx = (px - width / 2) * metres_per_px
+        dy = -(py - height / 2) * metres_per_px
+        east = dx * math.cos(angle) - dy * math.sin(angle)
+        north = dx * math.sin(angle) + dy * math.cos(angle)
+        return (
+            lat + north / 111320,
+            lng + east / (111320 * math.cos(math.radians(lat))),
+        )
+
+    return place
+
+
+def _rotated_corners(width, height, degrees):
+    place = _placer(width, height, degrees)
+    corners = {}
+    for name, (px, py) in zip(
+        plan_warp.CORNER_NAMES, [(0, 0), (width, 0), (width, height), (0, height)]
+    ):
+        corners[f"corner_{name}_lat"], corners[f"corner_{name}_lng"] = place(px, py)
+    return corners
+
+
+def _png(image):
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_mercator_round_trip_and_homography():
+    lng, lat = np.array([-74.0, 151.2, 0.0]), np.array([40.0, -33.9, 0.0])
+    back = plan_warp.mercator_to_lnglat(*plan_warp.lnglat_to_mercator(lng, lat))
+    assert np.allclose(back, (lng, lat))
+
+    src = np.array([[0, 0], [10, 0], [10, 5], [0, 5]])
+    dst = np.array([[1, 1], [9, 2], [12, 8], [-1, 6]])
+    matrix = plan_warp.homography(src, dst)
+    assert np.allclose(plan_warp.apply_homography(matrix, src), dst)
+
+
+def test_axis_aligned_corners_need_no_warp():
+    assert plan_warp.is_axis_aligned(_rotated_corners(400, 200, 0))
+    assert not plan_warp.is_axis_aligned(_rotated_corners(400, 200, 30))
+
+
+def test_warp_places_plan_corners_and_leaves_outside_transparent():
+    width, height = 400, 200
+    image = Image.new("RGB", (width, height), (255, 0, 0))
+    image.paste((0, 0, 255), (0, 0, 20, 20))  # marks the nw corner
+    corners = _rotated_corners(width, height, 30)
+
+    warp = plan_warp.plan_warp(width, height, corners)
+    out = Image.open(io.BytesIO(plan_warp.warp_raster(_png(image), warp)))
+
+    assert out.mode == "RGBA" and out.size == (warp.width, warp.height)
+    # Same pixel density: the box of a plan turned by 30 degrees.
+    cos30, sin30 = math.cos(math.radians(30)), math.sin(math.radians(30))
+    assert warp.width == pytest.approx(width * cos30 + height * sin30, rel=0.02)
+    assert warp.height == pytest.approx(width * sin30 + height * cos30, rel=0.02)
+    lats = [v for k, v in corners.items() if k.endswith("_lat")]
+    assert (warp.min_lat, warp.max_lat) == pytest.approx((min(lats), max(lats)))
+    # The bounding box corners lie outside the rotated plan.
+    assert out.getpixel((0, 0))[3] == 0
+    assert out.getpixel((warp.width - 1, warp.height - 1))[3] == 0
+    assert out.getpixel((warp.width // 2, warp.height // 2)) == (255, 0, 0, 255)
+
+    # The middle of the nw marker lands where its calibrated position projects.
+    lat, lng = _placer(width, height, 30)(10, 10)
+    x, y = plan_warp.lnglat_to_mercator(
+        [warp.min_lng, warp.max_lng, lng], [warp.min_lat, warp.max_lat, lat]
+    )
+    u = (x[2] - x[0]) / (x[1] - x[0]) * warp.width
+    v = (y[1] - y[2]) / (y[1] - y[0]) * warp.height
+    assert out.getpixel((int(u), int(v))) == (0, 0, 255, 255)
+
+
+def test_self_intersecting_corners_are_rejected():
+    corners = _rotated_corners(400, 200, 10)
+    corners["corner_ne_lat"], corners["corner_se_lat"] = (
+        corners["corner_se_lat"],
+        corners["corner_ne_lat"],
+    )
+    with pytest.raises(ValueError):
+        plan_warp.plan_warp(400, 200, corners)
+
+
+def test_warp_key_depends_on_raster_and_calibration():
+    corners = _rotated_corners(40, 20, 15)
+    raster = _png(Image.new("RGB", (40, 20)))
+    key = plan_warp.warp_key("p1", raster, corners, "png")
+
+    assert key.startswith("projects/p1/plans/warped/") and key.endswith(".png")
+    assert key == plan_warp.warp_key("p1", raster, dict(corners), "png")
+    moved = dict(corners, corner_nw_lat=corners["corner_nw_lat"] + 1e-6)
+    assert key != plan_warp.warp_key("p1", raster, moved, "png")
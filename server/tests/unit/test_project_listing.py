@@ -0,0 +1,175 @@
+"""Unit tests for the single-request, per-user cached project listing."""
+
+import time
+
+import pytest
+
+from app.services.storage import supabase_client as supabase_module
+from app.services.storage.schema_capabilities import SchemaCapabilities
+from app.services.storage.supabase_client import SupabaseClient
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.columns = None
+        self.filters = {}
+        self.payload = None
+
+    def select(self, columns, **_kwargs):
+        self.columns = columns
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def execute(self):
+        self.client.requests.append(self)
+        if self.payload is not None:
+            return _Result([])
+        if self.table == "project_members" and "projects!inner" in self.columns:
+            return _Result(self.client.embedded_rows)
+        if self.table == "project_members":
+            return _Result(
+                [
+                    {
+                        "project_id": "p1",
+                        "role": "owner",
+                        "last_accessed_at": "2025-01-01",
+                    }
+                ]
+            )
+        return _Result([{"id": "p1", "name": "Legacy"}])
+
+
+class _Client:
+    def __init__(self, embedded_rows):
+        self.embedded_rows = embedded_rows
+        self.requests = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+_ROWS = [
+    {
+        "role": "viewer",
+        "last_accessed_at": "2025-01-01T00:00:00Z",
+        "projects": {
+            "id": "p1",
+            "name": "Old",
+            "project_stats": {"photo_count": 3, "location_count": 1},
+            "project_plans": None,
+        },
+    },
+    {
+        "role": "owner",
+        "last_accessed_at": "2025-06-01T00:00:00Z",
+        "projects": {
+            "id": "p2",
+            "name": "Recent",
+            "project_stats": None,
+            "project_plans": {"project_id": "p2"},
+        },
+    },
+]
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    holder = {"value": None}
+    monkeypatch.setattr(
+        supabase_module.schema_probe, "current", lambda: holder["value"]
+    )
+    return holder
+
+
+@pytest.fixture
+def sb(snapshot):
+    client = SupabaseClient()
+    client.client = _Client(_ROWS)
+    return client
+
+
+def test_listing_uses_one_embedded_request(sb):
+    projects = sb.list_projects_for_user("u1", show_on_projects=True)
+
+    assert len(sb.client.requests) == 1
+    request = sb.client.requests[0]
+    assert request.filters == {"user_id": "u1", "projects.show_on_projects": True}
+    assert [p["id"] for p in projects] == ["p2", "p1"]
+    assert projects[0]["role"] == "Owner"
+    assert projects[0]["has_plan"] is True
+    assert projects[0]["photo_count"] == 0
+    assert projects[1]["photo_count"] == 3
+    assert "project_stats" not in projects[1]
+
+
+def test_listing_is_cached_per_user_until_membership_changes(sb):
+    first = sb.list_projects_for_user("u1")
+    first[0]["name"] = "mutated by caller"
+    second = sb.list_projects_for_user("u1")
+
+    assert len(sb.client.requests) == 1
+    assert second[0]["name"] == "Recent"
+
+    sb.touch_project_access("p1", "u1")
+    sb.list_projects_for_user("u1")
+    assert len(sb.client.requests) == 3
+
+
+def test_project_write_evicts_listings_containing_it(sb):
+    sb.list_projects_for_user("u1")
+    sb.invalidate_project_lists(project_id="other")
+    sb.list_projects_for_user("u1")
+    assert len(sb.client.requests) == 1
+
+    sb.invalidate_project_lists(project_id="p2")
+    sb.list_projects_for_user("u1")
+    assert len(sb.client.requests) == 2
+
+
+def test_listing_falls_back_without_project_stats(sb, snapshot):
+    snapshot["value"] = SchemaCapabilities({"photos": ["id"]}, time.time())
+
+    projects = sb.list_projects_for_user("u1", show_on_projects=None)
+
+    assert [req.table for req in sb.client.requests] == ["project_members", "projects"]
+    assert projects == [
+        {
+            "id": "p1",
+            "name": "Legacy",
+            "role": "Owner",
+            "last_accessed_at": "2025-01-01",
+        }
+    ]
+
+
+def test_photo_scope_authorizes_from_live_membership(sb, monkeypatch):
+    from app.api_routes.v1 import photos as photos_module
+
+    monkeypatch.setattr(photos_module, "supabase_client", sb)
+    # The cached listing still has p2; project_members (live) only has p1.
+    sb.list_projects_for_user("u1")
+
+    ids, cache, error = photos_module._prefetch_project_scope("u1", None)
+
+    assert error is None
+    assert ids == ["p1"]
+    assert cache == {"p1": {"role": "Owner", "name": "Old"}}
+    assert sb.client.requests[-1].columns == "project_id, role"
@@ -0,0 +1,162 @@
+"""Unit tests for reading the trigger-maintained project_stats counters."""
+
+import time
+
+import pytest
+
+from app.services.storage import supabase_client as supabase_module
+from app.services.storage.schema_capabilities import SchemaCapabilities
+from app.services.storage.supabase_client import SupabaseClient
+
+_P1 = "11111111-1111-1111-1111-111111111111"
+_P2 = "22222222-2222-2222-2222-222222222222"
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = {}
+
+    def select(self, *_args, **_kwargs):
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        self.client.requests.append(self)
+        if self.table == "project_stats":
+            if self.client.stats_missing:
+                raise RuntimeError("relation public.project_stats does not exist")
+            wanted = set(self.filters["project_id"])
+            return _Result(
+                [row for row in self.client.stats if row["project_id"] in wanted]
+            )
+        rows = [
+            {"marker": "individual", "number": 3},
+            {"marker": "multi", "number": 2},
+            {"marker": "project", "number": 0},
+        ]
+        markers = self.filters.get("marker")
+        if markers is not None:
+            rows = [row for row in rows if row["marker"] in markers]
+        result = _Result(rows)
+        result.count = None
+        return result
+
+
+class _StatsClient:
+    def __init__(self, stats=None, stats_missing=False):
+        self.stats = stats or []
+        self.stats_missing = stats_missing
+        self.requests = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    snapshot = {"value": None}
+    monkeypatch.setattr(
+        supabase_module.schema_probe, "current", lambda: snapshot["value"]
+    )
+    return snapshot
+
+
+def test_stats_for_many_projects_use_one_request(probe):
+    sb = SupabaseClient()
+    sb.client = _StatsClient(
+        stats=[
+            {
+                "project_id": _P1,
+                "photo_count": 5,
+                "location_count": 2,
+                "storage_bytes": 2048,
+                "first_captured_at": "2025-01-01T00:00:00+00:00",
+                "last_captured_at": "2025-02-01T00:00:00+00:00",
+            }
+        ]
+    )
+
+    stats = sb.get_project_stats_many([_P1, _P2])
+
+    assert len(sb.client.requests) == 1
+    assert stats[_P1]["photo_count"] == 5
+    assert stats[_P1]["storage_bytes"] == 2048
+    # Projects without a counters row yet report zeros.
+    assert stats[_P2] == sb._empty_project_stats()
+    assert sb.get_project_stats(_P1) == (5, 2)
+
+
+def test_stats_fall_back_to_counting_when_table_missing(probe):
+    probe["value"] = SchemaCapabilities(
+        {"photos": ["id"], "locations": ["id"]}, time.time()
+    )
+    sb = SupabaseClient()
+    sb.client = _StatsClient(stats_missing=True)
+
+    summary = sb.get_project_stats_summary(_P1)
+
+    assert "project_stats" not in {req.table for req in sb.client.requests}
+    assert summary["photo_count"] == 5
+    assert summary["location_count"] == 2
+    assert summary["storage_bytes"] is None
+
+
+def test_stats_fall_back_when_read_fails(probe):
+    sb = SupabaseClient()
+    sb.client = _StatsClient(stats_missing=True)
+
+    assert sb.get_project_stats(_P1) == (5, 2)
+
+
+def test_stats_endpoint_aggregates_member_projects(monkeypatch, client, auth_headers):
+    monkeypatch.setattr(
+        "app.api_routes.v1.photos.supabase_client.list_projects_for_user",
+        lambda user_id: [{"id": _P1, "role": "Owner"}, {"id": _P2, "role": "Viewer"}],
+    )
+    monkeypatch.setattr(
+        "app.api_routes.v1.photos.supabase_client.get_project_stats_many",
+        lambda ids: {
+            _P1: {
+                "photo_count": 4,
+                "location_count": 1,
+                "storage_bytes": 100,
+                "first_captured_at": "2025-03-01T00:00:00+00:00",
+                "last_captured_at": "2025-03-02T00:00:00+00:00",
+            },
+            _P2: {
+                "photo_count": 6,
+                "location_count": 3,
+                "storage_bytes": 50,
+                "first_captured_at": "2025-01-01T00:00:00+00:00",
+                "last_captured_at": "2025-01-05T00:00:00+00:00",
+            },
+        },
+    )
+
+    resp = client.get("/api/v1/photos/stats", headers=auth_headers)
+
+    assert resp.status_code == 200
+    totals = resp.get_json()["totals"]
+    assert totals["photo_count"] == 10
+    assert totals["storage_bytes"] == 150
+    assert totals["first_captured_at"].startswith("2025-01-01")
+    assert totals["last_captured_at"].startswith("2025-03-02")
+
+
+def test_stats_endpoint_rejects_bad_project_id(client, auth_headers):
+    resp = client.get("/api/v1/photos/stats?project_id=nope", headers=auth_headers)
+    assert resp.status_code == 400
@@ -0,0 +1,187 @@
+"""Unit tests for retries, hedged reads and circuit breakers."""
+
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services import resilience
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Dependency,
+    ResilientTransport,
+    get_dependency,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fast_policies(monkeypatch):
+    monkeypatch.setenv("RESILIENCE_RETRY_BASE_DELAY", "0")
+    monkeypatch.setenv("RESILIENCE_BREAKER_THRESHOLD", "2")
+    resilience.reset_dependencies()
+    yield
+    resilience.reset_dependencies()
+
+
+def test_breaker_opens_then_allows_one_trial_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        "svc", failure_threshold=2, reset_timeout=10, clock=lambda: now[0]
+    )
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()  # half-open trial
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_idempotent_calls_retry_transient_errors(monkeypatch):
+    monkeypatch.setenv("RESILIENCE_BREAKER_THRESHOLD", "5")
+    dep = Dependency("svc")
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError("blip")
+        return "ok"
+
+    assert dep.call(flaky, idempotent=True) == "ok"
+    assert len(attempts) == 3
+    assert dep.retries == 2
+
+
+def test_a_retried_call_counts_once_against_the_breaker():
+    dep = Dependency("svc")  # threshold 2, 3 attempts per call
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise TimeoutError("blip")
+
+    with pytest.raises(TimeoutError):
+        dep.call(down, idempotent=True)
+    assert len(attempts) == 3
+    assert dep.breaker.state == "closed"
+
+    with pytest.raises(TimeoutError):
+        dep.call(down, idempotent=True)
+    assert dep.breaker.state == "open"
+
+
+def test_non_idempotent_calls_only_retry_when_never_sent():
+    dep = Dependency("svc")
+    attempts = []
+
+    def fails():
+        attempts.append(1)
+        raise TimeoutError("maybe applied")
+
+    with pytest.raises(TimeoutError):
+        dep.call(fails, idempotent=False)
+    assert len(attempts) == 1
+
+
+def test_open_breaker_fails_fast_without_calling():
+    dep = get_dependency("svc")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            dep.call(lambda: (_ for _ in ()).throw(ValueError("down")))
+
+    called = []
+    with pytest.raises(CircuitOpenError):
+        dep.call(lambda: called.append(1))
+    assert called == []
+    assert resilience.dependency_health()["svc"]["state"] == "open"
+
+
+def test_resilient_transport_retries_gets_but_not_posts():
+    seen = []
+
+    def handler(request):
+        seen.append(request.method)
+        return httpx.Response(503 if len(seen) == 1 else 200, json=[])
+
+    transport = ResilientTransport(httpx.MockTransport(handler), dependency="pg")
+    with httpx.Client(transport=transport) as client:
+        assert (
+            client.get("https://example.supabase.co/rest/v1/photos").status_code == 200
+        )
+        seen.clear()
+        assert (
+            client.post("https://example.supabase.co/rest/v1/photos").status_code == 503
+        )
+    assert seen == ["POST"]
+
+
+def test_read_timeouts_are_not_retried():
+    seen = []
+
+    def handler(request):
+        seen.append(request.method)
+        raise httpx.ReadTimeout("slow", request=request)
+
+    transport = ResilientTransport(httpx.MockTransport(handler), dependency="pg")
+    with httpx.Client(transport=transport) as client:
+        with pytest.raises(httpx.ReadTimeout):
+            client.get("https://example.supabase.co/rest/v1/photos")
+    assert seen == ["GET"]
+
+
+def test_retries_stop_at_the_call_deadline(monkeypatch):
+    monkeypatch.setenv("RESILIENCE_BREAKER_THRESHOLD", "5")
+    monkeypatch.setenv("RESILIENCE_RETRY_DEADLINE", "0.05")
+    dep = Dependency("svc")
+    attempts = []
+
+    def slow_failure():
+        attempts.append(1)
+        time.sleep(0.06)
+        raise TimeoutError("blip")
+
+    with pytest.raises(TimeoutError):
+        dep.call(slow_failure, idempotent=True)
+    assert len(attempts) == 1
+    assert dep.retries == 0
+
+
+def test_slow_reads_are_hedged(monkeypatch):
+    monkeypatch.setenv("RESILIENCE_HEDGE_ENABLED", "true")
+    monkeypatch.setenv("RESILIENCE_HEDGE_MIN_DELAY", "0.01")
+    dep = Dependency("svc")
+    for _ in range(dep.latency.min_samples):
+        dep.latency.observe(0.01)
+
+    calls = []
+    lock = threading.Lock()
+
+    def read():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0)
+        return "slow" if first else "fast"
+
+    started = time.perf_counter()
+    assert dep.call(read, idempotent=True, hedge=True) == "fast"
+    assert time.perf_counter() - started < 0.4
+    assert dep.hedges == 1
+
+
+def test_health_reports_dependency_state(client):
+    dep = get_dependency("supabase")
+    dep.breaker.record_failure()
+    dep.breaker.record_failure()
+
+    data = client.get("/api/health").get_json()
+    assert data["status"] == "degraded"
+    assert data["dependencies"]["supabase"]["state"] == "open"
@@ -0,0 +1,241 @@
+"""Unit tests for the start-up schema capability snapshot."""
+
+import time
+
+import pytest
+
+from app.services.storage import schema_capabilities as caps_module
+from app.services.storage.schema_capabilities import (
+    SchemaCapabilities,
+    SchemaProbe,
+    load_cached,
+    parse_openapi_columns,
+    save_cached,
+)
+from app.services.storage.supabase_client import SupabaseClient
+
+_URL = "https://example.supabase.co"
+
+_OPENAPI = {
+    "swagger": "2.0",
+    "definitions": {
+        "photos": {"properties": {"id": {}, "project_id": {}, "show_on_photos": {}}},
+        "locations": {"properties": {"id": {}, "city": {}, "state": {}, "country": {}}},
+        "users": {"properties": {"id": {}}},
+    },
+}
+
+
+@pytest.fixture
+def probe_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("SUPABASE_URL", _URL)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-role-key")
+    monkeypatch.setenv("SUPABASE_SCHEMA_PROBE", "on")
+    monkeypatch.setenv("SUPABASE_SCHEMA_CACHE_PATH", str(tmp_path / "schema.json"))
+    probe = SchemaProbe()
+    monkeypatch.setattr(caps_module, "schema_probe", probe)
+    monkeypatch.setattr(
+        "app.services.storage.supabase_client.schema_probe", probe, raising=True
+    )
+    return probe
+
+
+def test_parse_openapi_columns_reads_probed_tables_only():
+    tables = parse_openapi_columns(_OPENAPI)
+    assert set(tables) == {"photos", "locations"}
+    assert "show_on_photos" in tables["photos"]
+
+
+def test_cache_round_trip_is_keyed_by_project_url(tmp_path):
+    path = str(tmp_path / "schema.json")
+    snapshot = SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time())
+    save_cached(path, _URL, snapshot)
+
+    loaded = load_cached(path, _URL)
+    assert loaded.has_columns("locations", "city", "country") is True
+    assert loaded.has_columns("project_plans", "id") is None
+    assert load_cached(path, "https://other.supabase.co") is None
+
+
+def test_warm_uses_fresh_file_cache_without_network(probe_env, monkeypatch, tmp_path):
+    save_cached(
+        str(tmp_path / "schema.json"),
+        _URL,
+        SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time()),
+    )
+
+    def _no_network(*_args, **_kwargs):
+        raise AssertionError("fresh cache must not trigger a probe")
+
+    monkeypatch.setattr(caps_module, "fetch_capabilities", _no_network)
+    assert probe_env.warm(background=False).has_columns("photos", "id") is True
+
+
+def test_stale_cache_is_refreshed_and_persisted(probe_env, monkeypatch, tmp_path):
+    path = str(tmp_path / "schema.json")
+    save_cached(path, _URL, SchemaCapabilities({"photos": ["id"]}, time.time() - 7200))
+    calls = []
+
+    def _fetch(url, key):
+        calls.append(url)
+        return SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time())
+
+    monkeypatch.setattr(caps_module, "fetch_capabilities", _fetch)
+    probe_env.warm(background=False)
+
+    assert calls == [_URL]
+    assert probe_env.current().has_columns("photos", "show_on_photos") is True
+    assert load_cached(path, _URL).has_columns("photos", "show_on_photos") is True
+
+
+def test_supabase_helpers_read_the_snapshot(probe_env):
+    sb = SupabaseClient()
+    sb.client = object()
+
+    # Unknown schema: assume the shipped migrations ran, no live probe.
+    assert sb.supports_thumbnail_columns() is True
+    assert sb.supports_show_on_photos() is True
+    assert sb.supports_location_geocode_columns() is True
+
+    probe_env.set(SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time()))
+    assert sb.supports_thumbnail_columns() is False
+    assert sb.supports_location_geocode_columns() is True
+
+
+def test_writes_do_not_trust_the_snapshot_for_columns(probe_env, monkeypatch):
+    from postgrest.exceptions import APIError
+
+    refreshes = []
+    monkeypatch.setattr(probe_env, "invalidate", lambda: refreshes.append(1))
+    inserted = []
+    live_columns = {"project_id", "original_filename"}
+
+    class _Table:
+        def insert(self, payload):
+            inserted.append(payload)
+            return self
+
+        def execute(self):
+            unknown = sorted(set(inserted[-1]) - live_columns)
+            if unknown:
+                raise APIError(
+                    {
+                        "code": "PGRST204",
+                        "message": f"Could not find the '{unknown[0]}' column"
+                        " of 'photos' in the schema cache",
+                    }
+                )
+            return type("R", (), {"data": [dict(inserted[-1], id="photo-1")]})()
+
+    class _Client:
+        def table(self, _name):
+            return _Table()
+
+    # A cached snapshot from before original_filename was migrated in.
+    probe_env.set(SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time()))
+    sb = SupabaseClient()
+    sb.client = _Client()
+
+    record = sb.store_photo_metadata(
+        {"project_id": "proj-1", "original_filename": "IMG_1.jpg", "legacy": 1}
+    )
+
+    assert record["original_filename"] == "IMG_1.jpg"
+    assert inserted[-1] == {"project_id": "proj-1", "original_filename": "IMG_1.jpg"}
+    assert refreshes == [1]
+
+
+def test_failed_background_probe_is_retried_with_backoff(probe_env, monkeypatch):
+    attempts = []
+    timers = []
+
+    def _fetch(url, key):
+        attempts.append(url)
+        if len(attempts) == 1:
+            raise OSError("connection refused")
+        return SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time())
+
+    class _Timer:
+        def __init__(self, delay, fn):
+            timers.append(delay)
+            self.fn = fn
+            self.daemon = False
+
+        def start(self):
+            self.fn(background=False)
+
+    monkeypatch.setattr(caps_module, "fetch_capabilities", _fetch)
+    monkeypatch.setattr(caps_module.threading, "Timer", _Timer)
+    probe_env._refresh(_URL, "service-role-key", retry=True)
+
+    assert len(attempts) == 2
+    assert 0 <= timers[0] <= caps_module.RETRY_BASE_SECONDS
+    assert probe_env.current().has_columns("photos", "id") is True
+
+
+def test_forked_worker_rewarms_on_first_read(probe_env, monkeypatch, tmp_path):
+    probe_env._warmed = True  # the parent warmed before forking
+    probe_env._reinit_after_fork()
+    assert probe_env._capabilities is None
+    # A sibling worker refreshed the shared file cache meanwhile.
+    save_cached(
+        str(tmp_path / "schema.json"),
+        _URL,
+        SchemaCapabilities(parse_openapi_columns(_OPENAPI), time.time()),
+    )
+    monkeypatch.setattr(
+        caps_module,
+        "fetch_capabilities",
+        lambda *_: pytest.fail("fresh cache must not trigger a probe"),
+    )
+
+    assert probe_env.current().has_columns("photos", "show_on_photos") is True
+
+
+def test_rejected_thumbnail_columns_fall_back_to_metadata(probe_env):
+    from postgrest.exceptions import APIError
+
+    updates = []
+
+    class _Query:
+        def __init__(self, payload=None):
+            self.payload = payload
+
+        def update(self, payload):
+            return _Query(payload)
+
+        def select(self, *_args):
+            return _Query()
+
+        def eq(self, *_args):
+            return self
+
+        def execute(self):
+            if self.payload is None:
+                return type("R", (), {"data": [{"id": "photo-1", "metadata": {}}]})()
+            updates.append(self.payload)
+            if "thumbnail_r2_path" in self.payload:
+                raise APIError(
+                    {
+                        "code": "PGRST204",
+                        "message": "Could not find the 'thumbnail_r2_path' column"
+                        " of 'photos' in the schema cache",
+                    }
+                )
+            return type("R", (), {"data": [dict(self.payload, id="photo-1")]})()
+
+    class _Client:
+        def table(self, _name):
+            return _Query()
+
+    sb = SupabaseClient()
+    sb.client = _Client()
+
+    updates_payload = sb.build_thumbnail_updates("thumb.jpg", "https://cdn/thumb.jpg")
+    record = sb.update_photo_metadata("photo-1", updates_payload)
+
+    assert sb.supports_thumbnail_columns() is False
+    assert record["metadata"]["thumbnails"]["default"] == {
+        "r2_path": "thumb.jpg",
+        "r2_url": "https://cdn/thumb.jpg",
+    }
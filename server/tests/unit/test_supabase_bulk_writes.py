@@ -0,0 +1,148 @@
+"""Unit tests for the chunked bulk write helpers on SupabaseClient."""
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from app.services.storage import supabase_client as supabase_module
+from app.services.storage.supabase_client import SupabaseClient
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.rows = None
+        self.payload = None
+        self.ids = None
+
+    def insert(self, rows, default_to_null=True):
+        self.rows = rows
+        return self
+
+    def upsert(self, rows, on_conflict="", default_to_null=True):
+        self.rows = rows
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def in_(self, _column, ids):
+        self.ids = ids
+        return self
+
+    def execute(self):
+        self.client.requests.append(self)
+        columns = set()
+        for row in self.rows or [self.payload]:
+            columns.update(row)
+        if "legacy_col" in columns:
+            raise RuntimeError(
+                "{'code': 'PGRST204', 'message': \"Could not find the 'legacy_col' "
+                "column of 'photos' in the schema cache\"}"
+            )
+        if self.rows is not None:
+            if any(row.get("file_name") == "bad.jpg" for row in self.rows):
+                raise APIError(
+                    {"code": "23514", "message": "violates check constraint"}
+                )
+            if any(row.get("file_name") == "offline.jpg" for row in self.rows):
+                raise httpx.ConnectError("connection refused")
+            return _Result(
+                [dict(row, id=f"id-{row.get('file_name')}") for row in self.rows]
+            )
+        existing = [pid for pid in self.ids if pid != "missing"]
+        return _Result([dict(self.payload, id=pid) for pid in existing])
+
+
+class _RecordingClient:
+    def __init__(self):
+        self.requests = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+@pytest.fixture
+def sb(monkeypatch):
+    monkeypatch.setattr(supabase_module.schema_probe, "invalidate", lambda: None)
+    client = SupabaseClient()
+    client.client = _RecordingClient()
+    return client
+
+
+def test_store_many_chunks_and_preserves_order(sb):
+    photos = [{"project_id": "p", "file_name": f"{i}.jpg"} for i in range(5)]
+
+    results = sb.store_photo_metadata_many(photos, chunk_size=2)
+
+    assert [len(req.rows) for req in sb.client.requests] == [2, 2, 1]
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert all(r["ok"] for r in results)
+    assert results[3]["record"]["id"] == "id-3.jpg"
+
+
+def test_store_many_isolates_failing_rows(sb):
+    photos = [{"file_name": name} for name in ("a.jpg", "bad.jpg", "c.jpg", "d.jpg")]
+
+    results = sb.store_photo_metadata_many(photos, chunk_size=4)
+
+    assert [r["ok"] for r in results] == [True, False, True, True]
+    assert "check constraint" in results[1]["error"]
+    assert results[2]["record"]["id"] == "id-c.jpg"
+
+
+def test_store_many_raises_non_row_errors_without_bisecting(sb):
+    photos = [{"file_name": name} for name in ("a.jpg", "offline.jpg", "c.jpg")]
+
+    with pytest.raises(httpx.ConnectError):
+        sb.store_photo_metadata_many(photos)
+
+    assert len(sb.client.requests) == 1
+
+
+def test_store_many_strips_unknown_columns_for_whole_chunk(sb):
+    photos = [
+        {"file_name": "a.jpg", "legacy_col": 1},
+        {"file_name": "b.jpg"},
+    ]
+
+    results = sb.store_photo_metadata_many(photos)
+
+    assert all(r["ok"] for r in results)
+    final = sb.client.requests[-1].rows
+    assert all("legacy_col" not in row for row in final)
+    assert len(sb.client.requests) == 2
+
+
+def test_update_many_groups_identical_payloads(sb):
+    updates = [
+        ("p1", {"show_on_photos": False}),
+        ("p2", {"show_on_photos": False}),
+        ("missing", {"show_on_photos": False}),
+        ("p3", {"caption": "hi"}),
+    ]
+
+    results = sb.update_photos_many(updates)
+
+    assert len(sb.client.requests) == 2
+    assert sb.client.requests[0].ids == ["p1", "p2", "missing"]
+    assert [r["ok"] for r in results] == [True, True, False, True]
+    assert results[2]["error"] == "photo not found"
+    assert results[3]["record"]["caption"] == "hi"
+
+
+def test_add_members_many_upserts_in_one_request(sb):
+    results = sb.add_project_members_many(
+        "proj-1", [("u1", "Editor"), ("u2", "Viewer")]
+    )
+
+    assert len(sb.client.requests) == 1
+    assert {row["user_id"] for row in sb.client.requests[0].rows} == {"u1", "u2"}
+    assert all(r["ok"] for r in results)
@@ -0,0 +1,135 @@
+"""Unit tests for the request-scoped identity map on SupabaseClient."""
+
+from flask import Flask
+
+from app.services.storage.supabase_client import SupabaseClient, reset_identity_map
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.payload = None
+
+    def select(self, *_args, **_kwargs):
+        return self
+
+    def update(self, payload):
+        self.op = "update"
+        self.payload = payload
+        return self
+
+    def eq(self, *_args):
+        return self
+
+    def maybe_single(self):
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.table, self.op))
+        if self.client.rows.get(self.table) is None:
+            return _Result([])
+        row = dict(self.client.rows[self.table])
+        if self.op == "update":
+            row.update(self.payload)
+            self.client.rows[self.table] = row
+        return _Result([row])
+
+
+class _CountingClient:
+    def __init__(self):
+        self.calls = []
+        self.rows = {
+            "projects": {"id": "proj-1", "name": "Alpha"},
+            "photos": {
+                "id": "photo-1",
+                "project_id": "proj-1",
+                "exif_data": {"gps": {"lat": 1.0}},
+            },
+            "project_members": {"role": "owner"},
+        }
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _make_client():
+    client = SupabaseClient()
+    client.client = _CountingClient()
+    return client
+
+
+def test_repeated_reads_in_one_request_hit_backend_once():
+    sb = _make_client()
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        assert sb.get_project("proj-1")["name"] == "Alpha"
+        assert sb.get_project("proj-1")["name"] == "Alpha"
+        assert sb.get_project_role("proj-1", "user-1") == "Owner"
+        assert sb.get_project_role("proj-1", "user-1") == "Owner"
+        assert sb.get_photo_metadata("photo-1")["project_id"] == "proj-1"
+        assert sb.get_photo_metadata("photo-1")["project_id"] == "proj-1"
+
+    assert sb.client.calls == [
+        ("projects", "select"),
+        ("project_members", "select"),
+        ("photos", "select"),
+    ]
+
+
+def test_writes_refresh_identity_map():
+    sb = _make_client()
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        sb.get_project("proj-1")
+        sb.update_project("proj-1", name="Beta")
+        assert sb.get_project("proj-1")["name"] == "Beta"
+        sb.update_project_member_role("proj-1", "user-1", "Viewer")
+        assert sb.get_project_role("proj-1", "user-1") == "Viewer"
+
+    assert ("projects", "select") in sb.client.calls
+    assert sb.client.calls.count(("projects", "select")) == 1
+    assert ("project_members", "select") not in sb.client.calls
+
+
+def test_role_update_matching_no_member_is_not_remembered():
+    sb = _make_client()
+    sb.client.rows["project_members"] = None
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        assert sb.update_project_member_role("proj-1", "user-2", "Editor") is None
+        assert sb.get_project_role("proj-1", "user-2") is None
+
+    assert ("project_members", "select") in sb.client.calls
+
+
+def test_cached_records_are_copies():
+    sb = _make_client()
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        first = sb.get_project("proj-1")
+        first["name"] = "mutated"
+        assert sb.get_project("proj-1")["name"] == "Alpha"
+        photo = sb.get_photo_metadata("photo-1")
+        photo["exif_data"]["gps"]["lat"] = 2.0
+        assert sb.get_photo_metadata("photo-1")["exif_data"]["gps"]["lat"] == 1.0
+
+
+def test_identity_map_is_request_scoped():
+    sb = _make_client()
+    app = Flask(__name__)
+    with app.test_request_context("/"):
+        sb.get_project("proj-1")
+        reset_identity_map()
+        sb.get_project("proj-1")
+    # Outside a request context nothing is cached.
+    sb.get_project("proj-1")
+    sb.get_project("proj-1")
+
+    assert sb.client.calls.count(("projects", "select")) == 4
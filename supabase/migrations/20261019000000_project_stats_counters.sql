@@ -0,0 +1,234 @@
+-- Per-project statistics maintained by triggers so summary/stats endpoints can
+-- read one row instead of scanning locations and photos on every request.
+--
+--   photo_count       sum of locations.number (same definition as before)
+--   location_count    photo locations (marker 'individual' / 'multi')
+--   storage_bytes     sum of photos.file_size for visible photos
+--   first/last_captured_at  captured_at range of visible photos
+--
+-- Counters are adjusted incrementally per row change. The captured_at range is
+-- only recomputed (index-backed min/max) when the removed row sat on a bound.
+-- public.refresh_project_stats() rebuilds rows from scratch (backfill/repair).
+
+CREATE TABLE IF NOT EXISTS public.project_stats (
+    project_id uuid PRIMARY KEY REFERENCES public.projects(id) ON DELETE CASCADE,
+    photo_count bigint NOT NULL DEFAULT 0,
+    location_count bigint NOT NULL DEFAULT 0,
+    storage_bytes bigint NOT NULL DEFAULT 0,
+    first_captured_at timestamptz NULL,
+    last_captured_at timestamptz NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_photos_project_captured_visible
+    ON public.photos (project_id, captured_at)
+    WHERE show_on_photos;
+
+-- Apply counter deltas, creating the row on first use.
+CREATE OR REPLACE FUNCTION public.project_stats_apply(
+    p_project_id uuid,
+    p_photos bigint,
+    p_locations bigint,
+    p_bytes bigint
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF p_project_id IS NULL THEN
+    RETURN;
+  END IF;
+  -- The EXISTS guard skips projects being deleted (cascaded child deletes
+  -- would otherwise re-create their stats row and violate the FK).
+  INSERT INTO public.project_stats AS s (project_id, photo_count, location_count, storage_bytes)
+  SELECT p_project_id, GREATEST(p_photos, 0), GREATEST(p_locations, 0), GREATEST(p_bytes, 0)
+   WHERE EXISTS (SELECT 1 FROM public.projects WHERE id = p_project_id)
+  ON CONFLICT (project_id) DO UPDATE
+    SET photo_count = GREATEST(s.photo_count + p_photos, 0),
+        location_count = GREATEST(s.location_count + p_locations, 0),
+        storage_bytes = GREATEST(s.storage_bytes + p_bytes, 0),
+        updated_at = now();
+END;
+$$;
+
+-- Recompute the captured_at range for one project (index-only scan).
+CREATE OR REPLACE FUNCTION public.project_stats_recompute_range(p_project_id uuid)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  UPDATE public.project_stats s
+     SET first_captured_at = r.first_at,
+         last_captured_at = r.last_at,
+         updated_at = now()
+    FROM (
+      SELECT min(captured_at) AS first_at, max(captured_at) AS last_at
+        FROM public.photos
+       WHERE project_id = p_project_id AND show_on_photos
+    ) r
+   WHERE s.project_id = p_project_id;
+$$;
+
+CREATE OR REPLACE FUNCTION public.project_stats_on_locations()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  old_is_photo int := 0;
+  new_is_photo int := 0;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    old_is_photo := CASE WHEN OLD.marker IN ('individual', 'multi') THEN 1 ELSE 0 END;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    new_is_photo := CASE WHEN NEW.marker IN ('individual', 'multi') THEN 1 ELSE 0 END;
+  END IF;
+
+  IF TG_OP = 'UPDATE' AND OLD.project_id IS NOT DISTINCT FROM NEW.project_id THEN
+    IF COALESCE(NEW.number, 0) <> COALESCE(OLD.number, 0) OR new_is_photo <> old_is_photo THEN
+      PERFORM public.project_stats_apply(
+        NEW.project_id,
+        COALESCE(NEW.number, 0) - COALESCE(OLD.number, 0),
+        new_is_photo - old_is_photo,
+        0
+      );
+    END IF;
+    RETURN NEW;
+  END IF;
+
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.project_stats_apply(OLD.project_id, -COALESCE(OLD.number, 0), -old_is_photo, 0);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.project_stats_apply(NEW.project_id, COALESCE(NEW.number, 0), new_is_photo, 0);
+  END IF;
+  RETURN COALESCE(NEW, OLD);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.project_stats_on_photos()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  old_visible boolean := false;
+  new_visible boolean := false;
+  bounds public.project_stats%ROWTYPE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    old_visible := COALESCE(OLD.show_on_photos, true);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    new_visible := COALESCE(NEW.show_on_photos, true);
+  END IF;
+
+  IF TG_OP = 'UPDATE'
+     AND OLD.project_id IS NOT DISTINCT FROM NEW.project_id
+     AND old_visible = new_visible
+     AND OLD.file_size IS NOT DISTINCT FROM NEW.file_size
+     AND OLD.captured_at IS NOT DISTINCT FROM NEW.captured_at THEN
+    RETURN NEW;
+  END IF;
+
+  -- Remove the old row's contribution.
+  IF old_visible THEN
+    PERFORM public.project_stats_apply(OLD.project_id, 0, 0, -COALESCE(OLD.file_size, 0));
+    IF OLD.captured_at IS NOT NULL THEN
+      SELECT * INTO bounds FROM public.project_stats WHERE project_id = OLD.project_id;
+      IF OLD.captured_at <= bounds.first_captured_at OR OLD.captured_at >= bounds.last_captured_at THEN
+        PERFORM public.project_stats_recompute_range(OLD.project_id);
+      END IF;
+    END IF;
+  END IF;
+
+  -- Add the new row's contribution.
+  IF new_visible THEN
+    PERFORM public.project_stats_apply(NEW.project_id, 0, 0, COALESCE(NEW.file_size, 0));
+    IF NEW.captured_at IS NOT NULL THEN
+      UPDATE public.project_stats
+         SET first_captured_at = LEAST(COALESCE(first_captured_at, NEW.captured_at), NEW.captured_at),
+             last_captured_at = GREATEST(COALESCE(last_captured_at, NEW.captured_at), NEW.captured_at)
+       WHERE project_id = NEW.project_id;
+    END IF;
+  END IF;
+  RETURN COALESCE(NEW, OLD);
+END;
+$$;
+
+DROP TRIGGER IF EXISTS project_stats_on_locations ON public.locations;
+CREATE TRIGGER project_stats_on_locations
+AFTER INSERT OR UPDATE OR DELETE ON public.locations
+FOR EACH ROW EXECUTE FUNCTION public.project_stats_on_locations();
+
+DROP TRIGGER IF EXISTS project_stats_on_photos ON public.photos;
+CREATE TRIGGER project_stats_on_photos
+AFTER INSERT OR UPDATE OR DELETE ON public.photos
+FOR EACH ROW EXECUTE FUNCTION public.project_stats_on_photos();
+
+-- Rebuild counters from source tables (all projects when p_project_id is NULL).
+CREATE OR REPLACE FUNCTION public.refresh_project_stats(p_project_id uuid DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO public.project_stats AS s (
+      project_id, photo_count, location_count, storage_bytes,
+      first_captured_at, last_captured_at, updated_at
+  )
+  SELECT p.id,
+         COALESCE(l.photo_count, 0),
+         COALESCE(l.location_count, 0),
+         COALESCE(ph.storage_bytes, 0),
+         ph.first_at,
+         ph.last_at,
+         now()
+    FROM public.projects p
+    LEFT JOIN (
+      SELECT project_id,
+             SUM(COALESCE(number, 0)) AS photo_count,
+             COUNT(*) FILTER (WHERE marker IN ('individual', 'multi')) AS location_count
+        FROM public.locations
+       GROUP BY project_id
+    ) l ON l.project_id = p.id
+    LEFT JOIN (
+      SELECT project_id,
+             SUM(COALESCE(file_size, 0)) AS storage_bytes,
+             MIN(captured_at) AS first_at,
+             MAX(captured_at) AS last_at
+        FROM public.photos
+       WHERE show_on_photos
+       GROUP BY project_id
+    ) ph ON ph.project_id = p.id
+   WHERE p_project_id IS NULL OR p.id = p_project_id
+  ON CONFLICT (project_id) DO UPDATE
+    SET photo_count = EXCLUDED.photo_count,
+        location_count = EXCLUDED.location_count,
+        storage_bytes = EXCLUDED.storage_bytes,
+        first_captured_at = EXCLUDED.first_captured_at,
+        last_captured_at = EXCLUDED.last_captured_at,
+        updated_at = now();
+$$;
+
+SELECT public.refresh_project_stats();
+
+-- Members may read their projects' stats; writes happen only via triggers.
+ALTER TABLE public.project_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS project_stats_select_members ON public.project_stats;
+CREATE POLICY project_stats_select_members ON public.project_stats
+FOR SELECT
+USING (
+  EXISTS (
+    SELECT 1 FROM public.project_members pm
+    WHERE pm.project_id = project_stats.project_id
+      AND pm.user_id = auth.uid()
+  )
+);
@@ -0,0 +1,11 @@
+-- Describe the optional 256 px tile pyramid of a plan
+-- Tiles live in R2 under {tiles_path}{z}/{x}/{y}.png; tile_width/tile_height
+-- are the pixel size of the full-resolution level (z = tile_max_zoom).
+-- All null when the plan was uploaded without tiling.
+
+alter table public.project_plans
+  add column if not exists tiles_path text,
+  add column if not exists tile_size integer,
+  add column if not exists tile_max_zoom integer,
+  add column if not exists tile_width integer,
+  add column if not exists tile_height integer;
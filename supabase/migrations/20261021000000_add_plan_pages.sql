@@ -0,0 +1,12 @@
+-- Page index of multi-page PDF plans
+-- The source PDF, page thumbnails and lazily rendered sheets live in R2 under
+-- pages_path (one prefix per uploaded PDF). pages holds one entry per page:
+-- {page, width_pts, height_pts, width, height, thumb_width, thumb_height}.
+-- source_page is the sheet shown by the overview raster (r2_path), from 1.
+-- All null for images and single-page PDFs.
+
+alter table public.project_plans
+  add column if not exists pages_path text,
+  add column if not exists page_count integer,
+  add column if not exists source_page integer,
+  add column if not exists pages jsonb;
@@ -0,0 +1,14 @@
+-- Pre-aligned raster of plans calibrated with rotated or skewed corners
+-- corner_* keep the four calibrated corners; warped_r2_path is the plan
+-- resampled into Web Mercator, north-up, transparent outside the plan, to be
+-- drawn over the axis-aligned warped_min/max box. Null for plans whose
+-- corners already form such a box.
+
+alter table public.project_plans
+  add column if not exists warped_r2_path text,
+  add column if not exists warped_width integer,
+  add column if not exists warped_height integer,
+  add column if not exists warped_min_lat double precision,
+  add column if not exists warped_min_lng double precision,
+  add column if not exists warped_max_lat double precision,
+  add column if not exists warped_max_lng double precision;
@@ -0,0 +1,21 @@
+-- Pending direct-to-R2 photo uploads
+-- /api/photos/uploads records one row per presigned PUT; finalize only
+-- accepts (and only ever deletes) objects with a live row here, and removes
+-- the row once the photo is stored. Rows past expires_at are swept together
+-- with their objects. Only the server (service role) reads or writes them.
+
+create table if not exists public.photo_upload_reservations (
+  photo_id uuid primary key,
+  project_id uuid not null references public.projects (id) on delete cascade,
+  user_id uuid not null references public.users (id) on delete cascade,
+  r2_key text not null,
+  content_type text not null,
+  file_size bigint not null,
+  expires_at timestamptz not null,
+  created_at timestamptz not null default timezone('UTC', now())
+);
+
+create index if not exists photo_upload_reservations_expires_idx
+  on public.photo_upload_reservations (expires_at);
+
+alter table public.photo_upload_reservations enable row level security;
@@ -0,0 +1,11 @@
+-- Background resolution state of a project's location
+-- location_status is 'pending' while a busy geocoder's answer is resolved in
+-- the background, then 'resolved' or 'failed'; null for projects without a
+-- location. location_request_id names the latest location change: a
+-- background write only lands while the row still carries its id, so an
+-- older resolution never overwrites a newer update.
+
+alter table public.projects
+  add column if not exists location_status text
+    check (location_status in ('pending', 'failed', 'resolved')),
+  add column if not exists location_request_id uuid;